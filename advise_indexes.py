@@ -0,0 +1,79 @@
+"""
+Recommend composite and partial indexes from the captured query workload.
+
+Reads statements from the slow query log (or a query log file), costs
+candidate indexes with the planner and writes the worthwhile ones as an
+Alembic migration.
+
+    python advise_indexes.py                                  # slow query log, last 7 days
+    python advise_indexes.py --log postgresql.log --top 5
+    python advise_indexes.py --migration migrations/versions --down-revision 1a2b3c4d5e6f
+
+On PostgreSQL this needs the hypopg extension, or --use-real-indexes to build
+each candidate in a rolled back transaction (which locks the table meanwhile).
+"""
+import argparse
+import json
+import os
+import sys
+
+# The advisor's own planning statements are not part of the workload
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from app import app, db
+from services.index_advisor import (
+    DEFAULT_MIN_IMPROVEMENT, IndexAdvisor, render_migration, workload_from_log_file, workload_from_slow_query_log
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Recommend indexes for the captured workload.')
+    parser.add_argument('--log', help='Query log file to read instead of the slow query log')
+    parser.add_argument('--since-hours', type=int, default=24 * 7, help='Slow query log window (0 for all)')
+    parser.add_argument('--statements', type=int, default=200, help='Most expensive statement shapes to consider')
+    parser.add_argument('--top', type=int, default=10, help='Recommendations to keep')
+    parser.add_argument('--min-improvement', type=float, default=DEFAULT_MIN_IMPROVEMENT,
+                        help='Minimum share of a statement cost an index must save (PostgreSQL)')
+    parser.add_argument('--use-real-indexes', action='store_true',
+                        help='Build candidates in a rolled back transaction when hypopg is unavailable')
+    parser.add_argument('--migration', help='Directory or file to write the Alembic migration to')
+    parser.add_argument('--down-revision', help='Revision the migration follows')
+    parser.add_argument('--json', action='store_true', help='Print recommendations as JSON')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        if args.log:
+            workload = workload_from_log_file(args.log)
+        else:
+            workload = workload_from_slow_query_log(args.since_hours or None, args.statements)
+        if not workload:
+            sys.exit('No captured statements to analyze.')
+
+        with db.engine.connect() as connection:
+            try:
+                advisor = IndexAdvisor(connection, use_real_indexes=args.use_real_indexes)
+            except ValueError as e:
+                sys.exit(str(e))
+            recommendations = advisor.analyze(workload, args.min_improvement)[:args.top]
+            connection.rollback()
+
+    if args.json:
+        print(json.dumps([candidate.serialize() for candidate in recommendations], indent=2))
+    else:
+        print(f"Analyzed {len(workload)} statement shapes, {len(recommendations)} recommended indexes:")
+        for rank, candidate in enumerate(recommendations, start=1):
+            size = f", ~{candidate.size_bytes // 1024}KB" if candidate.size_bytes else ''
+            print(f"{rank:>3}. {candidate.ddl()}")
+            print(f"     benefit {candidate.benefit:.1f} across {len(candidate.improved)} statements{size}")
+
+    if args.migration and recommendations:
+        revision, source = render_migration(recommendations, args.down_revision)
+        path = args.migration
+        if os.path.isdir(path):
+            path = os.path.join(path, f"{revision}_advisor_indexes.py")
+        with open(path, 'w') as f:
+            f.write(source)
+        print(f"Wrote migration {revision} to {path}")
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from flask_restx import Api
 from logger import setup_logger
 from extensions import db, jwt, migrate, cache
+from services import metrics, slow_query_log, profiling, db_routing
 
 # Import all resource namespaces
 from resources.auth_resource import auth_ns
@@ -30,6 +31,9 @@ from resources.sales_target_resource import sales_target_ns
 from resources.bank_resource import bank_ns
 from resources.retention_resource import retention_ns
 from resources.inception_resource import inception_ns
+from resources.reconciliation_resource import reconciliation_ns
+from resources.geo_resource import geo_ns
+from resources.diagnostics_resource import diagnostics_ns
 
 # Disable OneDNN for TensorFlow optimizations (if applicable)
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
@@ -70,6 +74,10 @@ db.init_app(app)
 jwt.init_app(app)
 migrate.init_app(app, db)
 cache.init_app(app)
+metrics.init_app(app, db)
+slow_query_log.init_app(app, db)
+profiling.init_app(app)
+db_routing.init_app(app, db)
 
 # Setup logging based on environment
 logger = setup_logger(app)
@@ -116,7 +124,10 @@ api.add_namespace(sales_target_ns, path=f'/api/{api_version}/sales_target')
 api.add_namespace(bank_ns, path=f'/api/{api_version}/bank')
 api.add_namespace(retention_ns, path=f'/api/{api_version}/retention')
 api.add_namespace(inception_ns, path=f'/api/{api_version}/inceptions')
+api.add_namespace(reconciliation_ns, path=f'/api/{api_version}/reconciliation')
+api.add_namespace(geo_ns, path=f'/api/{api_version}/geo')
 api.add_namespace(help_ns, path=f'/api/{api_version}/help')
+api.add_namespace(diagnostics_ns, path=f'/api/{api_version}/diagnostics')
 
 # Serve the Swagger UI documentation at /api/v1/docs
 swagger_ui_path = f'/api/{api_version}/docs'
@@ -0,0 +1,58 @@
+"""
+Apply the retention policies: archive and delete expired rows in chunks.
+
+    python apply_retention.py                          # every data type with a policy
+    python apply_retention.py sales audit --max-seconds 600
+    python apply_retention.py --reset sales            # start over instead of resuming
+
+Safe to stop at any time; the next run resumes after the last committed chunk.
+Data types without an explicit retention policy are left alone.
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from app import app
+from models.retention_model import DataType
+from services.retention_executor import RetentionExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Archive and delete data past its retention period.')
+    parser.add_argument('data_types', nargs='*', help='Data types to process (default: all)')
+    parser.add_argument('--chunk-size', type=int, help='Rows per chunk (default: RETENTION_CHUNK_SIZE)')
+    parser.add_argument('--pause', type=float, help='Seconds to pause between chunks (default: RETENTION_PAUSE_SECONDS)')
+    parser.add_argument('--max-seconds', type=float, help='Stop after this long; the next run resumes')
+    parser.add_argument('--reset', action='store_true', help='Discard interrupted runs and start over')
+    args = parser.parse_args()
+    known = {data_type.value for data_type in DataType}
+    unknown = [data_type for data_type in args.data_types if data_type not in known]
+    if unknown:
+        parser.error(f"unknown data types: {', '.join(unknown)}")
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        if args.reset:
+            print(f"Reset {RetentionExecutor.reset(args.data_types)} checkpoints")
+        executor = RetentionExecutor.from_config(
+            chunk_size=args.chunk_size, pause_seconds=args.pause, max_seconds=args.max_seconds
+        )
+        results = executor.run(args.data_types)
+
+    for result in results:
+        if result['status'] == 'no_policy':
+            print(f"{result['table']:<20} no retention policy for {result['data_type']}, skipped")
+            continue
+        print(
+            f"{result['table']:<20} {result['status']:<10} {result['deleted']} deleted, {result['archived']} archived "
+            f"in {result['chunks']} chunks (cutoff {result['cutoff']}, last id {result['last_id']})"
+        )
+        if result['status'] == 'failed':
+            print(f"{'':<20} {result['error']}")
+    if any(result['status'] == 'failed' for result in results):
+        sys.exit(1)
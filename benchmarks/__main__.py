@@ -0,0 +1,107 @@
+"""
+Benchmark the hot API endpoints against the configured database.
+
+Generate a dataset first (python generate_data.py --sales 1000000), then:
+
+    python -m benchmarks                      # run, append to history, compare to baseline
+    python -m benchmarks --save-baseline      # record this run as the new baseline
+    python -m benchmarks --only sales_list,check_serial --iterations 200
+    python -m benchmarks --read-only          # skip scenarios that write
+
+Exits with status 1 when a scenario regressed against the baseline.
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Benchmarks measure the endpoints, not the diagnostics around them
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from app import app, db
+from benchmarks.runner import (
+    BenchmarkRunner, DEFAULT_ITERATIONS, DEFAULT_LATENCY_TOLERANCE,
+    append_history, compare, load_json, save_baseline
+)
+from benchmarks.scenarios import SCENARIOS, SCENARIOS_BY_NAME
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark the hot API endpoints.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Calls per scenario before weighting')
+    parser.add_argument('--concurrency', type=int, default=1, help='Threads issuing requests')
+    parser.add_argument('--only', help='Comma-separated scenario names')
+    parser.add_argument('--read-only', action='store_true', help='Skip scenarios that write to the database')
+    parser.add_argument('--email', help='Admin account to log in with (default: first admin)')
+    parser.add_argument('--password', help='Password of that account (default: the generator password)')
+    parser.add_argument('--history', default=os.path.join(BENCHMARK_DIR, 'history.json'))
+    parser.add_argument('--baseline', default=os.path.join(BENCHMARK_DIR, 'baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_LATENCY_TOLERANCE,
+                        help='Allowed p95 growth before a scenario counts as regressed (0.2 = 20%%)')
+    return parser.parse_args()
+
+
+def print_result(name, result):
+    if 'skipped' in result:
+        print(f"{name:<28} skipped: {result['skipped']}")
+        return
+    print(
+        f"{name:<28} p50 {result['p50_ms']:>8.1f}ms  p95 {result['p95_ms']:>8.1f}ms  "
+        f"p99 {result['p99_ms']:>8.1f}ms  {result['throughput_rps']:>7.1f} req/s  "
+        f"{result['queries_avg']:>5.1f} queries  {result['peak_memory_kb']:>8.1f}KB peak  "
+        f"{result['errors']} errors"
+    )
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    # Request logging would dominate the timings
+    logging.disable(logging.CRITICAL)
+
+    scenarios = SCENARIOS
+    if args.only:
+        unknown = [name for name in args.only.split(',') if name not in SCENARIOS_BY_NAME]
+        if unknown:
+            sys.exit(f"Unknown scenarios: {', '.join(unknown)}. Available: {', '.join(SCENARIOS_BY_NAME)}")
+        scenarios = [SCENARIOS_BY_NAME[name] for name in args.only.split(',')]
+    if args.read_only:
+        scenarios = [scenario for scenario in scenarios if not scenario.writes]
+
+    runner = BenchmarkRunner(
+        app, db,
+        iterations=args.iterations,
+        concurrency=args.concurrency,
+        email=args.email,
+        password=args.password
+    )
+    print(f"Benchmarking {len(scenarios)} scenarios against {runner.context.sale_count} sales...")
+    entry = runner.run(scenarios, progress=print_result)
+    append_history(args.history, entry)
+
+    if args.save_baseline:
+        failed = save_baseline(args.baseline, entry)
+        print(f"Saved baseline to {args.baseline}")
+        if failed:
+            print(f"Left out scenarios whose every request failed: {', '.join(failed)}")
+        sys.exit(0)
+
+    baseline = load_json(args.baseline, None)
+    if baseline is None:
+        print("No baseline recorded yet; run with --save-baseline to create one.")
+        sys.exit(0)
+    if baseline.get('sales') != entry['sales']:
+        print(f"Warning: baseline was recorded with {baseline.get('sales')} sales, this run has {entry['sales']}.")
+    if baseline.get('concurrency') != entry['concurrency']:
+        print(f"Warning: baseline was recorded with concurrency {baseline.get('concurrency')}, "
+              f"this run used {entry['concurrency']}.")
+
+    regressions = compare(entry, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regressions against the baseline from {baseline['timestamp']}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions against the baseline from {baseline['timestamp']}.")
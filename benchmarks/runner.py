@@ -0,0 +1,229 @@
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from benchmarks.scenarios import BenchmarkContext, Scenario
+
+DEFAULT_ITERATIONS = 50
+WARMUP_ITERATIONS = 3
+# A scenario regresses when its p95 grows by more than this share of the baseline
+DEFAULT_LATENCY_TOLERANCE = 0.20
+# p95s this small are dominated by noise and never flagged
+MIN_COMPARABLE_MS = 5.0
+
+_statements = threading.local()
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_statements, 'active', False):
+        _statements.count += 1
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRunner:
+    """
+    Drives scenarios through the Flask test client and summarizes each one.
+
+    Every scenario is warmed up, then called ``iterations * weight`` times
+    across ``concurrency`` threads, each with its own test client. Latency
+    is wall time per request; queries are the SQL statements issued while
+    handling it. Peak memory comes from one extra call under tracemalloc,
+    kept out of the timed calls because tracing slows them down.
+    """
+
+    def __init__(self, app, db, iterations: int = DEFAULT_ITERATIONS, concurrency: int = 1,
+                 email: Optional[str] = None, password: Optional[str] = None, seed: int = 42):
+        self.app = app
+        self.db = db
+        self.iterations = iterations
+        self.concurrency = max(1, concurrency)
+        context_kwargs = {'email': email, 'seed': seed}
+        if password:
+            context_kwargs['password'] = password
+        self.context = BenchmarkContext(app, app.test_client(), **context_kwargs)
+        self.lock = threading.Lock()
+
+    def _call(self, client, scenario: Scenario, i: int):
+        with self.lock:
+            path, kwargs = scenario.request_args(self.context, i)
+        _statements.active = True
+        _statements.count = 0
+        start = time.perf_counter()
+        try:
+            response = client.open(path, method=scenario.method, **kwargs)
+            response.get_data()
+        finally:
+            elapsed = time.perf_counter() - start
+            _statements.active = False
+        return elapsed, _statements.count, response.status_code
+
+    def _peak_memory_kb(self, scenario: Scenario) -> float:
+        client = self.app.test_client()
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            self._call(client, scenario, -1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            if started:
+                tracemalloc.stop()
+        return round(max(0, peak - baseline) / 1024, 1)
+
+    def run_scenario(self, scenario: Scenario) -> Dict:
+        if scenario.name == 'report_generate' and self.context.report_id is None:
+            return {'skipped': 'report could not be created'}
+        if scenario.name == 'refresh' and self.context.refresh_token is None:
+            return {'skipped': 'login failed, so no refresh token is available'}
+
+        warmup_client = self.app.test_client()
+        for i in range(WARMUP_ITERATIONS):
+            self._call(warmup_client, scenario, i)
+
+        count = max(1, int(self.iterations * scenario.weight))
+        per_thread = [list(range(worker, count, self.concurrency)) for worker in range(self.concurrency)]
+        samples = []
+
+        def worker(indexes):
+            client = self.app.test_client()
+            results = [self._call(client, scenario, i) for i in indexes]
+            with self.lock:
+                samples.extend(results)
+
+        start = time.perf_counter()
+        if self.concurrency == 1:
+            worker(per_thread[0])
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                list(pool.map(worker, per_thread))
+        wall = time.perf_counter() - start
+
+        latencies = [elapsed * 1000 for elapsed, _, _ in samples]
+        queries = [statements for _, statements, _ in samples]
+        statuses: Dict[str, int] = {}
+        for _, _, status in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            'requests': len(samples),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'throughput_rps': round(len(samples) / wall, 1) if wall else None,
+            'queries_avg': round(sum(queries) / len(queries), 1),
+            'queries_max': max(queries),
+            'peak_memory_kb': self._peak_memory_kb(scenario),
+            'errors': sum(count for status, count in statuses.items() if not status.startswith(('2', '3'))),
+            'statuses': statuses
+        }
+
+    def run(self, scenarios: List[Scenario], progress=None) -> Dict:
+        """Run the scenarios and return a history entry."""
+        with self.app.app_context():
+            engine = self.db.engine
+            sale_count = self.context.sale_count
+        event.listen(engine, 'before_cursor_execute', _count_statement)
+        try:
+            results = {}
+            for scenario in scenarios:
+                results[scenario.name] = self.run_scenario(scenario)
+                if progress:
+                    progress(scenario.name, results[scenario.name])
+        finally:
+            event.remove(engine, 'before_cursor_execute', _count_statement)
+        return {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'database': engine.dialect.name,
+            'sales': sale_count,
+            'iterations': self.iterations,
+            'concurrency': self.concurrency,
+            'python': platform.python_version(),
+            'results': results
+        }
+
+
+def load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def append_history(path: str, entry: Dict):
+    history = load_json(path, [])
+    history.append(entry)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+
+
+def save_baseline(path: str, entry: Dict) -> List[str]:
+    """
+    Store a run as the baseline; returns the scenarios left out of it.
+
+    A scenario whose every request failed only measured its error path, so
+    it is recorded as skipped rather than compared against later.
+    """
+    failed = [
+        name for name, result in entry['results'].items()
+        if 'skipped' not in result and result['errors'] == result['requests']
+    ]
+    baseline = dict(entry, results={
+        name: {'skipped': 'every request failed when the baseline was recorded'} if name in failed else result
+        for name, result in entry['results'].items()
+    })
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    return failed
+
+
+def compare(entry: Dict, baseline: Dict, tolerance: float = DEFAULT_LATENCY_TOLERANCE) -> List[str]:
+    """
+    Return the regressions of a run against a baseline run.
+
+    A scenario regresses when its p95 latency grows beyond the tolerance,
+    when it issues more SQL statements on average, or when it starts
+    returning errors. Baselines from a different database size are still
+    compared, so record them on the same generated dataset.
+    """
+    regressions = []
+    for name, result in entry['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'skipped' in result or 'skipped' in before:
+            continue
+        if result['p95_ms'] >= MIN_COMPARABLE_MS and result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms "
+                f"(+{(result['p95_ms'] / max(before['p95_ms'], 0.001) - 1) * 100:.0f}%)"
+            )
+        if result['queries_avg'] > before['queries_avg']:
+            regressions.append(f"{name}: queries {before['queries_avg']} -> {result['queries_avg']} per request")
+        if result['errors'] > before['errors']:
+            regressions.append(f"{name}: errors {before['errors']} -> {result['errors']} ({result['statuses']})")
+    return regressions
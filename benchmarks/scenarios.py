@@ -0,0 +1,190 @@
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+from extensions import db
+from models.impact_product_model import ImpactProduct
+from models.report_model import ReportType
+from models.sales_executive_model import SalesExecutive
+from models.sales_model import Sale
+from models.user_model import Role, User
+from services.data_generator import DEFAULT_PASSWORD, PHONE_PREFIXES, SURNAMES
+
+API_PREFIX = '/api/v1'
+SERIAL_SAMPLE_SIZE = 500
+
+
+class BenchmarkContext:
+    """
+    Ids, credentials and tokens the scenarios need, taken from the benchmarked database.
+
+    The admin account must accept ``password`` (generated users all use the
+    generator's default password). A report is created for the report
+    generation scenario and a refresh token is obtained by logging in once.
+    """
+
+    def __init__(self, app, client, email: Optional[str] = None, password: str = DEFAULT_PASSWORD,
+                 seed: int = 42):
+        self.random = random.Random(seed)
+        self.password = password
+        # Serials created by earlier runs stay in the database, so tag them per run
+        self.run_tag = f"{int(time.time()):x}"
+        self.created = 0
+
+        with app.app_context():
+            admin_query = User.query.join(Role).filter(func.lower(Role.name) == 'admin', User.is_deleted == False)
+            if email:
+                admin_query = User.query.filter_by(email=email)
+            admin = admin_query.order_by(User.id).first()
+            if admin is None:
+                raise RuntimeError("No admin user found; run generate_data.py first or pass --email")
+            self.email = admin.email
+            self.identity = {'id': admin.id, 'email': admin.email, 'role': admin.role.name}
+            self.access_token = create_access_token(identity=self.identity)
+
+            executive = SalesExecutive.query.filter_by(is_deleted=False).order_by(SalesExecutive.id).first()
+            product = ImpactProduct.query.filter_by(is_deleted=False).order_by(ImpactProduct.id).first()
+            if executive is None or product is None:
+                raise RuntimeError("Benchmarks need at least one sales executive and product")
+            self.manager_id = executive.manager_id
+            self.executive_id = executive.id
+            self.product_id = product.id
+            self.sale_count = db.session.execute(select(func.count(Sale.id))).scalar()
+            self.serials = list(db.session.execute(
+                select(Sale.serial_number).order_by(Sale.id.desc()).limit(SERIAL_SAMPLE_SIZE)
+            ).scalars())
+
+        headers = self.auth_headers()
+        response = client.post(f'{API_PREFIX}/reports/', headers=headers, json={
+            'report_type': ReportType.SALES_PERFORMANCE.value,
+            'name': f'Benchmark report {self.run_tag}',
+            'schedule': 'manual'
+        })
+        self.report_id = response.get_json().get('id') if response.status_code == 201 else None
+
+        response = client.post(f'{API_PREFIX}/auth/login', json={'email': self.email, 'password': self.password})
+        self.refresh_token = response.get_json().get('refresh_token') if response.status_code == 200 else None
+
+    def auth_headers(self, token: Optional[str] = None) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {token or self.access_token}'}
+
+    def phone(self) -> str:
+        return f"{self.random.choice(PHONE_PREFIXES)[0]}{self.random.randrange(10 ** 7):07d}"
+
+    def new_serial(self) -> str:
+        self.created += 1
+        return f"BENCH{self.run_tag}{self.created:07d}"
+
+
+class Scenario:
+    """
+    One benchmarked endpoint call.
+
+    ``build`` returns the path and test client keyword arguments for the
+    i-th call; ``weight`` scales the iteration count for endpoints too heavy
+    to call as often as the rest.
+    """
+
+    def __init__(self, name: str, method: str, build: Callable[[BenchmarkContext, int], Tuple[str, Dict]],
+                 weight: float = 1.0, auth: Optional[str] = 'access', writes: bool = False):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.weight = weight
+        self.auth = auth
+        self.writes = writes
+
+    def request_args(self, context: BenchmarkContext, i: int) -> Tuple[str, Dict]:
+        path, kwargs = self.build(context, i)
+        if self.auth == 'access':
+            kwargs['headers'] = context.auth_headers()
+        elif self.auth == 'refresh':
+            kwargs['headers'] = context.auth_headers(context.refresh_token)
+        return API_PREFIX + path, kwargs
+
+
+def _sales_page(context: BenchmarkContext, i: int):
+    pages = max(1, context.sale_count // 20)
+    # Mostly the first pages, as users browse them, with some deep pages
+    page = context.random.randrange(1, 6) if context.random.random() < 0.8 else context.random.randrange(1, pages + 1)
+    return f'/sales/?page={page}&per_page=20', {}
+
+
+def _sales_projection(context: BenchmarkContext, i: int):
+    return '/sales/?per_page=50&fields=id,client_name,client_phone,amount,status&expand=policy_type', {}
+
+
+def _sales_search(context: BenchmarkContext, i: int):
+    if i % 3 == 0 and context.serials:
+        query = context.random.choice(context.serials)[:8]
+    elif i % 3 == 1:
+        query = context.phone()[:6]
+    else:
+        query = context.random.choice(SURNAMES)[:4]
+    return f'/sales/search?q={query}&limit=20', {}
+
+
+def _sales_create(context: BenchmarkContext, i: int):
+    return '/sales/', {'json': {
+        'user_id': context.identity['id'],
+        'sale_manager_id': context.manager_id,
+        'sales_executive_id': context.executive_id,
+        'client_name': f"Benchmark Client {i}",
+        'client_id_no': f"GHA{context.random.randrange(10 ** 9):09d}1",
+        'client_phone': context.phone(),
+        'serial_number': context.new_serial(),
+        'source_type': 'momo',
+        'collection_platform': 'Hubtel',
+        'momo_reference_number': f"MP{context.random.randrange(10 ** 9):09d}",
+        'policy_type_id': context.product_id,
+        'amount': round(context.random.uniform(20, 300), 2)
+    }}
+
+
+def _check_serial(context: BenchmarkContext, i: int):
+    # Alternate known serials (database confirmation) with new ones (filter miss)
+    if i % 2 == 0 and context.serials:
+        serial = context.random.choice(context.serials)
+    else:
+        serial = f"NEW{context.random.randrange(10 ** 12):012d}"
+    return f'/sales/check-serial?serial_number={serial}', {}
+
+
+def _dropdown(context: BenchmarkContext, i: int):
+    if i % 2 == 0:
+        return '/dropdown/?type=impact_product', {}
+    return f'/dropdown/?type=sales_executive&manager_id={context.manager_id}', {}
+
+
+def _report_generate(context: BenchmarkContext, i: int):
+    return f'/reports/{context.report_id}/generate', {'json': {
+        'format': 'csv',
+        'filters': {'status': 'submitted', 'sale_manager_id': context.manager_id}
+    }}
+
+
+def _login(context: BenchmarkContext, i: int):
+    return '/auth/login', {'json': {'email': context.email, 'password': context.password}}
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('sales_list', 'GET', _sales_page),
+    Scenario('sales_list_projection', 'GET', _sales_projection),
+    Scenario('sales_search', 'GET', _sales_search),
+    Scenario('sales_create', 'POST', _sales_create, writes=True),
+    Scenario('check_serial', 'GET', _check_serial),
+    Scenario('dropdown', 'GET', _dropdown),
+    Scenario('sales_metrics', 'GET', lambda context, i: ('/sales/metrics', {}), weight=0.4),
+    Scenario('report_generate', 'POST', _report_generate, weight=0.2),
+    # Runs before login, which revokes the refresh token obtained during setup
+    Scenario('refresh', 'POST', lambda context, i: ('/auth/refresh', {}), auth='refresh', writes=True),
+    # Password hashing dominates login, so it is sampled less often
+    Scenario('login', 'POST', _login, weight=0.2, auth=None, writes=True),
+    Scenario('performance_auto_update', 'POST', lambda context, i: ('/sales_performance/auto-update', {}),
+             weight=0.2, writes=True),
+    Scenario('investigation_auto_update', 'POST', lambda context, i: ('/under_investigation/auto-update', {}),
+             weight=0.1, writes=True),
+]
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
@@ -34,6 +34,54 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your_jwt_secret_key')
     API_VERSION = os.getenv('API_VERSION', 'v1')
 
+    # Read-only endpoints (reports, metrics, logs, dropdowns, analytics) read from this
+    # replica when set; a second local database works for testing the routing
+    REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 10))
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', 5))
+
+    # Retention executor: rows per chunk, pause between chunks, and how long a chunk may
+    # wait for row locks (PostgreSQL) before it backs off and retries
+    RETENTION_CHUNK_SIZE = int(os.getenv('RETENTION_CHUNK_SIZE', 1000))
+    RETENTION_PAUSE_SECONDS = float(os.getenv('RETENTION_PAUSE_SECONDS', 0.2))
+    RETENTION_LOCK_TIMEOUT_MS = int(os.getenv('RETENTION_LOCK_TIMEOUT_MS', 2000))
+
+    # Sale validation rules (bank account lengths, platforms, formats) and how often they
+    # are recompiled against the bank list
+    VALIDATION_RULES_PATH = os.getenv('VALIDATION_RULES_PATH')  # Defaults to validation_rules.json
+    VALIDATION_RULES_REFRESH_SECONDS = int(os.getenv('VALIDATION_RULES_REFRESH_SECONDS', 300))
+
+    # Serial number membership index (Bloom filter) settings
+    SERIAL_INDEX_FALSE_POSITIVE_RATE = float(os.getenv('SERIAL_INDEX_FALSE_POSITIVE_RATE', 0.001))
+    SERIAL_INDEX_REFRESH_SECONDS = int(os.getenv('SERIAL_INDEX_REFRESH_SECONDS', 5))
+    SERIAL_INDEX_REWARM_SECONDS = int(os.getenv('SERIAL_INDEX_REWARM_SECONDS', 3600))
+
+    # Endpoints over their query budget log a warning; tests turn this into an error
+    ENFORCE_QUERY_BUDGETS = os.getenv('ENFORCE_QUERY_BUDGETS', 'false').lower() == 'true'
+
+    # Request and SQL instrumentation exposed at /metrics
+    SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # Bearer token required to scrape, if set
+
+    # Slow statements are stored with their plan in the slow_query_log table
+    SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_LOG_MAX_ROWS = int(os.getenv('SLOW_QUERY_LOG_MAX_ROWS', 10000))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE', 'false').lower() == 'true'
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', 300))
+
+    # Generated reports are cached, compressed, until the sales they cover change; the
+    # least recently used are evicted beyond the size budget
+    REPORT_CACHE_ENABLED = os.getenv('REPORT_CACHE_ENABLED', 'true').lower() == 'true'
+    REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    REPORT_CACHE_MAX_ENTRY_BYTES = int(os.getenv('REPORT_CACHE_MAX_ENTRY_BYTES', 32 * 1024 * 1024))
+
+    # On-demand request profiling for admins (X-Profile header or _profile=1)
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles/')
+    PROFILE_MAX_KEPT = int(os.getenv('PROFILE_MAX_KEPT', 50))
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))
+
     # Default log file path and creation
     LOG_FILE_PATH = os.getenv('LOG_FILE_PATH', 'logs/')
     if not os.path.exists(LOG_FILE_PATH):
@@ -173,6 +221,7 @@ class TestConfig(DevelopmentConfig):
     SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///test.db')
     TESTING = True
     DEBUG = True
+    ENFORCE_QUERY_BUDGETS = True
 
     # You can disable or minimize logging during tests to focus on test outputs
     LOGGING = {
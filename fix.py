@@ -1,5 +1,5 @@
 import csv
-from difflib import get_close_matches
+from services.reference_import import NameIndex
 
 # Sales Manager targets from the provided information
 targets_info = {
@@ -15,10 +15,6 @@ targets_info = {
     ]
 }
 
-# Convert a string to sentence case (capitalize first letter of each word)
-def to_sentence_case(name):
-    return ' '.join(word.capitalize() for word in name.split())
-
 # Read the users.csv and filter only Sales Managers, storing their original case
 def read_users_csv(users_csv_file):
     sales_managers = []
@@ -35,25 +31,10 @@ def read_users_csv(users_csv_file):
 
     return sales_managers
 
-# Split names into components (first, middle, last) for matching
-def split_name(name):
-    return name.split()
-
-# Match names based on two or three components
-def match_names(target_name, sales_managers):
-    # Split the target name into components
-    target_components = split_name(target_name)
-
-    # Try to match with at least two or three components
-    for name, email in sales_managers:
-        user_components = split_name(to_sentence_case(name))  # Match against sentence case
-        # Ensure matching at least 2 components (e.g., first and last name)
-        matches = set(target_components).intersection(user_components)
-        if len(matches) >= 2:
-            return name  # Return the original case name from users.csv
-
-    # If no match is found, return None
-    return None
+# Index sales manager names once so each target name is matched by token lookup
+# (at least two shared name components) instead of scanning every manager
+def build_name_index(sales_managers):
+    return NameIndex((name, name) for name, email in sales_managers)
 
 # Write matched names into a new CSV with their original spelling from users.csv
 def write_matched_names_to_csv(matched_names, output_csv_file):
@@ -69,6 +50,7 @@ def write_matched_names_to_csv(matched_names, output_csv_file):
 # Get sales managers from users.csv
 users_csv_file = './users.csv'  # Path to the CSV file
 sales_managers = read_users_csv(users_csv_file)
+manager_index = build_name_index(sales_managers)
 
 # Match all target names with the users from CSV
 matched_names = {}
@@ -76,8 +58,7 @@ for target_group, target_names in targets_info.items():
     matched_names[target_group] = []
 
     for target_name in target_names:
-        target_name_sentence_case = to_sentence_case(target_name)  # Convert target name to sentence case for matching
-        matched_name = match_names(target_name_sentence_case, sales_managers)
+        matched_name = manager_index.match(target_name)  # Returns the original case name from users.csv
         if matched_name:
             matched_names[target_group].append(matched_name)
         else:
@@ -0,0 +1,72 @@
+"""
+Generate a synthetic production-scale dataset for load and performance testing.
+
+Writes into the database configured for the current FLASK_ENV (DEV_DATABASE_URL,
+DATABASE_URL or TEST_DATABASE_URL), using COPY on PostgreSQL and bulk inserts
+elsewhere. Generated rows are appended; run it against a scratch database.
+
+    python generate_data.py --sales 1000000
+    python generate_data.py --sales 50000000 --managers 200 --chunk-size 50000
+"""
+import argparse
+import logging
+import os
+
+# Each bulk chunk is a deliberately large statement; keep them out of the slow query log
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+os.environ.setdefault('SLOW_QUERY_THRESHOLD_MS', '60000')
+
+from app import app, db
+from services.data_generator import DataGenerator, DEFAULT_VOLUMES, DEFAULT_CHUNK_SIZE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate synthetic sales data.')
+    parser.add_argument('--sales', type=int, default=DEFAULT_VOLUMES['sales'], help='Number of sales to generate')
+    parser.add_argument('--managers', type=int, default=DEFAULT_VOLUMES['managers'], help='Number of sales managers')
+    parser.add_argument('--executives-per-manager', type=int, default=DEFAULT_VOLUMES['executives_per_manager'])
+    parser.add_argument('--back-office-users', type=int, default=DEFAULT_VOLUMES['back_office_users'])
+    parser.add_argument('--inception-rate', type=float, default=DEFAULT_VOLUMES['inception_rate'])
+    parser.add_argument('--duplicate-rate', type=float, default=DEFAULT_VOLUMES['duplicate_rate'])
+    parser.add_argument('--fraud-rate', type=float, default=DEFAULT_VOLUMES['fraud_rate'])
+    parser.add_argument('--sessions-per-user', type=int, default=DEFAULT_VOLUMES['sessions_per_user'])
+    parser.add_argument('--audit-rows-per-sale', type=float, default=DEFAULT_VOLUMES['audit_rows_per_sale'])
+    parser.add_argument('--days', type=int, default=365, help='Spread sales over this many past days')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed produces the same data')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Sales written per commit')
+    parser.add_argument('--create-tables', action='store_true', help='Create missing tables first')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    with app.app_context():
+        if args.create_tables:
+            db.create_all()
+
+        generator = DataGenerator(
+            volumes={
+                'sales': args.sales,
+                'managers': args.managers,
+                'executives_per_manager': args.executives_per_manager,
+                'back_office_users': args.back_office_users,
+                'inception_rate': args.inception_rate,
+                'duplicate_rate': args.duplicate_rate,
+                'fraud_rate': args.fraud_rate,
+                'sessions_per_user': args.sessions_per_user,
+                'audit_rows_per_sale': args.audit_rows_per_sale,
+            },
+            days=args.days,
+            seed=args.seed,
+            chunk_size=args.chunk_size
+        )
+        print(f"Generating data into {db.engine.url.render_as_string(hide_password=True)}...")
+        counts = generator.run()
+
+        seconds = counts.pop('seconds')
+        rows = sum(counts.values())
+        for table, count in counts.items():
+            print(f"  {table}: {count}")
+        print(f"Generated {rows} rows in {seconds}s ({rows / max(seconds, 0.001):.0f} rows/s)")
@@ -0,0 +1,49 @@
+"""
+Import reference data CSVs with bulk upserts, one transaction per file.
+
+    python import_reference.py                        # banks, users, sales executives and targets
+    python import_reference.py banks --file banks.csv
+    python import_reference.py users sales_executives --dry-run --verbose
+
+Dry runs compute and print the diff without writing anything.
+"""
+import argparse
+import time
+from app import app
+from services.reference_import import IMPORTERS
+
+# Files are imported in dependency order: executives need users, targets need managers
+DEFAULT_FILES = {
+    'banks': './banks.csv',
+    'users': './users.csv',
+    'sales_executives': './sales_exec.csv',
+    'targets': './targets.csv',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Import reference data CSVs.')
+    parser.add_argument('sources', nargs='*', help=f"Reference data to import: {', '.join(IMPORTERS)} (default: all)")
+    parser.add_argument('--file', help='CSV to read when importing a single source')
+    parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them')
+    parser.add_argument('--verbose', action='store_true', help='List every inserted, updated and skipped row')
+    args = parser.parse_args()
+    args.sources = args.sources or list(IMPORTERS)
+    unknown = [source for source in args.sources if source not in IMPORTERS]
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(unknown)}")
+    if args.file and len(args.sources) != 1:
+        parser.error('--file needs exactly one source')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        for source in DEFAULT_FILES:
+            if source not in args.sources:
+                continue
+            start = time.perf_counter()
+            report = IMPORTERS[source](args.file or DEFAULT_FILES[source], dry_run=args.dry_run)
+            print(report.format(verbose=args.verbose))
+            print(f"  took {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,74 @@
+"""
+Inspect, compact and restore the retention archive.
+
+    python manage_archive.py stats
+    python manage_archive.py compact sales audit           # repack one-row-per-record archives into segments
+    python manage_archive.py show sales 1042               # print one archived record
+    python manage_archive.py show reports 7 --table custom_report
+    python manage_archive.py restore sales --from 2024-01-01 --to 2024-02-01
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from app import app
+from models.retention_model import DataType
+from services.archive_segments import find_record, restore, storage_stats
+from services.retention_executor import archive_table, compact_archived_data
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Manage the retention archive.')
+    parser.add_argument('command', choices=['stats', 'compact', 'show', 'restore'])
+    parser.add_argument('arguments', nargs='*', help='Data types (compact), data type and id (show) or data type (restore)')
+    parser.add_argument('--from', dest='start_date', type=datetime.fromisoformat, help='Restore records dated on or after')
+    parser.add_argument('--to', dest='end_date', type=datetime.fromisoformat, help='Restore records dated before')
+    parser.add_argument('--segment', type=int, action='append', dest='segment_ids', help='Restore only these segments')
+    parser.add_argument('--table', help='Table the record came from (show; needed for reports and user_sessions)')
+    args = parser.parse_args()
+    known = {data_type.value for data_type in DataType}
+    if args.command == 'show' and (len(args.arguments) != 2 or not args.arguments[1].isdigit()):
+        parser.error('show takes a data type and a record id')
+    if args.command == 'restore' and len(args.arguments) != 1:
+        parser.error('restore takes one data type')
+    data_types = args.arguments[:1] if args.command in ('show', 'restore') else args.arguments
+    unknown = [data_type for data_type in data_types if data_type not in known]
+    if unknown:
+        parser.error(f"unknown data types: {', '.join(unknown)}")
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        if args.command == 'stats':
+            for row in storage_stats():
+                ratio = f", {row['raw_bytes'] / row['compressed_bytes']:.1f}x" if row['raw_bytes'] and row['compressed_bytes'] else ''
+                segments = f" in {row['segments']} segments" if row['segments'] is not None else ''
+                print(
+                    f"{row['data_type']:<14} {row['format']:<8} {row['records']} records{segments}, "
+                    f"{row['compressed_bytes'] // 1024}KB{ratio}"
+                )
+
+        elif args.command == 'compact':
+            for data_type in args.arguments or [data_type.value for data_type in DataType]:
+                result = compact_archived_data(data_type)
+                print(
+                    f"{data_type:<14} {result['rows']} rows packed into {result['segments']} segments"
+                    + (f", {result['skipped']} left in place (table unknown)" if result['skipped'] else '')
+                )
+
+        elif args.command == 'show':
+            try:
+                table_name = archive_table(args.arguments[0], args.table)
+            except ValueError as e:
+                sys.exit(str(e))
+            record = find_record(args.arguments[0], int(args.arguments[1]), table_name)
+            if record is None:
+                sys.exit('No archived record with that id')
+            print(json.dumps(record, indent=2))
+
+        else:
+            result = restore(args.arguments[0], args.start_date, args.end_date, args.segment_ids)
+            print(f"Restored {result['restored']} records from {result['segments']} segments")
@@ -0,0 +1,45 @@
+"""
+Maintain the customer profiles derived from sales.
+
+    python manage_customers.py rebuild               # recompute every profile
+    python manage_customers.py refresh 0241234567    # recompute one customer's profile
+    python manage_customers.py show +233241234567
+
+Sales written through the API keep the profiles up to date; rebuild after
+bulk loads, archive restores or retention runs that delete sales.
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from app import app
+from services import customer_profiles
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Maintain the customer profiles.')
+    parser.add_argument('command', choices=['rebuild', 'refresh', 'show'])
+    parser.add_argument('phones', nargs='*', help='Phone numbers (refresh, show)')
+    args = parser.parse_args()
+    if args.command != 'rebuild' and not args.phones:
+        parser.error(f'{args.command} takes one or more phone numbers')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        started = time.perf_counter()
+        if args.command == 'rebuild':
+            print(f"{customer_profiles.rebuild_profiles()} customer profiles")
+        else:
+            for phone in args.phones:
+                if args.command == 'refresh':
+                    profile = customer_profiles.refresh_customer(phone)
+                else:
+                    profile = customer_profiles.get_profile(phone)
+                print(json.dumps(profile.serialize(), indent=2) if profile else f"{phone}: no sales")
+        print(f"Done in {time.perf_counter() - started:.1f}s")
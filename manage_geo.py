@@ -0,0 +1,45 @@
+"""
+Maintain the geospatial index.
+
+    python manage_geo.py backfill            # set geohashes of rows loaded without one
+    python manage_geo.py rebuild-heatmap     # recompute the heatmap cells from the sales
+    python manage_geo.py nearest 5.6037 -0.1870 --layer paypoint
+
+Sales written through the API keep both up to date; run these after bulk
+loads, restores from the archive, or retention runs that delete sales.
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from app import app
+from services import geo_index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Maintain the geohash index and the sales heatmap.')
+    parser.add_argument('command', choices=['backfill', 'rebuild-heatmap', 'nearest'])
+    parser.add_argument('coordinates', nargs='*', type=float, help='Latitude and longitude (nearest)')
+    parser.add_argument('--layer', default='branch', choices=sorted(geo_index.LAYERS))
+    parser.add_argument('--limit', type=int, default=5)
+    args = parser.parse_args()
+    if args.command == 'nearest' and len(args.coordinates) != 2:
+        parser.error('nearest takes a latitude and a longitude')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        started = time.perf_counter()
+        if args.command == 'backfill':
+            for layer, count in geo_index.backfill_geohashes().items():
+                print(f"{layer:<10} {count} geohashes set")
+        elif args.command == 'rebuild-heatmap':
+            print(f"{geo_index.rebuild_heatmap()} heatmap cells")
+        else:
+            for row in geo_index.nearest(geo_index.get_layer(args.layer), *args.coordinates, limit=args.limit):
+                print(f"{row['distance_km']:>9.3f} km  #{row['id']} {row.get('name') or row.get('serial_number')}")
+        print(f"Done in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,87 @@
+"""
+Manage monthly partitions of the sale and audit_trail tables (PostgreSQL 13+).
+
+    python manage_partitions.py status
+    python manage_partitions.py convert sale              # one-off, locks the table while it runs
+    python manage_partitions.py convert audit_trail
+    python manage_partitions.py maintain                  # run daily, e.g. from cron
+
+maintain creates the partitions for the coming months and applies the sales
+and audit retention policies by dropping (or, for policies that archive
+before deleting, detaching) partitions that have fully expired.
+"""
+import argparse
+import sys
+from app import app, db
+from services.partitioning import (
+    DEFAULT_MONTHS_AHEAD, PARTITIONED_TABLES, PartitionManager, apply_partition_retention
+)
+from services.sale_events import rebuild_derived_models
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Manage monthly table partitions.')
+    parser.add_argument('command', choices=['status', 'convert', 'maintain'])
+    parser.add_argument('tables', nargs='*', help=f"Tables to act on (default: {', '.join(PARTITIONED_TABLES)})")
+    parser.add_argument('--months-ahead', type=int, default=DEFAULT_MONTHS_AHEAD,
+                        help='Future monthly partitions to keep created')
+    parser.add_argument('--skip-retention', action='store_true', help='Only create partitions when maintaining')
+    args = parser.parse_args()
+    unknown = [table for table in args.tables if table not in PARTITIONED_TABLES]
+    if unknown:
+        parser.error(f"unknown tables: {', '.join(unknown)}")
+    args.tables = args.tables or list(PARTITIONED_TABLES)
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            sys.exit('Table partitioning requires PostgreSQL')
+
+        if args.command == 'status':
+            with db.engine.connect() as connection:
+                manager = PartitionManager(connection)
+                for table in args.tables:
+                    if not manager.is_partitioned(table):
+                        print(f"{table}: not partitioned")
+                        continue
+                    partitions = manager.partitions(table)
+                    print(f"{table}: {len(partitions)} partitions")
+                    for partition in partitions:
+                        bounds = 'DEFAULT' if partition['default'] else f"{partition['start']:%Y-%m-%d} to {partition['end']:%Y-%m-%d}"
+                        print(f"  {partition['name']:<28} {bounds:<26} ~{partition['rows']} rows")
+
+        elif args.command == 'convert':
+            for table in args.tables:
+                print(f"Converting {table}...")
+                with db.engine.begin() as connection:
+                    result = PartitionManager(connection).convert(table, args.months_ahead)
+                print(
+                    f"  {result['rows']} rows copied into {result['partitions']} partitions, "
+                    f"{result['indexes']} indexes rebuilt"
+                )
+                for definition in result['non_unique_indexes']:
+                    print(f"  no longer unique (enforced through sale_key instead): {definition}")
+                for foreign_key in result['foreign_keys_repointed']:
+                    print(f"  foreign key re-pointed to sale_key: {foreign_key}")
+
+        else:
+            with db.engine.begin() as connection:
+                manager = PartitionManager(connection)
+                for table in args.tables:
+                    if not manager.is_partitioned(table):
+                        print(f"{table}: not partitioned, skipping")
+                        continue
+                    created = manager.ensure_future_partitions(table, args.months_ahead)
+                    print(f"{table}: created {', '.join(created) if created else 'no new partitions'}")
+            if not args.skip_retention:
+                with db.engine.begin() as connection:
+                    dropped = apply_partition_retention(PartitionManager(connection), args.tables)
+                for table, names in dropped.items():
+                    print(f"{table}: expired {', '.join(names) if names else 'no partitions'}")
+                if dropped.get('sale'):
+                    # Dropped months take their sales out of every derived read model
+                    rebuild_derived_models()
+                    print("sale: rebuilt derived read models")
@@ -0,0 +1,37 @@
+"""
+Inspect and trim the cache of generated reports.
+
+    python manage_report_cache.py stats    # entries, sizes and hits
+    python manage_report_cache.py evict    # evict least recently used entries beyond REPORT_CACHE_MAX_BYTES
+    python manage_report_cache.py clear    # drop every cached report
+
+Entries are replaced automatically when the sales they cover change;
+clear after changes the watermark cannot see, such as direct SQL edits
+that leave updated_at untouched.
+"""
+import argparse
+import json
+import os
+
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from app import app
+from services import report_cache
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Inspect and trim the report cache.')
+    parser.add_argument('command', choices=['stats', 'evict', 'clear'])
+    parser.add_argument('--max-bytes', type=int, help='Size budget for evict (default REPORT_CACHE_MAX_BYTES)')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with app.app_context():
+        if args.command == 'stats':
+            print(json.dumps(report_cache.stats(), indent=2))
+        elif args.command == 'evict':
+            print(f"{report_cache.evict(args.max_bytes)} cached reports evicted")
+        else:
+            print(f"{report_cache.clear()} cached reports deleted")
@@ -1,19 +1,24 @@
 # Import models as needed to avoid circular dependencies
 from .user_model import User, Role, UserStatus
 from .access_model import Access
+from .analytics_model import SalesDailyAggregate
 from .audit_model import AuditTrail, AuditAction
 from .bank_model import Bank, BankBranch
 from .branch_model import Branch, BranchStatus
+from .customer_model import CustomerProfile
+from .geo_model import GeoHeatmapCell
 from .help_model import HelpTour, HelpStep, HelpStepCategory
 from .impact_product_model import ImpactProduct, ProductCategory
 from .inception_model import Inception
 from .paypoint_model import Paypoint
 from .performance_model import SalesTarget, SalesPerformance
 from .query_model import Query, QueryResponse
+from .reconciliation_model import ReconciliationBatch, ReconciliationPayment, ReconciliationStatus
 from .report_model import Report, CustomReport, ReportType, ReportSchedule, ReportAccessLevel
-from .retention_model import RetentionPolicy, DataType, DataImportance, ArchivedData
+from .retention_model import RetentionPolicy, DataType, DataImportance, ArchivedData, RetentionCheckpoint, ArchiveSegment, ArchiveDictionary
 from .sales_executive_model import SalesExecutive, ExecutiveStatus
 from .sales_model import Sale
+from .slow_query_model import SlowQueryLog
 from .token_model import RefreshToken, TokenBlacklist
 from .under_investigation_model import (
     UnderInvestigation,
@@ -28,19 +33,25 @@ from .user_session_model import UserSession
 __all__ = [
     'User', 'Role', 'UserStatus',
     'Access',
+    'SalesDailyAggregate',
     'AuditTrail', 'AuditAction',
     'Bank', 'BankBranch',
     'Branch', 'BranchStatus',
+    'CustomerProfile',
+    'GeoHeatmapCell',
     'HelpTour', 'HelpStep', 'HelpStepCategory',
     'ImpactProduct', 'ProductCategory',
     'Inception',
     'Paypoint',
     'SalesTarget', 'SalesPerformance',
     'Query', 'QueryResponse',
+    'ReconciliationBatch', 'ReconciliationPayment', 'ReconciliationStatus',
     'Report', 'CustomReport', 'ReportType', 'ReportSchedule', 'ReportAccessLevel',
-    'RetentionPolicy', 'DataType', 'DataImportance', 'ArchivedData',
+    'RetentionPolicy', 'DataType', 'DataImportance', 'ArchivedData', 'RetentionCheckpoint',
+    'ArchiveSegment', 'ArchiveDictionary',
     'SalesExecutive', 'ExecutiveStatus',
     'Sale',
+    'SlowQueryLog',
     'RefreshToken', 'TokenBlacklist',
     'UnderInvestigation', 'InvestigationPriority', 'InvestigationStatus',
     'InvestigationCategory', 'InvestigationSLA', 'InvestigationTemplate',
@@ -0,0 +1,37 @@
+from extensions import db
+from datetime import datetime
+
+# Key columns of the daily aggregate. Missing values are stored as 0 or '' so
+# the unique key (and the upserts relying on it) also covers them.
+AGGREGATE_KEY_COLUMNS = (
+    'day', 'sale_manager_id', 'sales_executive_id', 'policy_type_id', 'paypoint_id',
+    'bank_id', 'collection_platform', 'status', 'source_type'
+)
+
+
+class SalesDailyAggregate(db.Model):
+    """
+    Sales count and premium per day and combination of the sale dimensions.
+
+    Kept current by the sale event hooks and rebuilt from the sales table
+    after bulk loads; the analytics cube answers count, sum and average
+    queries from it instead of the sales.
+    """
+    __tablename__ = 'sales_daily_aggregate'
+    __table_args__ = (
+        db.UniqueConstraint(*AGGREGATE_KEY_COLUMNS, name='uq_sales_daily_aggregate_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    sale_manager_id = db.Column(db.Integer, nullable=False)
+    sales_executive_id = db.Column(db.Integer, nullable=False)
+    policy_type_id = db.Column(db.Integer, nullable=False)
+    paypoint_id = db.Column(db.Integer, nullable=False, default=0)  # 0 when the sale has none
+    bank_id = db.Column(db.Integer, nullable=False, default=0)  # 0 when the sale has none
+    collection_platform = db.Column(db.String(100), nullable=False, default='')
+    status = db.Column(db.String(50), nullable=False, default='')
+    source_type = db.Column(db.String(50), nullable=False, default='')
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    total_premium = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -12,6 +12,7 @@ class AuditAction(Enum):
     DELETE = 'DELETE'
     LOGIN = 'LOGIN'
     LOGOUT = 'LOGOUT'
+    REFRESH = 'REFRESH'
     FILTER = 'FILTER'
     GENERATE_REPORT = 'GENERATE_REPORT'
     REVOKE_REFRESH_TOKEN = 'REVOKE_REFRESH_TOKEN'
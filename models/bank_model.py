@@ -2,7 +2,8 @@ from extensions import db
 from datetime import datetime
 from sqlalchemy.orm import validates
 from typing import List, Dict, Any, Optional
-from sqlalchemy import and_
+from sqlalchemy import and_, event
+from services.geohash import encode_point
 
 
 class Bank(db.Model):
@@ -203,6 +204,7 @@ class BankBranch(db.Model):
     country = db.Column(db.String(100), nullable=True)
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # Derived from the coordinates
     contact_phone = db.Column(db.String(20), nullable=True)
     contact_email = db.Column(db.String(100), nullable=True)
     is_deleted = db.Column(db.Boolean, default=False, index=True)
@@ -344,3 +346,10 @@ class BankBranch(db.Model):
             search_query = search_query.filter(BankBranch.city.ilike(f'%{city}%'))
 
         return search_query.all()
+
+
+@event.listens_for(BankBranch, 'before_insert')
+@event.listens_for(BankBranch, 'before_update')
+def _set_branch_geohash(mapper, connection, target):
+    """Keep the geohash in step with the branch's coordinates."""
+    target.geohash = encode_point(target.latitude, target.longitude)
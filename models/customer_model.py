@@ -0,0 +1,61 @@
+import json
+from extensions import db
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+class CustomerProfile(db.Model):
+    """
+    One row per customer, keyed by normalized phone number.
+
+    The totals are maintained incrementally from sale events, so customer
+    360 and retention lookups read this row instead of the customer's sales.
+    The mean gap between purchases is derived from the first and last sale,
+    which is what the mean of the consecutive gaps reduces to.
+    """
+    __tablename__ = 'customer_profile'
+
+    id = db.Column(db.Integer, primary_key=True)
+    phone = db.Column(db.String(20), nullable=False, unique=True, index=True)  # Normalized, e.g. 0241234567
+    id_number = db.Column(db.String(150), nullable=True, index=True)  # Latest ID number given
+    client_name = db.Column(db.String(150), nullable=True)  # Latest name given
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    total_premium = db.Column(db.Float, nullable=False, default=0.0)
+    first_sale_at = db.Column(db.DateTime, nullable=True)
+    last_sale_at = db.Column(db.DateTime, nullable=True, index=True)
+    product_mix = db.Column(db.Text, nullable=True)  # JSON object of policy type id -> number of sales
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def encode_product_mix(mix: Dict[str, int]) -> str:
+        return json.dumps({key: count for key, count in sorted(mix.items()) if count > 0})
+
+    def get_product_mix(self) -> Dict[str, int]:
+        return json.loads(self.product_mix) if self.product_mix else {}
+
+    def set_product_mix(self, mix: Dict[str, int]):
+        self.product_mix = CustomerProfile.encode_product_mix(mix)
+
+    @property
+    def mean_gap_days(self) -> Optional[float]:
+        """Mean number of days between consecutive purchases, None for single-purchase customers."""
+        if self.sale_count < 2 or not self.first_sale_at or not self.last_sale_at:
+            return None
+        return (self.last_sale_at - self.first_sale_at).total_seconds() / 86400 / (self.sale_count - 1)
+
+    def serialize(self) -> Dict[str, Any]:
+        gap = self.mean_gap_days
+        return {
+            'phone': self.phone,
+            'id_number': self.id_number,
+            'client_name': self.client_name,
+            'sale_count': self.sale_count,
+            'total_premium': round(self.total_premium or 0.0, 2),
+            'average_premium': round(self.total_premium / self.sale_count, 2) if self.sale_count else None,
+            'first_sale_at': self.first_sale_at.isoformat() if self.first_sale_at else None,
+            'last_sale_at': self.last_sale_at.isoformat() if self.last_sale_at else None,
+            'mean_gap_days': round(gap, 1) if gap is not None else None,
+            'days_since_last_sale': (datetime.utcnow() - self.last_sale_at).days if self.last_sale_at else None,
+            'product_mix': self.get_product_mix(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,38 @@
+from extensions import db
+from datetime import datetime
+from typing import Dict, Any
+from services.geohash import bounds, center
+
+
+class GeoHeatmapCell(db.Model):
+    """
+    Sales totals of one geohash cell, kept for a few precisions (zoom levels).
+
+    Rows are adjusted by the sale event hooks as sales are created, moved,
+    re-priced or deleted, so map views read a handful of cells instead of
+    aggregating the sales table.
+    """
+    __tablename__ = 'geo_heatmap_cell'
+    __table_args__ = (
+        db.UniqueConstraint('precision', 'cell', name='uq_geo_heatmap_precision_cell'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    precision = db.Column(db.Integer, nullable=False)
+    cell = db.Column(db.String(12), nullable=False)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    total_premium = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def serialize(self) -> Dict[str, Any]:
+        latitude, longitude = center(self.cell)
+        min_lat, min_lng, max_lat, max_lng = bounds(self.cell)
+        return {
+            'cell': self.cell,
+            'precision': self.precision,
+            'latitude': latitude,
+            'longitude': longitude,
+            'bounds': [min_lat, min_lng, max_lat, max_lng],
+            'sale_count': self.sale_count,
+            'total_premium': round(self.total_premium or 0.0, 2),
+        }
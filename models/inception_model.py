@@ -90,6 +90,21 @@ class Inception(db.Model):
         ).scalar()
         return total or 0  # Return 0 if no inceptions found
 
+    @staticmethod
+    def get_total_inceptions_by_sales(sale_ids):
+        """Get the total completed inception amount of each of many sales in one query."""
+        if not sale_ids:
+            return {}
+        rows = db.session.query(
+            Inception.sale_id, db.func.sum(Inception.amount_received)
+        ).filter(
+            Inception.sale_id.in_(sale_ids),
+            Inception.status == 'completed'
+        ).group_by(Inception.sale_id).all()
+        totals = {sale_id: 0 for sale_id in sale_ids}
+        totals.update({sale_id: total or 0 for sale_id, total in rows})
+        return totals
+
     @staticmethod
     def get_inceptions_by_date_range(start_date, end_date):
         """Get all inceptions received within a given date range."""
@@ -1,7 +1,8 @@
 from extensions import db
 from datetime import datetime
 from sqlalchemy.orm import validates
-from sqlalchemy import Index, UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint, event
+from services.geohash import encode_point
 from models.sales_model import Sale
 import json
 
@@ -15,6 +16,9 @@ class Paypoint(db.Model):
     contact_phone = db.Column(db.String(20), nullable=True)
     contact_email = db.Column(db.String(100), nullable=True)
     operating_hours = db.Column(db.String(255), nullable=True)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # Derived from the coordinates
     status = db.Column(db.String(20), nullable=False, default='active')
     is_deleted = db.Column(db.Boolean, default=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -62,6 +66,16 @@ class Paypoint(db.Model):
             raise ValueError("Invalid email format")
         return email
 
+    @validates('latitude', 'longitude')
+    def validate_coordinates(self, key, value):
+        """Validate that the coordinates are within valid ranges."""
+        if value is not None:
+            if key == 'latitude' and (value < -90 or value > 90):
+                raise ValueError("Latitude must be between -90 and 90")
+            elif key == 'longitude' and (value < -180 or value > 180):
+                raise ValueError("Longitude must be between -180 and 180")
+        return value
+
     @validates('status')
     def validate_status(self, _, status):
         """Validate that the status is one of the allowed values."""
@@ -82,6 +96,8 @@ class Paypoint(db.Model):
             'contact_phone': self.contact_phone,
             'contact_email': self.contact_email,
             'operating_hours': self.operating_hours,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
             'status': self.status,
             'is_deleted': self.is_deleted,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -194,3 +210,10 @@ class Paypoint(db.Model):
         except Exception as e:
             db.session.rollback()
             raise ValueError(f"Error permanently deleting paypoint: {str(e)}")
+
+
+@event.listens_for(Paypoint, 'before_insert')
+@event.listens_for(Paypoint, 'before_update')
+def _set_paypoint_geohash(mapper, connection, target):
+    """Keep the geohash in step with the paypoint's coordinates."""
+    target.geohash = encode_point(target.latitude, target.longitude)
@@ -1,9 +1,12 @@
 from extensions import db
 from datetime import datetime, timedelta
 from sqlalchemy.orm import validates
-from sqlalchemy import Index, and_, or_, func
+from sqlalchemy import Index, and_, or_, func, case, select
 from typing import Dict, List, Optional, Tuple, Union, TypedDict
 
+# Criteria types matched against a sale's first or subsequent payment source
+SOURCE_CRITERIA_TYPES = ('source_type', 'subsequent_pay_source_type')
+
 
 class SalesTarget(db.Model):
     __tablename__ = 'sales_target'
@@ -200,8 +203,9 @@ class SalesTarget(db.Model):
     def forecast_achievement(self) -> Dict:
         """Forecast target achievement based on current performance."""
         try:
-            progress = self.get_progress()
-            if not progress['sales_count_progress'] or not progress['premium_amount_progress']:
+            from services.forecasting import forecast_targets
+            forecasts = forecast_targets(target_ids=[self.id])
+            if not forecasts:
                 return {
                     'forecast_sales_count': 0,
                     'forecast_premium_amount': 0,
@@ -209,77 +213,22 @@ class SalesTarget(db.Model):
                     'achievement_forecast': 0
                 }
 
-            now = datetime.utcnow()
-            if not self.period_end:
-                return {
-                    'forecast_sales_count': progress['sales_count_progress'],
-                    'forecast_premium_amount': progress['premium_amount_progress'],
-                    'days_remaining': 0,
-                    'achievement_forecast': 0
-                }
-
-            days_elapsed = (now - self.period_start).days
-            days_remaining = (self.period_end - now).days
-            if days_elapsed <= 0 or days_remaining <= 0:
-                return {
-                    'forecast_sales_count': progress['sales_count_progress'],
-                    'forecast_premium_amount': progress['premium_amount_progress'],
-                    'days_remaining': days_remaining,
-                    'achievement_forecast': 0
-                }
-
-            daily_sales_rate = progress['sales_count_progress'] / days_elapsed
-            daily_premium_rate = progress['premium_amount_progress'] / days_elapsed
-
-            forecast_sales = progress['sales_count_progress'] + (daily_sales_rate * days_remaining)
-            forecast_premium = progress['premium_amount_progress'] + (daily_premium_rate * days_remaining)
-
-            achievement_forecast = min(
-                (forecast_sales / self.target_sales_count) * 100,
-                (forecast_premium / self.target_premium_amount) * 100
-            )
-
+            forecast = forecasts[0]['forecast']
             return {
-                'forecast_sales_count': forecast_sales,
-                'forecast_premium_amount': forecast_premium,
-                'days_remaining': days_remaining,
-                'achievement_forecast': achievement_forecast
+                'forecast_sales_count': forecast['forecast_sales_count'],
+                'forecast_premium_amount': forecast['forecast_premium_amount'],
+                'days_remaining': forecast['days_remaining'],
+                'achievement_forecast': forecast['achievement_forecast']
             }
         except Exception as e:
             raise ValueError(f"Error forecasting achievement: {str(e)}")
 
     def check_performance_alerts(self) -> List[Dict]:
         """Check for performance alerts based on targets."""
-        alerts = []
         try:
-            forecast = self.forecast_achievement()
-            progress = self.get_progress()
-
-            # Check if target is at risk
-            if forecast['achievement_forecast'] < 80 and forecast['days_remaining'] > 0:
-                alerts.append({
-                    'type': 'target_risk',
-                    'message': 'Target achievement is at risk',
-                    'severity': 'warning',
-                    'details': {
-                        'current_achievement': progress['sales_count_percentage'],
-                        'forecast_achievement': forecast['achievement_forecast']
-                    }
-                })
-
-            # Check if target is significantly behind
-            if progress['sales_count_percentage'] < 50 and forecast['days_remaining'] < 30:
-                alerts.append({
-                    'type': 'behind_schedule',
-                    'message': 'Significantly behind target schedule',
-                    'severity': 'critical',
-                    'details': {
-                        'current_achievement': progress['sales_count_percentage'],
-                        'days_remaining': forecast['days_remaining']
-                    }
-                })
-
-            return alerts
+            from services.forecasting import forecast_targets
+            forecasts = forecast_targets(target_ids=[self.id])
+            return forecasts[0]['alerts'] if forecasts else []
         except Exception as e:
             raise ValueError(f"Error checking performance alerts: {str(e)}")
 
@@ -489,6 +438,164 @@ class SalesPerformance(db.Model):
         except Exception as e:
             raise ValueError(f"Error getting team performance: {str(e)}")
 
+    @staticmethod
+    def compute_target_actuals(
+        target_ids: Optional[List[int]] = None,
+        performance_day: Optional[datetime] = None
+    ) -> Dict[int, Dict]:
+        """
+        Compute actual sales count, premium amount and criteria met count for targets.
+
+        All targets are resolved in a single grouped query: each target is outer
+        joined to the sales of its manager inside its period, and the target's
+        criteria is applied per row with a CASE expression.
+
+        Args:
+            target_ids: Restrict to these targets; defaults to all active targets.
+            performance_day: Day whose existing performance row should be reported.
+
+        Returns:
+            Mapping of target ID to its actuals and the ID of the existing
+            performance row for ``performance_day`` (or None).
+        """
+        from models.sales_model import Sale
+        from models.impact_product_model import ImpactProduct
+
+        try:
+            day_start = (performance_day or datetime.utcnow()).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            day_end = day_start + timedelta(days=1)
+
+            criteria_type = SalesTarget.target_criteria_type
+            criteria_value = SalesTarget.target_criteria_value
+            source_criteria = criteria_type.in_(SOURCE_CRITERIA_TYPES)
+            product_criteria = criteria_type == 'product_group'
+
+            # 1 when the joined sale satisfies the target criteria, 0 otherwise
+            matched = case(
+                (Sale.id.is_(None), 0),
+                (and_(source_criteria, or_(
+                    Sale.source_type == criteria_value,
+                    Sale.subsequent_pay_source_type == criteria_value
+                )), 1),
+                (source_criteria, 0),
+                (and_(product_criteria, ImpactProduct.group == criteria_value), 1),
+                (product_criteria, 0),
+                else_=1
+            )
+
+            existing_performance_id = select(func.max(SalesPerformance.id)).where(
+                SalesPerformance.target_id == SalesTarget.id,
+                SalesPerformance.is_deleted == False,
+                SalesPerformance.performance_date >= day_start,
+                SalesPerformance.performance_date < day_end
+            ).correlate(SalesTarget).scalar_subquery()
+
+            query = db.session.query(
+                SalesTarget.id,
+                SalesTarget.sales_manager_id,
+                SalesTarget.target_criteria_type,
+                SalesTarget.target_criteria_value,
+                func.coalesce(func.sum(matched), 0).label('sales_count'),
+                func.coalesce(func.sum(matched * Sale.amount), 0.0).label('premium_amount'),
+                existing_performance_id.label('performance_id')
+            ).outerjoin(
+                Sale,
+                and_(
+                    Sale.sale_manager_id == SalesTarget.sales_manager_id,
+                    Sale.is_deleted == False,
+                    or_(SalesTarget.period_start.is_(None), Sale.created_at >= SalesTarget.period_start),
+                    or_(SalesTarget.period_end.is_(None), Sale.created_at <= SalesTarget.period_end)
+                )
+            ).outerjoin(
+                ImpactProduct, ImpactProduct.id == Sale.policy_type_id
+            ).filter(SalesTarget.is_deleted == False)
+
+            if target_ids is not None:
+                query = query.filter(SalesTarget.id.in_(target_ids))
+            else:
+                query = query.filter(SalesTarget.is_active == True)
+
+            rows = query.group_by(
+                SalesTarget.id,
+                SalesTarget.sales_manager_id,
+                SalesTarget.target_criteria_type,
+                SalesTarget.target_criteria_value
+            ).all()
+
+            return {
+                row.id: {
+                    'sales_manager_id': row.sales_manager_id,
+                    'criteria_type': row.target_criteria_type,
+                    'criteria_value': row.target_criteria_value,
+                    'actual_sales_count': int(row.sales_count or 0),
+                    'actual_premium_amount': float(row.premium_amount or 0.0),
+                    'criteria_met_count': int(row.sales_count or 0),
+                    'performance_id': row.performance_id
+                }
+                for row in rows
+            }
+        except Exception as e:
+            raise ValueError(f"Error computing target actuals: {str(e)}")
+
+    @staticmethod
+    def refresh_from_targets(
+        insert_missing: bool = True,
+        target_ids: Optional[List[int]] = None
+    ) -> Dict[str, int]:
+        """
+        Refresh today's performance rows for all active targets.
+
+        Actuals come from a single grouped query (see ``compute_target_actuals``);
+        existing rows for today are bulk updated and, when ``insert_missing`` is
+        set, rows for targets without one are bulk inserted in the same commit.
+
+        Returns:
+            Counts of inserted and updated performance rows.
+        """
+        try:
+            performance_day = datetime.utcnow().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            actuals = SalesPerformance.compute_target_actuals(
+                target_ids=target_ids,
+                performance_day=performance_day
+            )
+
+            updates = []
+            inserts = []
+            for target_id, values in actuals.items():
+                row = {
+                    'actual_sales_count': values['actual_sales_count'],
+                    'actual_premium_amount': values['actual_premium_amount'],
+                    'criteria_met_count': values['criteria_met_count']
+                }
+                if values['performance_id'] is not None:
+                    row['id'] = values['performance_id']
+                    updates.append(row)
+                elif insert_missing:
+                    row.update({
+                        'sales_manager_id': values['sales_manager_id'],
+                        'target_id': target_id,
+                        'criteria_type': values['criteria_type'],
+                        'criteria_value': values['criteria_value'],
+                        'performance_date': performance_day,
+                        'is_deleted': False
+                    })
+                    inserts.append(row)
+
+            if updates:
+                db.session.bulk_update_mappings(SalesPerformance, updates)
+            if inserts:
+                db.session.bulk_insert_mappings(SalesPerformance, inserts)
+            db.session.commit()
+
+            return {'inserted': len(inserts), 'updated': len(updates)}
+        except Exception as e:
+            db.session.rollback()
+            raise ValueError(f"Error refreshing performance from targets: {str(e)}")
+
 
 class TrendData(TypedDict):
     dates: List[str]
@@ -0,0 +1,111 @@
+from extensions import db
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any
+
+
+class ReconciliationStatus(Enum):
+    """Outcome of matching one incoming payment against the sales."""
+    PENDING = 'pending'
+    MATCHED = 'matched'  # A sale with the same transaction id or reference, within the tolerances
+    MISMATCHED = 'mismatched'  # A sale with the same identifier, but the amount or date is off
+    UNMATCHED = 'unmatched'  # No sale carries the identifier
+    DUPLICATE = 'duplicate'  # The sale was already matched by another payment
+
+
+class ReconciliationBatch(db.Model):
+    """A statement of incoming premiums (inceptions) to reconcile against sales."""
+    __tablename__ = 'reconciliation_batch'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(255), nullable=False)  # File name or description of the statement
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, completed, posted, failed
+    amount_tolerance = db.Column(db.Float, nullable=False, default=0.0)  # Absolute difference allowed
+    amount_tolerance_pct = db.Column(db.Float, nullable=False, default=0.0)  # Share of the sale amount allowed
+    days_before = db.Column(db.Integer, nullable=False, default=1)  # Payment may precede the sale by this many days
+    days_after = db.Column(db.Integer, nullable=False, default=45)  # and follow it by this many
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+    matched_count = db.Column(db.Integer, nullable=False, default=0)
+    mismatched_count = db.Column(db.Integer, nullable=False, default=0)
+    unmatched_count = db.Column(db.Integer, nullable=False, default=0)
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+    matched_amount = db.Column(db.Float, nullable=False, default=0.0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    reconciled_at = db.Column(db.DateTime, nullable=True)
+    posted_at = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self) -> Dict[str, Any]:
+        """Serialize the batch and its reconciliation totals."""
+        return {
+            'id': self.id,
+            'source': self.source,
+            'uploaded_by': self.uploaded_by,
+            'status': self.status,
+            'amount_tolerance': self.amount_tolerance,
+            'amount_tolerance_pct': self.amount_tolerance_pct,
+            'days_before': self.days_before,
+            'days_after': self.days_after,
+            'payment_count': self.payment_count,
+            'matched_count': self.matched_count,
+            'mismatched_count': self.mismatched_count,
+            'unmatched_count': self.unmatched_count,
+            'duplicate_count': self.duplicate_count,
+            'total_amount': self.total_amount,
+            'matched_amount': self.matched_amount,
+            'created_at': self.created_at.isoformat(),
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None,
+            'posted_at': self.posted_at.isoformat() if self.posted_at else None
+        }
+
+
+class ReconciliationPayment(db.Model):
+    """One payment line of a batch and the sale it was matched to."""
+    __tablename__ = 'reconciliation_payment'
+
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.Integer, db.ForeignKey('reconciliation_batch.id'), nullable=False)
+    line_number = db.Column(db.Integer, nullable=True)
+    momo_reference_number = db.Column(db.String(100), nullable=True, index=True)
+    momo_transaction_id = db.Column(db.String(100), nullable=True, index=True)
+    amount = db.Column(db.Float, nullable=False)
+    received_at = db.Column(db.DateTime, nullable=False)
+    payment_method = db.Column(db.String(50), nullable=False, default='mobile_money')
+    description = db.Column(db.String(255), nullable=True)
+
+    # Match result, written by the reconciliation engine
+    status = db.Column(db.String(20), nullable=False, default=ReconciliationStatus.PENDING.value)
+    sale_id = db.Column(db.Integer, db.ForeignKey('sale.id'), nullable=True, index=True)
+    matched_on = db.Column(db.String(30), nullable=True)  # momo_transaction_id or momo_reference_number
+    amount_difference = db.Column(db.Float, nullable=True)  # Payment amount minus sale amount
+    days_difference = db.Column(db.Integer, nullable=True)  # Days from the sale to the payment
+    reason = db.Column(db.String(255), nullable=True)
+    inception_id = db.Column(db.Integer, db.ForeignKey('inception.id'), nullable=True)
+
+    batch = db.relationship('ReconciliationBatch', backref=db.backref('payments', lazy='dynamic'))
+
+    __table_args__ = (
+        db.Index('idx_reconciliation_payment_batch_status', 'batch_id', 'status', 'id'),
+    )
+
+    def serialize(self) -> Dict[str, Any]:
+        """Serialize the payment line and its match."""
+        return {
+            'id': self.id,
+            'batch_id': self.batch_id,
+            'line_number': self.line_number,
+            'momo_reference_number': self.momo_reference_number,
+            'momo_transaction_id': self.momo_transaction_id,
+            'amount': self.amount,
+            'received_at': self.received_at.isoformat(),
+            'payment_method': self.payment_method,
+            'description': self.description,
+            'status': self.status,
+            'sale_id': self.sale_id,
+            'matched_on': self.matched_on,
+            'amount_difference': self.amount_difference,
+            'days_difference': self.days_difference,
+            'reason': self.reason,
+            'inception_id': self.inception_id
+        }
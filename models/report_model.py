@@ -358,3 +358,45 @@ class CustomReport(db.Model):
             db.session.rollback()
             logger.error(f"Error restoring custom report: {e}")
             raise ValueError(f"Error restoring custom report: {e}")
+
+
+class ReportResultCache(db.Model):
+    """
+    A generated report kept for reuse, gzip-compressed.
+
+    Entries are keyed by a hash of the report type and its normalized
+    parameters and stamped with the data watermark they were generated at;
+    an entry is served only while the watermark is unchanged. The least
+    recently used entries are evicted to keep the table within its size budget.
+    """
+    __tablename__ = 'report_result_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), nullable=False, unique=True, index=True)  # SHA-256 of type and parameters
+    report_type = db.Column(db.String(100), nullable=False)
+    parameters = db.Column(JSON, nullable=True)  # Normalized parameters the key was computed from
+    watermark = db.Column(db.String(255), nullable=False)
+    content = db.Column(db.LargeBinary, nullable=False)  # gzip-compressed report body
+    content_type = db.Column(db.String(100), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    headers = db.Column(JSON, nullable=True)  # Extra response headers generated with the report
+    size = db.Column(db.Integer, nullable=False)  # Uncompressed bytes
+    compressed_size = db.Column(db.Integer, nullable=False)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def serialize(self):
+        """Serialize the cache entry, without its content."""
+        return {
+            'id': self.id,
+            'cache_key': self.cache_key,
+            'report_type': self.report_type,
+            'parameters': self.parameters,
+            'watermark': self.watermark,
+            'size': self.size,
+            'compressed_size': self.compressed_size,
+            'hit_count': self.hit_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_accessed_at': self.last_accessed_at.isoformat() if self.last_accessed_at else None
+        }
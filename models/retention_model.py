@@ -5,7 +5,18 @@ from typing import Optional, Dict, List, Any
 from enum import Enum
 import json
 import gzip
-from sqlalchemy import event
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    """Encode the column types json cannot, as serialize() would."""
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
 
 
 class DataType(Enum):
@@ -42,16 +53,92 @@ class ArchivedData(db.Model):
 
     retention_policy = db.relationship('RetentionPolicy', backref='archived_data')
 
+    @staticmethod
+    def encode(data: Dict) -> bytes:
+        """Encode a row as JSON; dates, enums and decimals are stored as strings."""
+        return json.dumps(data, default=_json_default, separators=(',', ':')).encode()
+
+    @staticmethod
+    def compress(data: Dict) -> bytes:
+        """Compress a row for storage."""
+        return gzip.compress(ArchivedData.encode(data))
+
     def compress_data(self, data: Dict) -> None:
         """Compress and store the data."""
-        json_data = json.dumps(data)
-        self.original_data = gzip.compress(json_data.encode())
+        self.original_data = ArchivedData.compress(data)
 
     def decompress_data(self) -> Dict:
         """Decompress and return the original data."""
         return json.loads(gzip.decompress(self.original_data).decode())
 
 
+class ArchiveDictionary(db.Model):
+    """Compression dictionary trained on the archived records of one data type."""
+    id = db.Column(db.Integer, primary_key=True)
+    data_type = db.Column(db.String(50), nullable=False, index=True)
+    codec = db.Column(db.String(10), nullable=False)  # zstd or zlib
+    data = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ArchiveSegment(db.Model):
+    """
+    Many archived records of one table, packed into independently compressed frames.
+
+    The records are sorted by original id; frame_index holds the id range,
+    byte offset and length of each frame, so a single record is read by
+    decompressing just its frame.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    data_type = db.Column(db.String(50), nullable=False)
+    table_name = db.Column(db.String(100), nullable=True)
+    date_column = db.Column(db.String(50), nullable=True)  # Column min_date and max_date are taken from
+    codec = db.Column(db.String(10), nullable=False)
+    dictionary_id = db.Column(db.Integer, db.ForeignKey('archive_dictionary.id'), nullable=True)
+    record_count = db.Column(db.Integer, nullable=False)
+    min_original_id = db.Column(db.Integer, nullable=False)
+    max_original_id = db.Column(db.Integer, nullable=False)
+    min_date = db.Column(db.DateTime, nullable=True)
+    max_date = db.Column(db.DateTime, nullable=True)
+    frame_index = db.Column(db.Text, nullable=False)  # JSON [[first_id, last_id, offset, length], ...]
+    data = db.Column(db.LargeBinary, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    retention_policy_id = db.Column(
+        db.Integer,
+        db.ForeignKey('retention_policy.id'),
+        nullable=False
+    )
+    restored_at = db.Column(db.DateTime, nullable=True)
+    is_deleted = db.Column(db.Boolean, default=False, index=True)
+
+    dictionary = db.relationship('ArchiveDictionary')
+    retention_policy = db.relationship('RetentionPolicy', backref='archive_segments')
+
+    __table_args__ = (
+        db.Index('idx_archive_segment_type_ids', 'data_type', 'min_original_id', 'max_original_id'),
+        db.Index('idx_archive_segment_type_dates', 'data_type', 'min_date', 'max_date'),
+    )
+
+    def serialize(self) -> Dict:
+        """Serialize the ArchiveSegment object, without its data."""
+        return {
+            'id': self.id,
+            'data_type': self.data_type,
+            'table_name': self.table_name,
+            'codec': self.codec,
+            'record_count': self.record_count,
+            'min_original_id': self.min_original_id,
+            'max_original_id': self.max_original_id,
+            'min_date': self.min_date.isoformat() if self.min_date else None,
+            'max_date': self.max_date.isoformat() if self.max_date else None,
+            'compressed_size': len(self.data),
+            'raw_size': self.raw_size,
+            'archived_at': self.archived_at.isoformat(),
+            'restored_at': self.restored_at.isoformat() if self.restored_at else None
+        }
+
+
 class RetentionPolicy(db.Model):
     """Model for managing data retention policies."""
     id = db.Column(db.Integer, primary_key=True)
@@ -237,19 +324,34 @@ class RetentionPolicy(db.Model):
             return {}
 
 
-# Event listeners for automatic retention policy application
-@event.listens_for(RetentionPolicy, 'after_insert')
-def apply_retention_policy(mapper, connection, target):
-    """Apply retention policy to existing data after policy creation."""
-    try:
-        # Get the model class for the data type
-        model_class = globals().get(target.data_type.capitalize())
-        if model_class and hasattr(model_class, 'created_at'):
-            # Update existing records
-            connection.execute(
-                model_class.__table__.update()
-                .where(model_class.created_at < datetime.utcnow() - timedelta(days=target.retention_days))
-                .values(is_deleted=True)
-            )
-    except Exception as e:
-        logger.error(f"Error applying retention policy: {e}")
+
+class RetentionCheckpoint(db.Model):
+    """Progress of the retention executor through one table, so an interrupted run resumes."""
+    id = db.Column(db.Integer, primary_key=True)
+    data_type = db.Column(db.String(50), nullable=False, index=True)
+    table_name = db.Column(db.String(100), nullable=False, unique=True)
+    cutoff = db.Column(db.DateTime, nullable=True)  # Cutoff of the run in progress
+    last_id = db.Column(db.Integer, nullable=False, default=0)  # Highest id processed by that run
+    status = db.Column(db.String(20), nullable=False, default='idle')  # idle, running, completed, failed
+    rows_archived = db.Column(db.Integer, nullable=False, default=0)
+    rows_deleted = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self) -> Dict:
+        """Serialize the RetentionCheckpoint object."""
+        return {
+            'data_type': self.data_type,
+            'table_name': self.table_name,
+            'status': self.status,
+            'cutoff': self.cutoff.isoformat() if self.cutoff else None,
+            'last_id': self.last_id,
+            'rows_archived': self.rows_archived,
+            'rows_deleted': self.rows_deleted,
+            'last_error': self.last_error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
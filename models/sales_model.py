@@ -1,7 +1,8 @@
 from extensions import db
-from sqlalchemy import and_, or_, not_
+from sqlalchemy import and_, or_, not_, event
 from flask import jsonify, request
-from models.bank_model import Bank
+from services.validation_rules import get_rules
+from services.geohash import encode_point
 from sqlalchemy.orm import validates, selectinload
 from datetime import datetime, timedelta
 from models.under_investigation_model import UnderInvestigation
@@ -16,9 +17,9 @@ class Sale(db.Model):
     client_phone = db.Column(db.String(10), nullable=False, index=True)
     serial_number = db.Column(db.String(100), nullable=False, index=True, unique=True)
     source_type = db.Column(db.String(50), nullable=False)
-    momo_reference_number = db.Column(db.String(100), nullable=True)
+    momo_reference_number = db.Column(db.String(100), nullable=True, index=True)
     collection_platform = db.Column(db.String(100), nullable=True)  # Transflow, Hubtel, Momo
-    momo_transaction_id = db.Column(db.String(100), nullable=True)
+    momo_transaction_id = db.Column(db.String(100), nullable=True, index=True)
     first_pay_with_momo = db.Column(db.Boolean, nullable=True)
     subsequent_pay_source_type = db.Column(db.String(50), nullable=True)
     bank_id = db.Column(db.Integer, db.ForeignKey('bank.id'), nullable=True, index=True)
@@ -34,6 +35,7 @@ class Sale(db.Model):
     is_deleted = db.Column(db.Boolean, default=False, index=True)
     geolocation_latitude = db.Column(db.Float, nullable=True)
     geolocation_longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # Derived from the coordinates
     status = db.Column(db.String(50), default='submitted', index=True)
     customer_called = db.Column(db.Boolean, default=False)
     momo_first_premium = db.Column(db.Boolean, default=False)
@@ -61,7 +63,6 @@ class Sale(db.Model):
     bank_branch = db.relationship('BankBranch', foreign_keys=[bank_branch_id], lazy='joined')
     user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('created_sales', lazy='dynamic'), lazy='joined')
 
-    ALLOWED_PLATFORMS = ['', 'Transflow', 'Hubtel', 'company Momo number']
     MAX_RECENT_TRANSACTIONS = 10
     TRANSACTION_PERIOD_DAYS = 30
 
@@ -76,40 +77,16 @@ class Sale(db.Model):
     def validate_bank_acc_number(self, key, value):
         """Ensure account numbers are valid for selected banks."""
         if key == 'bank_acc_number' and self.bank_id:  # Only validate if bank_id is provided
-            bank = Bank.query.get(self.bank_id)
-            length = len(value)
-
-            # Define account number length requirements based on bank names
-            account_length_requirements = {
-                'UNITED BANK FOR AFRICA': 14,
-                'ZENITH': 10,
-                'ABSA': 10,
-                'SOCIETE GENERAL': [12, 13]
-            }
-
-            # Convert the bank name to lowercase for case-insensitive comparison
-            bank_name_lower = bank.name.lower()
-
-            # Check account number requirements based on the bank name
-            for keyword, required_length in account_length_requirements.items():
-                if keyword.lower() in bank_name_lower:  # Compare in lowercase
-                    if isinstance(required_length, list):  # Handle cases with multiple valid lengths
-                        if length not in required_length:
-                            raise ValueError(f"{keyword} account number must be {required_length} digits")
-                    else:
-                        if length != required_length:
-                            raise ValueError(f"{keyword} account number must be {required_length} digits")
-                    break  # Exit loop once the matching bank is found
-
-            # Check for other banks and generic length requirements
-            if length not in [10, 12, 13, 14, 16]:
-                raise ValueError("Account number must be 10, 12, 13, 14, or 16 digits")
+            error = get_rules().check_bank_account(self.bank_id, value)
+            if error:
+                raise ValueError(error)
         return value
 
     @validates('collection_platform')
     def validate_collection_platform(self, _, value):
-        if value not in self.ALLOWED_PLATFORMS:
-            raise ValueError(f"Invalid collection platform. Must be one of {self.ALLOWED_PLATFORMS}.")
+        error = get_rules().check_platform(value)
+        if error:
+            raise ValueError(error)
         return value
 
     @validates('geolocation_latitude', 'geolocation_longitude')
@@ -478,33 +455,28 @@ class Sale(db.Model):
             return {}
 
     def get_customer_retention_metrics(self):
-        """Calculate customer retention metrics."""
-        try:
-            # Get all sales for this customer
-            customer_sales = Sale.query.filter(
-                Sale.client_phone == self.client_phone,
-                not_(Sale.is_deleted)
-            ).order_by(Sale.created_at.desc()).all()
+        """Customer retention metrics, read from the customer's profile."""
+        from services.customer_profiles import get_profile
 
-            if not customer_sales:
+        try:
+            profile = get_profile(self.client_phone)
+            if not profile or not profile.sale_count:
                 return {}
 
-            # Calculate metrics
-            total_sales = len(customer_sales)
-            total_amount = sum(sale.amount for sale in customer_sales)
-            avg_time_between_sales = 0
-            if total_sales > 1:
-                time_diffs = [(customer_sales[i].created_at - customer_sales[i+1].created_at).days
-                            for i in range(total_sales-1)]
-                avg_time_between_sales = sum(time_diffs) / len(time_diffs)
-
             return {
-                'total_sales': total_sales,
-                'total_amount': total_amount,
-                'avg_time_between_sales': avg_time_between_sales,
-                'first_sale_date': customer_sales[-1].created_at,
-                'last_sale_date': customer_sales[0].created_at
+                'total_sales': profile.sale_count,
+                'total_amount': profile.total_premium,
+                'avg_time_between_sales': profile.mean_gap_days or 0,
+                'first_sale_date': profile.first_sale_at,
+                'last_sale_date': profile.last_sale_at
             }
         except Exception as e:
             logger.error(f"Error calculating retention metrics: {str(e)}")
             return {}
+
+
+@event.listens_for(Sale, 'before_insert')
+@event.listens_for(Sale, 'before_update')
+def _set_sale_geohash(mapper, connection, target):
+    """Keep the geohash in step with the sale's coordinates."""
+    target.geohash = encode_point(target.geolocation_latitude, target.geolocation_longitude)
@@ -0,0 +1,123 @@
+from extensions import db
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+from sqlalchemy import func, select
+
+
+class SlowQueryLog(db.Model):
+    """
+    A captured slow SQL statement with its redacted parameters and plan.
+    Rows are grouped by fingerprint, the hash of the normalized statement,
+    so repeated executions of the same query shape can be compared.
+    """
+    __tablename__ = 'slow_query_log'
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(40), nullable=False, index=True)
+    normalized_statement = db.Column(db.Text, nullable=False)
+    statement = db.Column(db.Text, nullable=False)
+    parameters = db.Column(db.Text, nullable=True)  # JSON, values redacted
+    duration_ms = db.Column(db.Float, nullable=False)
+    endpoint = db.Column(db.String(255), nullable=True, index=True)
+    explain_plan = db.Column(db.Text, nullable=True)
+    captured_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index('idx_slow_query_fingerprint_captured', 'fingerprint', 'captured_at'),
+    )
+
+    def serialize(self) -> Dict[str, Any]:
+        """Serialize a captured statement for API responses."""
+        return {
+            'id': self.id,
+            'fingerprint': self.fingerprint,
+            'normalized_statement': self.normalized_statement,
+            'statement': self.statement,
+            'parameters': self.parameters,
+            'duration_ms': self.duration_ms,
+            'endpoint': self.endpoint,
+            'explain_plan': self.explain_plan,
+            'captured_at': self.captured_at.isoformat()
+        }
+
+    @staticmethod
+    def summarize(since_hours: Optional[int] = 24, order_by: str = 'total', limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Group captured statements by fingerprint.
+
+        Each group reports how often the statement was slow, its total, mean
+        and worst duration, the endpoints it ran under and the most recently
+        captured plan.
+        """
+        total = func.sum(SlowQueryLog.duration_ms).label('total_ms')
+        worst = func.max(SlowQueryLog.duration_ms).label('max_ms')
+        count = func.count(SlowQueryLog.id).label('occurrences')
+        ordering = {'total': total, 'max': worst, 'count': count}.get(order_by)
+        if ordering is None:
+            raise ValueError(f"Invalid order_by value: {order_by}")
+
+        query = select(
+            SlowQueryLog.fingerprint,
+            count,
+            total,
+            func.avg(SlowQueryLog.duration_ms).label('avg_ms'),
+            worst,
+            func.min(SlowQueryLog.captured_at).label('first_seen'),
+            func.max(SlowQueryLog.captured_at).label('last_seen'),
+            func.max(SlowQueryLog.id).label('latest_id')
+        ).group_by(SlowQueryLog.fingerprint).order_by(ordering.desc()).limit(limit)
+        if since_hours:
+            query = query.where(SlowQueryLog.captured_at >= datetime.utcnow() - timedelta(hours=since_hours))
+        groups = db.session.execute(query).all()
+        if not groups:
+            return []
+
+        # Sample statement and latest plan per fingerprint
+        samples = {
+            row.fingerprint: row for row in SlowQueryLog.query.filter(
+                SlowQueryLog.id.in_([group.latest_id for group in groups])
+            )
+        }
+        plans = dict(db.session.execute(
+            select(SlowQueryLog.fingerprint, SlowQueryLog.explain_plan)
+            .where(
+                SlowQueryLog.id.in_(
+                    select(func.max(SlowQueryLog.id))
+                    .where(
+                        SlowQueryLog.fingerprint.in_(samples.keys()),
+                        SlowQueryLog.explain_plan.isnot(None)
+                    )
+                    .group_by(SlowQueryLog.fingerprint)
+                )
+            )
+        ).all())
+        endpoints: Dict[str, List[str]] = {}
+        for fingerprint, endpoint in db.session.execute(
+            select(SlowQueryLog.fingerprint, SlowQueryLog.endpoint)
+            .where(SlowQueryLog.fingerprint.in_(samples.keys()))
+            .distinct()
+        ):
+            endpoints.setdefault(fingerprint, []).append(endpoint)
+
+        return [
+            {
+                'fingerprint': group.fingerprint,
+                'normalized_statement': samples[group.fingerprint].normalized_statement,
+                'occurrences': group.occurrences,
+                'total_ms': round(group.total_ms, 2),
+                'avg_ms': round(group.avg_ms, 2),
+                'max_ms': round(group.max_ms, 2),
+                'first_seen': group.first_seen.isoformat(),
+                'last_seen': group.last_seen.isoformat(),
+                'endpoints': sorted(endpoint for endpoint in endpoints.get(group.fingerprint, []) if endpoint),
+                'latest_plan': plans.get(group.fingerprint)
+            }
+            for group in groups
+        ]
+
+    @staticmethod
+    def get_samples(fingerprint: str, limit: int = 20) -> List['SlowQueryLog']:
+        """Return the most recent captures of one fingerprint."""
+        return SlowQueryLog.query.filter_by(fingerprint=fingerprint).order_by(
+            SlowQueryLog.captured_at.desc()
+        ).limit(limit).all()
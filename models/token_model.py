@@ -1,7 +1,6 @@
 from extensions import db
 from datetime import datetime, timedelta
 from sqlalchemy import and_, func
-from models.retention_model import RetentionPolicy, DataType
 import logging
 
 # Configure logger
@@ -74,41 +73,12 @@ class TokenBlacklist(db.Model):
     @staticmethod
     def cleanup_expired_tokens():
         """Clean up expired tokens based on retention policy."""
-        try:
-            # Get retention policy for tokens
-            policy = RetentionPolicy.get_policy(DataType.USER_SESSIONS.value)
-            cutoff_date = datetime.utcnow() - timedelta(days=policy.retention_days)
-
-            # Get tokens to delete
-            tokens_to_delete = TokenBlacklist.query.filter(
-                and_(
-                    TokenBlacklist.expire_at < cutoff_date,
-                    TokenBlacklist.is_deleted == False
-                )
-            ).all()
-
-            # Archive tokens if required by policy
-            if policy.archive_before_delete:
-                for token in tokens_to_delete:
-                    # Archive token data
-                    archived_data = ArchivedData(
-                        data_type=DataType.USER_SESSIONS.value,
-                        original_id=token.id,
-                        retention_policy_id=policy.id
-                    )
-                    archived_data.compress_data(token.serialize())
-                    db.session.add(archived_data)
-
-            # Mark tokens as deleted
-            for token in tokens_to_delete:
-                token.is_deleted = True
+        from services.retention_executor import RetentionExecutor, target_for
 
-            db.session.commit()
-            return len(tokens_to_delete)
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error cleaning up expired tokens: {e}")
-            raise ValueError(f"Error cleaning up expired tokens: {e}")
+        result = RetentionExecutor.from_config().run_target(target_for(TokenBlacklist))
+        if result['status'] == 'failed':
+            raise ValueError(f"Error cleaning up expired tokens: {result['error']}")
+        return result['deleted']
 
     @staticmethod
     def get_active_tokens():
@@ -171,7 +141,7 @@ class TokenBlacklist(db.Model):
 class RefreshToken(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    token = db.Column(db.Text, unique=True, nullable=False)  # Store the refresh token itself
+    token = db.Column(db.Text, unique=True, nullable=False)  # jti of the refresh token
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     revoked_at = db.Column(db.DateTime, nullable=True)
     revoked = db.Column(db.Boolean, default=False, index=True)  # Add revoked flag
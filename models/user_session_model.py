@@ -7,7 +7,6 @@ import secrets
 import os
 from typing import Optional, List
 from sqlalchemy import Index, and_, func
-from models.retention_model import RetentionPolicy, DataType
 import json
 import logging
 import redis
@@ -173,41 +172,12 @@ class UserSession(db.Model):
     @staticmethod
     def cleanup_expired_sessions():
         """Clean up expired sessions based on retention policy."""
-        try:
-            # Get retention policy for sessions
-            policy = RetentionPolicy.get_policy(DataType.USER_SESSIONS.value)
-            cutoff_date = datetime.utcnow() - timedelta(days=policy.retention_days)
-
-            # Get sessions to delete
-            sessions_to_delete = UserSession.query.filter(
-                and_(
-                    UserSession.expires_at < cutoff_date,
-                    UserSession.is_deleted == False
-                )
-            ).all()
-
-            # Archive sessions if required by policy
-            if policy.archive_before_delete:
-                for session in sessions_to_delete:
-                    # Archive session data
-                    archived_data = ArchivedData(
-                        data_type=DataType.USER_SESSIONS.value,
-                        original_id=session.id,
-                        retention_policy_id=policy.id
-                    )
-                    archived_data.compress_data(session.serialize())
-                    db.session.add(archived_data)
-
-            # Mark sessions as deleted
-            for session in sessions_to_delete:
-                session.is_deleted = True
+        from services.retention_executor import RetentionExecutor, target_for
 
-            db.session.commit()
-            return len(sessions_to_delete)
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error cleaning up expired sessions: {e}")
-            raise ValueError(f"Error cleaning up expired sessions: {e}")
+        result = RetentionExecutor.from_config().run_target(target_for(UserSession))
+        if result['status'] == 'failed':
+            raise ValueError(f"Error cleaning up expired sessions: {result['error']}")
+        return result['deleted']
 
     @staticmethod
     def get_expired_sessions():
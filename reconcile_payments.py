@@ -0,0 +1,76 @@
+"""
+Reconcile a statement of incoming premiums against the sales.
+
+    python reconcile_payments.py statement.csv --amount-tolerance 1 --days-after 31
+    python reconcile_payments.py --batch 12 --days-after 60     # reconcile an existing batch again
+    python reconcile_payments.py --batch 12 --post              # record matched payments as inceptions
+
+The CSV needs momo_reference_number and/or momo_transaction_id, amount and
+received_at columns (reference, transaction_id and date are accepted too).
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from app import app, db
+from models.reconciliation_model import ReconciliationBatch
+from services.reconciliation import create_batch, post_batch, reconcile
+from services.reference_import import read_csv
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Reconcile incoming payments against sales.')
+    parser.add_argument('file', nargs='?', help='Statement CSV to ingest as a new batch')
+    parser.add_argument('--batch', type=int, help='Existing batch to reconcile again or post')
+    parser.add_argument('--source', help='Name of the statement (default: the file name)')
+    parser.add_argument('--amount-tolerance', type=float, help='Absolute amount difference allowed')
+    parser.add_argument('--amount-tolerance-pct', type=float, help='Amount difference allowed, in percent of the sale')
+    parser.add_argument('--days-before', type=int, help='Days a payment may precede its sale')
+    parser.add_argument('--days-after', type=int, help='Days a payment may follow its sale')
+    parser.add_argument('--post', action='store_true', help='Record the matched payments as inceptions')
+    args = parser.parse_args()
+    if bool(args.file) == bool(args.batch):
+        parser.error('give either a statement file or --batch')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    tolerances = {
+        'amount_tolerance': args.amount_tolerance,
+        'amount_tolerance_pct': args.amount_tolerance_pct,
+        'days_before': args.days_before,
+        'days_after': args.days_after,
+    }
+    with app.app_context():
+        started = time.monotonic()
+        if args.file:
+            batch, errors = create_batch(args.source or os.path.basename(args.file), read_csv(args.file), **tolerances)
+            for error in errors[:20]:
+                print(f"  skipped {error}")
+            if len(errors) > 20:
+                print(f"  ... {len(errors) - 20} more lines skipped")
+            print(f"Ingested {batch.payment_count} payments as batch {batch.id} in {time.monotonic() - started:.1f}s")
+        else:
+            batch = db.session.get(ReconciliationBatch, args.batch)
+            if batch is None:
+                sys.exit(f"No batch {args.batch}")
+            for field, value in tolerances.items():
+                if value is not None:
+                    setattr(batch, field, value)
+
+        if batch.status != 'posted' and (args.file or not args.post or any(v is not None for v in tolerances.values())):
+            reconcile(batch)
+            print(
+                f"Batch {batch.id}: {batch.matched_count} matched ({batch.matched_amount:.2f} of {batch.total_amount:.2f}), "
+                f"{batch.mismatched_count} mismatched, {batch.unmatched_count} unmatched, "
+                f"{batch.duplicate_count} duplicates in {time.monotonic() - started:.1f}s"
+            )
+        if args.post:
+            try:
+                print(f"Posted {post_batch(batch)} inceptions")
+            except ValueError as e:
+                sys.exit(str(e))
@@ -6,9 +6,12 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils import get_client_ip
 from datetime import datetime, timedelta
 from functools import wraps
-import time
-import psutil
 from sqlalchemy import desc, and_
+from services.metrics import track_duration
+from services.db_routing import read_only
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define namespace for audit trails
 audit_ns = Namespace('audit_trail', description='Audit trail operations')
@@ -62,29 +65,9 @@ action_summary_model = audit_ns.model('ActionSummary', {
     'count': fields.Integer(description='Number of occurrences')
 })
 
-# Performance metrics decorator
+# Performance metrics decorator; durations are exported through /metrics
 def track_performance(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        start_memory = psutil.Process().memory_info().rss
-
-        result = func(*args, **kwargs)
-
-        end_time = time.time()
-        end_memory = psutil.Process().memory_info().rss
-
-        execution_time = end_time - start_time
-        memory_used = end_memory - start_memory
-
-        logger.info(
-            f"Performance metrics for {func.__name__}: "
-            f"Execution time: {execution_time:.2f}s, "
-            f"Memory used: {memory_used / 1024 / 1024:.2f}MB"
-        )
-
-        return result
-    return wrapper
+    return track_duration(f"audit_trail.{func.__name__}")(func)
 
 # Admin-only decorator
 def admin_required(func):
@@ -106,6 +89,7 @@ class AuditTrailResource(Resource):
     @jwt_required()
     @admin_required
     @track_performance
+    @read_only
     def get(self):
         """Get the audit trail logs with pagination and filtering."""
         page = request.args.get('page', 1, type=int)
@@ -201,6 +185,7 @@ class SingleAuditTrailResource(Resource):
     @jwt_required()
     @admin_required
     @track_performance
+    @read_only
     def get(self, audit_id):
         """Retrieve a specific audit log by its ID."""
         audit_log = AuditTrail.query.filter_by(id=audit_id).first()
@@ -219,6 +204,7 @@ class FilteredAuditTrailResource(Resource):
     @admin_required
     @track_performance
     @audit_ns.marshal_list_with(audit_model)
+    @read_only
     def post(self):
         """Filter the audit logs with advanced options."""
         data = request.get_json()
@@ -336,6 +322,7 @@ class AuditSummaryResource(Resource):
     @jwt_required()
     @admin_required
     @track_performance
+    @read_only
     def get(self):
         """Get summary statistics of audit actions."""
         start_date = request.args.get('start_date')
@@ -363,6 +350,7 @@ class UserAuditTrailResource(Resource):
     @admin_required
     @track_performance
     @audit_ns.marshal_list_with(audit_model)
+    @read_only
     def get(self, user_id):
         """Get audit logs for a specific user."""
         include_archived = request.args.get(
@@ -210,10 +210,10 @@ class LoginResource(Resource):
             )
             db.session.add(session)
 
-            # Create refresh token record
+            # Create refresh token record, keyed by the jti /auth/refresh looks it up by
             refresh_token_record = RefreshToken(
                 user_id=user.id,
-                token=refresh_token,
+                token=decode_token(refresh_token)['jti'],
                 expire_at=datetime.utcnow() + refresh_token_expiry
             )
             db.session.add(refresh_token_record)
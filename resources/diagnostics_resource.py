@@ -0,0 +1,163 @@
+from flask_restx import Namespace, Resource, fields
+from flask import request, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.slow_query_model import SlowQueryLog
+from models.audit_model import AuditTrail
+from services import profiling
+from extensions import db
+from utils import get_client_ip
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Define a namespace for database diagnostics
+diagnostics_ns = Namespace('diagnostics', description='Database diagnostics (admin only)')
+
+slow_query_group_model = diagnostics_ns.model('SlowQueryGroup', {
+    'fingerprint': fields.String(description='Hash of the normalized statement'),
+    'normalized_statement': fields.String(description='Statement with literals and parameters replaced'),
+    'occurrences': fields.Integer(description='Number of slow executions captured'),
+    'total_ms': fields.Float(description='Total duration in milliseconds'),
+    'avg_ms': fields.Float(description='Average duration in milliseconds'),
+    'max_ms': fields.Float(description='Worst duration in milliseconds'),
+    'first_seen': fields.String(description='First capture time'),
+    'last_seen': fields.String(description='Latest capture time'),
+    'endpoints': fields.List(fields.String, description='Endpoints that ran the statement'),
+    'latest_plan': fields.String(description='Most recently captured plan')
+})
+
+
+def is_admin(current_user):
+    """Diagnostics expose raw SQL, so they are restricted to admins."""
+    return current_user['role'].lower() == 'admin'
+
+
+def log_access(current_user, details):
+    """Record access to diagnostics in the audit trail."""
+    audit = AuditTrail(
+        user_id=current_user['id'],
+        action='ACCESS',
+        resource_type='diagnostics',
+        details=details,
+        ip_address=get_client_ip(),
+        user_agent=request.headers.get('User-Agent')
+    )
+    db.session.add(audit)
+    db.session.commit()
+
+
+@diagnostics_ns.route('/slow-queries')
+class SlowQueryListResource(Resource):
+    @diagnostics_ns.doc(security='Bearer Auth', responses={200: 'OK', 400: 'Invalid Parameters', 403: 'Unauthorized'})
+    @diagnostics_ns.param('since_hours', 'Only include captures from the last N hours (0 for all)', type='integer', default=24)
+    @diagnostics_ns.param('order_by', 'Rank groups by total, max or count', type='string', default='total')
+    @diagnostics_ns.param('limit', 'Maximum number of groups', type='integer', default=50)
+    @jwt_required()
+    def get(self):
+        """List slow statements grouped by fingerprint."""
+        current_user = get_jwt_identity()
+        if not is_admin(current_user):
+            logger.warning(f"Unauthorized slow query access attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        since_hours = request.args.get('since_hours', 24, type=int)
+        order_by = request.args.get('order_by', 'total')
+        limit = min(request.args.get('limit', 50, type=int), 500)
+
+        try:
+            groups = SlowQueryLog.summarize(since_hours=since_hours, order_by=order_by, limit=limit)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        log_access(current_user, "User viewed slow query summary")
+        return {'slow_queries': groups}, 200
+
+
+@diagnostics_ns.route('/slow-queries/<string:fingerprint>')
+class SlowQueryDetailResource(Resource):
+    @diagnostics_ns.doc(security='Bearer Auth', responses={200: 'OK', 403: 'Unauthorized', 404: 'Not Found'})
+    @diagnostics_ns.param('limit', 'Maximum number of captures', type='integer', default=20)
+    @jwt_required()
+    def get(self, fingerprint):
+        """List the most recent captures of one statement fingerprint."""
+        current_user = get_jwt_identity()
+        if not is_admin(current_user):
+            logger.warning(f"Unauthorized slow query access attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        captures = [capture.serialize() for capture in SlowQueryLog.get_samples(fingerprint, limit)]
+        if not captures:
+            return {'message': 'Fingerprint not found'}, 404
+
+        log_access(current_user, f"User viewed slow query captures for {fingerprint}")
+        return {'fingerprint': fingerprint, 'captures': captures}, 200
+
+
+@diagnostics_ns.route('/profiles')
+class ProfileListResource(Resource):
+    @diagnostics_ns.doc(security='Bearer Auth', responses={200: 'OK', 403: 'Unauthorized'})
+    @jwt_required()
+    def get(self):
+        """
+        List stored request profiles.
+
+        Admins profile a request by sending it with an X-Profile: 1 header or a
+        _profile=1 query parameter; the response carries the profile ID in X-Profile-Id.
+        """
+        current_user = get_jwt_identity()
+        if not is_admin(current_user):
+            logger.warning(f"Unauthorized profile access attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        log_access(current_user, "User viewed request profiles")
+        return {'profiles': profiling.list_profiles()}, 200
+
+
+@diagnostics_ns.route('/profiles/<string:profile_id>')
+class ProfileDetailResource(Resource):
+    @diagnostics_ns.doc(security='Bearer Auth', responses={200: 'OK', 403: 'Unauthorized', 404: 'Not Found'})
+    @diagnostics_ns.param('top', 'Number of functions to include, by cumulative time', type='integer', default=30)
+    @jwt_required()
+    def get(self, profile_id):
+        """Get a profile's metadata, top allocations and top functions."""
+        current_user = get_jwt_identity()
+        if not is_admin(current_user):
+            logger.warning(f"Unauthorized profile access attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        profile = profiling.load_profile(profile_id, top=min(request.args.get('top', 30, type=int), 200))
+        if not profile:
+            return {'message': 'Profile not found'}, 404
+
+        log_access(current_user, f"User viewed request profile {profile_id}")
+        return profile, 200
+
+
+@diagnostics_ns.route('/profiles/<string:profile_id>/download')
+class ProfileDownloadResource(Resource):
+    @diagnostics_ns.doc(security='Bearer Auth', responses={200: 'OK', 403: 'Unauthorized', 404: 'Not Found'})
+    @diagnostics_ns.param('artifact', 'pstats (for snakeviz/pstats) or collapsed (for flamegraph.pl/speedscope)', type='string', default='pstats')
+    @jwt_required()
+    def get(self, profile_id):
+        """Download a profile artifact."""
+        current_user = get_jwt_identity()
+        if not is_admin(current_user):
+            logger.warning(f"Unauthorized profile download attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        artifact = request.args.get('artifact', 'pstats')
+        if artifact not in ('pstats', 'collapsed'):
+            return {'message': 'Invalid artifact. Use pstats or collapsed.'}, 400
+        path = profiling.artifact_path(profile_id, artifact)
+        if not path:
+            return {'message': 'Profile not found'}, 404
+
+        log_access(current_user, f"User downloaded {artifact} for request profile {profile_id}")
+        return send_file(
+            os.path.abspath(path),
+            mimetype='application/octet-stream' if artifact == 'pstats' else 'text/plain',
+            as_attachment=True,
+            download_name=os.path.basename(path)
+        )
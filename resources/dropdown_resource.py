@@ -10,6 +10,10 @@ from models.branch_model import Branch, BranchStatus
 from extensions import db
 from flask_jwt_extended import jwt_required
 from utils import get_client_ip
+from services.db_routing import read_only
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define a namespace for dropdown-related operations
 dropdown_ns = Namespace('dropdown', description='Dropdown operations')
@@ -79,6 +83,7 @@ class DropdownResource(Resource):
     @dropdown_ns.param('branch_id', 'The branch ID for sales executive filtering (optional for sales executive dropdown)', type='integer')
     @dropdown_ns.param('page', 'Page number for pagination', type='integer', default=1)
     @dropdown_ns.param('per_page', 'Number of items per page', type='integer', default=10)
+    @read_only
     def get(self):
         """Retrieve dropdown values based on the type."""
         dropdown_type = request.args.get('type')
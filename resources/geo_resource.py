@@ -0,0 +1,128 @@
+import logging
+from flask_restx import Namespace, Resource
+from flask import request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services import geo_index
+
+logger = logging.getLogger(__name__)
+
+# Define a namespace for location queries
+geo_ns = Namespace('geo', description='Location queries over sales, bank branches and paypoints')
+
+# Sale locations carry client details; branches and paypoints are open to every user
+SALE_LAYER_ROLES = ['admin', 'manager', 'back_office']
+MAX_NEAREST = 50
+
+
+def _authorized(current_user, layer: str) -> bool:
+    return layer != 'sale' or current_user['role'].lower() in SALE_LAYER_ROLES
+
+
+def _coordinate(name: str) -> float:
+    value = request.args.get(name, type=float)
+    if value is None:
+        raise ValueError(f"{name} is required and must be a number")
+    return value
+
+
+def _box():
+    return tuple(_coordinate(name) for name in ('min_lat', 'min_lng', 'max_lat', 'max_lng'))
+
+
+def _limit(default: int, maximum: int) -> int:
+    return max(1, min(request.args.get('limit', default, type=int), maximum))
+
+
+@geo_ns.route('/nearest')
+class NearestResource(Resource):
+    @geo_ns.doc(security='Bearer Auth', responses={200: 'Success', 400: 'Invalid Input', 403: 'Unauthorized'})
+    @geo_ns.param('layer', 'branch, paypoint or sale', type='string', default='branch')
+    @geo_ns.param('lat', 'Latitude of the agent', type='number', required=True)
+    @geo_ns.param('lng', 'Longitude of the agent', type='number', required=True)
+    @geo_ns.param('limit', 'Number of results', type='integer', default=5)
+    @geo_ns.param('max_km', 'Ignore anything farther than this', type='number')
+    @jwt_required()
+    def get(self):
+        """Find the bank branches or paypoints nearest to a location."""
+        current_user = get_jwt_identity()
+        layer_name = request.args.get('layer', 'branch')
+        if not _authorized(current_user, layer_name):
+            return {'message': 'Unauthorized'}, 403
+        try:
+            layer = geo_index.get_layer(layer_name)
+            latitude, longitude = _coordinate('lat'), _coordinate('lng')
+            max_km = request.args.get('max_km', type=float)
+            results = geo_index.nearest(layer, latitude, longitude, _limit(5, MAX_NEAREST), max_km)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'layer': layer.name, 'results': results}, 200
+
+
+@geo_ns.route('/within')
+class WithinBoxResource(Resource):
+    @geo_ns.doc(security='Bearer Auth', responses={200: 'Success', 400: 'Invalid Input', 403: 'Unauthorized'})
+    @geo_ns.param('layer', 'branch, paypoint or sale', type='string', default='branch')
+    @geo_ns.param('min_lat', 'Southern edge', type='number', required=True)
+    @geo_ns.param('min_lng', 'Western edge (greater than max_lng across the antimeridian)', type='number', required=True)
+    @geo_ns.param('max_lat', 'Northern edge', type='number', required=True)
+    @geo_ns.param('max_lng', 'Eastern edge', type='number', required=True)
+    @geo_ns.param('limit', 'Maximum number of results', type='integer', default=geo_index.MAX_RESULTS)
+    @jwt_required()
+    def get(self):
+        """Retrieve the locations inside a bounding box, e.g. the visible part of a map."""
+        current_user = get_jwt_identity()
+        layer_name = request.args.get('layer', 'branch')
+        if not _authorized(current_user, layer_name):
+            return {'message': 'Unauthorized'}, 403
+        try:
+            layer = geo_index.get_layer(layer_name)
+            results = geo_index.within_box(layer, _box(), _limit(geo_index.MAX_RESULTS, geo_index.MAX_RESULTS))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'layer': layer.name, 'results': results, 'count': len(results)}, 200
+
+
+@geo_ns.route('/radius')
+class WithinRadiusResource(Resource):
+    @geo_ns.doc(security='Bearer Auth', responses={200: 'Success', 400: 'Invalid Input', 403: 'Unauthorized'})
+    @geo_ns.param('layer', 'branch, paypoint or sale', type='string', default='branch')
+    @geo_ns.param('lat', 'Latitude of the center', type='number', required=True)
+    @geo_ns.param('lng', 'Longitude of the center', type='number', required=True)
+    @geo_ns.param('radius_km', 'Radius in kilometres', type='number', required=True)
+    @geo_ns.param('limit', 'Maximum number of results', type='integer', default=geo_index.MAX_RESULTS)
+    @jwt_required()
+    def get(self):
+        """Retrieve the locations within a distance of a point, nearest first."""
+        current_user = get_jwt_identity()
+        layer_name = request.args.get('layer', 'branch')
+        if not _authorized(current_user, layer_name):
+            return {'message': 'Unauthorized'}, 403
+        try:
+            layer = geo_index.get_layer(layer_name)
+            results = geo_index.within_radius(
+                layer, _coordinate('lat'), _coordinate('lng'), _coordinate('radius_km'),
+                _limit(geo_index.MAX_RESULTS, geo_index.MAX_RESULTS)
+            )
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        return {'layer': layer.name, 'results': results, 'count': len(results)}, 200
+
+
+@geo_ns.route('/heatmap')
+class HeatmapResource(Resource):
+    @geo_ns.doc(security='Bearer Auth', responses={200: 'Success', 400: 'Invalid Input', 403: 'Unauthorized'})
+    @geo_ns.param('min_lat', 'Southern edge', type='number', required=True)
+    @geo_ns.param('min_lng', 'Western edge', type='number', required=True)
+    @geo_ns.param('max_lat', 'Northern edge', type='number', required=True)
+    @geo_ns.param('max_lng', 'Eastern edge', type='number', required=True)
+    @geo_ns.param('precision', 'Geohash length of the cells (4, 5 or 6); chosen from the box when omitted', type='integer')
+    @jwt_required()
+    def get(self):
+        """Retrieve the sales count and premium per geohash cell inside a bounding box."""
+        current_user = get_jwt_identity()
+        if current_user['role'].lower() not in SALE_LAYER_ROLES:
+            return {'message': 'Unauthorized'}, 403
+        try:
+            return geo_index.heatmap(_box(), request.args.get('precision', type=int)), 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
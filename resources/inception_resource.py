@@ -7,6 +7,10 @@ from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from utils import get_client_ip
+from services.loading_profiles import with_profile
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define a namespace for Inception operations
 inception_ns = Namespace(
@@ -81,13 +85,46 @@ def validate_inception_data(data):
 @inception_ns.route('/')
 class InceptionListResource(Resource):
     @inception_ns.doc(security='Bearer Auth')
-    @inception_ns.marshal_list_with(inception_model)
+    @inception_ns.param('page', 'Page number for pagination', type='integer', default=1)
+    @inception_ns.param('per_page', 'Number of items per page', type='integer', default=50)
+    @inception_ns.param('sale_id', 'Filter by sale', type='integer')
+    @inception_ns.param('status', 'Filter by status', type='string')
+    @inception_ns.param('payment_method', 'Filter by payment method', type='string')
+    @inception_ns.param('start_date', 'Received on or after (ISO date)', type='string')
+    @inception_ns.param('end_date', 'Received before (ISO date)', type='string')
     @jwt_required()
     def get(self):
-        """Retrieve a list of all inceptions."""
+        """Retrieve a paginated list of inceptions, newest first."""
         current_user = get_jwt_identity()
 
-        inceptions = Inception.query.filter_by(is_deleted=False).all()
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 500)
+        sale_id = request.args.get('sale_id', type=int)
+        status = request.args.get('status')
+        payment_method = request.args.get('payment_method')
+
+        inception_query = Inception.query
+        if sale_id:
+            inception_query = inception_query.filter(Inception.sale_id == sale_id)
+        if status:
+            inception_query = inception_query.filter(Inception.status == status)
+        if payment_method:
+            inception_query = inception_query.filter(Inception.payment_method == payment_method)
+        try:
+            if request.args.get('start_date'):
+                inception_query = inception_query.filter(
+                    Inception.received_at >= datetime.fromisoformat(request.args['start_date'])
+                )
+            if request.args.get('end_date'):
+                inception_query = inception_query.filter(
+                    Inception.received_at < datetime.fromisoformat(request.args['end_date'])
+                )
+        except ValueError:
+            return {'message': 'Invalid date format, use ISO format (YYYY-MM-DD)'}, 400
+
+        inceptions = inception_query.order_by(
+            Inception.received_at.desc(), Inception.id.desc()
+        ).paginate(page=page, per_page=per_page, error_out=False)
 
         # Log the access to audit trail
         audit = AuditTrail(
@@ -101,7 +138,12 @@ class InceptionListResource(Resource):
         db.session.add(audit)
         db.session.commit()
 
-        return inceptions, 200
+        return {
+            'inceptions': [inception.serialize() for inception in inceptions.items],
+            'total': inceptions.total,
+            'pages': inceptions.pages,
+            'current_page': inceptions.page
+        }, 200
 
     @inception_ns.doc(
         security='Bearer Auth',
@@ -122,7 +164,9 @@ class InceptionListResource(Resource):
             return {'message': str(e)}, 400
 
         # Validate the Sale exists
-        sale = Sale.query.filter_by(id=data['sale_id'], is_deleted=False).first()
+        sale = with_profile(
+            Sale.query.filter_by(id=data['sale_id'], is_deleted=False), Sale, 'exists'
+        ).first()
         if not sale:
             logger.error(
                 f"Sale with ID {data['sale_id']} not found for user {current_user['id']}"
@@ -8,6 +8,7 @@ from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 from utils import get_client_ip
+from services.db_routing import read_only
 from functools import lru_cache
 from sqlalchemy import desc, and_, or_
 
@@ -61,6 +62,7 @@ class LogResource(Resource):
     @log_ns.doc(security='Bearer Auth')
     @log_ns.expect(log_param)
     @jwt_required()
+    @read_only
     def get(self):
         """Retrieve logs based on various filters (admin and manager only)."""
         current_user = get_jwt_identity()
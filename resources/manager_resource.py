@@ -2,12 +2,15 @@ from flask_restx import Namespace, Resource, fields
 from flask import request, jsonify
 from models.sales_executive_model import SalesExecutive, ExecutiveStatus
 from models.audit_model import AuditTrail
-from models.performance_model import SalesPerformance, SalesTarget
+from models.sales_model import Sale
 from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from utils import get_client_ip
-from sqlalchemy import func
+from sqlalchemy import func, and_
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define a namespace for manager-related operations
 manager_ns = Namespace('manager', description='Manager operations')
@@ -231,35 +234,48 @@ class ManagerPerformanceResource(Resource):
             logger.warning(f"Unauthorized performance access attempt by User ID {current_user.get('id')}.")
             return {'message': 'Unauthorized'}, 403
 
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-
-        # Get all sales executives under this manager
-        sales_executives = SalesExecutive.query.filter_by(
-            manager_id=current_user['id'],
-            is_deleted=False
-        ).all()
-
-        performance_data = []
-        for se in sales_executives:
-            # Get performance metrics
-            query = SalesPerformance.query.filter_by(sales_executive_id=se.id)
-            if start_date:
-                query = query.filter(SalesPerformance.performance_date >= start_date)
-            if end_date:
-                query = query.filter(SalesPerformance.performance_date <= end_date)
-
-            performance = query.first()
-            if performance:
-                performance_data.append({
-                    'sales_executive_id': se.id,
-                    'sales_executive_name': se.name,
-                    'actual_sales_count': performance.actual_sales_count,
-                    'actual_premium_amount': performance.actual_premium_amount,
-                    'target_sales_count': se.target_sales_count,
-                    'target_premium_amount': se.target_premium_amount,
-                    'performance_date': performance.performance_date
-                })
+        try:
+            start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d') if request.args.get('start_date') else None
+            end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d') if request.args.get('end_date') else None
+        except ValueError:
+            return {'message': 'Invalid date format. Use YYYY-MM-DD'}, 400
+
+        # Aggregate every executive's sales in one grouped query
+        sale_conditions = [Sale.sales_executive_id == SalesExecutive.id, Sale.is_deleted == False]
+        if start_date:
+            sale_conditions.append(Sale.created_at >= start_date)
+        if end_date:
+            sale_conditions.append(Sale.created_at <= end_date)
+
+        rows = db.session.query(
+            SalesExecutive.id,
+            SalesExecutive.name,
+            SalesExecutive.target_sales_count,
+            SalesExecutive.target_premium_amount,
+            func.count(Sale.id).label('actual_sales_count'),
+            func.coalesce(func.sum(Sale.amount), 0.0).label('actual_premium_amount'),
+            func.max(Sale.created_at).label('last_sale_at')
+        ).outerjoin(
+            Sale, and_(*sale_conditions)
+        ).filter(
+            SalesExecutive.manager_id == current_user['id'],
+            SalesExecutive.is_deleted == False
+        ).group_by(
+            SalesExecutive.id,
+            SalesExecutive.name,
+            SalesExecutive.target_sales_count,
+            SalesExecutive.target_premium_amount
+        ).order_by(func.coalesce(func.sum(Sale.amount), 0.0).desc()).all()
+
+        performance_data = [{
+            'sales_executive_id': row.id,
+            'sales_executive_name': row.name,
+            'actual_sales_count': row.actual_sales_count,
+            'actual_premium_amount': float(row.actual_premium_amount),
+            'target_sales_count': row.target_sales_count,
+            'target_premium_amount': row.target_premium_amount,
+            'performance_date': row.last_sale_at.isoformat() if row.last_sale_at else None
+        } for row in rows]
 
         # Log the access to audit trail
         audit = AuditTrail(
@@ -19,6 +19,8 @@ paypoint_model = paypoint_ns.model('Paypoint', {
     'contact_phone': fields.String(description='Contact Phone'),
     'contact_email': fields.String(description='Contact Email'),
     'operating_hours': fields.String(description='Operating Hours'),
+    'latitude': fields.Float(description='Paypoint Latitude'),
+    'longitude': fields.Float(description='Paypoint Longitude'),
     'status': fields.String(description='Status (active/inactive/suspended)'),
     'is_deleted': fields.Boolean(description='Whether the paypoint is deleted'),
     'created_at': fields.DateTime(description='Creation timestamp'),
@@ -117,6 +119,8 @@ class PaypointListResource(Resource):
                 contact_phone=data.get('contact_phone', ''),
                 contact_email=data.get('contact_email', ''),
                 operating_hours=data.get('operating_hours', ''),
+                latitude=data.get('latitude'),
+                longitude=data.get('longitude'),
                 status=data.get('status', 'active')
             )
             db.session.add(new_paypoint)
@@ -194,6 +198,8 @@ class PaypointResource(Resource):
             paypoint.contact_phone = data.get('contact_phone', paypoint.contact_phone)
             paypoint.contact_email = data.get('contact_email', paypoint.contact_email)
             paypoint.operating_hours = data.get('operating_hours', paypoint.operating_hours)
+            paypoint.latitude = data.get('latitude', paypoint.latitude)
+            paypoint.longitude = data.get('longitude', paypoint.longitude)
             paypoint.status = data.get('status', paypoint.status)
             paypoint.updated_at = datetime.utcnow()
 
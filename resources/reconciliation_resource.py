@@ -0,0 +1,258 @@
+import io
+import logging
+from flask_restx import Namespace, Resource, fields
+from flask import request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.audit_model import AuditTrail
+from models.inception_model import Inception
+from models.reconciliation_model import ReconciliationBatch, ReconciliationPayment, ReconciliationStatus
+from extensions import db
+from services.reconciliation import create_batch, post_batch, reconcile
+from services.reference_import import read_csv_file
+from utils import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+# Define a namespace for payment reconciliation operations
+reconciliation_ns = Namespace(
+    'reconciliation',
+    description='Reconciliation of incoming premiums (inceptions) against sales'
+)
+
+RECONCILIATION_ROLES = ['admin', 'manager', 'back_office']
+TOLERANCE_FIELDS = {
+    'amount_tolerance': float,
+    'amount_tolerance_pct': float,
+    'days_before': int,
+    'days_after': int,
+}
+
+tolerance_model = reconciliation_ns.model('ReconciliationTolerances', {
+    'amount_tolerance': fields.Float(description='Absolute amount difference allowed'),
+    'amount_tolerance_pct': fields.Float(description='Amount difference allowed, in percent of the sale amount'),
+    'days_before': fields.Integer(description='Days a payment may precede its sale'),
+    'days_after': fields.Integer(description='Days a payment may follow its sale'),
+})
+
+batch_upload_model = reconciliation_ns.inherit('ReconciliationBatchUpload', tolerance_model, {
+    'source': fields.String(required=True, description='Name of the statement'),
+    'payments': fields.List(fields.Raw, required=True, description=(
+        'Payment lines with momo_reference_number and/or momo_transaction_id, amount and received_at'
+    )),
+})
+
+
+def _authorized(current_user) -> bool:
+    return current_user['role'].lower() in RECONCILIATION_ROLES
+
+
+def _tolerances(data) -> dict:
+    """Tolerance values from a JSON body or form, converted; raises ValueError when invalid."""
+    tolerances = {}
+    for field, convert in TOLERANCE_FIELDS.items():
+        if data.get(field) not in (None, ''):
+            tolerances[field] = convert(data[field])
+            if tolerances[field] < 0:
+                raise ValueError(f"{field} cannot be negative")
+    return tolerances
+
+
+def _log(current_user, action, batch, details):
+    audit = AuditTrail(
+        user_id=current_user['id'],
+        action=action,
+        resource_type='reconciliation_batch',
+        resource_id=batch.id,
+        details=details,
+        ip_address=get_client_ip(),
+        user_agent=request.headers.get('User-Agent')
+    )
+    db.session.add(audit)
+    db.session.commit()
+
+
+@reconciliation_ns.route('/batches')
+class ReconciliationBatchListResource(Resource):
+    @reconciliation_ns.doc(security='Bearer Auth')
+    @reconciliation_ns.param('page', 'Page number for pagination', type='integer', default=1)
+    @reconciliation_ns.param('per_page', 'Number of items per page', type='integer', default=20)
+    @jwt_required()
+    def get(self):
+        """Retrieve a paginated list of reconciliation batches, newest first."""
+        current_user = get_jwt_identity()
+        if not _authorized(current_user):
+            return {'message': 'Unauthorized'}, 403
+
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        batches = ReconciliationBatch.query.order_by(ReconciliationBatch.id.desc()) \
+            .paginate(page=page, per_page=per_page, error_out=False)
+        return {
+            'batches': [batch.serialize() for batch in batches.items],
+            'total': batches.total,
+            'pages': batches.pages,
+            'current_page': batches.page
+        }, 200
+
+    @reconciliation_ns.doc(
+        security='Bearer Auth',
+        responses={201: 'Created', 400: 'Invalid Input', 403: 'Unauthorized'},
+        description='Upload a statement as a CSV file (multipart field "file") or as JSON, then reconcile it.'
+    )
+    @reconciliation_ns.expect(batch_upload_model)
+    @jwt_required()
+    def post(self):
+        """Ingest a batch of incoming payments and reconcile it against the sales."""
+        current_user = get_jwt_identity()
+        if not _authorized(current_user):
+            logger.warning(f"Unauthorized reconciliation upload by user {current_user['id']}")
+            return {'message': 'Unauthorized'}, 403
+
+        upload = request.files.get('file')
+        data = request.form if upload else (request.get_json(silent=True) or {})
+        try:
+            tolerances = _tolerances(data)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        if upload:
+            source = data.get('source') or upload.filename
+            rows = read_csv_file(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+        else:
+            source = data.get('source')
+            payments = data.get('payments')
+            if not source or not isinstance(payments, list):
+                return {'message': 'source and a list of payments (or a CSV file) are required'}, 400
+            rows = enumerate(payments, start=1)
+
+        try:
+            batch, errors = create_batch(source, rows, current_user['id'], **tolerances)
+            if not batch.payment_count:
+                batch.status = 'failed'
+                db.session.commit()
+                return {'message': 'No valid payment lines', 'batch': batch.serialize(), 'errors': errors[:100]}, 400
+            reconcile(batch)
+            _log(current_user, 'CREATE', batch, f"Reconciled {batch.payment_count} payments from {source}")
+            logger.info(f"User {current_user['id']} reconciled batch {batch.id}")
+            return {'batch': batch.serialize(), 'errors': errors[:100], 'error_count': len(errors)}, 201
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reconciling payments for user {current_user['id']}: {str(e)}")
+            return {'message': 'Error reconciling payments'}, 500
+
+
+@reconciliation_ns.route('/batches/<int:batch_id>')
+class ReconciliationBatchResource(Resource):
+    @reconciliation_ns.doc(security='Bearer Auth', responses={200: 'Success', 404: 'Batch not found'})
+    @jwt_required()
+    def get(self, batch_id):
+        """Retrieve a reconciliation batch and its totals."""
+        current_user = get_jwt_identity()
+        if not _authorized(current_user):
+            return {'message': 'Unauthorized'}, 403
+
+        batch = db.session.get(ReconciliationBatch, batch_id)
+        if not batch:
+            return {'message': 'Batch not found'}, 404
+        return batch.serialize(), 200
+
+
+@reconciliation_ns.route('/batches/<int:batch_id>/reconcile')
+class ReconciliationRunResource(Resource):
+    @reconciliation_ns.doc(security='Bearer Auth', responses={200: 'Reconciled', 400: 'Invalid Input', 404: 'Batch not found'})
+    @reconciliation_ns.expect(tolerance_model)
+    @jwt_required()
+    def post(self, batch_id):
+        """Reconcile a batch again, optionally with new tolerances."""
+        current_user = get_jwt_identity()
+        if not _authorized(current_user):
+            return {'message': 'Unauthorized'}, 403
+
+        batch = db.session.get(ReconciliationBatch, batch_id)
+        if not batch:
+            return {'message': 'Batch not found'}, 404
+        if batch.status == 'posted':
+            return {'message': 'Posted batches cannot be reconciled again'}, 400
+        try:
+            for field, value in _tolerances(request.get_json(silent=True) or {}).items():
+                setattr(batch, field, value)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        try:
+            reconcile(batch)
+            _log(current_user, 'UPDATE', batch, f"Reconciled batch {batch.id} again")
+            return batch.serialize(), 200
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reconciling batch {batch_id}: {str(e)}")
+            return {'message': 'Error reconciling batch'}, 500
+
+
+@reconciliation_ns.route('/batches/<int:batch_id>/post')
+class ReconciliationPostResource(Resource):
+    @reconciliation_ns.doc(security='Bearer Auth', responses={200: 'Posted', 400: 'Not reconciled', 404: 'Batch not found'})
+    @jwt_required()
+    def post(self, batch_id):
+        """Record the matched payments of a batch as inceptions of their sales."""
+        current_user = get_jwt_identity()
+        if current_user['role'].lower() not in ['admin', 'manager']:
+            return {'message': 'Unauthorized'}, 403
+
+        batch = db.session.get(ReconciliationBatch, batch_id)
+        if not batch:
+            return {'message': 'Batch not found'}, 404
+        try:
+            posted = post_batch(batch)
+            _log(current_user, 'UPDATE', batch, f"Posted {posted} inceptions from batch {batch.id}")
+            return {'posted': posted, 'batch': batch.serialize()}, 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error posting batch {batch_id}: {str(e)}")
+            return {'message': 'Error posting batch'}, 500
+
+
+@reconciliation_ns.route('/batches/<int:batch_id>/payments')
+class ReconciliationPaymentListResource(Resource):
+    @reconciliation_ns.doc(security='Bearer Auth', responses={200: 'Success', 400: 'Invalid Input', 404: 'Batch not found'})
+    @reconciliation_ns.param('status', 'Comma-separated statuses, e.g. unmatched,mismatched', type='string')
+    @reconciliation_ns.param('page', 'Page number for pagination', type='integer', default=1)
+    @reconciliation_ns.param('per_page', 'Number of items per page', type='integer', default=50)
+    @jwt_required()
+    def get(self, batch_id):
+        """Retrieve the payments of a batch by match status, with the inceptions already on their sales."""
+        current_user = get_jwt_identity()
+        if not _authorized(current_user):
+            return {'message': 'Unauthorized'}, 403
+        if not db.session.get(ReconciliationBatch, batch_id):
+            return {'message': 'Batch not found'}, 404
+
+        statuses = [status for status in request.args.get('status', '').split(',') if status]
+        valid = {status.value for status in ReconciliationStatus}
+        if any(status not in valid for status in statuses):
+            return {'message': f"Invalid status. Allowed values are: {', '.join(sorted(valid))}"}, 400
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 500)
+
+        payment_query = ReconciliationPayment.query.filter(ReconciliationPayment.batch_id == batch_id)
+        if statuses:
+            payment_query = payment_query.filter(ReconciliationPayment.status.in_(statuses))
+        payments = payment_query.order_by(ReconciliationPayment.id) \
+            .paginate(page=page, per_page=per_page, error_out=False)
+
+        received = Inception.get_total_inceptions_by_sales(
+            list({payment.sale_id for payment in payments.items if payment.sale_id})
+        )
+        items = []
+        for payment in payments.items:
+            item = payment.serialize()
+            item['sale_inceptions_total'] = received.get(payment.sale_id) if payment.sale_id else None
+            items.append(item)
+        return {
+            'payments': items,
+            'total': payments.total,
+            'pages': payments.pages,
+            'current_page': payments.page
+        }, 200
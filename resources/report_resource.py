@@ -1,7 +1,6 @@
 from flask import request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-import csv
-from io import StringIO
+from itertools import chain
 from extensions import db
 from models.sales_model import Sale
 from models.user_model import User, Role
@@ -15,6 +14,13 @@ from sqlalchemy.orm import aliased
 from sqlalchemy import func
 from datetime import datetime
 from utils import get_client_ip
+from services.loading_profiles import with_profile
+from services.query_budget import query_budget
+from services.db_routing import read_only
+from services import analytics_cube, report_cache, report_writers
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define namespace for report-related operations
 report_ns = Namespace(
@@ -32,7 +38,8 @@ report_model = report_ns.model('Report', {
     'filters': fields.Raw(description="Filters for the report"),
     'aggregate_by': fields.String(description="Field to aggregate by"),
     'format': fields.String(
-        description="Output format (csv, pdf, excel)",
+        description="Output format (csv, excel, parquet)",
+        enum=list(report_writers.FORMATS),
         default='csv'
     ),
     'schedule': fields.String(
@@ -51,9 +58,30 @@ report_model = report_ns.model('Report', {
     'description': fields.String(description="Description of the report")
 })
 
+analytics_model = report_ns.model('AnalyticsQuery', {
+    'dimensions': fields.List(
+        fields.String(enum=list(analytics_cube.DIMENSIONS)),
+        required=True,
+        description="Dimensions to group by, outermost first"
+    ),
+    'measures': fields.List(
+        fields.String(enum=list(analytics_cube.MEASURES)),
+        description="Measures to compute (default count and sum)"
+    ),
+    'rollup': fields.String(
+        description="Subtotals: none, rollup (hierarchical) or cube (every combination)",
+        enum=list(analytics_cube.ROLLUP_MODES),
+        default='none'
+    ),
+    'filters': fields.Raw(
+        description="start_date and end_date (YYYY-MM-DD), and lists of values per dimension"
+    )
+})
+
 @report_ns.route('/')
 class ReportListResource(Resource):
     @jwt_required()
+    @read_only
     def get(self):
         """Get a list of available reports."""
         current_user = get_jwt_identity()
@@ -138,9 +166,39 @@ class ReportListResource(Resource):
             logger.error(f"Error creating report: {str(e)}")
             return {'message': 'Error creating report'}, 500
 
+@report_ns.route('/analytics')
+class SalesAnalyticsResource(Resource):
+    @query_budget(10)
+    @jwt_required()
+    @read_only
+    @report_ns.expect(analytics_model)
+    def post(self):
+        """Pivot sales by several dimensions with optional ROLLUP or CUBE subtotals."""
+        current_user = get_jwt_identity()
+        if current_user['role'] not in ['admin', 'manager', 'back_office']:
+            return {'message': 'Unauthorized'}, 403
+
+        data = request.json or {}
+        dimensions = data.get('dimensions') or []
+        measures = data.get('measures') or ['count', 'sum']
+        if not isinstance(dimensions, list) or not isinstance(measures, list):
+            return {'message': 'dimensions and measures must be lists'}, 400
+        filters = data.get('filters') or {}
+        if not isinstance(filters, dict):
+            return {'message': 'filters must be an object'}, 400
+
+        try:
+            return analytics_cube.pivot(dimensions, measures, data.get('rollup') or 'none', filters), 200
+        except ValueError as e:
+            return {'message': str(e)}, 400
+        except Exception as e:
+            logger.error(f"Error running sales analytics: {str(e)}")
+            return {'message': 'Error running sales analytics'}, 500
+
 @report_ns.route('/<int:report_id>')
 class ReportResource(Resource):
     @jwt_required()
+    @read_only
     def get(self, report_id):
         """Get a specific report configuration."""
         current_user = get_jwt_identity()
@@ -284,7 +342,9 @@ class ReportResource(Resource):
 
 @report_ns.route('/<int:report_id>/generate')
 class ReportGenerationResource(Resource):
+    @query_budget(20)
     @jwt_required()
+    @read_only
     def post(self, report_id):
         """Generate a report based on its configuration."""
         current_user = get_jwt_identity()
@@ -346,6 +406,21 @@ class ReportGenerationResource(Resource):
     def generate_sales_report(self, filters, aggregate_by, output_format):
         """Generate a sales performance report."""
         try:
+            try:
+                report_format = report_writers.get_format(output_format)
+            except ValueError as e:
+                return {'message': str(e)}, 400
+
+            # Reuse the last result for the same parameters while the sales it covers are unchanged
+            cache = report_cache.CacheSlot(
+                ReportType.SALES_PERFORMANCE.value,
+                {'filters': filters, 'aggregate_by': aggregate_by, 'format': report_format.name},
+                report_cache.sales_watermark(filters)
+            )
+            cached = cache.lookup()
+            if cached is not None:
+                return cached
+
             # Build and execute the query
             query = self.build_sales_query(filters)
             query = self.apply_filters(query, filters)
@@ -359,13 +434,12 @@ class ReportGenerationResource(Resource):
                 )
 
             # Generate report in specified format
-            if output_format == 'csv':
-                return self.stream_csv_response(
-                    query.all(),
-                    aggregation_results
-                )
-            else:
-                return {'message': 'Unsupported format'}, 400
+            return self.stream_report_response(
+                query,
+                aggregation_results,
+                report_format,
+                cache
+            )
 
         except Exception as e:
             error_msg = f"Error generating sales report: {str(e)}"
@@ -431,7 +505,7 @@ class ReportGenerationResource(Resource):
             .join(SalesExecutive, Sale.sales_executive_id == SalesExecutive.id)
             .filter(Sale.is_deleted == False)
         )
-        return query
+        return with_profile(query, Sale, 'export')
 
     def log_audit(self, user_id, filters):
         """Log the report generation action to the audit trail."""
@@ -448,17 +522,39 @@ class ReportGenerationResource(Resource):
         db.session.commit()
         logger.info(f"Sales report generated by user {user_id} with filters: {filters}")
 
-    def stream_csv_response(self, sales, aggregation_results):
-        """Stream CSV response with sales data."""
+    def stream_report_response(self, query, aggregation_results, report_format, cache=None):
+        """
+        Stream the sales report in the requested format, storing it in the report cache as it goes.
+
+        Sales are read and converted a batch at a time and every writer
+        consumes the same row batches, so no format holds the whole report.
+        """
+        aggregate_headers = {f'X-Aggregate-{key}': value for key, value in aggregation_results.items()}
+        batches = self.sale_batches(query)
+        first_batch = next(batches, None)
+        if first_batch is None and report_format.name == 'csv':
+            chunks = iter(["No data available\n"])
+        else:
+            columns = self.sales_report_columns(first_batch[0] if first_batch else None)
+            rows = (
+                [self.sales_report_row(sale, columns, report_format.missing) for sale in batch]
+                for batch in chain([first_batch] if first_batch else [], batches)
+            )
+            chunks = report_format.write(columns, rows)
+        filename = f"sales_report.{report_format.extension}"
+        if cache is not None:
+            chunks = cache.capture(chunks, report_format.mimetype, filename, aggregate_headers)
         response = Response(
-            stream_with_context(self.generate_csv(sales)),
-            mimetype="text/csv",
-            headers={"Content-Disposition": "attachment;filename=sales_report.csv"}
+            stream_with_context(chunks),
+            mimetype=report_format.mimetype,
+            headers={"Content-Disposition": f"attachment;filename={filename}"}
         )
+        if cache is not None and cache.enabled:
+            response.headers['X-Report-Cache'] = 'miss'
 
         # Include aggregation results in response headers if available
-        for key, value in aggregation_results.items():
-            response.headers[f'X-Aggregate-{key}'] = value
+        for key, value in aggregate_headers.items():
+            response.headers[key] = value
 
         return response  # This should be a valid CSV response
 
@@ -566,67 +662,68 @@ class ReportGenerationResource(Resource):
         query = query.order_by(db.desc(sort_column) if sort_order == 'desc' else db.asc(sort_column))
         return query
 
-    def generate_csv(self, sales):
-        """Generate CSV row by row with dynamic headers."""
-        if not sales:
-            yield "No data available\n"
-            return
-
-        first_row_dict = sales[0].serialize()
-        columns_to_drop = [
-            'user_id', 'sale_manager', 'sales_executive_id',
-            'bank_branch', 'policy_type',
-            'geolocation_latitude', 'geolocation_longitude',
-            'paypoint', 'bank',
-        ]
-
-        dynamic_headers = [key for key in first_row_dict.keys() if key not in columns_to_drop] + [
-            'sales_id', 'sale_manager_name', 'inception_amount_received',
-            'sales_executive_code', 'sales_executive_name', 'sales_executive_branch',
-            'product_name', 'product_category', 'product_group',
-            'bank_name', 'bank_branch_name', 'paypoint_name',
+    # Sale fields left out of the report rows; related records are added by name below
+    REPORT_DROPPED_FIELDS = [
+        'user_id', 'sale_manager', 'sales_executive_id',
+        'bank_branch', 'policy_type',
+        'geolocation_latitude', 'geolocation_longitude',
+        'paypoint', 'bank',
+    ]
+    REPORT_RELATED_COLUMNS = [
+        ('sales_id', 'int'), ('sale_manager_name', 'str'), ('inception_amount_received', 'float'),
+        ('sales_executive_code', 'str'), ('sales_executive_name', 'str'), ('sales_executive_branch', 'str'),
+        ('product_name', 'str'), ('product_category', 'str'), ('product_group', 'str'),
+        ('bank_name', 'str'), ('bank_branch_name', 'str'), ('paypoint_name', 'str'),
+    ]
+
+    def sale_batches(self, query):
+        """Sales of the report query in batches, loaded a batch at a time."""
+        batch = []
+        for sale in query.yield_per(report_writers.REPORT_BATCH_SIZE):
+            batch.append(sale)
+            if len(batch) >= report_writers.REPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def sales_report_columns(self, first_sale):
+        """Report columns: the sale's own fields (taken from the first sale) followed by related names."""
+        fields = [key for key in first_sale.serialize().keys() if key not in self.REPORT_DROPPED_FIELDS] if first_sale else []
+        return [
+            report_writers.ReportColumn(name, report_writers.column_kind(Sale.__table__.c.get(name)))
+            for name in fields
+        ] + [report_writers.ReportColumn(name, kind) for name, kind in self.REPORT_RELATED_COLUMNS]
+
+    def sales_report_row(self, sale, columns, missing):
+        """One report row; ``missing`` stands in for related records the sale does not have."""
+        sale_dict = sale.serialize()
+        fields = [sale_dict.get(column.name) for column in columns[:-len(self.REPORT_RELATED_COLUMNS)]]
+        sales_id = sale.id if sale.id else None
+        sale_manager_data = sale.sale_manager.serialize() if sale.sale_manager else {}
+        inception_data = sale.inceptions[0].amount_received if sale.inceptions else None
+        sales_executive_code = sale.sales_executive.code if sale.sales_executive else None
+        sales_executive_name = sale.sales_executive.name if sale.sales_executive else None
+        sales_executive_branch = sale.sales_executive.branches[0].name if sale.sales_executive.branches else None
+        product_name = sale.policy_type.name if sale.policy_type else None
+        product_category = sale.policy_type.category.name if sale.policy_type else None
+        product_group = sale.policy_type.group if sale.policy_type.group else None
+        bank_name = sale.bank.name if sale.bank else None
+        bank_branch_name = sale.bank_branch.name if sale.bank_branch else None
+        paypoint_name = sale.paypoint.name if sale.paypoint else None
+
+        return [
+            *fields,
+            sales_id if sales_id else missing,
+            sale_manager_data.get('name', missing),
+            inception_data if inception_data else missing,
+            sales_executive_code if sales_executive_code else missing,
+            sales_executive_name if sales_executive_name else missing,
+            sales_executive_branch if sales_executive_branch else missing,
+            product_name if product_name else missing,
+            product_category if product_category else missing,
+            product_group if product_group else missing,
+            bank_name if bank_name else missing,
+            bank_branch_name if bank_branch_name else missing,
+            paypoint_name if paypoint_name else missing,
         ]
-
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(dynamic_headers)  # Write the header row
-        yield output.getvalue()  # Yield the headers
-        output.seek(0)
-        output.truncate(0)
-
-        # Write each sale's data to the CSV
-        for sale in sales:
-            sale_dict = {k: v for k, v in sale.serialize().items() if k not in columns_to_drop}
-            sales_id = sale.id if sale.id else None
-            sale_manager_data = sale.sale_manager.serialize() if sale.sale_manager else {}
-            inception_data = sale.inceptions[0].amount_received if sale.inceptions else None
-            sales_executive_code = sale.sales_executive.code if sale.sales_executive else None
-            sales_executive_name = sale.sales_executive.name if sale.sales_executive else None
-            sales_executive_branch = sale.sales_executive.branches[0].name if sale.sales_executive.branches else None
-            product_name = sale.policy_type.name if sale.policy_type else None
-            product_category = sale.policy_type.category.name if sale.policy_type else None
-            product_group = sale.policy_type.group if sale.policy_type.group else None
-            bank_name = sale.bank.name if sale.bank else None
-            bank_branch_name = sale.bank_branch.name if sale.bank_branch else None
-            paypoint_name = sale.paypoint.name if sale.paypoint else None
-
-            # Write the row for the current sale
-            writer.writerow([
-                *sale_dict.values(),
-                sales_id if sales_id else 'N/A',
-                sale_manager_data.get('name', 'N/A'),
-                inception_data if inception_data else 'N/A',
-                sales_executive_code if sales_executive_code else 'N/A',
-                sales_executive_name if sales_executive_name else 'N/A',
-                sales_executive_branch if sales_executive_branch else 'N/A',
-                product_name if product_name else 'N/A',
-                product_category if product_category else 'N/A',
-                product_group if product_group else 'N/A',
-                bank_name if bank_name else 'N/A',
-                bank_branch_name if bank_branch_name else 'N/A',
-                paypoint_name if paypoint_name else 'N/A',
-            ])
-
-            yield output.getvalue()  # Yield the current CSV data
-            output.seek(0)
-            output.truncate(0)  # Clear the output for the next row
@@ -1,11 +1,17 @@
+import logging
+from datetime import datetime
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.retention_model import RetentionPolicy, DataType, DataImportance
+from models.retention_model import RetentionPolicy, DataType, DataImportance, RetentionCheckpoint
 from models.audit_model import AuditTrail
 from extensions import db
+from services import archive_segments
+from services.retention_executor import archive_table
 from utils import get_client_ip
 
+logger = logging.getLogger(__name__)
+
 # Define a namespace for retention policy operations
 retention_ns = Namespace(
     'retention',
@@ -49,6 +55,13 @@ data_volume_model = retention_ns.model('DataVolume', {
     'data_type': fields.String(description='Type of data')
 })
 
+archive_restore_model = retention_ns.model('ArchiveRestore', {
+    'data_type': fields.String(required=True, description='Type of data to restore'),
+    'start_date': fields.String(description='Restore records dated on or after (ISO date)'),
+    'end_date': fields.String(description='Restore records dated before (ISO date)'),
+    'segment_ids': fields.List(fields.Integer, description='Restore only these archive segments')
+})
+
 @retention_ns.route('/')
 class RetentionPolicyResource(Resource):
     @retention_ns.doc(security='Bearer Auth')
@@ -193,3 +206,91 @@ class RetentionTypesResource(Resource):
                 f"Error fetching retention types for User {current_user['id']}: {str(e)}"
             )
             return {'message': 'Error fetching retention types'}, 500
+
+@retention_ns.route('/runs')
+class RetentionRunsResource(Resource):
+    @retention_ns.doc(security='Bearer Auth')
+    @jwt_required()
+    def get(self):
+        """Get the progress of the retention executor for each table."""
+        current_user = get_jwt_identity()
+
+        try:
+            checkpoints = RetentionCheckpoint.query.order_by(RetentionCheckpoint.table_name).all()
+            return {'runs': [checkpoint.serialize() for checkpoint in checkpoints]}, 200
+        except Exception as e:
+            logger.error(
+                f"Error fetching retention runs for User {current_user['id']}: {str(e)}"
+            )
+            return {'message': 'Error fetching retention runs'}, 500
+
+@retention_ns.route('/archive/<string:data_type>/<int:original_id>')
+class ArchivedRecordResource(Resource):
+    @retention_ns.doc(security='Bearer Auth', params={
+        'table': 'Table the record was archived from; required for data types archived from several tables'
+    })
+    @jwt_required()
+    def get(self, data_type, original_id):
+        """Get one archived record."""
+        current_user = get_jwt_identity()
+        if current_user['role'].lower() != 'admin':
+            return {'message': 'Unauthorized'}, 403
+
+        try:
+            table_name = archive_table(data_type, request.args.get('table'))
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        try:
+            record = archive_segments.find_record(data_type, original_id, table_name)
+            if record is None:
+                return {'message': 'Archived record not found'}, 404
+            return record, 200
+        except Exception as e:
+            logger.error(
+                f"Error fetching archived {data_type} record {original_id} for User {current_user['id']}: {str(e)}"
+            )
+            return {'message': 'Error fetching archived record'}, 500
+
+@retention_ns.route('/archive/restore')
+class ArchiveRestoreResource(Resource):
+    @retention_ns.expect(archive_restore_model, validate=True)
+    @retention_ns.doc(security='Bearer Auth', responses={200: 'Restored', 400: 'Invalid Input'})
+    @jwt_required()
+    def post(self):
+        """Restore archived records of a data type back into their tables."""
+        current_user = get_jwt_identity()
+        if current_user['role'].lower() != 'admin':
+            return {'message': 'Unauthorized'}, 403
+        data = request.json
+
+        try:
+            DataType(data['data_type'])
+            start_date = datetime.fromisoformat(data['start_date']) if data.get('start_date') else None
+            end_date = datetime.fromisoformat(data['end_date']) if data.get('end_date') else None
+        except ValueError as e:
+            return {'message': f"Invalid input: {str(e)}"}, 400
+
+        try:
+            result = archive_segments.restore(data['data_type'], start_date, end_date, data.get('segment_ids'))
+
+            audit = AuditTrail(
+                user_id=current_user['id'],
+                action='UPDATE',
+                resource_type='retention_archive',
+                details=f"User restored {result['restored']} archived {data['data_type']} records",
+                ip_address=get_client_ip(),
+                user_agent=request.headers.get('User-Agent')
+            )
+            db.session.add(audit)
+            db.session.commit()
+
+            logger.info(
+                f"User {current_user['id']} restored {result['restored']} archived {data['data_type']} records"
+            )
+            return result, 200
+        except Exception as e:
+            logger.error(
+                f"Error restoring archived {data['data_type']} records for User {current_user['id']}: {str(e)}"
+            )
+            return {'message': 'Error restoring archived records'}, 500
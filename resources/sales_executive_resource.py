@@ -8,6 +8,11 @@ from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from utils import get_client_ip
+from services.loading_profiles import with_profile
+from services.query_budget import query_budget
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define a namespace for Sales Executive operations
 sales_executive_ns = Namespace(
@@ -47,6 +52,7 @@ performance_model = sales_executive_ns.model('Performance', {
 @sales_executive_ns.route('/')
 class SalesExecutiveListResource(Resource):
     @sales_executive_ns.doc(security='Bearer Auth')
+    @query_budget(8)
     @jwt_required()
     @sales_executive_ns.param(
         'page',
@@ -82,7 +88,9 @@ class SalesExecutiveListResource(Resource):
         status = request.args.get('status', None)
         sort_by = request.args.get('sort_by', 'created_at')
 
-        sales_executive_query = SalesExecutive.query.filter_by(is_deleted=False)
+        sales_executive_query = with_profile(
+            SalesExecutive.query.filter_by(is_deleted=False), SalesExecutive, 'list'
+        )
 
         if filter_by:
             sales_executive_query = sales_executive_query.filter(
@@ -98,6 +106,14 @@ class SalesExecutiveListResource(Resource):
             error_out=False
         )
 
+        # Serialize before the audit commit expires the loaded executives
+        payload = {
+            'sales_executives': [se.serialize() for se in sales_executives.items],
+            'total': sales_executives.total,
+            'pages': sales_executives.pages,
+            'current_page': sales_executives.page
+        }
+
         # Log the access to audit trail and logger
         logger.info(
             f"User {current_user['id']} accessed the list of Sales Executives."
@@ -114,12 +130,7 @@ class SalesExecutiveListResource(Resource):
         db.session.add(audit)
         db.session.commit()
 
-        return {
-            'sales_executives': [se.serialize() for se in sales_executives.items],
-            'total': sales_executives.total,
-            'pages': sales_executives.pages,
-            'current_page': sales_executives.page
-        }, 200
+        return payload, 200
 
     @sales_executive_ns.doc(
         security='Bearer Auth',
@@ -1,15 +1,18 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from models.performance_model import SalesPerformance, SalesTarget
-from models.sales_model import Sale
 from models.audit_model import AuditTrail
 from models.impact_product_model import ImpactProduct  # Assuming you have a Product model defined
 from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from utils import get_client_ip
+from services import leaderboard
+from services.db_routing import read_only
 from functools import lru_cache
-from sqlalchemy import and_, or_
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define a namespace for sales performance-related operations
 sales_performance_ns = Namespace(
@@ -123,75 +126,10 @@ def validate_performance_data(data):
                 raise ValueError('Achievement rate percentage must be between 0 and 100')
 
 
-@lru_cache(maxsize=100)
-def get_actual_sales_count(target):
-    """Count actual sales based on target criteria and date range with caching."""
-    base_query = Sale.query.filter(
-        Sale.sale_manager_id == target.sales_manager_id,
-        Sale.is_deleted == False,
-        Sale.created_at.between(target.period_start, target.period_end)
-    )
-
-    if target.target_criteria_type in ['source_type', 'subsequent_pay_source_type']:
-        base_query = base_query.filter(
-            or_(
-                Sale.source_type == target.target_criteria_value,
-                Sale.subsequent_pay_source_type == target.target_criteria_value
-            )
-        )
-    elif target.target_criteria_type == 'product_group':
-        base_query = base_query.join(ImpactProduct).filter(
-            ImpactProduct.id == target.target_criteria_value
-        )
-
-    return base_query.count()
-
-
-@lru_cache(maxsize=100)
-def get_actual_premium_amount(target):
-    """Calculate total premium amount based on target criteria and date range with caching."""
-    base_query = db.session.query(db.func.sum(Sale.amount)).filter(
-        Sale.sale_manager_id == target.sales_manager_id,
-        Sale.is_deleted == False,
-        Sale.created_at.between(target.period_start, target.period_end)
-    )
-
-    if target.target_criteria_type in ['source_type', 'subsequent_pay_source_type']:
-        base_query = base_query.filter(
-            or_(
-                Sale.source_type == target.target_criteria_value,
-                Sale.subsequent_pay_source_type == target.target_criteria_value
-            )
-        )
-    elif target.target_criteria_type == 'product_group':
-        base_query = base_query.join(ImpactProduct).filter(
-            ImpactProduct.id == target.target_criteria_value
-        )
-
-    result = base_query.scalar()
-    return result or 0.0
-
-
-def get_criteria_met_count(target):
-    """Count of sales that met the criteria within the target date range."""
-    query = Sale.query.filter(
-        Sale.sale_manager_id == target.sales_manager_id,
-        Sale.is_deleted == False,
-        Sale.created_at.between(target.period_start, target.period_end)  # Ensure it's within the target date range
-    )
-
-    # Dynamic criteria handling
-    if target.target_criteria_type in ['source_type', 'subsequent_pay_source_type']:
-        query = query.filter(
-            (Sale.source_type == target.target_criteria_value) |
-            (Sale.subsequent_pay_source_type == target.target_criteria_value)
-        )
-    elif target.target_criteria_type == 'product_group':
-        query = query.join(ImpactProduct).filter(ImpactProduct.id == target.target_criteria_value)
-    elif target.target_criteria_type == 'overall':
-        pass  # All sales that meet overall criteria
-
-    return query.count()
+def get_criteria_met_count(target_id):
+    """Count of sales that met the target's criteria within its date range."""
+    actuals = SalesPerformance.compute_target_actuals(target_ids=[target_id])
+    return actuals[target_id]['criteria_met_count'] if target_id in actuals else 0
 
 
 @sales_performance_ns.route('/')
@@ -204,6 +142,7 @@ class SalesPerformanceResource(Resource):
     @sales_performance_ns.param('target_id', 'Filter by Sales Target ID', type='integer')
     @sales_performance_ns.param('criteria_type', 'Filter by Criteria Type (e.g., source_type)', type='string')
     @sales_performance_ns.param('criteria_value', 'Filter by Criteria Value (e.g., paypoint)', type='string')
+    @read_only
     def get(self):
         """Retrieve sales performance records with pagination and optional filters."""
         current_user = get_jwt_identity()
@@ -269,7 +208,7 @@ class SalesPerformanceResource(Resource):
             return {'message': 'Sales Target not found'}, 404
 
         # Calculate criteria met count
-        criteria_met_count = get_criteria_met_count(target)
+        criteria_met_count = get_criteria_met_count(target.id)
 
         # Create new sales performance with dynamic criteria
         new_sales_performance = SalesPerformance(
@@ -306,6 +245,7 @@ class SalesPerformanceResource(Resource):
 class SingleSalesPerformanceResource(Resource):
     @sales_performance_ns.doc(security='Bearer Auth', responses={200: 'Success', 404: 'Sales Performance not found', 403: 'Unauthorized'})
     @jwt_required()
+    @read_only
     def get(self, performance_id):
         """Retrieve a specific sales performance by its ID."""
         current_user = get_jwt_identity()
@@ -357,7 +297,8 @@ class SingleSalesPerformanceResource(Resource):
         sales_performance.criteria_value = data.get('criteria_value', sales_performance.criteria_value)
 
         # Recalculate criteria met count
-        sales_performance.criteria_met_count = get_criteria_met_count(sales_performance)
+        if sales_performance.target_id:
+            sales_performance.criteria_met_count = get_criteria_met_count(sales_performance.target_id)
 
         sales_performance.performance_date = data.get('performance_date', sales_performance.performance_date)
         sales_performance.updated_at = datetime.utcnow()
@@ -421,52 +362,34 @@ class AutoGeneratePerformanceResource(Resource):
     def post(self):
         """Automatically generate sales performance records for all sales managers based on targets."""
         try:
-            # Fetch all active sales targets
-            sales_targets = SalesTarget.query.filter_by(is_active=True, is_deleted=False).all()
-            sales_performance_records = []
-
-            for target in sales_targets:
-                # Logic to calculate actual sales count and premium amount based on the target within the target date range
-                actual_sales_count = get_actual_sales_count(target)
-                actual_premium_amount = get_actual_premium_amount(target)
-                criteria_met_count = get_criteria_met_count(target)  # Calculate criteria met count
-
-                # Create new sales performance record
-                performance_record = SalesPerformance(
-                    sales_manager_id=target.sales_manager_id,
-                    actual_sales_count=actual_sales_count,
-                    actual_premium_amount=actual_premium_amount,
-                    target_id=target.id,
-                    criteria_type=target.target_criteria_type,
-                    criteria_value=target.target_criteria_value,
-                    criteria_met_count=criteria_met_count,  # Include criteria met count
-                    performance_date=datetime.utcnow().date()  # Use today's date for the performance date
-                )
-                db.session.add(performance_record)
-                sales_performance_records.append(performance_record)
-
-            db.session.commit()
+            # Compute actuals for every active target in one pass and upsert today's records
+            result = SalesPerformance.refresh_from_targets(insert_missing=True)
+            records_count = result['inserted'] + result['updated']
 
             # Log the auto-generation to audit trail
             audit = AuditTrail(
                 user_id=get_jwt_identity()['id'],
                 action='ACCESS',
                 resource_type='sales_performance',
-                details=f"User auto-generated sales performance records for {len(sales_performance_records)} managers.",
+                details=f"User auto-generated sales performance records for {records_count} managers.",
                 ip_address=get_client_ip(),
                 user_agent=request.headers.get('User-Agent')
             )
             db.session.add(audit)
             db.session.commit()
 
-            return {'message': 'Sales performance records auto-generated successfully', 'records_count': len(sales_performance_records)}, 201
+            return {
+                'message': 'Sales performance records auto-generated successfully',
+                'records_count': records_count,
+                'inserted_count': result['inserted'],
+                'updated_count': result['updated']
+            }, 201
 
         except Exception as e:
             logger.error(f"Error during auto generation of sales performance: {e}")
             return {'message': 'Error during auto generation'}, 500
 
 
-
 @sales_performance_ns.route('/auto-update')
 class AutoUpdatePerformanceResource(Resource):
     @sales_performance_ns.doc(security='Bearer Auth')
@@ -474,33 +397,9 @@ class AutoUpdatePerformanceResource(Resource):
     def post(self):
         """Automatically update sales performance records for all sales managers based on targets."""
         try:
-            # Fetch all active sales targets
-            sales_targets = SalesTarget.query.filter_by(is_active=True, is_deleted=False).all()
-            updated_records_count = 0
-
-            for target in sales_targets:
-                # Logic to calculate actual sales count and premium amount based on the target within the target date range
-                actual_sales_count = get_actual_sales_count(target)
-                actual_premium_amount = get_actual_premium_amount(target)
-
-                # Check for existing performance record
-                performance_record = SalesPerformance.query.filter_by(
-                    sales_manager_id=target.sales_manager_id,
-                    target_id=target.id,
-                    criteria_type=target.target_criteria_type,
-                    criteria_value=target.target_criteria_value,
-                    performance_date=datetime.utcnow().date()  # Use today's date for the performance date
-                ).first()
-
-                if performance_record:
-                    # Update existing record
-                    performance_record.actual_sales_count = actual_sales_count
-                    performance_record.actual_premium_amount = actual_premium_amount
-                    performance_record.criteria_met_count = get_criteria_met_count(target)  # Update criteria met count
-                    performance_record.updated_at = datetime.utcnow()
-                    updated_records_count += 1
-
-            db.session.commit()
+            # Only refresh records that already exist for today
+            result = SalesPerformance.refresh_from_targets(insert_missing=False)
+            updated_records_count = result['updated']
 
             # Log the auto-update to audit trail
             audit = AuditTrail(
@@ -521,11 +420,110 @@ class AutoUpdatePerformanceResource(Resource):
             return {'message': 'Error during auto update'}, 500
 
 
+@sales_performance_ns.route('/leaderboard')
+class LeaderboardResource(Resource):
+    @sales_performance_ns.doc(security='Bearer Auth', responses={200: 'Success', 400: 'Invalid Input', 403: 'Unauthorized'})
+    @jwt_required()
+    @sales_performance_ns.param('period', 'Leaderboard period (day/week/month)', type='string', default='month')
+    @sales_performance_ns.param('entity', 'Ranked entity (manager/executive/branch)', type='string', default='manager')
+    @sales_performance_ns.param('metric', 'Ranking metric (count/premium/achievement)', type='string', default='premium')
+    @sales_performance_ns.param('limit', 'Number of entries to return', type='integer', default=10)
+    @read_only
+    def get(self):
+        """Get the top-N standings for the current day, week or month."""
+        current_user = get_jwt_identity()
+        if not check_role_permission(current_user, 'sales_manager'):
+            logger.warning(f"Unauthorized leaderboard access attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        period = request.args.get('period', 'month')
+        entity = request.args.get('entity', 'manager')
+        metric = request.args.get('metric', 'premium')
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+
+        try:
+            standings = leaderboard.top(period, entity, metric, limit)
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        return {
+            'period': period,
+            'period_key': leaderboard.period_key(period),
+            'entity': entity,
+            'metric': metric,
+            'standings': standings
+        }, 200
+
+
+@sales_performance_ns.route('/leaderboard/<string:entity>/<int:member_id>')
+class LeaderboardRankResource(Resource):
+    @sales_performance_ns.doc(security='Bearer Auth', responses={200: 'Success', 400: 'Invalid Input', 403: 'Unauthorized'})
+    @jwt_required()
+    @sales_performance_ns.param('period', 'Leaderboard period (day/week/month)', type='string', default='month')
+    @read_only
+    def get(self, entity, member_id):
+        """Get a manager's, executive's or branch's rank on every metric."""
+        current_user = get_jwt_identity()
+        if not check_role_permission(current_user, 'sales_manager'):
+            logger.warning(f"Unauthorized leaderboard rank access attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        period = request.args.get('period', 'month')
+        try:
+            ranks = {
+                metric: leaderboard.rank(period, entity, metric, member_id)
+                for metric in leaderboard.METRICS
+            }
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        return {
+            'period': period,
+            'period_key': leaderboard.period_key(period),
+            'entity': entity,
+            'id': member_id,
+            'ranks': ranks
+        }, 200
+
+
+@sales_performance_ns.route('/leaderboard/rebuild')
+class LeaderboardRebuildResource(Resource):
+    @sales_performance_ns.doc(security='Bearer Auth', responses={200: 'Rebuilt', 403: 'Unauthorized', 500: 'Internal Server Error'})
+    @jwt_required()
+    def post(self):
+        """Rebuild the current leaderboards from the database (admin only)."""
+        current_user = get_jwt_identity()
+        if not check_role_permission(current_user, 'admin'):
+            logger.warning(f"Unauthorized leaderboard rebuild attempt by User ID {current_user['id']}.")
+            return {'message': 'Unauthorized'}, 403
+
+        try:
+            rebuilt = leaderboard.rebuild()
+        except Exception as e:
+            logger.error(f"Error rebuilding leaderboards: {str(e)}")
+            return {'message': 'Error rebuilding leaderboards'}, 500
+
+        # Log the rebuild to audit trail
+        audit = AuditTrail(
+            user_id=current_user['id'],
+            action='UPDATE',
+            resource_type='leaderboard',
+            details="User rebuilt sales leaderboards",
+            ip_address=get_client_ip(),
+            user_agent=request.headers.get('User-Agent')
+        )
+        db.session.add(audit)
+        db.session.commit()
+
+        return {'message': 'Leaderboards rebuilt successfully', 'members': rebuilt}, 200
+
+
 @sales_performance_ns.route('/comparison/<int:sales_manager_id>')
 class PerformanceComparisonResource(Resource):
     @sales_performance_ns.doc(security='Bearer Auth')
     @jwt_required()
     @sales_performance_ns.param('period', 'Comparison period (month/quarter/year)', type='string', default='month')
+    @read_only
     def get(self, sales_manager_id):
         """Get performance comparison for a sales manager."""
         current_user = get_jwt_identity()
@@ -562,6 +560,7 @@ class TeamPerformanceResource(Resource):
     @jwt_required()
     @sales_performance_ns.param('start_date', 'Start date for performance period', type='string')
     @sales_performance_ns.param('end_date', 'End date for performance period', type='string')
+    @read_only
     def get(self):
         """Get team performance metrics."""
         current_user = get_jwt_identity()
@@ -614,6 +613,7 @@ class PerformanceTrendsResource(Resource):
         'End date for trend analysis',
         type='string'
     )
+    @read_only
     def get(self, sales_manager_id):
         """Get performance trends for a sales manager."""
         try:
@@ -1,20 +1,39 @@
 from flask_restx import Namespace, Resource, fields
-from flask import request
+from flask import request, Response
 from models.sales_model import Sale
 from models.audit_model import AuditTrail
-from models.performance_model import SalesPerformance
 from extensions import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_, func
+from sqlalchemy import func
 from datetime import datetime, timedelta
 from utils import get_client_ip
-import re
+from services.search import search_sales, search_filter
+from services.serial_index import get_serial_index, check_serials
+from services.loading_profiles import with_profile
+from services.query_budget import query_budget
+from services.db_routing import read_only
+from services.validation_rules import get_rules
+from services.customer_profiles import get_profile, find_by_id_number
+from services.sale_projection import (
+    SCALAR_FIELDS, parse_projection, project_query, encode_json
+)
+from services.sale_events import (
+    sale_snapshot, on_sale_created, on_sale_updated, on_sale_deleted
+)
+import logging
 from functools import wraps
 
+logger = logging.getLogger(__name__)
+
 
 # Define a namespace for sales operations
 sales_ns = Namespace('sales', description='Sales operations')
 
+# Upper bound on serial numbers per batch existence check
+MAX_SERIAL_BATCH_SIZE = 1000
+# Upper bound on sale payloads per batch validation
+MAX_VALIDATION_BATCH_SIZE = 5000
+
 
 # Define model for Swagger documentation
 sale_model = sales_ns.model('Sale', {
@@ -104,76 +123,24 @@ def handle_errors(f):
     return wrapped
 
 
-def validate_phone_number(phone):
-    """Validate phone number format."""
-    pattern = r'^\+?[0-9]{10,15}$'
-    return bool(re.match(pattern, phone))
-
-
-def validate_id_number(id_no):
-    """Validate ID number format."""
-    if not id_no:
-        return True
-    pattern = r'^[A-Z0-9]{6,20}$'
-    return bool(re.match(pattern, id_no))
-
-
-def validate_geolocation(lat, lng):
-    """Validate geolocation coordinates."""
-    if lat is None or lng is None:
-        return True
-    return -90 <= lat <= 90 and -180 <= lng <= 180
-
-
-def validate_amount(amount):
-    """Validate sale amount."""
-    return amount > 0
-
-
 def validate_sale_data(data):
     """Validate all sale data."""
-    errors = []
-
-    # Required fields validation
-    required_fields = [
-        'sale_manager_id', 'sales_executive_id', 'client_name',
-        'client_phone', 'serial_number', 'policy_type_id', 'amount'
-    ]
-    for field in required_fields:
-        if field not in data:
-            errors.append(f'Missing required field: {field}')
-
-    # Phone number validation
-    if 'client_phone' in data and not validate_phone_number(
-        data['client_phone']
-    ):
-        errors.append('Invalid phone number format')
-
-    # ID number validation
-    if 'client_id_no' in data and not validate_id_number(
-        data['client_id_no']
-    ):
-        errors.append('Invalid ID number format')
-
-    # Amount validation
-    if 'amount' in data and not validate_amount(data['amount']):
-        errors.append('Amount must be greater than 0')
-
-    # Geolocation validation
-    if ('geolocation_latitude' in data or 'geolocation_longitude' in data) \
-       and not validate_geolocation(
-           data.get('geolocation_latitude'),
-           data.get('geolocation_longitude')
-       ):
-        errors.append('Invalid geolocation coordinates')
-
+    errors = get_rules().validate_sale(data)
     if errors:
         raise ValueError('; '.join(errors))
 
 
+def json_response(payload, status=200):
+    """Return a payload encoded with the fast JSON encoder."""
+    return Response(encode_json(payload), status=status, mimetype='application/json')
+
+
 @sales_ns.route('/')
 class SaleListResource(Resource):
     @sales_ns.doc(security='Bearer Auth')
+    @sales_ns.param('fields', 'Comma-separated Sale fields, e.g. id,client_name,policy_type.name', type='string')
+    @sales_ns.param('expand', 'Comma-separated relations to include, e.g. sale_manager,policy_type', type='string')
+    @query_budget(10)
     @jwt_required()
     @handle_errors
     def get(self):
@@ -185,6 +152,15 @@ class SaleListResource(Resource):
         per_page = request.args.get('per_page', 10, type=int)
         filter_by = request.args.get('filter_by', None)
         sort_by = request.args.get('sort_by', 'created_at')
+        if sort_by not in SCALAR_FIELDS:
+            raise ValueError(f'Invalid sort field: {sort_by}')
+
+        # Sparse fieldsets: project only the requested columns and relations
+        fields_param = request.args.get('fields')
+        expand_param = request.args.get('expand')
+        projection = None
+        if fields_param or expand_param:
+            projection = parse_projection(fields_param, expand_param)
 
         # Extended filters
         start_date = request.args.get('start_date', None)
@@ -201,10 +177,7 @@ class SaleListResource(Resource):
         sales_query = Sale.query.filter_by(is_deleted=False)
 
         if filter_by:
-            sales_query = sales_query.filter(or_(
-                Sale.client_name.ilike(f'%{filter_by}%'),
-                Sale.client_phone.ilike(f'%{filter_by}%')
-            ))
+            sales_query = sales_query.filter(search_filter(filter_by))
 
         # Date range filter
         if start_date and end_date:
@@ -232,10 +205,26 @@ class SaleListResource(Resource):
             sales_query = sales_query.filter_by(status=status)
 
         # Execute query with pagination
-        sales = sales_query.order_by(sort_by).paginate(
+        sales_query = sales_query.order_by(getattr(Sale, sort_by))
+        if projection:
+            sales_query, to_dict = project_query(sales_query, *projection)
+        else:
+            sales_query = with_profile(sales_query, Sale, 'list')
+        sales = sales_query.paginate(
             page=page, per_page=per_page, error_out=False
         )
 
+        # Serialize before the audit commit expires the loaded sales
+        payload = {
+            'sales': [
+                to_dict(row) if projection else row.serialize()
+                for row in sales.items
+            ],
+            'total': sales.total,
+            'pages': sales.pages,
+            'current_page': sales.page
+        }
+
         # Log access to audit trail
         logger.info(f"User {current_user['id']} accessed sales list")
         audit = AuditTrail(
@@ -250,12 +239,9 @@ class SaleListResource(Resource):
         db.session.add(audit)
         db.session.commit()
 
-        return {
-            'sales': [sale.serialize() for sale in sales.items],
-            'total': sales.total,
-            'pages': sales.pages,
-            'current_page': sales.page
-        }, 200
+        if projection:
+            return json_response(payload)
+        return payload, 200
 
     @sales_ns.doc(
         security='Bearer Auth',
@@ -278,14 +264,8 @@ class SaleListResource(Resource):
             db.session.add(sale)
             db.session.commit()
 
-            # Update sales performance
-            performance = SalesPerformance.query.filter_by(
-                sales_executive_id=data['sales_executive_id']
-            ).first()
-            if performance:
-                performance.total_sales += 1
-                performance.total_amount += data['amount']
-                db.session.commit()
+            # Update leaderboards and other derived read models
+            on_sale_created(sale)
 
             # Log creation to audit trail
             logger.info(f"User {current_user['id']} created sale: {sale.id}")
@@ -308,6 +288,30 @@ class SaleListResource(Resource):
             return {'message': 'Error creating sale'}, 500
 
 
+@sales_ns.route('/search')
+class SaleSearchResource(Resource):
+    @sales_ns.doc(
+        security='Bearer Auth',
+        responses={200: 'OK', 400: 'Invalid Input'}
+    )
+    @sales_ns.param('q', 'Client name, phone or serial number (prefix or approximate)', type='string', required=True)
+    @sales_ns.param('limit', 'Maximum number of results', type='integer', default=20)
+    @sales_ns.param('cursor', 'Cursor returned as next_cursor by the previous page', type='string')
+    @jwt_required()
+    @handle_errors
+    def get(self):
+        """Search sales by client name, phone or serial number, best matches first."""
+        current_user = get_jwt_identity()
+        results = search_sales(
+            request.args.get('q', ''),
+            limit=request.args.get('limit', 20, type=int),
+            cursor=request.args.get('cursor')
+        )
+
+        logger.info(f"User {current_user['id']} searched sales")
+        return results, 200
+
+
 @sales_ns.route('/check-serial')
 class SerialNumberCheckResource(Resource):
     @sales_ns.doc(
@@ -321,26 +325,164 @@ class SerialNumberCheckResource(Resource):
         if not serial_number:
             return {'message': 'Serial number not provided'}, 400
 
-        exists = Sale.query.filter_by(
-            serial_number=serial_number,
-            is_deleted=False
-        ).first() is not None
+        exists = get_serial_index().exists(serial_number)
 
         return {'exists': exists}, 200
 
 
+@sales_ns.route('/check-serials')
+class SerialNumberBatchCheckResource(Resource):
+    @sales_ns.doc(
+        security='Bearer Auth',
+        responses={200: 'OK', 400: 'Invalid Input'}
+    )
+    @sales_ns.expect(sales_ns.model('SerialNumberBatch', {
+        'serial_numbers': fields.List(
+            fields.String, required=True,
+            description='Serial numbers to check'
+        )
+    }), validate=True)
+    @jwt_required()
+    def post(self):
+        """Check whether each of many serial numbers is already in use."""
+        serial_numbers = request.json.get('serial_numbers') or []
+        if len(serial_numbers) > MAX_SERIAL_BATCH_SIZE:
+            return {
+                'message': f'At most {MAX_SERIAL_BATCH_SIZE} serial numbers can be checked at once'
+            }, 400
+
+        return {'results': check_serials(serial_numbers)}, 200
+
+
+@sales_ns.route('/validate')
+class SaleBatchValidationResource(Resource):
+    @sales_ns.doc(
+        security='Bearer Auth',
+        responses={200: 'OK', 400: 'Invalid Input'}
+    )
+    @sales_ns.expect(sales_ns.model('SaleValidationBatch', {
+        'sales': fields.List(
+            fields.Raw, required=True,
+            description='Sale payloads to validate'
+        )
+    }), validate=True)
+    @jwt_required()
+    def post(self):
+        """Validate many sale payloads without saving them, e.g. before a bulk import."""
+        payloads = request.json.get('sales') or []
+        if len(payloads) > MAX_VALIDATION_BATCH_SIZE:
+            return {
+                'message': f'At most {MAX_VALIDATION_BATCH_SIZE} sales can be validated at once'
+            }, 400
+        if not all(isinstance(payload, dict) for payload in payloads):
+            return {'message': 'Each sale must be an object'}, 400
+
+        results = get_rules().validate_sales(payloads)
+        invalid = [
+            {'index': index, 'errors': errors}
+            for index, errors in enumerate(results) if errors
+        ]
+        return {
+            'total': len(payloads),
+            'valid': len(payloads) - len(invalid),
+            'invalid': invalid
+        }, 200
+
+
+@sales_ns.route('/customers')
+class CustomerLookupResource(Resource):
+    @sales_ns.doc(
+        security='Bearer Auth',
+        responses={200: 'OK', 400: 'Invalid Input'}
+    )
+    @sales_ns.param('id_number', 'Client ID number', type='string', required=True)
+    @jwt_required()
+    @handle_errors
+    @read_only
+    def get(self):
+        """Find customer profiles by ID number."""
+        current_user = get_jwt_identity()
+        id_number = request.args.get('id_number', '').strip()
+        if not id_number:
+            return {'message': 'id_number is required'}, 400
+        # Serialize before the audit commit expires the loaded profiles
+        customers = [profile.serialize() for profile in find_by_id_number(id_number)]
+
+        # Log access to audit trail
+        logger.info(f"User {current_user['id']} looked up customers by ID number")
+        audit = AuditTrail(
+            user_id=current_user['id'],
+            action='ACCESS',
+            resource_type='customer_profile_lookup',
+            resource_id=None,
+            details=f"User looked up customers by ID number, {len(customers)} found",
+            ip_address=get_client_ip(),
+            user_agent=request.headers.get('User-Agent')
+        )
+        db.session.add(audit)
+        db.session.commit()
+
+        return {'customers': customers}, 200
+
+
+@sales_ns.route('/customers/<string:phone>')
+class CustomerProfileResource(Resource):
+    @sales_ns.doc(
+        security='Bearer Auth',
+        responses={200: 'OK', 404: 'Customer Not Found'}
+    )
+    @jwt_required()
+    @handle_errors
+    @read_only
+    def get(self, phone):
+        """Retrieve a customer's purchase history summary by phone number, in any common format."""
+        current_user = get_jwt_identity()
+        profile = get_profile(phone)
+        if not profile:
+            return {'message': 'Customer not found'}, 404
+        profile_id, payload = profile.id, profile.serialize()
+
+        # Log access to audit trail
+        logger.info(f"User {current_user['id']} accessed customer profile with ID {profile_id}")
+        audit = AuditTrail(
+            user_id=current_user['id'],
+            action='ACCESS',
+            resource_type='customer_profile',
+            resource_id=profile_id,
+            details=f"User accessed customer profile with ID {profile_id}",
+            ip_address=get_client_ip(),
+            user_agent=request.headers.get('User-Agent')
+        )
+        db.session.add(audit)
+        db.session.commit()
+
+        return payload, 200
+
+
 @sales_ns.route('/<int:sale_id>')
 class SaleDetailResource(Resource):
     @sales_ns.doc(
         security='Bearer Auth',
         responses={200: 'OK', 404: 'Sale Not Found'}
     )
+    @sales_ns.param('fields', 'Comma-separated Sale fields, e.g. id,client_name,policy_type.name', type='string')
+    @sales_ns.param('expand', 'Comma-separated relations to include, e.g. sale_manager,policy_type', type='string')
+    @query_budget(6)
     @jwt_required()
+    @handle_errors
     def get(self, sale_id):
         """Retrieve a single sale by ID."""
         current_user = get_jwt_identity()
 
-        sale = Sale.query.filter_by(id=sale_id, is_deleted=False).first()
+        fields_param = request.args.get('fields')
+        expand_param = request.args.get('expand')
+        sales_query = Sale.query.filter_by(id=sale_id, is_deleted=False)
+        if fields_param or expand_param:
+            projected, to_dict = project_query(sales_query, *parse_projection(fields_param, expand_param))
+            row = projected.first()
+            sale = to_dict(row) if row else None
+        else:
+            sale = with_profile(sales_query, Sale, 'detail').first()
         if not sale:
             return {'message': 'Sale not found'}, 404
 
@@ -358,6 +500,8 @@ class SaleDetailResource(Resource):
         db.session.add(audit)
         db.session.commit()
 
+        if isinstance(sale, dict):
+            return json_response(sale)
         return sale.serialize(), 200
 
     @sales_ns.doc(
@@ -369,11 +513,14 @@ class SaleDetailResource(Resource):
     def put(self, sale_id):
         """Update an existing sale by ID."""
         current_user = get_jwt_identity()
-        sale = Sale.query.filter_by(id=sale_id, is_deleted=False).first()
+        sale = with_profile(
+            Sale.query.filter_by(id=sale_id, is_deleted=False), Sale, 'detail'
+        ).first()
         if not sale:
             return {'message': 'Sale not found'}, 404
 
         data = request.json
+        before = sale_snapshot(sale)
 
         try:
             # Update fields
@@ -435,6 +582,7 @@ class SaleDetailResource(Resource):
             # Check for duplicates during update
             sale = sale.check_duplicate()
             db.session.commit()
+            on_sale_updated(before, sale)
 
             # Log the update to audit trail
             logger.info(
@@ -461,27 +609,34 @@ class SaleDetailResource(Resource):
         security='Bearer Auth',
         responses={200: 'Deleted', 404: 'Sale Not Found'}
     )
+    # Nine of these keep the derived read models (search, heatmap, customer profile, daily aggregate) in step
+    @query_budget(12)
     @jwt_required()
     def delete(self, sale_id):
         """Soft delete a sale by marking it as deleted."""
         current_user = get_jwt_identity()
-        sale = Sale.query.filter_by(id=sale_id, is_deleted=False).first()
+        sale = with_profile(
+            Sale.query.filter_by(id=sale_id, is_deleted=False), Sale, 'exists'
+        ).first()
         if not sale:
             return {'message': 'Sale not found'}, 404
 
+        # Snapshot before committing, so the expired sale is not loaded again
+        snapshot = sale_snapshot(sale)
         sale.is_deleted = True
         db.session.commit()
+        on_sale_deleted(snapshot)
 
         # Log the deletion to audit trail
         logger.info(
-            f"User {current_user['id']} soft-deleted sale with ID {sale.id}"
+            f"User {current_user['id']} soft-deleted sale with ID {sale_id}"
         )
         audit = AuditTrail(
             user_id=current_user['id'],
             action='DELETE',
             resource_type='sale',
-            resource_id=sale.id,
-            details=f"User soft-deleted sale with ID {sale.id}",
+            resource_id=sale_id,
+            details=f"User soft-deleted sale with ID {sale_id}",
             ip_address=get_client_ip(),
             user_agent=request.headers.get('User-Agent')
         )
@@ -496,6 +651,7 @@ class SalesMetricsResource(Resource):
     @sales_ns.doc(security='Bearer Auth')
     @jwt_required()
     @handle_errors
+    @read_only
     def get(self):
         """Get sales metrics and statistics."""
         current_user = get_jwt_identity()
@@ -9,6 +9,10 @@ from datetime import datetime
 from utils import get_client_ip
 from functools import lru_cache
 from sqlalchemy import and_, or_
+from services.forecasting import forecast_targets, DEFAULT_LOOKBACK_DAYS, DEFAULT_ROLLING_WINDOW
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define a namespace for Sales Target operations
 sales_target_ns = Namespace('sales_target', description='Sales Target operations')
@@ -138,6 +142,24 @@ def check_role_permission(current_user, required_roles):
     return current_user['role'].lower() in required_roles
 
 
+def get_forecast_scope(current_user):
+    """Resolve which sales managers' targets the user may forecast."""
+    if check_role_permission(current_user, ['admin', 'manager', 'back_office']):
+        sales_manager_id = request.args.get('sales_manager_id', type=int)
+        return [sales_manager_id] if sales_manager_id else None
+    return [current_user['id']]
+
+
+def get_forecast_options():
+    """Parse and clamp the shared forecast query parameters."""
+    lookback_days = request.args.get('lookback_days', DEFAULT_LOOKBACK_DAYS, type=int)
+    rolling_window = request.args.get('rolling_window', DEFAULT_ROLLING_WINDOW, type=int)
+    return {
+        'lookback_days': min(max(lookback_days, 1), 366),
+        'rolling_window': min(max(rolling_window, 1), 90)
+    }
+
+
 @sales_target_ns.route('/')
 class SalesTargetListResource(Resource):
     @sales_target_ns.doc(security='Bearer Auth')
@@ -409,3 +431,82 @@ class SalesTargetResource(Resource):
             logger.error(f"Error deleting sales target: {str(e)}")
             db.session.rollback()
             return {'message': 'Error deleting sales target'}, 400
+
+
+@sales_target_ns.route('/forecasts')
+class SalesTargetForecastResource(Resource):
+    @sales_target_ns.doc(security='Bearer Auth', responses={200: 'Success', 500: 'Internal Server Error'})
+    @jwt_required()
+    @sales_target_ns.param('sales_manager_id', 'Filter by Sales Manager ID (admin and manager only)', type='integer')
+    @sales_target_ns.param('lookback_days', 'Days of daily performance to load', type='integer', default=DEFAULT_LOOKBACK_DAYS)
+    @sales_target_ns.param('rolling_window', 'Days used for the rolling-rate forecast', type='integer', default=DEFAULT_ROLLING_WINDOW)
+    @sales_target_ns.param('include_trend', 'Include the daily trend series', type='boolean', default=False)
+    def get(self):
+        """Forecast achievement and alerts for all of the team's active targets."""
+        current_user = get_jwt_identity()
+        sales_manager_ids = get_forecast_scope(current_user)
+        include_trend = request.args.get('include_trend', 'false').lower() == 'true'
+
+        try:
+            forecasts = forecast_targets(
+                sales_manager_ids=sales_manager_ids,
+                include_trend=include_trend,
+                **get_forecast_options()
+            )
+        except ValueError as e:
+            logger.error(f"Error forecasting sales targets: {str(e)}")
+            return {'message': 'Error forecasting sales targets'}, 500
+
+        # Log the access to audit trail
+        audit = AuditTrail(
+            user_id=current_user['id'],
+            action='ACCESS',
+            resource_type='sales_target_forecast',
+            details=f"User accessed forecasts for {len(forecasts)} Sales Targets",
+            ip_address=get_client_ip(),
+            user_agent=request.headers.get('User-Agent')
+        )
+        db.session.add(audit)
+        db.session.commit()
+
+        return {'forecasts': forecasts, 'total': len(forecasts)}, 200
+
+
+@sales_target_ns.route('/alerts')
+class SalesTargetAlertResource(Resource):
+    @sales_target_ns.doc(security='Bearer Auth', responses={200: 'Success', 500: 'Internal Server Error'})
+    @jwt_required()
+    @sales_target_ns.param('sales_manager_id', 'Filter by Sales Manager ID (admin and manager only)', type='integer')
+    @sales_target_ns.param('severity', 'Only return alerts of this severity (warning/critical)', type='string')
+    def get(self):
+        """List performance alerts across all of the team's active targets."""
+        current_user = get_jwt_identity()
+        sales_manager_ids = get_forecast_scope(current_user)
+        severity = request.args.get('severity')
+
+        try:
+            forecasts = forecast_targets(sales_manager_ids=sales_manager_ids, **get_forecast_options())
+        except ValueError as e:
+            logger.error(f"Error checking sales target alerts: {str(e)}")
+            return {'message': 'Error checking sales target alerts'}, 500
+
+        alerts = [
+            dict(alert, target_id=forecast['target_id'], sales_manager_id=forecast['sales_manager_id'])
+            for forecast in forecasts
+            for alert in forecast['alerts']
+            if not severity or alert['severity'] == severity
+        ]
+
+        # Log the access to audit trail
+        audit = AuditTrail(
+            user_id=current_user['id'],
+            action='ACCESS',
+            resource_type='sales_target_alerts',
+            details=f"User accessed {len(alerts)} Sales Target alerts",
+            ip_address=get_client_ip(),
+            user_agent=request.headers.get('User-Agent')
+        )
+        db.session.add(audit)
+        db.session.commit()
+
+        return {'alerts': alerts, 'total': len(alerts)}, 200
@@ -11,7 +11,10 @@ from datetime import datetime
 from utils import get_client_ip
 import json
 from functools import wraps
+from services.loading_profiles import with_profile
+import logging
 
+logger = logging.getLogger(__name__)
 
 # Define namespace
 under_inv_ns = Namespace(
@@ -162,7 +165,9 @@ def validate_investigation_data(data):
 
     # Validate sale exists
     if 'sale_id' in data:
-        sale = Sale.query.filter_by(id=data['sale_id'], is_deleted=False).first()
+        sale = with_profile(
+            Sale.query.filter_by(id=data['sale_id'], is_deleted=False), Sale, 'exists'
+        ).first()
         if not sale:
             errors.append(f'Sale ID {data["sale_id"]} not found')
 
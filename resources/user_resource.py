@@ -13,6 +13,9 @@ import re
 from functools import lru_cache
 import logging
 
+from services.loading_profiles import with_profile
+from services.query_budget import query_budget
+
 logger = logging.getLogger(__name__)
 
 # Define a namespace for User-related operations
@@ -143,6 +146,7 @@ def validate_status_transition(current_status, new_status):
 @user_ns.route('/')
 class UserListResource(Resource):
     @user_ns.doc(security='Bearer Auth')
+    @query_budget(8)
     @jwt_required()
     @user_ns.param('page', 'Page number for pagination', type='integer', default=1)
     @user_ns.param('per_page', 'Number of items per page', type='integer', default=10)
@@ -157,13 +161,21 @@ class UserListResource(Resource):
         filter_by = request.args.get('filter_by', None)
         sort_by = request.args.get('sort_by', 'created_at')
 
-        user_query = User.query.filter_by(is_deleted=False)
+        user_query = with_profile(User.query.filter_by(is_deleted=False), User, 'list')
 
         if filter_by:
             user_query = user_query.filter(User.name.ilike(f'%{filter_by}%'))
 
         users = user_query.order_by(sort_by).paginate(page=page, per_page=per_page, error_out=False)
 
+        # Serialize before the audit commit expires the loaded users
+        payload = {
+            'users': [user.serialize() for user in users.items],
+            'total': users.total,
+            'pages': users.pages,
+            'current_page': users.page
+        }
+
         # Log the access to the audit trail and logger
         logger.info(f"User {current_user['id']} accessed the list of users.")
         audit = AuditTrail(
@@ -178,12 +190,7 @@ class UserListResource(Resource):
         db.session.add(audit)
         db.session.commit()
 
-        return {
-            'users': [user.serialize() for user in users.items],
-            'total': users.total,
-            'pages': users.pages,
-            'current_page': users.page
-        }, 200
+        return payload, 200
 
     @user_ns.doc(security='Bearer Auth', responses={201: 'Created', 400: 'Bad Request', 403: 'Unauthorized'})
     @jwt_required()
@@ -1,18 +1,11 @@
-import csv
 from app import app, db
-from models.bank_model import Bank, BankBranch
 from models.branch_model import Branch
 from models.impact_product_model import ImpactProduct, ProductCategory
-from models.performance_model import SalesTarget
 from models.paypoint_model import Paypoint
-from models.user_model import Role, User
+from models.user_model import Role
 from models.retention_model import RetentionPolicy
 from models.access_model import Access
-from models.sales_executive_model import SalesExecutive
-from datetime import datetime
-from sqlalchemy.exc import IntegrityError
-import calendar
-from werkzeug.security import generate_password_hash
+from services.reference_import import import_banks, import_sales_executives, import_targets, import_users
 
 # CSV file paths
 sales_exec_csv_file = './sales_exec.csv'
@@ -20,51 +13,9 @@ csv_file_path = './banks.csv'
 users_csv_file = './users.csv'
 targets_csv_file = './targets.csv'
 
-# Helper function to calculate the number of days in the current month
-def get_days_in_current_month():
-    year = datetime.utcnow().year
-    month = datetime.utcnow().month
-    return calendar.monthrange(year, month)[1]
-
-# Monthly targets based on the provided breakdown (use integers as keys)
-monthly_targets = {
-    180: 180,
-    165: 165,
-    150: 150
-}
-
-# Define daily target and premium amount calculations
-daily_target_sales_count = 10
-daily_target_premium_amount = 1000
-
 with app.app_context():
     # Seed Banks and BankBranches
-    unique_banks = {}
-    with open(csv_file_path, newline='', encoding='utf-8-sig') as csvfile:
-        csv_reader = csv.DictReader(csvfile)
-        for row in csv_reader:
-            bank_name = row.get('BANK NAME', '').strip()
-            branch_name = row.get('BRANCH NAME', '').strip()
-            branch_code = row.get('SORT CODE', '').strip()
-
-            # Check if the bank already exists
-            existing_bank = db.session.query(Bank).filter_by(name=bank_name).first()
-            if not existing_bank:
-                bank = Bank(name=bank_name)
-                db.session.add(bank)
-                db.session.commit()
-                unique_banks[bank_name] = bank.id
-            else:
-                unique_banks[bank_name] = existing_bank.id
-
-            # Check if the branch already exists under the bank
-            existing_branch = db.session.query(BankBranch).filter_by(name=branch_name, bank_id=unique_banks[bank_name]).first()
-            if not existing_branch:
-                branch = BankBranch(name=branch_name, bank_id=unique_banks[bank_name], sort_code=branch_code)
-                db.session.add(branch)
-
-    db.session.commit()  # Commit after adding all branches
-    print("Banks and branches seeded successfully!")
+    print(import_banks(csv_file_path).format())
 
     # Seed Impact Product Categories
     categories = ['Retail', 'Corporate', 'Micro']
@@ -213,38 +164,8 @@ with app.app_context():
             db.session.commit()
         roles_dict[role_name] = role.id
 
-    # Seed Users from CSV with Debugging
-    with open(users_csv_file, newline='', encoding='utf-8-sig') as csvfile:
-        csv_reader = csv.DictReader(csvfile)
-        for row in csv_reader:
-            name = row.get('Name', '').strip()
-            email = row.get('Email', '').strip()
-            phone_number = row.get('Phone number', '').strip()
-            role_name = row.get('Role', '').strip()
-
-            if not email:  # Skip the record if the email is empty
-                print(f"Skipping user {row.get('Name', 'Unknown')} due to missing email.")
-                continue
-
-            user = db.session.query(User).filter_by(email=email).first()
-            if not user:
-                user = User(
-                    email=email,
-                    name=name,
-                    password_hash=generate_password_hash('Password'),  # Set a default password
-                    is_active=True,
-                    is_deleted=False
-                )
-                if role_name in roles_dict:
-                    user.role_id = roles_dict[role_name]
-                else:
-                    print(f"Role '{role_name}' not found for user '{name}', skipping.")
-                    continue
-
-                db.session.add(user)
-
-    db.session.commit()  # Commit after adding all users
-    print("Users and roles seeded successfully!")
+    # Seed Users from CSV
+    print(import_users(users_csv_file).format(verbose=True))
 
     # Seed Access Rules for each role
     access_rules = [
@@ -336,142 +257,10 @@ with app.app_context():
         db.session.commit()
 
     # Seed Sales Executives from CSV file
-    unique_sales_managers = {}
-
-    with open(sales_exec_csv_file, newline='', encoding='utf-8-sig') as csvfile:
-        csv_reader = csv.DictReader(csvfile)
-        for row in csv_reader:
-            agent_code = row.get('AGENTCODE', '').strip()
-            manager_name = row.get('SALE MANAGER', '').strip()
-            executive_name = row.get('SALES EXECUTIVE', '').strip()
-            branch_name = row.get('BRANCH', '').strip()
-            phone_number = row.get('TELEPHONE ', '').strip()
-
-            if not agent_code:
-                print(f"Skipping {executive_name} due to missing agent code.")
-                continue
-
-            # Ensure the manager exists as a user with flexible name checking
-            if manager_name not in unique_sales_managers:
-                manager_name_parts = manager_name.split(' ')
-                search_pattern = f"%{'%'.join(manager_name_parts)}%"
-                sales_manager = db.session.query(User).filter(User.name.ilike(search_pattern)).first()
-
-                if not sales_manager:
-                    print(f"Sales manager '{manager_name}' not found, skipping {executive_name}.")
-                    continue
-
-                unique_sales_managers[manager_name] = sales_manager.id
-
-            if not phone_number:
-                print(f"Skipping {executive_name} due to missing phone number.")
-                continue
-
-            existing_executive = db.session.query(SalesExecutive).filter_by(phone_number=phone_number).first()
-            if existing_executive:
-                print(f"Skipping {executive_name} due to duplicate phone number: {phone_number}")
-                continue
-
-            branch = db.session.query(Branch).filter_by(name=branch_name).first()
-            if branch:
-                sales_executive = db.session.query(SalesExecutive).filter_by(name=executive_name).first()
-                if not sales_executive:
-                    sales_executive = SalesExecutive(
-                        name=executive_name,
-                        code=agent_code,
-                        phone_number=phone_number,
-                        manager_id=unique_sales_managers[manager_name]
-                    )
-                    sales_executive.branches.append(branch)
-                    db.session.add(sales_executive)
-            else:
-                print(f"Branch {branch_name} not found, skipping sales executive {executive_name}.")
-
-    db.session.commit()
-    print("Sales executives seeding completed successfully!")
-
-    # Seed Targets
-    # Open the CSV file containing Sales Manager names and their corresponding targets
-    with open(targets_csv_file, newline='', encoding='utf-8-sig') as csvfile:
-        csv_reader = csv.DictReader(csvfile)
-        for row in csv_reader:
-            # Get the monthly target and sales manager name
-            monthly_target_type = int(row.get('Target', '').strip())
-            sales_manager_name = row.get('Name', '').strip()
-
-            # Convert the integer target into the corresponding string key
-            monthly_target_key = f"{monthly_target_type}_cases"
-
-            # Validate the target type
-            if monthly_target_type not in monthly_targets:
-                print(f"Invalid target type for Sales Manager {sales_manager_name}, skipping...")
-                continue
-
-            # Fetch the Sales Manager from the database based on the name
-            sales_manager = db.session.query(User).filter(User.name.ilike(f'%{sales_manager_name}%')).first()
-            if not sales_manager:
-                print(f"Sales Manager {sales_manager_name} not found, skipping...")
-                continue
-
-            # Set the monthly target sales count and premium amount
-            monthly_target_sales_count = monthly_targets[monthly_target_type]
-            monthly_target_premium_amount = monthly_target_sales_count * 100  # Premium target per case is 100 GHC
-
-            # Calculate the number of days in the current month
-            days_in_month = get_days_in_current_month()
-
-            # Calculate daily targets
-            daily_target_sales_count = monthly_target_sales_count / days_in_month
-            daily_target_premium_amount = monthly_target_premium_amount / days_in_month
-
-            # Calculate the fraction of targets for paypoints and risk group
-            paypoint_target_sales_count = monthly_target_sales_count * 0.80  # 80% of the monthly target
-            risk_group_target_sales_count = monthly_target_sales_count * 0.70  # 70% of the monthly target
-
-            # Set the Paypoint Target as a SalesTarget entry (for the month)
-            paypoint_target = SalesTarget(
-                sales_manager_id=sales_manager.id,
-                target_sales_count=paypoint_target_sales_count,  # 80% of the total sales count
-                target_premium_amount=paypoint_target_sales_count * 100,  # Corresponding premium amount
-                target_criteria_type='source_type',  # Dynamic criteria type
-                target_criteria_value='paypoint',  # Dynamic criteria value
-                period_start=datetime(datetime.utcnow().year, datetime.utcnow().month, 1),  # Start of the current month
-                period_end=datetime(datetime.utcnow().year, datetime.utcnow().month, days_in_month)  # End of the current month
-            )
-            db.session.add(paypoint_target)
-
-            # Set the Risk Product Group Target as a SalesTarget entry (for the month)
-            risk_group_target = SalesTarget(
-                sales_manager_id=sales_manager.id,
-                target_sales_count=risk_group_target_sales_count,  # 70% of the total sales count
-                target_premium_amount=risk_group_target_sales_count * 100,  # Corresponding premium amount
-                target_criteria_type='product_group',  # Dynamic criteria type
-                target_criteria_value='risk',  # Dynamic criteria value (for risk products)
-                period_start=datetime(datetime.utcnow().year, datetime.utcnow().month, 1),
-                period_end=datetime(datetime.utcnow().year, datetime.utcnow().month, days_in_month)
-            )
-            db.session.add(risk_group_target)
-
-            # Set the overall monthly target (including both risk and paypoint)
-            monthly_target = SalesTarget(
-                sales_manager_id=sales_manager.id,
-                target_sales_count=monthly_target_sales_count,  # Total monthly sales count
-                target_premium_amount=monthly_target_premium_amount,  # Total premium amount
-                target_criteria_type='overall',  # General monthly target
-                target_criteria_value='monthly_total',  # Just a placeholder for the overall target
-                period_start=datetime(datetime.utcnow().year, datetime.utcnow().month, 1),
-                period_end=datetime(datetime.utcnow().year, datetime.utcnow().month, days_in_month)
-            )
-            db.session.add(monthly_target)
-
-            # Commit to the database
-            try:
-                db.session.commit()
-            except IntegrityError:
-                db.session.rollback()
-                print(f"Failed to create sales targets for {sales_manager_name}, possible duplicate entry.")
+    print(import_sales_executives(sales_exec_csv_file).format(verbose=True))
 
-        print("Sales Target seeding completed successfully!")
+    # Seed Targets for the current month
+    print(import_targets(targets_csv_file).format(verbose=True))
 
     # All done!
     print("All Seeding completed successfully!")
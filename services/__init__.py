@@ -0,0 +1,3 @@
+# Service modules hold logic shared by several resources and models.
+# Import them directly (e.g. ``from services.forecasting import forecast_targets``)
+# so that importing the package does not pull in models before they are ready.
@@ -0,0 +1,395 @@
+import logging
+from datetime import date, datetime, timedelta
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, insert, literal, null, select, union_all
+from extensions import db
+from models.analytics_model import SalesDailyAggregate
+from models.bank_model import Bank
+from models.branch_model import Branch
+from models.impact_product_model import ImpactProduct, ProductCategory
+from models.paypoint_model import Paypoint
+from models.sales_executive_model import SalesExecutive, sales_executive_branches
+from models.sales_model import Sale
+from models.user_model import User
+from services.upserts import increment
+
+logger = logging.getLogger(__name__)
+
+MEASURES = ('count', 'sum', 'avg', 'distinct_clients')
+# Measures that add up across groups, so subtotals can be derived from finer groups
+ADDITIVE_MEASURES = ('count', 'sum', 'avg')
+TIME_DIMENSIONS = ('day', 'week', 'month')
+ROLLUP_MODES = ('none', 'rollup', 'cube')
+MAX_DIMENSIONS = 6
+MAX_CUBE_DIMENSIONS = 4
+# Finest groups a single request may produce before subtotals
+MAX_GROUPS = 50000
+
+
+class Dimension:
+    """
+    A group-by dimension of the cube.
+
+    ``column`` names the sale column (or the matching aggregate column) the
+    dimension reads; ``via`` is the joined table a derived dimension needs.
+    ``label_model`` resolves ids to names for the response.
+    """
+
+    def __init__(self, name: str, column: Optional[str] = None, via: Optional[str] = None, label_model=None):
+        self.name = name
+        self.column = column
+        self.via = via
+        self.label_model = label_model
+
+
+DIMENSIONS = {
+    'manager': Dimension('manager', 'sale_manager_id', label_model=User),
+    'executive': Dimension('executive', 'sales_executive_id', label_model=SalesExecutive),
+    'branch': Dimension('branch', via='branch', label_model=Branch),
+    'product': Dimension('product', 'policy_type_id', label_model=ImpactProduct),
+    'category': Dimension('category', via='product', label_model=ProductCategory),
+    'product_group': Dimension('product_group', via='product'),
+    'paypoint': Dimension('paypoint', 'paypoint_id', label_model=Paypoint),
+    'bank': Dimension('bank', 'bank_id', label_model=Bank),
+    'platform': Dimension('platform', 'collection_platform'),
+    'status': Dimension('status', 'status'),
+    'source': Dimension('source', 'source_type'),
+    'day': Dimension('day'),
+    'week': Dimension('week'),
+    'month': Dimension('month'),
+}
+
+
+def _time_bucket(column, grain: str):
+    """A text expression naming the day, week (its Monday) or month of a date or datetime column."""
+    if db.engine.dialect.name == 'postgresql':
+        if grain == 'week':
+            return func.to_char(func.date_trunc('week', column), 'YYYY-MM-DD')
+        return func.to_char(column, 'YYYY-MM' if grain == 'month' else 'YYYY-MM-DD')
+    if grain == 'week':
+        return func.date(column, 'weekday 0', '-6 days')
+    if grain == 'month':
+        return func.strftime('%Y-%m', column)
+    return func.date(column)
+
+
+def _week_label(monday: str) -> str:
+    year, week, _ = date.fromisoformat(monday).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class CubeSource:
+    """The table a cube query reads: the daily aggregate, or the sales themselves."""
+
+    def __init__(self, name: str, table, date_column: str, day_grain: bool):
+        self.name = name
+        self.table = table
+        self.date_column = table.c[date_column]
+        self.day_grain = day_grain
+        self.product = ImpactProduct.__table__.alias('cube_product')
+        branch_of = sales_executive_branches
+        # Executives may work at several branches; sales count toward the first one
+        self.executive_branch = select(
+            branch_of.c.sales_executive_id, func.min(branch_of.c.branch_id).label('branch_id')
+        ).group_by(branch_of.c.sales_executive_id).subquery('cube_executive_branch')
+
+    def expression(self, dimension: Dimension):
+        if dimension.name in TIME_DIMENSIONS:
+            return _time_bucket(self.date_column, dimension.name)
+        if dimension.name == 'branch':
+            return self.executive_branch.c.branch_id
+        if dimension.name == 'category':
+            return self.product.c.category_id
+        if dimension.name == 'product_group':
+            return self.product.c.group
+        return self.table.c[dimension.column]
+
+    def from_clause(self, dimensions: Sequence[Dimension]):
+        joined = self.table
+        vias = {dimension.via for dimension in dimensions}
+        if 'product' in vias:
+            joined = joined.join(self.product, self.product.c.id == self.table.c.policy_type_id)
+        if 'branch' in vias:
+            joined = joined.outerjoin(
+                self.executive_branch, self.executive_branch.c.sales_executive_id == self.table.c.sales_executive_id
+            )
+        return joined
+
+    def measures(self, distinct: bool) -> List:
+        if self.name == 'aggregate':
+            return [func.sum(self.table.c.sale_count), func.sum(self.table.c.total_premium)]
+        columns = [func.count(self.table.c.id), func.sum(self.table.c.amount)]
+        if distinct:
+            columns.append(func.count(self.table.c.client_phone.distinct()))
+        return columns
+
+    def conditions(self, start: Optional[date], end: Optional[date]) -> List:
+        conditions = []
+        if self.name == 'sales':
+            conditions.append(self.table.c.is_deleted.is_(False))
+        if start:
+            conditions.append(self.date_column >= (start if self.day_grain else datetime.combine(start, datetime.min.time())))
+        if end:
+            if self.day_grain:
+                conditions.append(self.date_column <= end)
+            else:
+                conditions.append(self.date_column < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        return conditions
+
+
+AGGREGATE_SOURCE = CubeSource('aggregate', SalesDailyAggregate.__table__, 'day', day_grain=True)
+SALES_SOURCE = CubeSource('sales', Sale.__table__, 'created_at', day_grain=False)
+
+
+def _grouping_sets(size: int, mode: str) -> List[Tuple[int, ...]]:
+    """Positions of the dimensions each result set groups by, finest first."""
+    if mode == 'rollup':
+        return [tuple(range(count)) for count in range(size, -1, -1)]
+    if mode == 'cube':
+        return [subset for count in range(size, -1, -1) for subset in combinations(range(size), count)]
+    return [tuple(range(size))]
+
+
+def _clean(dimension: Dimension, value):
+    """Undo the aggregate's placeholders for missing values and label weeks."""
+    if value in (0, ''):
+        return None
+    if dimension.name == 'week' and value is not None:
+        return _week_label(str(value))
+    if dimension.name in TIME_DIMENSIONS and value is not None:
+        return str(value)
+    return value
+
+
+def _parse_date(value, name: str) -> Optional[date]:
+    if value in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"Invalid {name}. Use YYYY-MM-DD.")
+
+
+def pivot(
+    dimensions: Sequence[str],
+    measures: Sequence[str] = ('count', 'sum'),
+    rollup: str = 'none',
+    filters: Optional[Dict] = None
+) -> Dict:
+    """
+    Group sales by several dimensions, with optional ROLLUP or CUBE subtotals.
+
+    Count, sum and average are answered from the daily aggregate; distinct
+    clients need the sales themselves. Subtotals of additive measures are
+    added up from the finest groups, so either source is read once;
+    distinct client subtotals are one UNION ALL of the grouping sets.
+
+    ``filters`` may hold start_date and end_date (inclusive, YYYY-MM-DD) and,
+    per dimension, a list of values to keep.
+    """
+    filters = dict(filters or {})
+    dimensions = list(dimensions)
+    measures = list(measures) or ['count', 'sum']
+    unknown = [name for name in dimensions if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Invalid dimensions: {', '.join(unknown)}. Allowed values are: {', '.join(DIMENSIONS)}")
+    if len(set(dimensions)) != len(dimensions):
+        raise ValueError("Each dimension can only be used once")
+    if len(dimensions) > MAX_DIMENSIONS:
+        raise ValueError(f"At most {MAX_DIMENSIONS} dimensions can be combined")
+    unknown = [name for name in measures if name not in MEASURES]
+    if unknown:
+        raise ValueError(f"Invalid measures: {', '.join(unknown)}. Allowed values are: {', '.join(MEASURES)}")
+    if rollup not in ROLLUP_MODES:
+        raise ValueError(f"Invalid rollup. Allowed values are: {', '.join(ROLLUP_MODES)}")
+    if rollup == 'cube' and len(dimensions) > MAX_CUBE_DIMENSIONS:
+        raise ValueError(f"CUBE is limited to {MAX_CUBE_DIMENSIONS} dimensions")
+
+    start = _parse_date(filters.pop('start_date', None), 'start_date')
+    end = _parse_date(filters.pop('end_date', None), 'end_date')
+    unknown = [name for name in filters if name not in DIMENSIONS or name in TIME_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Invalid filters: {', '.join(unknown)}")
+
+    distinct = 'distinct_clients' in measures
+    source = SALES_SOURCE if distinct else AGGREGATE_SOURCE
+    used = [DIMENSIONS[name] for name in dimensions]
+    filtered = [DIMENSIONS[name] for name in filters]
+    expressions = [source.expression(dimension) for dimension in used]
+    conditions = source.conditions(start, end)
+    for dimension in filtered:
+        values = filters[dimension.name]
+        values = values if isinstance(values, list) else [values]
+        conditions.append(source.expression(dimension).in_(values))
+    from_clause = source.from_clause(used + filtered)
+    sets = _grouping_sets(len(used), rollup)
+
+    if distinct:
+        rows = _grouping_set_rows(source, from_clause, expressions, conditions, sets)
+    else:
+        base = db.session.execute(
+            select(*expressions, *source.measures(False)).select_from(from_clause)
+            .where(*conditions).group_by(*expressions).limit(MAX_GROUPS + 1)
+        ).all()
+        if len(base) > MAX_GROUPS:
+            raise ValueError("Too many groups; add filters or use fewer dimensions")
+        rows = _subtotals(base, len(used), sets)
+
+    labels = _labels(used, rows)
+    result_rows, total = [], None
+    for positions, values, measure_values in rows:
+        row = {}
+        for position, dimension in enumerate(used):
+            value = _clean(dimension, values[position]) if position in positions else None
+            row[dimension.name] = value
+            if dimension.label_model is not None:
+                row[f"{dimension.name}_name"] = labels[dimension.name].get(value)
+        row.update(_measures(measures, measure_values))
+        row['subtotal_of'] = [dimension.name for position, dimension in enumerate(used) if position not in positions]
+        if not positions and used:
+            total = row
+        else:
+            result_rows.append(row)
+    return {
+        'dimensions': dimensions,
+        'measures': measures,
+        'rollup': rollup,
+        'source': source.name,
+        'rows': result_rows,
+        'total': total if used else (result_rows[0] if result_rows else None),
+    }
+
+
+def _measures(measures: Sequence[str], values: Sequence) -> Dict:
+    count, premium = values[0] or 0, round(values[1] or 0.0, 2)
+    computed = {'count': count, 'sum': premium, 'avg': round(premium / count, 2) if count else None}
+    if len(values) > 2:
+        computed['distinct_clients'] = values[2]
+    return {measure: computed[measure] for measure in measures}
+
+
+def _subtotals(base, size: int, sets: List[Tuple[int, ...]]) -> List[Tuple]:
+    """Finest groups plus every requested subtotal, added up in Python from the finest groups."""
+    rows = []
+    for positions in sets:
+        if len(positions) == size:
+            grouped = {tuple(row[:size]): [row[size] or 0, row[size + 1] or 0.0] for row in base}
+        else:
+            grouped = {}
+            for row in base:
+                key = tuple(row[position] if position in positions else None for position in range(size))
+                totals = grouped.setdefault(key, [0, 0.0])
+                totals[0] += row[size] or 0
+                totals[1] += row[size + 1] or 0.0
+        rows.extend((positions, key, totals) for key, totals in sorted(grouped.items(), key=_sort_key))
+    return rows
+
+
+def _grouping_set_rows(source: CubeSource, from_clause, expressions, conditions, sets) -> List[Tuple]:
+    """All grouping sets of a distinct-count query, as one UNION ALL statement."""
+    size = len(expressions)
+    selects = []
+    for number, positions in enumerate(sets):
+        columns = [
+            expression.label(f"d{position}") if position in positions else null().label(f"d{position}")
+            for position, expression in enumerate(expressions)
+        ]
+        grouped = [expressions[position] for position in positions]
+        statement = select(literal(number).label('grouping_set'), *columns, *source.measures(True)) \
+            .select_from(from_clause).where(*conditions)
+        selects.append(statement.group_by(*grouped) if grouped else statement)
+    statement = selects[0] if len(selects) == 1 else union_all(*selects)
+    result = db.session.execute(statement.limit(MAX_GROUPS * len(sets) + 1) if len(selects) == 1 else statement).all()
+    if len(result) > MAX_GROUPS * len(sets):
+        raise ValueError("Too many groups; add filters or use fewer dimensions")
+    by_set: Dict[int, List] = {}
+    for row in result:
+        by_set.setdefault(row[0], []).append((tuple(row[1:size + 1]), list(row[size + 1:])))
+    rows = []
+    for number, positions in enumerate(sets):
+        rows.extend((positions, key, measures) for key, measures in sorted(by_set.get(number, []), key=_sort_key))
+    return rows
+
+
+def _sort_key(item):
+    return tuple((value is None, str(value) if value is not None else '') for value in item[0])
+
+
+def _labels(used: Sequence[Dimension], rows) -> Dict[str, Dict]:
+    """Names of the ids appearing in the results, one query per labelled dimension."""
+    labels = {}
+    for position, dimension in enumerate(used):
+        if dimension.label_model is None:
+            continue
+        ids = {values[position] for _, values, _ in rows if values[position]}
+        model = dimension.label_model
+        labels[dimension.name] = dict(
+            db.session.execute(select(model.id, model.name).where(model.id.in_(ids))).all()
+        ) if ids else {}
+    return labels
+
+
+# Daily aggregate maintenance
+
+def _aggregate_key(snapshot: Dict) -> Optional[Dict]:
+    if snapshot.get('created_at') is None:
+        return None
+    return {
+        'day': snapshot['created_at'].date(),
+        'sale_manager_id': snapshot['sale_manager_id'],
+        'sales_executive_id': snapshot['sales_executive_id'],
+        'policy_type_id': snapshot['policy_type_id'],
+        'paypoint_id': snapshot.get('paypoint_id') or 0,
+        'bank_id': snapshot.get('bank_id') or 0,
+        'collection_platform': snapshot.get('collection_platform') or '',
+        'status': snapshot.get('status') or '',
+        'source_type': snapshot.get('source_type') or '',
+    }
+
+
+def record_sale(snapshot: Dict, sign: int = 1):
+    """Add (or with sign -1, remove) a sale snapshot to its daily aggregate row."""
+    key = _aggregate_key(snapshot)
+    if key is None:
+        return
+    try:
+        increment(SalesDailyAggregate, key, {
+            'sale_count': sign, 'total_premium': sign * (snapshot.get('amount') or 0.0)
+        })
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def rebuild_aggregates() -> int:
+    """Recompute the daily aggregate from the sales table; returns the number of rows."""
+    sales = Sale.__table__
+    keys = [
+        func.date(sales.c.created_at),
+        sales.c.sale_manager_id,
+        sales.c.sales_executive_id,
+        sales.c.policy_type_id,
+        func.coalesce(sales.c.paypoint_id, 0),
+        func.coalesce(sales.c.bank_id, 0),
+        func.coalesce(sales.c.collection_platform, ''),
+        func.coalesce(sales.c.status, ''),
+        func.coalesce(sales.c.source_type, ''),
+    ]
+    db.session.execute(delete(SalesDailyAggregate))
+    db.session.execute(
+        insert(SalesDailyAggregate).from_select(
+            [
+                'day', 'sale_manager_id', 'sales_executive_id', 'policy_type_id', 'paypoint_id', 'bank_id',
+                'collection_platform', 'status', 'source_type', 'sale_count', 'total_premium', 'updated_at'
+            ],
+            select(*keys, func.count(), func.coalesce(func.sum(sales.c.amount), 0.0), literal(datetime.utcnow()))
+            .where(sales.c.is_deleted.is_(False), sales.c.created_at.isnot(None))
+            .group_by(*keys)
+        )
+    )
+    db.session.commit()
+    count = db.session.scalar(select(func.count()).select_from(SalesDailyAggregate))
+    logger.info(f"Rebuilt {count} daily sales aggregate rows")
+    return count
@@ -0,0 +1,355 @@
+import bisect
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import Date, DateTime, Enum, insert, or_, select, update
+from extensions import db
+from models.retention_model import ArchiveDictionary, ArchivedData, ArchiveSegment
+
+try:
+    import zstandard
+except ImportError:  # zlib with a preset dictionary is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Records per independently compressed frame; a single record lookup decompresses one frame
+FRAME_RECORDS = 128
+# zlib only uses the last 32KB of a preset dictionary
+DICTIONARY_SIZE = 32 * 1024
+# Records needed before a dictionary is trained for a data type
+MIN_TRAINING_RECORDS = 256
+ZSTD_LEVEL = 12
+ZLIB_LEVEL = 9
+
+
+def preferred_codec() -> str:
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+class FrameCodec:
+    """Compresses frames with zstd or zlib, optionally primed with a trained dictionary."""
+
+    def __init__(self, codec: str, dictionary: Optional[bytes] = None):
+        if codec == 'zstd' and zstandard is None:
+            raise ValueError("Archive segment is zstd compressed but the zstandard package is not installed")
+        if codec not in ('zstd', 'zlib'):
+            raise ValueError(f"Unknown archive codec: {codec}")
+        self.codec = codec
+        self.dictionary = dictionary
+        if codec == 'zstd':
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data)
+            self.decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+
+    def compress(self, raw: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return self.compressor.compress(raw)
+        compressor = zlib.compressobj(ZLIB_LEVEL, zdict=self.dictionary) if self.dictionary else zlib.compressobj(ZLIB_LEVEL)
+        return compressor.compress(raw) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return self.decompressor.decompress(data)
+        decompressor = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+# Dictionaries never change once stored, so their codecs are kept for the life of the process
+_codecs: Dict[Optional[int], FrameCodec] = {}
+
+
+def _codec(codec: str, dictionary: Optional[ArchiveDictionary]) -> FrameCodec:
+    key = dictionary.id if dictionary else None
+    if key is None:
+        return FrameCodec(codec)
+    if key not in _codecs:
+        _codecs[key] = FrameCodec(dictionary.codec, dictionary.data)
+    return _codecs[key]
+
+
+def train_dictionary(samples: List[bytes], codec: str) -> Optional[bytes]:
+    """Build a dictionary from encoded records, or None when there are too few of them."""
+    if len(samples) < MIN_TRAINING_RECORDS:
+        return None
+    if codec == 'zstd':
+        try:
+            return zstandard.train_dictionary(DICTIONARY_SIZE, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            logger.warning(f"Could not train a zstd archive dictionary: {e}")
+            return None
+    # Deflate matches against the preset dictionary like earlier input, so a spread of
+    # sample records covers the keys and recurring values of the data type
+    step = max(1, len(samples) // 256)
+    dictionary = b'\n'.join(samples[::step])
+    return dictionary[-DICTIONARY_SIZE:]
+
+
+def dictionary_for(data_type: str, codec: str, samples: List[bytes]) -> Optional[ArchiveDictionary]:
+    """The dictionary of a data type, trained from the given samples the first time."""
+    dictionary = ArchiveDictionary.query.filter_by(data_type=data_type, codec=codec) \
+        .order_by(ArchiveDictionary.id.desc()).first()
+    if dictionary is None:
+        data = train_dictionary(samples, codec)
+        if data is None:
+            return None
+        dictionary = ArchiveDictionary(data_type=data_type, codec=codec, data=data)
+        db.session.add(dictionary)
+        db.session.flush()
+        logger.info(f"Trained a {len(data)} byte {codec} archive dictionary for {data_type}")
+    return dictionary
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return None
+
+
+def write_segment(
+    data_type: str,
+    table_name: Optional[str],
+    retention_policy_id: int,
+    records: List[Dict],
+    date_column: Optional[str] = None
+) -> ArchiveSegment:
+    """Pack records (each with an 'id') into a segment and add it to the session."""
+    records = sorted(records, key=lambda record: record['id'])
+    lines = [ArchivedData.encode(record) for record in records]
+    codec_name = preferred_codec()
+    dictionary = dictionary_for(data_type, codec_name, lines)
+    codec = _codec(codec_name, dictionary)
+
+    data, frame_index = bytearray(), []
+    for start in range(0, len(lines), FRAME_RECORDS):
+        frame = codec.compress(b'\n'.join(lines[start:start + FRAME_RECORDS]))
+        last = min(start + FRAME_RECORDS, len(records)) - 1
+        frame_index.append([records[start]['id'], records[last]['id'], len(data), len(frame)])
+        data += frame
+
+    dates = [_as_datetime(record.get(date_column)) for record in records] if date_column else []
+    dates = [value for value in dates if value is not None]
+    segment = ArchiveSegment(
+        data_type=data_type,
+        table_name=table_name,
+        date_column=date_column,
+        codec=codec_name,
+        dictionary_id=dictionary.id if dictionary else None,
+        record_count=len(records),
+        min_original_id=records[0]['id'],
+        max_original_id=records[-1]['id'],
+        min_date=min(dates) if dates else None,
+        max_date=max(dates) if dates else None,
+        frame_index=json.dumps(frame_index),
+        data=bytes(data),
+        raw_size=sum(len(line) + 1 for line in lines),
+        retention_policy_id=retention_policy_id
+    )
+    db.session.add(segment)
+    return segment
+
+
+def _frames(segment: ArchiveSegment) -> List[List[int]]:
+    return json.loads(segment.frame_index)
+
+
+def _read_frame(segment: ArchiveSegment, frame: List[int]) -> List[Dict]:
+    _, _, offset, length = frame
+    raw = _codec(segment.codec, segment.dictionary).decompress(segment.data[offset:offset + length])
+    # Newlines inside records are escaped, so the lines of a frame form a JSON array
+    return json.loads(b'[' + raw.replace(b'\n', b',') + b']')
+
+
+def segment_records(segment: ArchiveSegment) -> Iterator[Dict]:
+    for frame in _frames(segment):
+        yield from _read_frame(segment, frame)
+
+
+def find_record(data_type: str, original_id: int, table_name: Optional[str] = None) -> Optional[Dict]:
+    """
+    Read one archived record, decompressing only the frame that holds it.
+
+    Ids are only unique within a table, so data types archived from several
+    tables need ``table_name``. Segments of rows whose table was never
+    recorded match when the record's fields fit that table.
+    """
+    query = ArchiveSegment.query.filter(
+        ArchiveSegment.data_type == data_type,
+        ArchiveSegment.min_original_id <= original_id,
+        ArchiveSegment.max_original_id >= original_id,
+        ArchiveSegment.is_deleted.is_(False)
+    )
+    columns = None
+    if table_name:
+        query = query.filter(or_(ArchiveSegment.table_name == table_name, ArchiveSegment.table_name.is_(None)))
+        table = db.metadata.tables.get(table_name)
+        columns = set(table.c.keys()) if table is not None else set()
+    for segment in query.order_by(ArchiveSegment.id.desc()):
+        frames = _frames(segment)
+        position = bisect.bisect_right([frame[0] for frame in frames], original_id) - 1
+        if position < 0 or frames[position][1] < original_id:
+            continue
+        for record in _read_frame(segment, frames[position]):
+            if record['id'] == original_id:
+                if segment.table_name is None and columns is not None and not set(record) <= columns:
+                    break
+                return record
+    return None
+
+
+def find_segments(
+    data_type: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    include_restored: bool = False
+) -> List[ArchiveSegment]:
+    """Segments of a data type whose records may fall in [start_date, end_date)."""
+    query = ArchiveSegment.query.filter(
+        ArchiveSegment.data_type == data_type,
+        ArchiveSegment.is_deleted.is_(False)
+    )
+    if start_date:
+        query = query.filter(ArchiveSegment.max_date >= start_date)
+    if end_date:
+        query = query.filter(ArchiveSegment.min_date < end_date)
+    if not include_restored:
+        query = query.filter(ArchiveSegment.restored_at.is_(None))
+    return query.order_by(ArchiveSegment.min_original_id).all()
+
+
+def _row_for(table, record: Dict) -> Dict:
+    """Convert an archived record back to column values of its table."""
+    row = {}
+    for column in table.c:
+        if column.name not in record:
+            continue
+        value = record[column.name]
+        if value is not None:
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            elif isinstance(column.type, Enum) and column.type.enum_class is not None:
+                value = column.type.enum_class(value)
+        row[column.name] = value
+    return row
+
+
+def restore_segment(
+    segment: ArchiveSegment,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> int:
+    """
+    Put the records of a segment back in their table and return how many were restored.
+
+    Records still present in a soft delete table are undeleted, the others
+    are inserted with their original ids. Dates limit the restore to the
+    records whose date_column falls in [start_date, end_date).
+    """
+    if not segment.table_name or segment.table_name not in db.metadata.tables:
+        raise ValueError(f"Archive segment {segment.id} has no table to restore into")
+    table = db.metadata.tables[segment.table_name]
+    partial = bool((start_date or end_date) and segment.date_column)
+    records = []
+    for record in segment_records(segment):
+        if partial:
+            value = _as_datetime(record.get(segment.date_column))
+            if value is None or (start_date and value < start_date) or (end_date and value >= end_date):
+                continue
+        records.append(record)
+    if not records:
+        return 0
+
+    rows = [_row_for(table, record) for record in records]
+    ids = [row['id'] for row in rows]
+    existing = set()
+    for start in range(0, len(ids), 1000):
+        existing.update(db.session.execute(
+            select(table.c.id).where(table.c.id.in_(ids[start:start + 1000]))
+        ).scalars())
+    if existing and 'is_deleted' in table.c:
+        for start in range(0, len(ids), 1000):
+            db.session.execute(
+                update(table)
+                .where(table.c.id.in_([row_id for row_id in ids[start:start + 1000] if row_id in existing]))
+                .values(is_deleted=False)
+            )
+    missing = [row for row in rows if row['id'] not in existing]
+    if missing:
+        db.session.execute(insert(table), missing)
+    if not partial:
+        segment.restored_at = datetime.utcnow()
+    return len(rows)
+
+
+def restore(
+    data_type: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    segment_ids: Optional[List[int]] = None
+) -> Dict:
+    """Bulk-restore the archived records of a data type, committing one segment at a time."""
+    if segment_ids:
+        segments = ArchiveSegment.query.filter(
+            ArchiveSegment.id.in_(segment_ids),
+            ArchiveSegment.data_type == data_type
+        ).all()
+    else:
+        segments = find_segments(data_type, start_date, end_date)
+    restored = 0
+    for segment in segments:
+        try:
+            restored += restore_segment(segment, start_date, end_date)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    if restored and any(segment.table_name == 'sale' for segment in segments):
+        # Restored sales are written with Core statements, which the sale event hooks never see
+        from services.sale_events import rebuild_derived_models
+        rebuild_derived_models()
+    return {'data_type': data_type, 'segments': len(segments), 'restored': restored}
+
+
+def storage_stats() -> List[Dict]:
+    """Archived records, compressed and raw bytes per data type and storage format."""
+    stats = []
+    for data_type, count, records, compressed, raw in db.session.execute(
+        select(
+            ArchiveSegment.data_type,
+            db.func.count(ArchiveSegment.id),
+            db.func.sum(ArchiveSegment.record_count),
+            db.func.sum(db.func.length(ArchiveSegment.data)),
+            db.func.sum(ArchiveSegment.raw_size)
+        )
+        .where(ArchiveSegment.is_deleted.is_(False))
+        .group_by(ArchiveSegment.data_type)
+    ):
+        stats.append({
+            'data_type': data_type, 'format': 'segment', 'segments': count,
+            'records': records or 0, 'compressed_bytes': compressed or 0, 'raw_bytes': raw or 0
+        })
+    for data_type, records, compressed in db.session.execute(
+        select(
+            ArchivedData.data_type,
+            db.func.count(ArchivedData.id),
+            db.func.sum(db.func.length(ArchivedData.original_data))
+        )
+        .where(ArchivedData.is_deleted.is_(False))
+        .group_by(ArchivedData.data_type)
+    ):
+        stats.append({
+            'data_type': data_type, 'format': 'row', 'segments': None,
+            'records': records, 'compressed_bytes': compressed or 0, 'raw_bytes': None
+        })
+    return stats
@@ -0,0 +1,241 @@
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.customer_model import CustomerProfile
+from models.sales_model import Sale
+
+logger = logging.getLogger(__name__)
+
+COUNTRY_CODE = '233'
+LOCAL_PHONE_LENGTH = 10
+WRITE_BATCH_SIZE = 5000
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Local ten digit form of a phone number: '+233 24 123 4567', '233241234567' and '241234567' give '0241234567'."""
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    if digits.startswith(COUNTRY_CODE) and len(digits) == len(COUNTRY_CODE) + LOCAL_PHONE_LENGTH - 1:
+        digits = '0' + digits[len(COUNTRY_CODE):]
+    elif len(digits) == LOCAL_PHONE_LENGTH - 1:
+        digits = '0' + digits
+    return digits or None
+
+
+def phone_variants(phone: str) -> List[str]:
+    """The forms a normalized phone number may have been stored in on sales."""
+    variants = [phone]
+    if len(phone) == LOCAL_PHONE_LENGTH and phone.startswith('0'):
+        local = phone[1:]
+        variants += [local, COUNTRY_CODE + local, f"+{COUNTRY_CODE}{local}"]
+    return variants
+
+
+def get_profile(phone: str) -> Optional[CustomerProfile]:
+    normalized = normalize_phone(phone)
+    return CustomerProfile.query.filter_by(phone=normalized).first() if normalized else None
+
+
+def find_by_id_number(id_number: str) -> List[CustomerProfile]:
+    return CustomerProfile.query.filter_by(id_number=id_number.strip()) \
+        .order_by(CustomerProfile.last_sale_at.desc()).all()
+
+
+def _adjust(profile: CustomerProfile, snapshot: Dict, sign: int):
+    """Add (sign 1) or take away (sign -1) one sale from a profile whose boundaries it does not move."""
+    profile.sale_count = (profile.sale_count or 0) + sign
+    profile.total_premium = round((profile.total_premium or 0.0) + sign * (snapshot['amount'] or 0.0), 2)
+    mix = profile.get_product_mix()
+    product = str(snapshot['policy_type_id'])
+    mix[product] = mix.get(product, 0) + sign
+    profile.set_product_mix(mix)
+    if sign < 0:
+        return
+    created_at = snapshot['created_at']
+    if created_at is not None:
+        if profile.first_sale_at is None or created_at < profile.first_sale_at:
+            profile.first_sale_at = created_at
+        if profile.last_sale_at is None or created_at >= profile.last_sale_at:
+            profile.last_sale_at = created_at
+            profile.client_name = snapshot['client_name'] or profile.client_name
+            profile.id_number = (snapshot.get('client_id_no') or '').strip() or profile.id_number
+
+
+def _apply(phone: str, changes: List[Tuple[int, Dict]]):
+    profile = CustomerProfile.query.filter_by(phone=phone).with_for_update().first()
+    added_dates = {snapshot['created_at'] for sign, snapshot in changes if sign > 0}
+    removed = [snapshot for sign, snapshot in changes if sign < 0]
+    if removed and (
+        profile is None
+        or profile.sale_count <= len(removed)
+        or any(
+            snapshot['created_at'] in (profile.first_sale_at, profile.last_sale_at)
+            and snapshot['created_at'] not in added_dates
+            for snapshot in removed
+        )
+    ):
+        # The first or last sale went away; re-derive the boundaries from the customer's sales
+        db.session.rollback()
+        refresh_customer(phone)
+        return
+    if profile is None:
+        profile = CustomerProfile(phone=phone, sale_count=0, total_premium=0.0)
+        db.session.add(profile)
+    for sign, snapshot in sorted(changes, key=lambda change: change[0]):
+        _adjust(profile, snapshot, sign)
+    db.session.commit()
+
+
+def record_change(before: Optional[Dict], after: Optional[Dict]):
+    """
+    Apply a committed sale change to the profiles of the customers involved.
+
+    ``before`` and ``after`` are sale snapshots (None for a new or removed
+    sale); deleted sales count as absent. Counts, premium and product mix
+    are adjusted in place; only when a customer's first or last sale is
+    removed are their sales read again, through the phone index.
+    """
+    changes: Dict[str, List[Tuple[int, Dict]]] = defaultdict(list)
+    for sign, snapshot in ((-1, before), (1, after)):
+        if snapshot and not snapshot['is_deleted']:
+            phone = normalize_phone(snapshot['client_phone'])
+            if phone:
+                changes[phone].append((sign, snapshot))
+    for phone, phone_changes in changes.items():
+        for attempt in range(2):
+            try:
+                _apply(phone, phone_changes)
+                break
+            except IntegrityError:
+                # Another request created the profile first; apply the change to it
+                db.session.rollback()
+                if attempt:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+
+
+def refresh_customer(phone: str) -> Optional[CustomerProfile]:
+    """Recompute one customer's profile from their sales."""
+    phone = normalize_phone(phone)
+    if not phone:
+        return None
+    active = (Sale.client_phone.in_(phone_variants(phone)), Sale.is_deleted.is_(False))
+    rows = db.session.execute(
+        select(
+            Sale.policy_type_id, func.count(Sale.id), func.sum(Sale.amount),
+            func.min(Sale.created_at), func.max(Sale.created_at)
+        ).where(*active).group_by(Sale.policy_type_id)
+    ).all()
+    profile = CustomerProfile.query.filter_by(phone=phone).with_for_update().first()
+    if not rows:
+        if profile is not None:
+            db.session.delete(profile)
+        db.session.commit()
+        return None
+
+    latest_name = db.session.scalar(
+        select(Sale.client_name).where(*active).order_by(Sale.created_at.desc(), Sale.id.desc()).limit(1)
+    )
+    id_number = db.session.scalar(
+        select(Sale.client_id_no)
+        .where(*active, Sale.client_id_no.isnot(None), Sale.client_id_no != '')
+        .order_by(Sale.created_at.desc(), Sale.id.desc()).limit(1)
+    )
+    if profile is None:
+        profile = CustomerProfile(phone=phone)
+        db.session.add(profile)
+    profile.sale_count = sum(row[1] for row in rows)
+    profile.total_premium = round(sum(row[2] or 0.0 for row in rows), 2)
+    profile.first_sale_at = min((row[3] for row in rows if row[3]), default=None)
+    profile.last_sale_at = max((row[4] for row in rows if row[4]), default=None)
+    profile.client_name = latest_name
+    profile.id_number = id_number.strip() if id_number else None
+    profile.set_product_mix({str(row[0]): row[1] for row in rows})
+    db.session.commit()
+    return profile
+
+
+def rebuild_profiles() -> int:
+    """Recompute every profile from the sales table; returns the number of customers."""
+    customers: Dict[str, Dict] = {}
+    aggregates = select(
+        Sale.client_phone, Sale.policy_type_id, func.count(Sale.id), func.sum(Sale.amount),
+        func.min(Sale.created_at), func.max(Sale.created_at)
+    ).where(Sale.is_deleted.is_(False)).group_by(Sale.client_phone, Sale.policy_type_id)
+    for raw_phone, product, count, premium, first, last in db.session.execute(
+        aggregates.execution_options(yield_per=WRITE_BATCH_SIZE)
+    ):
+        phone = normalize_phone(raw_phone)
+        if not phone:
+            continue
+        customer = customers.get(phone)
+        if customer is None:
+            customer = customers[phone] = {
+                'phone': phone, 'sale_count': 0, 'total_premium': 0.0, 'first_sale_at': first,
+                'last_sale_at': last, 'mix': defaultdict(int), 'client_name': None, 'id_number': None,
+                'latest': None, 'latest_id': None
+            }
+        customer['sale_count'] += count
+        customer['total_premium'] += premium or 0.0
+        customer['mix'][str(product)] += count
+        if first and (customer['first_sale_at'] is None or first < customer['first_sale_at']):
+            customer['first_sale_at'] = first
+        if last and (customer['last_sale_at'] is None or last > customer['last_sale_at']):
+            customer['last_sale_at'] = last
+
+    # Name and ID number come from the customer's latest sale (the latest one with an ID number for the latter),
+    # ordered by created_at then id as in refresh_customer
+    for column, field, source, conditions in (
+        (Sale.client_name, 'client_name', 'latest', ()),
+        (Sale.client_id_no, 'id_number', 'latest_id', (Sale.client_id_no.isnot(None), Sale.client_id_no != '')),
+    ):
+        ranked = select(
+            Sale.id, Sale.client_phone, Sale.created_at, column.label('value'),
+            func.row_number().over(
+                partition_by=Sale.client_phone, order_by=(Sale.created_at.desc(), Sale.id.desc())
+            ).label('position')
+        ).where(Sale.is_deleted.is_(False), *conditions).subquery()
+        rows = db.session.execute(
+            select(ranked.c.id, ranked.c.client_phone, ranked.c.created_at, ranked.c.value)
+            .where(ranked.c.position == 1)
+            .execution_options(yield_per=WRITE_BATCH_SIZE)
+        )
+        for sale_id, raw_phone, created_at, value in rows:
+            customer = customers.get(normalize_phone(raw_phone))
+            if customer is None:
+                continue
+            # Phone variants of one customer are ranked separately; keep the latest across them
+            order = (created_at or datetime.min, sale_id)
+            if customer[source] is None or order > customer[source]:
+                customer[source] = order
+                customer[field] = value.strip() if value else None
+
+    db.session.execute(delete(CustomerProfile))
+    batch = []
+    for customer in customers.values():
+        batch.append({
+            'phone': customer['phone'],
+            'id_number': customer['id_number'],
+            'client_name': customer['client_name'],
+            'sale_count': customer['sale_count'],
+            'total_premium': round(customer['total_premium'], 2),
+            'first_sale_at': customer['first_sale_at'],
+            'last_sale_at': customer['last_sale_at'],
+            'product_mix': CustomerProfile.encode_product_mix(customer['mix']),
+        })
+        if len(batch) >= WRITE_BATCH_SIZE:
+            db.session.execute(insert(CustomerProfile), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(CustomerProfile), batch)
+    db.session.commit()
+    logger.info(f"Rebuilt {len(customers)} customer profiles")
+    return len(customers)
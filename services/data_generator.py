@@ -0,0 +1,693 @@
+import csv
+import io
+import logging
+import math
+import random
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, select, text
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models.audit_model import AuditTrail
+from models.bank_model import Bank, BankBranch
+from models.impact_product_model import ImpactProduct, ProductCategory
+from models.inception_model import Inception
+from models.paypoint_model import Paypoint
+from models.performance_model import SalesTarget
+from models.sales_executive_model import SalesExecutive
+from models.sales_model import Sale
+from services.geohash import encode_point
+from models.under_investigation_model import UnderInvestigation
+from models.user_model import Role, User
+from models.user_session_model import UserSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOLUMES = {
+    'managers': 20,
+    'executives_per_manager': 15,
+    'back_office_users': 10,
+    'sales': 100000,
+    'inception_rate': 0.6,          # share of sales with a first premium received
+    'duplicate_rate': 0.02,         # share of sales re-submitting an earlier client and policy
+    'fraud_rate': 0.01,             # share of sales matching a fraud detection rule
+    'sessions_per_user': 50,
+    'audit_rows_per_sale': 1.5,
+}
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_PASSWORD = 'Password123!'
+
+# Ghana mobile prefixes, weighted roughly by network market share
+PHONE_PREFIXES = (
+    ('024', 20), ('054', 16), ('055', 14), ('059', 6), ('025', 3), ('053', 4),  # MTN
+    ('020', 8), ('050', 7),                                                      # Telecel
+    ('027', 7), ('057', 6), ('026', 5), ('056', 4),                              # AirtelTigo
+)
+FIRST_NAMES = (
+    'Kwame', 'Kofi', 'Kwaku', 'Yaw', 'Kwabena', 'Kwadwo', 'Kojo', 'Ama', 'Akosua', 'Abena',
+    'Adwoa', 'Afua', 'Yaa', 'Efua', 'Esi', 'Ekua', 'Akua', 'Emmanuel', 'Samuel', 'Joseph',
+    'Isaac', 'Daniel', 'Michael', 'Richard', 'Grace', 'Mercy', 'Comfort', 'Gifty', 'Patience',
+    'Rita', 'Ibrahim', 'Abdul', 'Fatima', 'Amina', 'Selorm', 'Edem', 'Mawuli', 'Dzifa',
+)
+SURNAMES = (
+    'Mensah', 'Owusu', 'Boateng', 'Asante', 'Osei', 'Agyeman', 'Appiah', 'Adjei', 'Amoah',
+    'Darko', 'Ofori', 'Acheampong', 'Antwi', 'Opoku', 'Sarpong', 'Kuffour', 'Quaye', 'Tetteh',
+    'Lamptey', 'Addo', 'Nkrumah', 'Yeboah', 'Gyamfi', 'Annan', 'Quartey', 'Danso', 'Bonsu',
+    'Amponsah', 'Frimpong', 'Nyarko', 'Abubakar', 'Mohammed', 'Iddrisu', 'Agbeko', 'Kpodo',
+)
+# Sale locations cluster around the main towns; (name, latitude, longitude, weight)
+GEO_CLUSTERS = (
+    ('Accra', 5.6037, -0.1870, 40), ('Kumasi', 6.6885, -1.6244, 25), ('Takoradi', 4.8845, -1.7554, 10),
+    ('Tamale', 9.4075, -0.8533, 10), ('Cape Coast', 5.1053, -1.2466, 8), ('Ho', 6.6008, 0.4713, 7),
+)
+SOURCE_TYPES = (('momo', 55), ('bank', 30), ('paypoint', 15))
+COLLECTION_PLATFORMS = ('Transflow', 'Hubtel', 'company Momo number')
+INCEPTION_METHODS = (('mobile_money', 55), ('bank', 25), ('cash', 10), ('paypoint', 7), ('cheque', 3))
+INCEPTION_STATUSES = (('completed', 88), ('pending', 9), ('cancelled', 3))
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (Linux; Android 13; SM-A145F) AppleWebKit/537.36 Chrome/119.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+)
+AUDIT_ACTIONS = (('ACCESS', 50), ('FILTER', 20), ('UPDATE', 15), ('LOGIN', 10), ('GENERATE_REPORT', 5))
+
+# Reference rows created when the database has none
+REFERENCE_BANKS = {
+    'GCB BANK': ('GCB', ['Accra Main', 'Kumasi Adum', 'Takoradi Market Circle']),
+    'ECOBANK GHANA': ('ECO', ['Ridge', 'Kejetia', 'Tamale Central']),
+    'ABSA BANK GHANA': ('ABSA', ['High Street', 'Cape Coast', 'Ho']),
+    'ZENITH BANK GHANA': ('ZEN', ['Airport City', 'Asokwa']),
+}
+REFERENCE_PAYPOINTS = ('CAGD', 'GES', 'GHANA HEALTH SERVICE', 'GHANA POLICE SERVICE', 'COCOBOD')
+REFERENCE_PRODUCTS = {
+    'Life': [('Funeral Policy', 'risk'), ('Term Life Cover', 'risk'), ('Family Protection Plan', 'hybrid')],
+    'Savings': [('Education Plan', 'investment'), ('Retirement Plan', 'investment'), ('Wealth Builder', 'hybrid')],
+}
+# Typical monthly premium per product group; amounts are lognormal around these
+PREMIUM_MEDIANS = {'risk': 45.0, 'investment': 150.0, 'hybrid': 90.0}
+ACCOUNT_LENGTHS = {'GCB': 13, 'ECO': 13, 'ABSA': 10, 'ZEN': 10}
+
+
+def _weighted(choices):
+    values = [value for value, _ in choices]
+    weights = [weight for _, weight in choices]
+    return values, weights
+
+
+class BulkWriter:
+    """
+    Writes plain row dictionaries straight to a table, bypassing the ORM.
+
+    PostgreSQL (psycopg2) rows are streamed with COPY; other databases use
+    executemany inserts. Python column defaults are filled in here because
+    neither path runs the ORM.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.use_copy = self.dialect == 'postgresql' and connection.dialect.driver == 'psycopg2'
+        self.defaults: Dict[str, Dict] = {}
+
+    def _column_defaults(self, table):
+        if table.name not in self.defaults:
+            defaults = {}
+            for column in table.columns:
+                default = column.default
+                if default is None or column.primary_key:
+                    continue
+                if default.is_scalar:
+                    defaults[column.name] = (False, default.arg)
+                elif default.is_callable:
+                    defaults[column.name] = (True, default.arg)
+            self.defaults[table.name] = defaults
+        return self.defaults[table.name]
+
+    def complete(self, table, row: Dict) -> Dict:
+        for name, (is_callable, value) in self._column_defaults(table).items():
+            if name not in row:
+                row[name] = value(None) if is_callable else value
+        return row
+
+    def write(self, table, rows: List[Dict]):
+        if not rows:
+            return
+        rows = [self.complete(table, row) for row in rows]
+        if self.use_copy:
+            self._copy(table, rows)
+        else:
+            columns = [column.name for column in table.columns if column.name in rows[0]]
+            # Same key set for every row keeps executemany on its fast path
+            self.connection.execute(table.insert(), [{name: row.get(name) for name in columns} for row in rows])
+
+    def _copy(self, table, rows: List[Dict]):
+        preparer = self.connection.dialect.identifier_preparer
+        columns = [column.name for column in table.columns if column.name in rows[0]]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([self._copy_value(row.get(name)) for name in columns])
+        buffer.seek(0)
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {preparer.format_table(table)} ({', '.join(preparer.quote(name) for name in columns)}) "
+                f"FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _copy_value(value):
+        # CSV COPY reads an unquoted empty field as NULL
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, datetime):
+            return value.isoformat(sep=' ')
+        if hasattr(value, 'name') and hasattr(value, 'value'):  # Enum members are stored by name
+            return value.name
+        return value
+
+    def reset_sequences(self, tables: Iterable):
+        """Move PostgreSQL ID sequences past the explicitly assigned IDs."""
+        if self.dialect != 'postgresql':
+            return
+        preparer = self.connection.dialect.identifier_preparer
+        for table in tables:
+            quoted = preparer.format_table(table)
+            self.connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{quoted}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {quoted}), 0) + 1, false)"
+            ))
+
+
+class DataGenerator:
+    """
+    Generates a synthetic production-scale dataset for load and performance testing.
+
+    Users, executives, targets, sales, inceptions, investigations, sessions and
+    audit rows are written in chunks through ``BulkWriter``, committing after
+    each chunk so tens of millions of sales never sit in one transaction.
+    IDs are assigned explicitly from the current maximum, so generated data
+    can be appended to an existing database. The same seed always produces
+    the same rows.
+
+    Sales draw clients from a skewed customer pool (repeat buyers are common),
+    use weighted Ghana mobile prefixes and unique serials, and include
+    duplicates and fraud patterns that the detection rules in ``Sale`` flag:
+    velocity bursts, amount outliers, poor client information and
+    suspiciously quick submissions.
+    """
+
+    def __init__(self, volumes: Optional[Dict] = None, days: int = 365, seed: int = 42,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, now: Optional[datetime] = None):
+        self.volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+        self.days = days
+        self.chunk_size = chunk_size
+        self.now = now or datetime.utcnow()
+        self.start = self.now - timedelta(days=days)
+        self.random = random.Random(seed)
+        self.run_tag = f"{seed:x}{int(self.now.timestamp()):x}"
+        self.counts: Dict[str, int] = {}
+        self.prefixes, self.prefix_weights = _weighted(PHONE_PREFIXES)
+        self.sources, self.source_weights = _weighted(SOURCE_TYPES)
+        self.inception_methods, self.inception_method_weights = _weighted(INCEPTION_METHODS)
+        self.inception_statuses, self.inception_status_weights = _weighted(INCEPTION_STATUSES)
+        self.audit_actions, self.audit_action_weights = _weighted(AUDIT_ACTIONS)
+        self.cluster_weights = [cluster[3] for cluster in GEO_CLUSTERS]
+        # Roughly one customer per 1.4 sales, so repeat purchases are common
+        self.customer_count = max(10, int(self.volumes['sales'] / 1.4))
+
+    # Reference data
+
+    def _ensure_reference_data(self):
+        """Create roles, banks, paypoints and products through the ORM if they are missing."""
+        for name in ('Admin', 'Back_office', 'Sales_Manager'):
+            if not Role.query.filter_by(name=name).first():
+                db.session.add(Role(name=name, description=f'{name} role'))
+
+        if not Bank.query.first():
+            for bank_name, (code, branches) in REFERENCE_BANKS.items():
+                bank = Bank(name=bank_name, code=code)
+                db.session.add(bank)
+                db.session.flush()
+                for i, branch_name in enumerate(branches):
+                    db.session.add(BankBranch(name=branch_name, code=f'{code}{i + 1:03d}', bank_id=bank.id))
+
+        if not Paypoint.query.first():
+            for name in REFERENCE_PAYPOINTS:
+                db.session.add(Paypoint(name=name, location='Accra'))
+
+        if not ImpactProduct.query.first():
+            for category_name, products in REFERENCE_PRODUCTS.items():
+                category = ProductCategory.query.filter_by(name=category_name).first()
+                if not category:
+                    category = ProductCategory(name=category_name)
+                    db.session.add(category)
+                    db.session.flush()
+                for product_name, group in products:
+                    db.session.add(ImpactProduct(name=product_name, category_id=category.id, group=group))
+        db.session.commit()
+
+        self.roles = {role.name: role.id for role in Role.query.all()}
+        self.banks = [
+            (bank.id, ACCOUNT_LENGTHS.get(bank.code, 13), [branch.id for branch in bank.bank_branches])
+            for bank in Bank.query.filter_by(is_deleted=False).all()
+        ]
+        self.paypoints = [(paypoint.id, paypoint.name) for paypoint in Paypoint.query.filter_by(is_deleted=False).all()]
+        self.products = [(product.id, product.group) for product in ImpactProduct.query.filter_by(is_deleted=False).all()]
+
+    def _next_id(self, connection, model) -> int:
+        return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    # Row builders
+
+    def _timestamp(self, start: Optional[datetime] = None, days: Optional[float] = None) -> datetime:
+        """A random moment in business hours, with weekdays far busier than weekends."""
+        start = start or self.start
+        days = self.days if days is None else days
+        moment = start + timedelta(days=self.random.random() * days)
+        if moment.weekday() >= 5 and self.random.random() < 0.7:
+            moment -= timedelta(days=moment.weekday() - 4)
+        hour = min(19, max(7, int(self.random.gauss(12.5, 2.5))))
+        return moment.replace(hour=hour, minute=self.random.randrange(60), second=self.random.randrange(60))
+
+    def _customer(self, index: int) -> Dict:
+        """Deterministic identity of pooled customer ``index``."""
+        rng = random.Random(index)
+        prefix = rng.choices(self.prefixes, self.prefix_weights)[0]
+        return {
+            'client_name': f"{FIRST_NAMES[index % len(FIRST_NAMES)]} "
+                           f"{SURNAMES[(index // len(FIRST_NAMES)) % len(SURNAMES)]}",
+            'client_phone': f"{prefix}{rng.randrange(10 ** 7):07d}",
+            'client_id_no': f"GHA-{rng.randrange(10 ** 9):09d}-{rng.randrange(10)}",
+        }
+
+    def _pick_customer(self) -> int:
+        # Skewed toward low indexes: a minority of customers buy many policies
+        return int(self.customer_count * self.random.random() ** 1.6)
+
+    def _location(self):
+        if self.random.random() < 0.4:
+            return None, None
+        _, latitude, longitude, _ = self.random.choices(GEO_CLUSTERS, self.cluster_weights)[0]
+        return (
+            round(latitude + self.random.gauss(0, 0.05), 6),
+            round(longitude + self.random.gauss(0, 0.05), 6)
+        )
+
+    def _sale(self, sale_id: int, executive, created_at: datetime, customer: Dict) -> Dict:
+        executive_id, manager_id = executive
+        product_id, group = self.random.choice(self.products)
+        source_type = self.random.choices(self.sources, self.source_weights)[0]
+        latitude, longitude = self._location()
+        amount = round(PREMIUM_MEDIANS[group] * math.exp(self.random.gauss(0, 0.45)), 2)
+        row = {
+            'id': sale_id,
+            'user_id': self.random.choice(self.back_office_ids),
+            'sale_manager_id': manager_id,
+            'sales_executive_id': executive_id,
+            **customer,
+            'serial_number': f"IMP{created_at:%y%m}{sale_id:09d}",
+            'source_type': source_type,
+            'momo_reference_number': None,
+            'collection_platform': None,
+            'momo_transaction_id': None,
+            'first_pay_with_momo': None,
+            'subsequent_pay_source_type': None,
+            'bank_id': None,
+            'bank_branch_id': None,
+            'bank_acc_number': None,
+            'paypoint_id': None,
+            'paypoint_branch': None,
+            'staff_id': None,
+            'policy_type_id': product_id,
+            'amount': amount,
+            'created_at': created_at,
+            'updated_at': None,
+            'is_deleted': self.random.random() < 0.005,
+            'geolocation_latitude': latitude,
+            'geolocation_longitude': longitude,
+            'geohash': encode_point(latitude, longitude),
+            'status': 'submitted',
+            'customer_called': self.random.random() < 0.35,
+            'momo_first_premium': False,
+            'transaction_velocity': 1,
+            'amount_deviation': round(self.random.uniform(0.6, 1.6), 3),
+            'information_risk_score': round(self.random.uniform(0.0, 0.3), 3),
+            'device_fingerprint': secrets.token_hex(16) if self.random.random() < 0.5 else None,
+            'ip_address': f"41.{self.random.randrange(66, 219)}.{self.random.randrange(256)}.{self.random.randrange(1, 255)}",
+            'session_duration': self.random.randrange(60, 900),
+        }
+        if source_type == 'momo':
+            row.update({
+                'momo_reference_number': f"MP{created_at:%y%m%d}.{self.random.randrange(10 ** 4):04d}.{self.random.choice('ABCDEFGH')}{self.random.randrange(10 ** 5):05d}",
+                'collection_platform': self.random.choice(COLLECTION_PLATFORMS),
+                'momo_transaction_id': str(self.random.randrange(10 ** 10, 10 ** 11)),
+                'first_pay_with_momo': True,
+                'momo_first_premium': True,
+                'subsequent_pay_source_type': self.random.choice(('momo', 'bank', 'momo')),
+            })
+        elif source_type == 'bank':
+            bank_id, account_length, branch_ids = self.random.choice(self.banks)
+            row.update({
+                'bank_id': bank_id,
+                'bank_branch_id': self.random.choice(branch_ids) if branch_ids else None,
+                'bank_acc_number': ''.join(str(self.random.randrange(10)) for _ in range(account_length)),
+            })
+        else:
+            paypoint_id, paypoint_name = self.random.choice(self.paypoints)
+            row.update({
+                'paypoint_id': paypoint_id,
+                'paypoint_branch': f"{paypoint_name} {self.random.choice(GEO_CLUSTERS)[0]}",
+                'staff_id': f"{self.random.randrange(10 ** 6, 10 ** 7)}",
+            })
+        return row
+
+    def _investigation(self, sale: Dict, reason: str, notes: str) -> Dict:
+        resolved = self.random.random() < 0.4
+        flagged_at = sale['created_at'] + timedelta(minutes=self.random.randrange(1, 30))
+        return {
+            'sale_id': sale['id'],
+            'reason': reason,
+            'flagged_at': flagged_at,
+            'resolved': resolved,
+            'resolved_at': flagged_at + timedelta(days=self.random.randrange(1, 20)) if resolved else None,
+            'notes': notes,
+            'priority': self.random.choice(('low', 'medium', 'medium', 'high', 'critical')),
+            'status': 'resolved' if resolved else self.random.choice(('open', 'in_progress', 'pending_review')),
+            'last_status_change': flagged_at,
+            'risk_score': round(self.random.uniform(0.5, 1.0), 3),
+            'category': 'fraud',
+        }
+
+    def _apply_fraud_pattern(self, rows: List[Dict], investigations: List[Dict], executive):
+        """Turn the last sale into one of the patterns the fraud rules catch; bursts add extra sales."""
+        sale = rows[-1]
+        pattern = self.random.choice(('velocity', 'amount', 'information', 'speed'))
+        if pattern == 'velocity':
+            # One phone submitting more than MAX_HOURLY_TRANSACTIONS sales within the hour
+            burst = Sale.MAX_HOURLY_TRANSACTIONS + self.random.randrange(1, 10)
+            customer = {key: sale[key] for key in ('client_name', 'client_phone', 'client_id_no')}
+            for offset in range(1, burst):
+                rows.append(self._sale(sale['id'] + offset, executive,
+                                       sale['created_at'] + timedelta(seconds=self.random.randrange(3600)), customer))
+            burst_rows = sorted(rows[-burst:], key=lambda row: row['created_at'])
+            for velocity, row in enumerate(burst_rows, start=1):
+                row['transaction_velocity'] = velocity
+            flagged = burst_rows[Sale.MAX_HOURLY_TRANSACTIONS:]
+            reason = 'High transaction velocity'
+        elif pattern == 'amount':
+            sale['amount'] = round(sale['amount'] * self.random.uniform(4, 12), 2)
+            sale['amount_deviation'] = round(self.random.uniform(Sale.AMOUNT_DEVIATION_THRESHOLD + 0.5, 12), 3)
+            flagged, reason = [sale], 'Unusual transaction amount'
+        elif pattern == 'information':
+            sale.update({'client_id_no': None, 'collection_platform': None,
+                         'information_risk_score': round(self.random.uniform(0.85, 1.0), 3)})
+            flagged, reason = [sale], 'Poor information quality'
+        else:
+            sale['session_duration'] = self.random.randrange(2, Sale.MIN_SESSION_DURATION)
+            flagged, reason = [sale], 'Suspicious transaction speed'
+
+        for row in flagged:
+            row['status'] = 'under investigation'
+            investigations.append(self._investigation(
+                row, reason, "Auto-flagged by system based on fraud detection rules [with sales_id ]"
+            ))
+
+    def _inception(self, sale: Dict) -> Dict:
+        received_at = sale['created_at'] + timedelta(days=self.random.randrange(0, 10), hours=self.random.randrange(8))
+        method = 'mobile_money' if sale['source_type'] == 'momo' else \
+            self.random.choices(self.inception_methods, self.inception_method_weights)[0]
+        return {
+            'sale_id': sale['id'],
+            'amount_received': sale['amount'] if self.random.random() < 0.9 else round(sale['amount'] * 0.5, 2),
+            'received_at': received_at,
+            'description': 'First premium',
+            'payment_method': method,
+            'status': self.random.choices(self.inception_statuses, self.inception_status_weights)[0],
+            'created_at': received_at,
+            'updated_at': None,
+        }
+
+    def _audit(self, user_id: int, timestamp: datetime, action: str, resource_type: str,
+               resource_id: Optional[int] = None, details: Optional[str] = None) -> Dict:
+        return {
+            'user_id': user_id,
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'old_value': None,
+            'new_value': None,
+            'timestamp': timestamp,
+            'details': details,
+            'ip_address': f"10.{self.random.randrange(256)}.{self.random.randrange(256)}.{self.random.randrange(1, 255)}",
+            'user_agent': self.random.choice(USER_AGENTS),
+            'is_archived': False,
+            'archived_at': None,
+        }
+
+    # Generation steps
+
+    def _generate_people(self, writer: BulkWriter):
+        connection = writer.connection
+        password_hash = generate_password_hash(DEFAULT_PASSWORD)
+        next_user_id = self._next_id(connection, User)
+        next_executive_id = self._next_id(connection, SalesExecutive)
+        users, executives = [], []
+        self.manager_ids, self.back_office_ids, self.executives = [], [], []
+
+        def add_user(role: str, label: str):
+            user_id = next_user_id + len(users)
+            users.append({
+                'id': user_id,
+                'email': f"{label}.{self.run_tag}.{user_id}@example.com",
+                'name': f"{self.random.choice(FIRST_NAMES)} {self.random.choice(SURNAMES)}",
+                'password_hash': password_hash,
+                'role_id': self.roles[role],
+                'created_at': self.start,
+                'updated_at': self.start,
+            })
+            return user_id
+
+        self.admin_id = add_user('Admin', 'admin')
+        for _ in range(self.volumes['back_office_users']):
+            self.back_office_ids.append(add_user('Back_office', 'backoffice'))
+        for _ in range(self.volumes['managers']):
+            manager_id = add_user('Sales_Manager', 'manager')
+            self.manager_ids.append(manager_id)
+            for _ in range(self.volumes['executives_per_manager']):
+                executive_id = next_executive_id + len(executives)
+                executives.append({
+                    'id': executive_id,
+                    'name': f"{self.random.choice(FIRST_NAMES)} {self.random.choice(SURNAMES)}",
+                    'code': f"AG{self.run_tag}{executive_id:06d}".upper(),
+                    'manager_id': manager_id,
+                    'status': 'active' if self.random.random() < 0.92 else 'inactive',
+                    'created_at': self.start,
+                })
+                self.executives.append((executive_id, manager_id))
+        if not self.back_office_ids:
+            self.back_office_ids = self.manager_ids[:1]
+
+        writer.write(User.__table__, users)
+        writer.write(SalesExecutive.__table__, executives)
+        connection.commit()
+        self.counts['users'] = len(users)
+        self.counts['sales_executives'] = len(executives)
+
+    def _generate_targets(self, writer: BulkWriter):
+        """One overall and one source-type target per manager per month in the period."""
+        next_id = self._next_id(writer.connection, SalesTarget)
+        targets = []
+        month = self.start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        monthly_sales = self.volumes['sales'] / max(1, len(self.manager_ids)) / max(1.0, self.days / 30.0)
+        while month <= self.now:
+            month_end = (month + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+            for manager_id in self.manager_ids:
+                count = max(1, int(monthly_sales * self.random.uniform(0.9, 1.3)))
+                for criteria_type, criteria_value, share in ((None, None, 1.0), ('source_type', 'momo', 0.5)):
+                    targets.append({
+                        'id': next_id + len(targets),
+                        'sales_manager_id': manager_id,
+                        'target_sales_count': max(1, int(count * share)),
+                        'target_premium_amount': round(count * share * 80.0, 2),
+                        'created_at': month,
+                        'is_deleted': False,
+                        'is_active': True,
+                        'target_criteria_type': criteria_type,
+                        'target_criteria_value': criteria_value,
+                        'period_start': month,
+                        'period_end': month_end,
+                    })
+            month = month_end + timedelta(seconds=1)
+        writer.write(SalesTarget.__table__, targets)
+        writer.connection.commit()
+        self.counts['sales_targets'] = len(targets)
+
+    def _generate_sales(self, writer: BulkWriter):
+        connection = writer.connection
+        total = self.volumes['sales']
+        next_sale_id = self._next_id(connection, Sale)
+        next_investigation_id = self._next_id(connection, UnderInvestigation)
+        next_inception_id = self._next_id(connection, Inception)
+        next_audit_id = self._next_id(connection, AuditTrail)
+        recent = []  # recently sold (customer, policy) pairs, for duplicates
+        generated = 0
+        counts = {'sales': 0, 'inceptions': 0, 'under_investigation': 0, 'audit_trail': 0}
+
+        while generated < total:
+            rows: List[Dict] = []
+            investigations: List[Dict] = []
+            audits: List[Dict] = []
+            while len(rows) < self.chunk_size and generated + len(rows) < total:
+                sale_id = next_sale_id + generated + len(rows)
+                executive = self.random.choice(self.executives)
+                created_at = self._timestamp()
+                roll = self.random.random()
+
+                if roll < self.volumes['duplicate_rate'] and recent:
+                    # Same client and policy submitted again under a new serial
+                    original = self.random.choice(recent)
+                    customer = {key: original[key] for key in ('client_name', 'client_phone', 'client_id_no')}
+                    rows.append(self._sale(sale_id, executive, original['created_at'] + timedelta(
+                        hours=self.random.randrange(1, 72)), customer))
+                    rows[-1]['policy_type_id'] = original['policy_type_id']
+                    rows[-1]['status'] = 'potential duplicate'
+                    investigations.append(self._investigation(
+                        rows[-1], 'Potential duplicate',
+                        f"Auto-flagged by system based on fraud detection rules [with sales_id {original['id']}]"
+                    ))
+                    continue
+
+                rows.append(self._sale(sale_id, executive, created_at, self._customer(self._pick_customer())))
+                if roll < self.volumes['duplicate_rate'] + self.volumes['fraud_rate']:
+                    self._apply_fraud_pattern(rows, investigations, executive)
+                elif len(recent) < 1000:
+                    recent.append(rows[-1])
+                else:
+                    recent[self.random.randrange(len(recent))] = rows[-1]
+
+            inceptions = [
+                self._inception(row) for row in rows
+                if row['status'] == 'submitted' and self.random.random() < self.volumes['inception_rate']
+            ]
+            for row in rows:
+                audits.append(self._audit(row['user_id'], row['created_at'], 'CREATE', 'sale', row['id'],
+                                          f"Sale {row['serial_number']} created"))
+                extra = self.volumes['audit_rows_per_sale'] - 1
+                while extra > 0 and self.random.random() < extra:
+                    action = self.random.choices(self.audit_actions, self.audit_action_weights)[0]
+                    audits.append(self._audit(self.random.choice(self.back_office_ids),
+                                              row['created_at'] + timedelta(hours=self.random.randrange(1, 240)),
+                                              action, 'sale', row['id'], f"User performed {action.lower()} on sale"))
+                    extra -= 1
+
+            for offset, row in enumerate(investigations):
+                row['id'] = next_investigation_id + counts['under_investigation'] + offset
+            for offset, row in enumerate(inceptions):
+                row['id'] = next_inception_id + counts['inceptions'] + offset
+            for offset, row in enumerate(audits):
+                row['id'] = next_audit_id + counts['audit_trail'] + offset
+
+            writer.write(Sale.__table__, rows)
+            writer.write(UnderInvestigation.__table__, investigations)
+            writer.write(Inception.__table__, inceptions)
+            writer.write(AuditTrail.__table__, audits)
+            connection.commit()
+
+            generated += len(rows)
+            counts['sales'] += len(rows)
+            counts['inceptions'] += len(inceptions)
+            counts['under_investigation'] += len(investigations)
+            counts['audit_trail'] += len(audits)
+            logger.info(f"Generated {generated}/{total} sales")
+        self.counts.update(counts)
+
+    def _generate_sessions(self, writer: BulkWriter):
+        connection = writer.connection
+        next_id = self._next_id(connection, UserSession)
+        next_audit_id = self._next_id(connection, AuditTrail)
+        user_ids = [self.admin_id] + self.back_office_ids + self.manager_ids
+        sessions, audits = [], []
+        session_count = audit_count = 0
+
+        for user_id in user_ids:
+            for _ in range(self.volumes['sessions_per_user']):
+                login_time = self._timestamp()
+                active_minutes = self.random.randrange(2, 240)
+                logout_time = login_time + timedelta(minutes=active_minutes)
+                sessions.append({
+                    'id': next_id + session_count + len(sessions),
+                    'user_id': user_id,
+                    'login_time': login_time,
+                    'logout_time': logout_time,
+                    'expires_at': login_time + timedelta(minutes=45),
+                    'ip_address': f"41.{self.random.randrange(66, 219)}.{self.random.randrange(256)}.{self.random.randrange(1, 255)}",
+                    'is_active': False,
+                    'session_token': secrets.token_hex(32),
+                    'token_expires_at': login_time + timedelta(minutes=15),
+                    'user_agent': self.random.choice(USER_AGENTS),
+                    'last_activity': logout_time,
+                    'activity_count': self.random.randrange(1, 200),
+                    'suspicious_activity': self.random.random() < 0.01,
+                    'session_id': secrets.token_hex(32),
+                    'created_at': login_time,
+                    'is_deleted': False,
+                })
+                audits.append(self._audit(user_id, login_time, 'LOGIN', 'user_session', details='User logged in'))
+                audits.append(self._audit(user_id, logout_time, 'LOGOUT', 'user_session', details='User logged out'))
+                if len(sessions) >= self.chunk_size:
+                    session_count, audit_count = self._flush_sessions(writer, sessions, audits, next_audit_id,
+                                                                      session_count, audit_count)
+        self._flush_sessions(writer, sessions, audits, next_audit_id, session_count, audit_count)
+
+    def _flush_sessions(self, writer: BulkWriter, sessions: List[Dict], audits: List[Dict],
+                        next_audit_id: int, session_count: int, audit_count: int):
+        for offset, row in enumerate(audits):
+            row['id'] = next_audit_id + audit_count + offset
+        writer.write(UserSession.__table__, sessions)
+        writer.write(AuditTrail.__table__, audits)
+        writer.connection.commit()
+        session_count += len(sessions)
+        audit_count += len(audits)
+        self.counts['user_sessions'] = session_count
+        self.counts['audit_trail'] = self.counts.get('audit_trail', 0) + len(audits)
+        sessions.clear()
+        audits.clear()
+        return session_count, audit_count
+
+    def _refresh_derived_data(self):
+        """Bulk writes bypass the sale event hooks, so rebuild what they normally maintain."""
+        from services.sale_events import rebuild_derived_models
+
+        rebuild_derived_models()
+
+    def run(self) -> Dict[str, int]:
+        """Generate the whole dataset and return the number of rows written per table."""
+        started = time.perf_counter()
+        self._ensure_reference_data()
+        engine = db.engine
+        with engine.connect() as connection:
+            if engine.dialect.name == 'sqlite':
+                # Durability is irrelevant for generated data; skip the fsync per commit
+                connection.exec_driver_sql('PRAGMA synchronous=OFF')
+                connection.exec_driver_sql('PRAGMA cache_size=-200000')
+            writer = BulkWriter(connection)
+            self._generate_people(writer)
+            self._generate_targets(writer)
+            self._generate_sales(writer)
+            self._generate_sessions(writer)
+            writer.reset_sequences([
+                User.__table__, SalesExecutive.__table__, SalesTarget.__table__, Sale.__table__,
+                UnderInvestigation.__table__, Inception.__table__, AuditTrail.__table__, UserSession.__table__
+            ])
+            connection.commit()
+        self._refresh_derived_data()
+        self.counts['seconds'] = round(time.perf_counter() - started, 1)
+        return self.counts
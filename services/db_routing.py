@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from functools import wraps
+from typing import Optional
+from flask import g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from werkzeug.wrappers import Response as BaseResponse
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_KEY = 'replica'
+PRIMARY_HEADER = 'X-Read-Primary'
+PRIMARY_QUERY_FLAG = '_primary'
+DEFAULT_MAX_LAG_SECONDS = 10.0
+DEFAULT_LAG_CHECK_SECONDS = 5.0
+# Per-request routing state kept on flask.g
+ROUTING_STATE = ('db_route', 'db_replica_engine', 'db_primary_pinned')
+
+# Replication lag in seconds; zero when the replica has replayed everything it received,
+# which keeps an idle primary from looking like a lagging replica
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaMonitor:
+    """
+    Caches whether the replica is reachable and within the allowed replication lag.
+
+    The lag is measured at most once per ``check_interval`` seconds, so
+    routing a request never waits on more than an occasional probe. Replicas
+    that are not PostgreSQL standbys, such as a second local database, report
+    no lag.
+    """
+
+    def __init__(self, max_lag: float, check_interval: float):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.checked_at = 0.0
+        self.lag: Optional[float] = 0.0
+        self.lock = threading.Lock()
+
+    def _measure(self, engine) -> Optional[float]:
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name != 'postgresql':
+                    connection.execute(text('SELECT 1'))
+                    return 0.0
+                return float(connection.execute(POSTGRES_LAG_SQL).scalar() or 0)
+        except SQLAlchemyError as e:
+            logger.warning(f"Read replica unavailable, reading from the primary: {str(e)}")
+            return None
+
+    def mark_unavailable(self, context):
+        """Stop routing to a replica that dropped its connection until the next check."""
+        if context.is_disconnect:
+            with self.lock:
+                self.lag = None
+                self.checked_at = time.monotonic()
+
+    def usable(self, engine) -> Optional[str]:
+        """Return None when reads can go to the replica, otherwise the reason they cannot."""
+        with self.lock:
+            if time.monotonic() - self.checked_at >= self.check_interval:
+                lag = self._measure(engine)
+                if lag is not None and lag > self.max_lag and (self.lag is None or self.lag <= self.max_lag):
+                    logger.warning(f"Read replica is {lag:.1f}s behind, reading from the primary")
+                self.lag = lag
+                self.checked_at = time.monotonic()
+            lag = self.lag
+        if lag is None:
+            return 'unavailable'
+        if lag > self.max_lag:
+            return 'lagging'
+        return None
+
+
+monitor: Optional[ReplicaMonitor] = None
+
+
+def _replica_engine(db):
+    """Return the replica engine for the current read-only request, or None for the primary."""
+    if monitor is None or g.get('db_route') != REPLICA_BIND_KEY or g.get('db_primary_pinned'):
+        return None
+    if 'db_replica_engine' not in g:
+        engine = db.engines[REPLICA_BIND_KEY]
+        reason = monitor.usable(engine)
+        g.db_replica_engine = engine if reason is None else None
+        metrics.DB_READ_ROUTING.inc('replica' if reason is None else f'primary_{reason}')
+    return g.db_replica_engine
+
+
+class RoutingSession(Session):
+    """
+    Session sending the reads of read-only endpoints to the replica bind.
+
+    Only SELECTs against the default bind are routed, and never while
+    flushing. The first write in a request pins its remaining statements to
+    the primary, so a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or engine is not self._db.engines.get(None) or not has_app_context():
+            return engine
+        if self._flushing or getattr(clause, 'is_dml', False):
+            g.db_primary_pinned = True
+            return engine
+        if clause is None or not getattr(clause, 'is_select', False):
+            return engine
+        return _replica_engine(self._db) or engine
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _pin_primary(session, flush_context):
+    if has_app_context():
+        g.db_primary_pinned = True
+
+
+def primary_requested() -> bool:
+    """Whether the client asked to read from the primary (read-your-writes)."""
+    if not has_request_context():
+        return False
+    flag = request.headers.get(PRIMARY_HEADER) or request.args.get(PRIMARY_QUERY_FLAG)
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def read_only(f):
+    """
+    Route the SELECTs of an endpoint to the read replica, when one is configured.
+
+    Reads fall back to the primary when the replica is unreachable or lags
+    by more than REPLICA_MAX_LAG_SECONDS, and when the client sends
+    X-Read-Primary: 1 (or _primary=1) to read data it has just written.
+    A streamed response keeps the routing until it is closed, so the reads
+    made while its body is generated go to the same database.
+    """
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        if monitor is None:
+            return f(*args, **kwargs)
+        if primary_requested():
+            metrics.DB_READ_ROUTING.inc('primary_requested')
+            return f(*args, **kwargs)
+        state = g._get_current_object()
+        previous = {key: state.pop(key, None) for key in ROUTING_STATE}
+        state.db_route = REPLICA_BIND_KEY
+        try:
+            result = f(*args, **kwargs)
+        except BaseException:
+            _restore_routing(state, previous)
+            raise
+        response = result[0] if isinstance(result, tuple) else result
+        if isinstance(response, BaseResponse) and response.is_streamed:
+            response.call_on_close(lambda: _restore_routing(state, previous))
+        else:
+            _restore_routing(state, previous)
+        return result
+    return wrapped
+
+
+def _restore_routing(state, previous):
+    for key in ROUTING_STATE:
+        state.pop(key, None)
+        if previous[key] is not None:
+            setattr(state, key, previous[key])
+
+
+def init_app(app, db):
+    """Start monitoring the replica bind, if SQLALCHEMY_BINDS configures one."""
+    global monitor
+    if REPLICA_BIND_KEY not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+    monitor = ReplicaMonitor(
+        app.config.get('REPLICA_MAX_LAG_SECONDS', DEFAULT_MAX_LAG_SECONDS),
+        app.config.get('REPLICA_LAG_CHECK_SECONDS', DEFAULT_LAG_CHECK_SECONDS)
+    )
+    with app.app_context():
+        event.listen(db.engines[REPLICA_BIND_KEY], 'handle_error', monitor.mark_unavailable)
+        logger.info(f"Routing read-only endpoints to {db.engines[REPLICA_BIND_KEY].url.render_as_string(hide_password=True)}")
@@ -0,0 +1,361 @@
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import and_, func, or_, select
+from extensions import db
+from models.performance_model import SalesTarget, SalesPerformance
+
+# Alert thresholds, kept in line with SalesTarget.check_performance_alerts
+AT_RISK_FORECAST_PERCENTAGE = 80
+BEHIND_SCHEDULE_PERCENTAGE = 50
+BEHIND_SCHEDULE_DAYS = 30
+
+DEFAULT_LOOKBACK_DAYS = 30
+DEFAULT_ROLLING_WINDOW = 7
+
+
+class TargetSeries:
+    """Daily cumulative performance for a batch of targets as NumPy arrays."""
+
+    def __init__(self, targets: List[Dict], dates: List[datetime],
+                 sales_counts: np.ndarray, premium_amounts: np.ndarray):
+        self.targets = targets
+        self.dates = dates
+        self.sales_counts = sales_counts
+        self.premium_amounts = premium_amounts
+
+    def __len__(self):
+        return len(self.targets)
+
+
+def load_target_series(
+    target_ids: Optional[List[int]] = None,
+    sales_manager_ids: Optional[List[int]] = None,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    now: Optional[datetime] = None
+) -> TargetSeries:
+    """
+    Load daily performance series for many targets in a single query.
+
+    Targets are outer joined to their performance rows, so targets without any
+    performance still appear (with zero progress). Each performance row holds
+    the cumulative actuals as of its date; rows older than the lookback window
+    seed the first day and gaps are forward filled. Only the rows inside the
+    window are read, plus each target's latest row before it as the seed.
+    """
+    now = now or datetime.utcnow()
+    window_start = (now - timedelta(days=lookback_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    num_days = lookback_days + 1
+
+    target_filters = [SalesTarget.is_deleted == False]
+    if target_ids is not None:
+        target_filters.append(SalesTarget.id.in_(target_ids))
+    else:
+        target_filters.append(SalesTarget.is_active == True)
+    if sales_manager_ids is not None:
+        target_filters.append(SalesTarget.sales_manager_id.in_(sales_manager_ids))
+
+    # Each target's most recent row before the window, which seeds day 0
+    earlier = select(
+        SalesPerformance.id,
+        func.row_number().over(
+            partition_by=SalesPerformance.target_id,
+            order_by=(SalesPerformance.performance_date.desc(), SalesPerformance.id.desc())
+        ).label('position')
+    ).where(
+        SalesPerformance.target_id.in_(select(SalesTarget.id).where(*target_filters)),
+        SalesPerformance.is_deleted == False,
+        SalesPerformance.performance_date < window_start
+    ).subquery()
+    seed_ids = select(earlier.c.id).where(earlier.c.position == 1)
+
+    query = db.session.query(
+        SalesTarget.id,
+        SalesTarget.sales_manager_id,
+        SalesTarget.target_sales_count,
+        SalesTarget.target_premium_amount,
+        SalesTarget.target_criteria_type,
+        SalesTarget.target_criteria_value,
+        SalesTarget.period_start,
+        SalesTarget.period_end,
+        SalesPerformance.performance_date,
+        SalesPerformance.actual_sales_count,
+        SalesPerformance.actual_premium_amount
+    ).outerjoin(
+        SalesPerformance,
+        and_(
+            SalesPerformance.target_id == SalesTarget.id,
+            SalesPerformance.is_deleted == False,
+            SalesPerformance.performance_date <= now,
+            or_(SalesPerformance.performance_date >= window_start, SalesPerformance.id.in_(seed_ids))
+        )
+    ).filter(*target_filters)
+
+    rows = query.order_by(
+        SalesTarget.id,
+        SalesPerformance.performance_date,
+        SalesPerformance.id
+    ).all()
+
+    targets = []
+    positions = {}
+    cells_target, cells_day, cells_count, cells_premium = [], [], [], []
+    for row in rows:
+        if row.id not in positions:
+            positions[row.id] = len(targets)
+            targets.append({
+                'target_id': row.id,
+                'sales_manager_id': row.sales_manager_id,
+                'target_sales_count': row.target_sales_count or 0,
+                'target_premium_amount': row.target_premium_amount or 0.0,
+                'target_criteria_type': row.target_criteria_type,
+                'target_criteria_value': row.target_criteria_value,
+                'period_start': row.period_start,
+                'period_end': row.period_end
+            })
+        if row.performance_date is None:
+            continue
+        cells_target.append(positions[row.id])
+        cells_day.append(max((row.performance_date - window_start).days, 0))
+        cells_count.append(row.actual_sales_count or 0)
+        cells_premium.append(row.actual_premium_amount or 0.0)
+
+    sales_counts = np.full((len(targets), num_days), np.nan)
+    premium_amounts = np.full((len(targets), num_days), np.nan)
+
+    if cells_target:
+        cell_keys = np.asarray(cells_target) * num_days + np.asarray(cells_day)
+        # Rows are ordered by date, so keep the last row written for each (target, day)
+        _, last_from_end = np.unique(cell_keys[::-1], return_index=True)
+        keep = len(cell_keys) - 1 - last_from_end
+        target_idx = np.asarray(cells_target)[keep]
+        day_idx = np.asarray(cells_day)[keep]
+        sales_counts[target_idx, day_idx] = np.asarray(cells_count, dtype=float)[keep]
+        premium_amounts[target_idx, day_idx] = np.asarray(cells_premium, dtype=float)[keep]
+
+    dates = [window_start + timedelta(days=day) for day in range(num_days)]
+    return TargetSeries(
+        targets,
+        dates,
+        _forward_fill(sales_counts),
+        _forward_fill(premium_amounts)
+    )
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last known value forward along each row; leading gaps become zero."""
+    if values.size == 0:
+        return values
+    known = ~np.isnan(values)
+    index = np.where(known, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = values[np.arange(values.shape[0])[:, None], index]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+def _safe_percentage(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise percentage that yields zero where the denominator is zero."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(denominator > 0, numerator / denominator * 100, 0.0)
+    return result
+
+
+def _days_between(later: List[Optional[datetime]], earlier: List[Optional[datetime]]) -> np.ndarray:
+    """Whole days between two date lists (floored like ``timedelta.days``); NaN when missing."""
+    later = np.array([value or np.datetime64('NaT') for value in later], dtype='datetime64[us]')
+    earlier = np.array([value or np.datetime64('NaT') for value in earlier], dtype='datetime64[us]')
+    delta = (later - earlier).astype('timedelta64[us]')
+    days = np.floor(delta / np.timedelta64(1, 'D'))
+    return np.where(np.isnat(delta), np.nan, days)
+
+
+def compute_forecasts(
+    series: TargetSeries,
+    rolling_window: int = DEFAULT_ROLLING_WINDOW,
+    now: Optional[datetime] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Compute progress, run-rate and rolling-window forecasts for every target at once.
+
+    The run-rate forecast extrapolates the average daily rate since the start
+    of the period; the rolling forecast extrapolates the rate observed over the
+    last ``rolling_window`` days.
+    """
+    now = now or datetime.utcnow()
+    num_targets = len(series)
+    target_counts = np.array([t['target_sales_count'] for t in series.targets], dtype=float)
+    target_premiums = np.array([t['target_premium_amount'] for t in series.targets], dtype=float)
+    period_starts = [t['period_start'] for t in series.targets]
+    period_ends = [t['period_end'] for t in series.targets]
+
+    if num_targets:
+        current_counts = series.sales_counts[:, -1]
+        current_premiums = series.premium_amounts[:, -1]
+    else:
+        current_counts = np.zeros(0)
+        current_premiums = np.zeros(0)
+
+    days_elapsed = _days_between([now] * num_targets, period_starts)
+    days_remaining = _days_between(period_ends, [now] * num_targets)
+    has_end = ~np.isnan(days_remaining)
+    has_progress = (current_counts > 0) & (current_premiums > 0)
+    can_project = has_progress & has_end & (np.nan_to_num(days_elapsed) > 0) & (np.nan_to_num(days_remaining) > 0)
+
+    elapsed = np.where(can_project, days_elapsed, 1.0)
+    remaining = np.where(can_project, days_remaining, 0.0)
+
+    # Run-rate: average daily rate since the period started
+    forecast_counts = current_counts + current_counts / elapsed * remaining
+    forecast_premiums = current_premiums + current_premiums / elapsed * remaining
+
+    # Rolling: rate over the trailing window
+    window = max(1, min(rolling_window, series.sales_counts.shape[1] - 1)) if num_targets else 1
+    if num_targets and series.sales_counts.shape[1] > 1:
+        rolling_count_rate = (current_counts - series.sales_counts[:, -1 - window]) / window
+        rolling_premium_rate = (current_premiums - series.premium_amounts[:, -1 - window]) / window
+    else:
+        rolling_count_rate = np.zeros(num_targets)
+        rolling_premium_rate = np.zeros(num_targets)
+    rolling_counts = current_counts + np.clip(rolling_count_rate, 0, None) * remaining
+    rolling_premiums = current_premiums + np.clip(rolling_premium_rate, 0, None) * remaining
+
+    achievement_forecast = np.where(
+        can_project,
+        np.minimum(
+            _safe_percentage(forecast_counts, target_counts),
+            _safe_percentage(forecast_premiums, target_premiums)
+        ),
+        0.0
+    )
+    rolling_achievement_forecast = np.where(
+        can_project,
+        np.minimum(
+            _safe_percentage(rolling_counts, target_counts),
+            _safe_percentage(rolling_premiums, target_premiums)
+        ),
+        0.0
+    )
+
+    # Mirror SalesTarget.forecast_achievement for targets that cannot be projected
+    forecast_counts = np.where(has_progress, forecast_counts, 0.0)
+    forecast_premiums = np.where(has_progress, forecast_premiums, 0.0)
+    rolling_counts = np.where(has_progress, rolling_counts, 0.0)
+    rolling_premiums = np.where(has_progress, rolling_premiums, 0.0)
+    reported_days_remaining = np.where(has_progress & has_end, np.nan_to_num(days_remaining), 0).astype(int)
+
+    sales_count_percentage = _safe_percentage(current_counts, target_counts)
+    premium_amount_percentage = _safe_percentage(current_premiums, target_premiums)
+
+    return {
+        'sales_count_progress': current_counts,
+        'premium_amount_progress': current_premiums,
+        'sales_count_percentage': sales_count_percentage,
+        'premium_amount_percentage': premium_amount_percentage,
+        'forecast_sales_count': forecast_counts,
+        'forecast_premium_amount': forecast_premiums,
+        'rolling_forecast_sales_count': rolling_counts,
+        'rolling_forecast_premium_amount': rolling_premiums,
+        'days_remaining': reported_days_remaining,
+        'achievement_forecast': achievement_forecast,
+        'rolling_achievement_forecast': rolling_achievement_forecast,
+        'target_risk': (achievement_forecast < AT_RISK_FORECAST_PERCENTAGE) & (reported_days_remaining > 0),
+        'behind_schedule': (sales_count_percentage < BEHIND_SCHEDULE_PERCENTAGE) & (reported_days_remaining < BEHIND_SCHEDULE_DAYS)
+    }
+
+
+def _build_alerts(results: Dict[str, np.ndarray], index: int) -> List[Dict]:
+    """Build the alert payloads for one target from the batch results."""
+    alerts = []
+    if results['target_risk'][index]:
+        alerts.append({
+            'type': 'target_risk',
+            'message': 'Target achievement is at risk',
+            'severity': 'warning',
+            'details': {
+                'current_achievement': float(results['sales_count_percentage'][index]),
+                'forecast_achievement': float(results['achievement_forecast'][index])
+            }
+        })
+    if results['behind_schedule'][index]:
+        alerts.append({
+            'type': 'behind_schedule',
+            'message': 'Significantly behind target schedule',
+            'severity': 'critical',
+            'details': {
+                'current_achievement': float(results['sales_count_percentage'][index]),
+                'days_remaining': int(results['days_remaining'][index])
+            }
+        })
+    return alerts
+
+
+def forecast_targets(
+    target_ids: Optional[List[int]] = None,
+    sales_manager_ids: Optional[List[int]] = None,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    rolling_window: int = DEFAULT_ROLLING_WINDOW,
+    include_trend: bool = False
+) -> List[Dict]:
+    """
+    Forecast achievement and evaluate alerts for a batch of targets.
+
+    Defaults to every active target; pass ``sales_manager_ids`` to scope to a team.
+    Issues exactly one database query regardless of the number of targets.
+    """
+    try:
+        now = datetime.utcnow()
+        series = load_target_series(
+            target_ids=target_ids,
+            sales_manager_ids=sales_manager_ids,
+            lookback_days=lookback_days,
+            now=now
+        )
+        results = compute_forecasts(series, rolling_window=rolling_window, now=now)
+
+        if include_trend and len(series):
+            target_counts = np.array([t['target_sales_count'] for t in series.targets], dtype=float)[:, None]
+            target_premiums = np.array([t['target_premium_amount'] for t in series.targets], dtype=float)[:, None]
+            trend_rates = (
+                _safe_percentage(series.sales_counts, target_counts) +
+                _safe_percentage(series.premium_amounts, target_premiums)
+            ) / 2
+            trend_dates = [date.date().isoformat() for date in series.dates]
+
+        forecasts = []
+        for index, target in enumerate(series.targets):
+            entry = {
+                'target_id': target['target_id'],
+                'sales_manager_id': target['sales_manager_id'],
+                'target_criteria_type': target['target_criteria_type'],
+                'target_criteria_value': target['target_criteria_value'],
+                'progress': {
+                    'sales_count_progress': float(results['sales_count_progress'][index]),
+                    'premium_amount_progress': float(results['premium_amount_progress'][index]),
+                    'sales_count_percentage': float(results['sales_count_percentage'][index]),
+                    'premium_amount_percentage': float(results['premium_amount_percentage'][index])
+                },
+                'forecast': {
+                    'forecast_sales_count': float(results['forecast_sales_count'][index]),
+                    'forecast_premium_amount': float(results['forecast_premium_amount'][index]),
+                    'days_remaining': int(results['days_remaining'][index]),
+                    'achievement_forecast': float(results['achievement_forecast'][index]),
+                    'rolling_forecast_sales_count': float(results['rolling_forecast_sales_count'][index]),
+                    'rolling_forecast_premium_amount': float(results['rolling_forecast_premium_amount'][index]),
+                    'rolling_achievement_forecast': float(results['rolling_achievement_forecast'][index])
+                },
+                'alerts': _build_alerts(results, index)
+            }
+            if include_trend:
+                entry['trend'] = {
+                    'dates': trend_dates,
+                    'sales_counts': series.sales_counts[index].astype(int).tolist(),
+                    'premium_amounts': series.premium_amounts[index].tolist(),
+                    'achievement_rates': trend_rates[index].tolist()
+                }
+            forecasts.append(entry)
+
+        return forecasts
+    except Exception as e:
+        raise ValueError(f"Error forecasting targets: {str(e)}")
@@ -0,0 +1,275 @@
+import logging
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional
+from sqlalchemy import and_, delete, func, insert, literal, or_, select, update
+from extensions import db
+from models.bank_model import BankBranch
+from models.geo_model import GeoHeatmapCell
+from models.paypoint_model import Paypoint
+from models.sales_model import Sale
+from services import geohash
+from services.geohash import BoundingBox
+from services.upserts import increment
+
+logger = logging.getLogger(__name__)
+
+# Zoom levels kept in the heatmap: roughly 39km, 5km and 1.2km wide cells
+HEATMAP_PRECISIONS = (4, 5, 6)
+MAX_HEATMAP_CELLS = 2500
+# A covering is turned into at most this many index range scans
+MAX_COVER_CELLS = 32
+MAX_RESULTS = 1000
+# Nearest searches start with ~1km cells and widen until the answer is certain
+NEAREST_START_PRECISION = 6
+BACKFILL_BATCH_SIZE = 5000
+
+
+class GeoLayer:
+    """
+    A table with coordinates and an indexed geohash, and the columns a map needs of it.
+
+    ``active`` maps status columns to the value a row must have to be shown.
+    They are checked on the fetched rows rather than in the query, so the
+    geohash index (and not, say, the is_deleted index) drives the lookup.
+    """
+
+    def __init__(self, name: str, model, latitude: str, longitude: str, columns: List[str],
+                 active: Optional[Dict] = None):
+        self.name = name
+        self.model = model
+        self.table = model.__table__
+        self.latitude = self.table.c[latitude]
+        self.longitude = self.table.c[longitude]
+        self.geohash = self.table.c.geohash
+        self.columns = [self.table.c[column] for column in columns]
+        self.active = list((active or {}).items())
+        self.status_columns = [self.table.c[column] for column, _ in self.active]
+
+    def select_cells(self, cells: List[str], box: Optional[BoundingBox] = None):
+        """Rows whose geohash starts with one of the cells, optionally also inside a box."""
+        statement = select(self.table.c.id, *self.columns, *self.status_columns, self.latitude, self.longitude) \
+            .where(_in_cells(self.geohash, cells))
+        if box is not None:
+            min_lat, min_lng, max_lat, max_lng = box
+            statement = statement.where(self.latitude.between(min_lat, max_lat))
+            if min_lng <= max_lng:
+                statement = statement.where(self.longitude.between(min_lng, max_lng))
+            else:
+                statement = statement.where(or_(self.longitude >= min_lng, self.longitude <= max_lng))
+        return statement
+
+    def fetch(self, statement):
+        """Execute a select_cells statement, yielding the active rows."""
+        first = 1 + len(self.columns)
+        for row in db.session.execute(statement):
+            if all((row[first + position] or False) == value for position, (_, value) in enumerate(self.active)):
+                yield row
+
+    def row(self, row, distance_km: Optional[float] = None) -> Dict:
+        item = {'id': row[0]}
+        for column, value in zip(self.columns, row[1:]):
+            item[column.name] = value.isoformat() if isinstance(value, datetime) else value
+        item['latitude'], item['longitude'] = row[-2], row[-1]
+        if distance_km is not None:
+            item['distance_km'] = round(distance_km, 3)
+        return item
+
+
+LAYERS = {
+    'sale': GeoLayer(
+        'sale', Sale, 'geolocation_latitude', 'geolocation_longitude',
+        ['serial_number', 'client_name', 'sales_executive_id', 'amount', 'created_at'],
+        {'is_deleted': False}
+    ),
+    'branch': GeoLayer(
+        'branch', BankBranch, 'latitude', 'longitude',
+        ['name', 'bank_id', 'city', 'region', 'contact_phone'],
+        {'is_deleted': False}
+    ),
+    'paypoint': GeoLayer(
+        'paypoint', Paypoint, 'latitude', 'longitude',
+        ['name', 'location', 'contact_phone', 'operating_hours'],
+        {'is_deleted': False, 'status': 'active'}
+    ),
+}
+
+
+def get_layer(name: str) -> GeoLayer:
+    if name not in LAYERS:
+        raise ValueError(f"Invalid layer. Allowed values are: {', '.join(LAYERS)}")
+    return LAYERS[name]
+
+
+def _in_cells(column, cells: List[str]):
+    """Index range conditions matching the geohashes inside the cells."""
+    conditions = [
+        and_(column >= low, column < high) if high is not None else column >= low
+        for low, high in geohash.prefix_ranges(cells)
+    ]
+    return or_(*conditions) if len(conditions) > 1 else conditions[0]
+
+
+def validate_box(box: BoundingBox) -> BoundingBox:
+    min_lat, min_lng, max_lat, max_lng = box
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError("Latitudes must be between -90 and 90, with min_lat not above max_lat")
+    if not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+        raise ValueError("Longitudes must be between -180 and 180")
+    return box
+
+
+def within_box(layer: GeoLayer, box: BoundingBox, limit: int = MAX_RESULTS) -> List[Dict]:
+    """Rows of a layer inside a bounding box (min_lng > max_lng crosses the antimeridian)."""
+    validate_box(box)
+    cells = geohash.cover(box, geohash.cover_precision(box, MAX_COVER_CELLS))
+    return [layer.row(row) for row in islice(layer.fetch(layer.select_cells(cells, box)), limit)]
+
+
+def within_radius(layer: GeoLayer, latitude: float, longitude: float, radius_km: float,
+                  limit: int = MAX_RESULTS) -> List[Dict]:
+    """Rows of a layer within radius_km of a location, nearest first."""
+    if radius_km <= 0:
+        raise ValueError("Radius must be positive")
+    box = geohash.radius_box(latitude, longitude, radius_km)
+    cells = geohash.cover(box, geohash.cover_precision(box, MAX_COVER_CELLS))
+    found = []
+    for row in layer.fetch(layer.select_cells(cells, box)):
+        distance = geohash.haversine_km(latitude, longitude, row[-2], row[-1])
+        if distance <= radius_km:
+            found.append((distance, row))
+    found.sort(key=lambda item: item[0])
+    return [layer.row(row, distance) for distance, row in found[:limit]]
+
+
+def nearest(layer: GeoLayer, latitude: float, longitude: float, limit: int = 5,
+            max_km: Optional[float] = None) -> List[Dict]:
+    """
+    The rows of a layer closest to a location.
+
+    The search reads the cell around the location and its eight neighbors,
+    widening to coarser cells until enough rows lie within the distance the
+    block is guaranteed to cover, so sparse areas cost a few more index
+    range scans instead of a table scan.
+    """
+    geohash.encode(latitude, longitude)  # validates the location
+    found = []
+    for precision in range(NEAREST_START_PRECISION, 0, -1):
+        cell = geohash.encode(latitude, longitude, precision)
+        reach = geohash.reach_km(latitude, longitude, cell)
+        found = sorted(
+            ((geohash.haversine_km(latitude, longitude, row[-2], row[-1]), row)
+             for row in layer.fetch(layer.select_cells(geohash.neighbors(cell)))),
+            key=lambda item: item[0]
+        )
+        certain = [item for item in found if item[0] <= reach]
+        if len(certain) >= limit or (max_km is not None and reach >= max_km):
+            found = certain
+            break
+    if max_km is not None:
+        found = [item for item in found if item[0] <= max_km]
+    return [layer.row(row, distance) for distance, row in found[:limit]]
+
+
+# Heatmap
+
+def record_sale(snapshot: Dict, sign: int = 1):
+    """Add (or with sign -1, remove) a sale snapshot to the heatmap cells containing it."""
+    cell = geohash.encode_point(snapshot.get('geolocation_latitude'), snapshot.get('geolocation_longitude'))
+    if cell is None:
+        return
+    premium = sign * (snapshot.get('amount') or 0.0)
+    try:
+        for precision in HEATMAP_PRECISIONS:
+            increment(
+                GeoHeatmapCell, {'precision': precision, 'cell': cell[:precision]},
+                {'sale_count': sign, 'total_premium': premium}
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def rebuild_heatmap() -> int:
+    """Recompute every heatmap cell from the indexed sale geohashes; returns the number of cells."""
+    sales = Sale.__table__
+    now = datetime.utcnow()
+    db.session.execute(delete(GeoHeatmapCell))
+    for precision in HEATMAP_PRECISIONS:
+        cell = func.substr(sales.c.geohash, 1, precision)
+        db.session.execute(
+            insert(GeoHeatmapCell).from_select(
+                ['precision', 'cell', 'sale_count', 'total_premium', 'updated_at'],
+                select(literal(precision), cell, func.count(), func.coalesce(func.sum(sales.c.amount), 0.0), literal(now))
+                .where(sales.c.geohash.isnot(None), sales.c.is_deleted.is_(False))
+                .group_by(cell)
+            )
+        )
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(GeoHeatmapCell))
+
+
+def heatmap_precision(box: BoundingBox) -> int:
+    """The finest heatmap zoom level that shows a box in at most MAX_HEATMAP_CELLS cells."""
+    for precision in sorted(HEATMAP_PRECISIONS, reverse=True):
+        if geohash.cover_count(box, precision) <= MAX_HEATMAP_CELLS:
+            return precision
+    return min(HEATMAP_PRECISIONS)
+
+
+def heatmap(box: BoundingBox, precision: Optional[int] = None) -> Dict:
+    """Sales count and premium of the heatmap cells intersecting a box."""
+    validate_box(box)
+    if precision is None:
+        precision = heatmap_precision(box)
+    elif precision not in HEATMAP_PRECISIONS:
+        raise ValueError(f"Invalid precision. Allowed values are: {', '.join(map(str, HEATMAP_PRECISIONS))}")
+    cover = geohash.cover(box, geohash.cover_precision(box, MAX_COVER_CELLS, precision))
+    cells = GeoHeatmapCell.query.filter(
+        GeoHeatmapCell.precision == precision,
+        _in_cells(GeoHeatmapCell.cell, cover),
+        GeoHeatmapCell.sale_count > 0
+    ).order_by(GeoHeatmapCell.cell).all()
+    min_lat, min_lng, max_lat, max_lng = box
+    items = []
+    for cell in cells:
+        cell_min_lat, cell_min_lng, cell_max_lat, cell_max_lng = geohash.bounds(cell.cell)
+        if cell_max_lat < min_lat or cell_min_lat > max_lat:
+            continue
+        if min_lng <= max_lng and (cell_max_lng < min_lng or cell_min_lng > max_lng):
+            continue
+        items.append(cell.serialize())
+    return {
+        'precision': precision,
+        'cells': items,
+        'sale_count': sum(item['sale_count'] for item in items),
+        'total_premium': round(sum(item['total_premium'] for item in items), 2),
+    }
+
+
+def backfill_geohashes(batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+    """Set the geohash of rows written without one, e.g. by bulk loads or before the column existed."""
+    counts = {}
+    for layer in LAYERS.values():
+        key, count, last_id = layer.table.c.id, 0, 0
+        while True:
+            rows = db.session.execute(
+                select(key, layer.latitude, layer.longitude)
+                .where(
+                    key > last_id, layer.geohash.is_(None),
+                    layer.latitude.isnot(None), layer.longitude.isnot(None)
+                )
+                .order_by(key).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            db.session.execute(update(layer.model), [
+                {'id': row_id, 'geohash': geohash.encode(latitude, longitude)}
+                for row_id, latitude, longitude in rows
+            ])
+            db.session.commit()
+            count += len(rows)
+        counts[layer.name] = count
+    return counts
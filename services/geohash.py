@@ -0,0 +1,218 @@
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+DECODE = {char: value for value, char in enumerate(BASE32)}
+MAX_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+BoundingBox = Tuple[float, float, float, float]  # (min_lat, min_lng, max_lat, max_lng)
+
+
+def _bits(precision: int) -> Tuple[int, int]:
+    """Latitude and longitude bits of a geohash; longitude takes the first (and any odd) bit."""
+    if not 1 <= precision <= MAX_PRECISION:
+        raise ValueError(f"Geohash precision must be between 1 and {MAX_PRECISION}")
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Height and width of a cell in degrees."""
+    lat_bits, lng_bits = _bits(precision)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _indices(latitude: float, longitude: float, precision: int) -> Tuple[int, int]:
+    """Row and column of the cell containing a point."""
+    lat_bits, lng_bits = _bits(precision)
+    row = int((latitude + 90.0) / 180.0 * (1 << lat_bits))
+    column = int((longitude + 180.0) / 360.0 * (1 << lng_bits))
+    # The north pole and the antimeridian belong to the last row and column
+    return min(max(row, 0), (1 << lat_bits) - 1), min(max(column, 0), (1 << lng_bits) - 1)
+
+
+def _from_indices(row: int, column: int, precision: int) -> str:
+    lat_bits, lng_bits = _bits(precision)
+    value = 0
+    for bit in range(5 * precision):
+        if bit % 2 == 0:
+            lng_bits -= 1
+            value = (value << 1) | ((column >> lng_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((row >> lat_bits) & 1)
+    return ''.join(BASE32[(value >> shift) & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+
+def _to_indices(cell: str) -> Tuple[int, int]:
+    row = column = 0
+    bit = 0
+    try:
+        for char in cell:
+            value = DECODE[char]
+            for shift in range(4, -1, -1):
+                if bit % 2 == 0:
+                    column = (column << 1) | ((value >> shift) & 1)
+                else:
+                    row = (row << 1) | ((value >> shift) & 1)
+                bit += 1
+    except KeyError:
+        raise ValueError(f"Invalid geohash: {cell}")
+    return row, column
+
+
+def encode(latitude: float, longitude: float, precision: int = MAX_PRECISION) -> str:
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError("Latitude must be between -90 and 90 and longitude between -180 and 180")
+    return _from_indices(*_indices(latitude, longitude, precision), precision)
+
+
+def encode_point(latitude: Optional[float], longitude: Optional[float], precision: int = MAX_PRECISION) -> Optional[str]:
+    """Geohash of a location, or None when either coordinate is missing."""
+    if latitude is None or longitude is None:
+        return None
+    return encode(latitude, longitude, precision)
+
+
+def bounds(cell: str) -> BoundingBox:
+    height, width = cell_size(len(cell))
+    row, column = _to_indices(cell)
+    return row * height - 90.0, column * width - 180.0, (row + 1) * height - 90.0, (column + 1) * width - 180.0
+
+
+def center(cell: str) -> Tuple[float, float]:
+    min_lat, min_lng, max_lat, max_lng = bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def neighbors(cell: str) -> List[str]:
+    """The cell and the (up to) eight cells around it; longitude wraps, latitude stops at the poles."""
+    precision = len(cell)
+    lat_bits, lng_bits = _bits(precision)
+    row, column = _to_indices(cell)
+    cells = []
+    for d_row in (-1, 0, 1):
+        if not 0 <= row + d_row < 1 << lat_bits:
+            continue
+        for d_column in (-1, 0, 1):
+            neighbor = _from_indices(row + d_row, (column + d_column) % (1 << lng_bits), precision)
+            if neighbor not in cells:
+                cells.append(neighbor)
+    return sorted(cells)
+
+
+def _columns(min_lng: float, max_lng: float, precision: int) -> List[int]:
+    _, lng_bits = _bits(precision)
+    first, last = _indices(0.0, min_lng, precision)[1], _indices(0.0, max_lng, precision)[1]
+    if first <= last:
+        return list(range(first, last + 1))
+    # The box crosses the antimeridian
+    return list(range(first, 1 << lng_bits)) + list(range(0, last + 1))
+
+
+def cover_count(box: BoundingBox, precision: int) -> int:
+    """Number of cells of a precision needed to cover a box."""
+    min_lat, min_lng, max_lat, max_lng = box
+    first_row, last_row = _indices(min_lat, 0.0, precision)[0], _indices(max_lat, 0.0, precision)[0]
+    return (last_row - first_row + 1) * len(_columns(min_lng, max_lng, precision))
+
+
+def cover(box: BoundingBox, precision: int) -> List[str]:
+    """The cells of a precision that intersect a box, in geohash order."""
+    min_lat, min_lng, max_lat, max_lng = box
+    first_row, last_row = _indices(min_lat, 0.0, precision)[0], _indices(max_lat, 0.0, precision)[0]
+    columns = _columns(min_lng, max_lng, precision)
+    return sorted(_from_indices(row, column, precision) for row in range(first_row, last_row + 1) for column in columns)
+
+
+def cover_precision(box: BoundingBox, max_cells: int, max_precision: int = MAX_PRECISION) -> int:
+    """The finest precision, up to max_precision, that covers a box with at most max_cells cells."""
+    for precision in range(max_precision, 1, -1):
+        if cover_count(box, precision) <= max_cells:
+            return precision
+    return 1
+
+
+def successor(cell: str) -> Optional[str]:
+    """The next cell of the same precision in geohash order, None after the last one."""
+    chars = list(cell)
+    for position in range(len(chars) - 1, -1, -1):
+        value = DECODE[chars[position]]
+        if value < 31:
+            chars[position] = BASE32[value + 1]
+            return ''.join(chars)
+        chars[position] = BASE32[0]
+    return None
+
+
+def prefix_ranges(cells: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Half-open [low, high) string ranges holding every geohash that starts with one of the cells.
+
+    Cells that follow each other in geohash order share one range, so a
+    covering turns into a few index range scans; high is None for a range
+    that runs to the end of the keyspace.
+    """
+    ranges: List[Tuple[str, Optional[str]]] = []
+    for cell in sorted(set(cells)):
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1] = (ranges[-1][0], successor(cell))
+        else:
+            ranges.append((cell, successor(cell)))
+    return ranges
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_box(latitude: float, longitude: float, radius_km: float) -> BoundingBox:
+    """A box containing every point within radius_km of a location."""
+    d_lat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(-90.0, latitude - d_lat), min(90.0, latitude + d_lat)
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 89.9:
+        return min_lat, -180.0, max_lat, 180.0
+    d_lng = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+    if d_lng >= 180:
+        return min_lat, -180.0, max_lat, 180.0
+    min_lng, max_lng = longitude - d_lng, longitude + d_lng
+    # Boxes crossing the antimeridian keep min_lng > max_lng
+    if min_lng < -180:
+        min_lng += 360
+    if max_lng > 180:
+        max_lng -= 360
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def in_box(latitude: float, longitude: float, box: BoundingBox) -> bool:
+    min_lat, min_lng, max_lat, max_lng = box
+    if not min_lat <= latitude <= max_lat:
+        return False
+    if min_lng <= max_lng:
+        return min_lng <= longitude <= max_lng
+    return longitude >= min_lng or longitude <= max_lng
+
+
+def reach_km(latitude: float, longitude: float, cell: str) -> float:
+    """
+    Distance within which every point lies inside the block of a cell and its neighbors.
+
+    Points found in that block and no farther than this are exactly the
+    nearest ones; longitude distances are taken at the block's widest
+    latitude so the figure never overstates the reach.
+    """
+    height, width = cell_size(len(cell))
+    min_lat, min_lng, max_lat, max_lng = bounds(cell)
+    block_min_lat, block_max_lat = min_lat - height, max_lat + height
+    north = (block_max_lat - latitude) * KM_PER_DEGREE if block_max_lat < 90 else math.inf
+    south = (latitude - block_min_lat) * KM_PER_DEGREE if block_min_lat > -90 else math.inf
+    widest = min(90.0, max(abs(block_min_lat), abs(block_max_lat)))
+    km_per_lng = KM_PER_DEGREE * math.cos(math.radians(widest))
+    east = (max_lng + width - longitude) * km_per_lng
+    west = (longitude - (min_lng - width)) * km_per_lng
+    return min(north, south, east, west)
@@ -0,0 +1,404 @@
+import json
+import logging
+import re
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import inspect, text
+from services.slow_query_log import fingerprint
+
+logger = logging.getLogger(__name__)
+
+MAX_INDEX_COLUMNS = 3
+MAX_INDEX_NAME_LENGTH = 63
+DEFAULT_MIN_IMPROVEMENT = 0.10
+
+# Soft-delete flags the application always filters on false; indexes on tables
+# filtered by them are proposed as partial indexes over the live rows only
+PARTIAL_PREDICATES = {'is_deleted': 'is_deleted = false'}
+
+_TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE)
+_PREDICATE = re.compile(
+    r'"?(\w+)"?\."?(\w+)"?\s*(=|!=|<>|>=|<=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b)', re.IGNORECASE
+)
+_ORDER_BY = re.compile(r'\bORDER BY\s+(.+?)(?:\bLIMIT\b|\bOFFSET\b|\bFOR\b|$)', re.IGNORECASE | re.DOTALL)
+_COLUMN_REFERENCE = re.compile(r'"?(\w+)"?\."?(\w+)"?')
+_PYFORMAT = re.compile(r'%\((\w+)\)s|%s')
+_NAMED = re.compile(r'(?<!:):(\w+)')
+# PostgreSQL logs with log_min_duration_statement
+_POSTGRES_LOG_LINE = re.compile(r'duration: ([\d.]+) ms\s+(?:statement|execute [^:]*):\s*(.*)', re.IGNORECASE)
+_RESERVED = {'where', 'on', 'join', 'left', 'right', 'inner', 'outer', 'group', 'order', 'limit', 'using', 'cross', 'full'}
+
+
+class WorkloadStatement:
+    """One statement shape of the workload and how much time it accounts for."""
+
+    def __init__(self, sql: str, calls: int = 1, total_ms: float = 0.0, source: str = ''):
+        self.sql = sql
+        self.calls = calls
+        self.total_ms = total_ms
+        self.source = source
+        self.base_cost: Optional[float] = None
+        self.base_plan: Optional[str] = None
+
+
+class IndexCandidate:
+    """A composite and/or partial index proposed for a table."""
+
+    def __init__(self, table: str, columns: Tuple[str, ...], where: Optional[str] = None):
+        self.table = table
+        self.columns = columns
+        self.where = where
+        self.statements: List[WorkloadStatement] = []
+        self.benefit = 0.0
+        self.improved: List[Dict] = []
+        self.size_bytes: Optional[int] = None
+
+    @property
+    def key(self):
+        return self.table, self.columns, self.where
+
+    @property
+    def name(self) -> str:
+        name = f"idx_{self.table}_{'_'.join(self.columns)}{'_active' if self.where else ''}"
+        return name[:MAX_INDEX_NAME_LENGTH]
+
+    def where_for(self, dialect: str) -> Optional[str]:
+        # SQLite stores booleans as integers and only uses a partial index whose
+        # predicate matches the statement's literal exactly
+        if self.where and dialect == 'sqlite':
+            return self.where.replace('= false', '= 0')
+        return self.where
+
+    def ddl(self, concurrently: bool = False, dialect: str = 'postgresql') -> str:
+        columns = ', '.join(self.columns)
+        where = f" WHERE {self.where_for(dialect)}" if self.where else ''
+        return f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{self.name} ON {self.table} ({columns}){where}"
+
+    def serialize(self) -> Dict:
+        return {
+            'name': self.name,
+            'table': self.table,
+            'columns': list(self.columns),
+            'where': self.where,
+            'ddl': self.ddl(),
+            'benefit': round(self.benefit, 2),
+            'statements': len(self.statements),
+            'improved': self.improved,
+            'size_bytes': self.size_bytes
+        }
+
+
+def workload_from_slow_query_log(since_hours: Optional[int] = None, limit: int = 200) -> List[WorkloadStatement]:
+    """Load captured statements grouped by fingerprint from the slow query log."""
+    from models.slow_query_model import SlowQueryLog
+    workload = []
+    for group in SlowQueryLog.summarize(since_hours=since_hours, order_by='total', limit=limit):
+        samples = SlowQueryLog.get_samples(group['fingerprint'], limit=1)
+        if samples:
+            workload.append(WorkloadStatement(
+                samples[0].statement, group['occurrences'], group['total_ms'], 'slow_query_log'
+            ))
+    return workload
+
+
+def workload_from_log_file(path: str) -> List[WorkloadStatement]:
+    """
+    Load statements from a query log, grouped by fingerprint.
+
+    PostgreSQL logs written with log_min_duration_statement are read with
+    their durations; any other file is read as statements separated by
+    semicolons, each counting as one call.
+    """
+    with open(path, encoding='utf-8', errors='replace') as f:
+        content = f.read()
+    entries = [(match.group(2), float(match.group(1))) for match in _POSTGRES_LOG_LINE.finditer(content)]
+    if not entries:
+        entries = [(statement, 0.0) for statement in content.split(';')]
+
+    grouped: Dict[str, WorkloadStatement] = {}
+    for statement, duration in entries:
+        statement = statement.strip()
+        if not statement.lstrip('(').upper().startswith(('SELECT', 'WITH')):
+            continue
+        key = fingerprint(statement)
+        if key in grouped:
+            grouped[key].calls += 1
+            grouped[key].total_ms += duration
+        else:
+            grouped[key] = WorkloadStatement(statement, 1, duration, path)
+    return list(grouped.values())
+
+
+def extract_candidates(statement: str, tables: Dict[str, Dict]) -> List[IndexCandidate]:
+    """
+    Propose indexes for one statement from the columns it filters and sorts on.
+
+    Equality columns come first, followed by one range or ORDER BY column,
+    which is the column order a B-tree can use for both. Tables filtered on
+    a soft-delete flag get partial indexes covering only the live rows.
+    """
+    aliases = {}
+    for table, alias in _TABLE_REFERENCE.findall(statement):
+        if table in tables:
+            aliases[table] = table
+            if alias and alias.lower() not in _RESERVED:
+                aliases[alias] = table
+
+    filters: Dict[str, Dict[str, List[str]]] = {}
+    for alias, column, operator in _PREDICATE.findall(statement):
+        table = aliases.get(alias)
+        if table is None or column not in tables[table]['columns']:
+            continue
+        kind = 'equality' if operator.upper() in ('=', 'IN', 'IS') else 'range'
+        columns = filters.setdefault(table, {'equality': [], 'range': [], 'order': []})[kind]
+        if column not in columns:
+            columns.append(column)
+    order_by = _ORDER_BY.search(statement)
+    if order_by:
+        for alias, column in _COLUMN_REFERENCE.findall(order_by.group(1)):
+            table = aliases.get(alias)
+            if table is not None and column in tables[table]['columns']:
+                filters.setdefault(table, {'equality': [], 'range': [], 'order': []})['order'].append(column)
+
+    candidates = []
+    for table, columns in filters.items():
+        partial = next((predicate for column, predicate in PARTIAL_PREDICATES.items()
+                        if column in columns['equality']), None)
+        equality = [column for column in columns['equality'] if column not in PARTIAL_PREDICATES]
+        trailing = [column for column in columns['range'] + columns['order'] if column not in equality][:1]
+
+        shapes = []
+        if equality or trailing:
+            shapes.append(tuple((equality + trailing)[:MAX_INDEX_COLUMNS]))
+        if len(equality) > 1 or (equality and trailing):
+            # The leading column alone also serves statements filtering on fewer columns
+            shapes.append((equality or trailing)[:1])
+        for shape in shapes:
+            if not partial and tuple(shape) in tables[table]['indexed']:
+                continue
+            candidates.append(IndexCandidate(table, tuple(shape), partial))
+    return candidates
+
+
+def _postgres_statement(statement: str) -> Tuple[str, int]:
+    """Rewrite DBAPI placeholders to $n so the statement can be prepared."""
+    names: Dict[str, int] = {}
+    positional = [0]
+
+    def replace(match):
+        if match.group(1) is None:
+            positional[0] += 1
+            return f"${positional[0]}"
+        if match.group(1) not in names:
+            names[match.group(1)] = len(names) + 1
+        return f"${names[match.group(1)]}"
+
+    rewritten = _PYFORMAT.sub(replace, statement).replace('%%', '%')
+    placeholders = [int(number) for number in re.findall(r'\$(\d+)', rewritten)]
+    return rewritten, max(placeholders, default=0)
+
+
+class IndexAdvisor:
+    """
+    Ranks candidate indexes by the planner's estimate of what they save on the workload.
+
+    On PostgreSQL candidates are costed with generic plans against
+    hypothetical indexes from the hypopg extension, so nothing is built.
+    Without hypopg, ``use_real_indexes`` builds each candidate inside a
+    transaction that is rolled back, which locks the table while it runs.
+    SQLite has no plan costs, so a candidate's benefit there is the time
+    spent in the statements whose plan starts using it.
+    """
+
+    def __init__(self, connection, use_real_indexes: bool = False):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+        self.use_real_indexes = use_real_indexes
+        self.hypopg = self.dialect == 'postgresql' and self._enable_hypopg()
+        if self.dialect == 'postgresql' and not self.hypopg and not use_real_indexes:
+            raise ValueError("hypopg is not installed; install it or allow real indexes built in a rolled back transaction")
+        self.tables = self._load_tables()
+
+    def _enable_hypopg(self) -> bool:
+        try:
+            with self.connection.begin_nested():
+                self.connection.execute(text("CREATE EXTENSION IF NOT EXISTS hypopg"))
+            return True
+        except Exception as e:
+            logger.info(f"hypopg unavailable: {str(e)}")
+            return False
+
+    def _load_tables(self) -> Dict[str, Dict]:
+        inspector = inspect(self.connection)
+        tables = {}
+        for table in inspector.get_table_names():
+            indexed = set()
+            for index in inspector.get_indexes(table):
+                columns = tuple(index['column_names'])
+                indexed.update(columns[:length] for length in range(1, len(columns) + 1))
+            primary_key = tuple(inspector.get_pk_constraint(table).get('constrained_columns') or ())
+            indexed.update(primary_key[:length] for length in range(1, len(primary_key) + 1))
+            tables[table] = {
+                'columns': {column['name'] for column in inspector.get_columns(table)},
+                'indexed': indexed
+            }
+        return tables
+
+    def _plan(self, statement: str) -> Tuple[Optional[float], str]:
+        """
+        Return the estimated total cost (None on SQLite) and the plan text of a statement.
+
+        On PostgreSQL each statement is planned inside a savepoint, so one that
+        fails to plan does not abort the transaction the rest of the run uses.
+        """
+        if self.dialect == 'postgresql':
+            prepared, parameters = _postgres_statement(statement)
+            name = f"advisor_{uuid.uuid4().hex[:12]}"
+            with self.connection.begin_nested():
+                self.connection.execute(text("SET LOCAL plan_cache_mode = force_generic_plan"))
+                self.connection.exec_driver_sql(f"PREPARE {name} AS {prepared}")
+                try:
+                    arguments = f"({', '.join(['NULL'] * parameters)})" if parameters else ''
+                    plan = self.connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) EXECUTE {name}{arguments}").scalar()
+                finally:
+                    self.connection.exec_driver_sql(f"DEALLOCATE {name}")
+            plan = plan if isinstance(plan, list) else json.loads(plan)
+            return float(plan[0]['Plan']['Total Cost']), json.dumps(plan[0]['Plan'])
+        parameters = None
+        if '?' in statement:
+            parameters = tuple([None] * statement.count('?'))
+        elif _NAMED.search(statement):
+            parameters = {name: None for name in _NAMED.findall(statement)}
+        rows = self.connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).all()
+        return None, '\n'.join(str(row[-1]) for row in rows)
+
+    def _with_candidate(self, candidate: IndexCandidate, statements: List[WorkloadStatement]):
+        """Plan statements with the candidate in place, yielding (statement, cost, plan)."""
+        if self.hypopg:
+            # Hypothetical indexes live in the session, not the transaction, so they are reset explicitly
+            with self.connection.begin_nested():
+                result = self.connection.execute(
+                    text("SELECT indexrelid FROM hypopg_create_index(:ddl)"), {'ddl': candidate.ddl()}
+                ).scalar()
+                try:
+                    candidate.size_bytes = self.connection.execute(
+                        text("SELECT hypopg_relation_size(:oid)"), {'oid': result}
+                    ).scalar()
+                    return [(statement, *self._plan(statement.sql)) for statement in statements]
+                finally:
+                    self.connection.execute(text("SELECT hypopg_reset()"))
+        transaction = self.connection.begin_nested()
+        try:
+            self.connection.exec_driver_sql(candidate.ddl(dialect=self.dialect))
+            return [(statement, *self._plan(statement.sql)) for statement in statements]
+        finally:
+            transaction.rollback()
+
+    def analyze(self, workload: Iterable[WorkloadStatement],
+                min_improvement: float = DEFAULT_MIN_IMPROVEMENT) -> List[IndexCandidate]:
+        """Cost every candidate against the statements it could serve and rank them by benefit."""
+        candidates: Dict[Tuple, IndexCandidate] = {}
+        for statement in workload:
+            try:
+                statement.base_cost, statement.base_plan = self._plan(statement.sql)
+            except Exception as e:
+                logger.info(f"Skipping statement that could not be planned: {str(e)[:200]}")
+                continue
+            for candidate in extract_candidates(statement.sql, self.tables):
+                candidates.setdefault(candidate.key, candidate).statements.append(statement)
+
+        ranked = []
+        for candidate in candidates.values():
+            try:
+                plans = self._with_candidate(candidate, candidate.statements)
+            except Exception as e:
+                logger.info(f"Could not evaluate {candidate.ddl()}: {str(e)[:200]}")
+                continue
+            for statement, cost, plan in plans:
+                if self.dialect == 'postgresql':
+                    saving = statement.base_cost - cost
+                    if saving <= statement.base_cost * min_improvement:
+                        continue
+                    candidate.benefit += saving * statement.calls
+                    candidate.improved.append({
+                        'statement': ' '.join(statement.sql.split())[:300],
+                        'calls': statement.calls,
+                        'cost_before': round(statement.base_cost, 2),
+                        'cost_after': round(cost, 2)
+                    })
+                elif candidate.name in plan and candidate.name not in (statement.base_plan or ''):
+                    candidate.benefit += statement.total_ms or statement.calls
+                    candidate.improved.append({
+                        'statement': ' '.join(statement.sql.split())[:300],
+                        'calls': statement.calls,
+                        'plan_before': statement.base_plan,
+                        'plan_after': plan
+                    })
+            if candidate.benefit > 0:
+                ranked.append(candidate)
+        ranked.sort(key=lambda candidate: candidate.benefit, reverse=True)
+        return _drop_redundant(ranked)
+
+
+def _drop_redundant(ranked: List[IndexCandidate]) -> List[IndexCandidate]:
+    """Drop candidates whose columns lead a better-ranked index with the same predicate."""
+    kept = []
+    for candidate in ranked:
+        if not any(
+            other.table == candidate.table and other.where == candidate.where
+            and other.columns[:len(candidate.columns)] == candidate.columns
+            for other in kept
+        ):
+            kept.append(candidate)
+    return kept
+
+
+def render_migration(candidates: List[IndexCandidate], down_revision: Optional[str] = None) -> Tuple[str, str]:
+    """Return the revision id and source of an Alembic migration creating the candidates."""
+    revision = uuid.uuid4().hex[:12]
+    upgrade, downgrade = [], []
+    for candidate in candidates:
+        where = ''
+        if candidate.where:
+            where = (f", postgresql_where=sa.text({candidate.where!r}), "
+                     f"sqlite_where=sa.text({candidate.where_for('sqlite')!r})")
+        upgrade.append(f"    # Benefit {candidate.benefit:.1f} over {len(candidate.improved)} statements")
+        upgrade.append(
+            f"    op.create_index({candidate.name!r}, {candidate.table!r}, {list(candidate.columns)!r}"
+            f"{where}, postgresql_concurrently=concurrently)"
+        )
+        downgrade.insert(0, f"    op.drop_index({candidate.name!r}, table_name={candidate.table!r}, "
+                            f"postgresql_concurrently=concurrently)")
+    body = f'''"""Add indexes recommended by the index advisor
+
+Revision ID: {revision}
+Revises: {down_revision or ''}
+Create Date: {datetime.utcnow().isoformat(sep=' ', timespec='seconds')}
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = {revision!r}
+down_revision = {down_revision!r}
+branch_labels = None
+depends_on = None
+
+
+def _concurrently():
+    # Indexes on PostgreSQL are built without blocking writes, outside the migration transaction
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    concurrently = _concurrently()
+    with op.get_context().autocommit_block():
+{chr(10).join('    ' + line for line in upgrade)}
+
+
+def downgrade():
+    concurrently = _concurrently()
+    with op.get_context().autocommit_block():
+{chr(10).join('    ' + line for line in downgrade)}
+'''
+    return revision, body
@@ -0,0 +1,380 @@
+import logging
+from calendar import monthrange
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, or_
+from extensions import db
+from models.sales_model import Sale
+from models.sales_executive_model import SalesExecutive, sales_executive_branches
+from models.performance_model import SalesTarget
+from models.user_model import User
+from models.branch_model import Branch
+from utils import redis_client
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('day', 'week', 'month')
+ENTITIES = ('manager', 'executive', 'branch')
+METRICS = ('count', 'premium', 'achievement')
+
+# How long each period's standings are kept after their last update
+PERIOD_TTL = {
+    'day': timedelta(days=8),
+    'week': timedelta(days=35),
+    'month': timedelta(days=400)
+}
+
+# Executive targets are monthly; scale them to the leaderboard period
+EXECUTIVE_TARGET_DAYS = 30
+
+KEY_PREFIX = 'leaderboard'
+
+
+def period_key(period: str, moment: Optional[datetime] = None) -> str:
+    """Return the bucket identifier for a period containing the given moment."""
+    moment = moment or datetime.utcnow()
+    if period == 'day':
+        return moment.strftime('%Y-%m-%d')
+    if period == 'week':
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == 'month':
+        return moment.strftime('%Y-%m')
+    raise ValueError(f"Invalid leaderboard period: {period}")
+
+
+def period_bounds(period: str, moment: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Return the [start, end) datetimes of the period containing the given moment."""
+    moment = moment or datetime.utcnow()
+    day_start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'day':
+        return day_start, day_start + timedelta(days=1)
+    if period == 'week':
+        week_start = day_start - timedelta(days=day_start.weekday())
+        return week_start, week_start + timedelta(days=7)
+    if period == 'month':
+        month_start = day_start.replace(day=1)
+        return month_start, month_start + timedelta(days=monthrange(moment.year, moment.month)[1])
+    raise ValueError(f"Invalid leaderboard period: {period}")
+
+
+def _validate(period: str, entity: str, metric: Optional[str] = None):
+    if period not in PERIODS:
+        raise ValueError(f"Invalid leaderboard period. Allowed values are: {', '.join(PERIODS)}")
+    if entity not in ENTITIES:
+        raise ValueError(f"Invalid leaderboard entity. Allowed values are: {', '.join(ENTITIES)}")
+    if metric is not None and metric not in METRICS:
+        raise ValueError(f"Invalid leaderboard metric. Allowed values are: {', '.join(METRICS)}")
+
+
+def _board_key(period: str, bucket: str, entity: str, metric: str) -> str:
+    return f"{KEY_PREFIX}:{period}:{bucket}:{entity}:{metric}"
+
+
+def _targets_key(period: str, bucket: str, entity: str) -> str:
+    return f"{KEY_PREFIX}:{period}:{bucket}:{entity}:targets"
+
+
+def _built_key(period: str, bucket: str) -> str:
+    """Marker set once a bucket's boards were rebuilt from the database, so they hold every sale."""
+    return f"{KEY_PREFIX}:{period}:{bucket}:built"
+
+
+def _achievement(count: float, premium: float, target: Optional[Tuple[float, float]]) -> Optional[float]:
+    """Overall achievement rate, matching SalesPerformance.calculate_achievement_rate."""
+    if not target:
+        return None
+    target_count, target_premium = target
+    count_rate = (count / target_count) * 100 if target_count > 0 else 0
+    premium_rate = (premium / target_premium) * 100 if target_premium > 0 else 0
+    return (count_rate + premium_rate) / 2
+
+
+def _load_targets(period: str, entity: str, member_ids: Optional[List[int]] = None,
+                  moment: Optional[datetime] = None) -> Dict[int, Tuple[float, float]]:
+    """
+    Load (count, premium) targets scaled to the leaderboard period.
+
+    Manager targets come from active SalesTargets prorated by their own length;
+    executive targets are treated as monthly. Branches have no targets.
+    """
+    if entity == 'branch':
+        return {}
+
+    start, end = period_bounds(period, moment)
+    period_days = (end - start).days
+
+    targets: Dict[int, Tuple[float, float]] = {}
+    if entity == 'manager':
+        query = db.session.query(
+            SalesTarget.sales_manager_id,
+            SalesTarget.target_sales_count,
+            SalesTarget.target_premium_amount,
+            SalesTarget.period_start,
+            SalesTarget.period_end
+        ).filter(
+            SalesTarget.is_deleted == False,
+            SalesTarget.is_active == True,
+            or_(SalesTarget.period_start.is_(None), SalesTarget.period_start < end),
+            or_(SalesTarget.period_end.is_(None), SalesTarget.period_end >= start)
+        )
+        if member_ids is not None:
+            query = query.filter(SalesTarget.sales_manager_id.in_(member_ids))
+        for row in query.all():
+            if row.period_start and row.period_end:
+                target_days = max((row.period_end - row.period_start).days, 1)
+            else:
+                target_days = EXECUTIVE_TARGET_DAYS
+            scale = period_days / target_days
+            count, premium = targets.get(row.sales_manager_id, (0.0, 0.0))
+            targets[row.sales_manager_id] = (
+                count + (row.target_sales_count or 0) * scale,
+                premium + (row.target_premium_amount or 0) * scale
+            )
+    else:
+        query = db.session.query(
+            SalesExecutive.id,
+            SalesExecutive.target_sales_count,
+            SalesExecutive.target_premium_amount
+        ).filter(
+            SalesExecutive.is_deleted == False,
+            or_(SalesExecutive.target_sales_count.isnot(None), SalesExecutive.target_premium_amount.isnot(None))
+        )
+        if member_ids is not None:
+            query = query.filter(SalesExecutive.id.in_(member_ids))
+        scale = period_days / EXECUTIVE_TARGET_DAYS
+        for row in query.all():
+            targets[row.id] = ((row.target_sales_count or 0) * scale, (row.target_premium_amount or 0) * scale)
+    return targets
+
+
+def compute_standings(period: str, entity: str, moment: Optional[datetime] = None) -> Dict[int, Dict[str, float]]:
+    """Compute count, premium and achievement standings for a period from the database."""
+    _validate(period, entity)
+    start, end = period_bounds(period, moment)
+
+    if entity == 'manager':
+        member = Sale.sale_manager_id
+        query = db.session.query(member, func.count(Sale.id), func.coalesce(func.sum(Sale.amount), 0.0))
+    elif entity == 'executive':
+        member = Sale.sales_executive_id
+        query = db.session.query(member, func.count(Sale.id), func.coalesce(func.sum(Sale.amount), 0.0))
+    else:
+        member = sales_executive_branches.c.branch_id
+        query = db.session.query(
+            member, func.count(Sale.id), func.coalesce(func.sum(Sale.amount), 0.0)
+        ).join(
+            sales_executive_branches,
+            sales_executive_branches.c.sales_executive_id == Sale.sales_executive_id
+        )
+
+    rows = query.filter(
+        Sale.is_deleted == False,
+        Sale.created_at >= start,
+        Sale.created_at < end
+    ).group_by(member).all()
+
+    targets = _load_targets(period, entity, moment=moment)
+    standings = {}
+    for member_id, count, premium in rows:
+        standings[member_id] = {
+            'count': float(count),
+            'premium': float(premium),
+            'achievement': _achievement(count, premium, targets.get(member_id))
+        }
+    return standings
+
+
+def rebuild(periods: Optional[List[str]] = None, moment: Optional[datetime] = None) -> Dict[str, int]:
+    """Rebuild the current standings for the given periods from the database."""
+    moment = moment or datetime.utcnow()
+    rebuilt = {}
+    pipe = redis_client.pipeline(transaction=True)
+    for period in periods or PERIODS:
+        bucket = period_key(period, moment)
+        for entity in ENTITIES:
+            standings = compute_standings(period, entity, moment)
+            targets = _load_targets(period, entity, moment=moment)
+            for metric in METRICS:
+                key = _board_key(period, bucket, entity, metric)
+                pipe.delete(key)
+                scores = {
+                    str(member_id): values[metric]
+                    for member_id, values in standings.items()
+                    if values[metric] is not None
+                }
+                if scores:
+                    pipe.zadd(key, scores)
+                    pipe.expire(key, PERIOD_TTL[period])
+            targets_key = _targets_key(period, bucket, entity)
+            pipe.delete(targets_key)
+            if targets:
+                pipe.hset(targets_key, mapping={
+                    str(member_id): f"{count}:{premium}" for member_id, (count, premium) in targets.items()
+                })
+                pipe.expire(targets_key, PERIOD_TTL[period])
+            rebuilt[f"{period}:{entity}"] = len(standings)
+        pipe.set(_built_key(period, bucket), moment.isoformat(), ex=PERIOD_TTL[period])
+    pipe.execute()
+    return rebuilt
+
+
+def _ensure_built(period: str, moment: Optional[datetime] = None):
+    """
+    Rebuild a bucket whose boards are missing or only partly filled.
+
+    Redis restarts, flushes and evictions, and period buckets that only
+    saw incremental updates, all leave boards that a read would otherwise
+    return as empty or partial standings.
+    """
+    moment = moment or datetime.utcnow()
+    if not redis_client.exists(_built_key(period, period_key(period, moment))):
+        logger.info(f"Leaderboard {period} {period_key(period, moment)} not built, rebuilding from database")
+        rebuild([period], moment)
+
+
+def _sale_members(sale_snapshot: Dict) -> Dict[str, List[int]]:
+    """Resolve the leaderboard members a sale counts towards."""
+    members = {
+        'manager': [sale_snapshot['sale_manager_id']] if sale_snapshot.get('sale_manager_id') else [],
+        'executive': [sale_snapshot['sales_executive_id']] if sale_snapshot.get('sales_executive_id') else [],
+        'branch': []
+    }
+    if sale_snapshot.get('sales_executive_id'):
+        members['branch'] = [
+            row.branch_id for row in db.session.query(sales_executive_branches.c.branch_id).filter(
+                sales_executive_branches.c.sales_executive_id == sale_snapshot['sales_executive_id']
+            ).all()
+        ]
+    return members
+
+
+def _member_target(period: str, bucket: str, entity: str, member_id: int,
+                   moment: datetime) -> Optional[Tuple[float, float]]:
+    """Read a member's period target from Redis, loading it from the database on a miss."""
+    if entity == 'branch':
+        return None
+    targets_key = _targets_key(period, bucket, entity)
+    cached = redis_client.hget(targets_key, str(member_id))
+    if cached is None:
+        target = _load_targets(period, entity, member_ids=[member_id], moment=moment).get(member_id)
+        # An empty marker avoids hitting the database for members without targets
+        cached = f"{target[0]}:{target[1]}" if target else ''
+        redis_client.hset(targets_key, str(member_id), cached)
+        redis_client.expire(targets_key, PERIOD_TTL[period])
+    if not cached:
+        return None
+    count, premium = cached.split(':')
+    return float(count), float(premium)
+
+
+def record_sale(sale_snapshot: Dict, sign: int = 1):
+    """
+    Apply a sale to every current leaderboard it belongs to.
+
+    Uses ZINCRBY for count and premium (O(log n) per board) and recomputes the
+    member's achievement rate from the new totals. Pass ``sign=-1`` to retract
+    a sale that was deleted or moved.
+    """
+    created_at = sale_snapshot.get('created_at') or datetime.utcnow()
+    amount = float(sale_snapshot.get('amount') or 0)
+    members = _sale_members(sale_snapshot)
+
+    for period in PERIODS:
+        bucket = period_key(period, created_at)
+        pipe = redis_client.pipeline(transaction=True)
+        updated = []
+        for entity, member_ids in members.items():
+            for member_id in member_ids:
+                count_key = _board_key(period, bucket, entity, 'count')
+                premium_key = _board_key(period, bucket, entity, 'premium')
+                pipe.zincrby(count_key, sign, str(member_id))
+                pipe.zincrby(premium_key, sign * amount, str(member_id))
+                pipe.expire(count_key, PERIOD_TTL[period])
+                pipe.expire(premium_key, PERIOD_TTL[period])
+                updated.append((entity, member_id))
+        if not updated:
+            continue
+        pipe.expire(_built_key(period, bucket), PERIOD_TTL[period])
+        results = pipe.execute()
+
+        pipe = redis_client.pipeline(transaction=True)
+        for position, (entity, member_id) in enumerate(updated):
+            count, premium = results[position * 4], results[position * 4 + 1]
+            achievement = _achievement(count, premium, _member_target(period, bucket, entity, member_id, created_at))
+            if achievement is not None:
+                achievement_key = _board_key(period, bucket, entity, 'achievement')
+                pipe.zadd(achievement_key, {str(member_id): achievement})
+                pipe.expire(achievement_key, PERIOD_TTL[period])
+        pipe.execute()
+
+
+def _member_names(entity: str, member_ids: List[int]) -> Dict[int, str]:
+    """Look up display names for leaderboard members in one query."""
+    if not member_ids:
+        return {}
+    model = {'manager': User, 'executive': SalesExecutive, 'branch': Branch}[entity]
+    return dict(db.session.query(model.id, model.name).filter(model.id.in_(member_ids)).all())
+
+
+def top(period: str, entity: str, metric: str, limit: int = 10,
+        moment: Optional[datetime] = None) -> List[Dict]:
+    """Return the top ``limit`` members of a leaderboard, best first."""
+    _validate(period, entity, metric)
+    bucket = period_key(period, moment)
+    try:
+        _ensure_built(period, moment)
+        entries = redis_client.zrevrange(_board_key(period, bucket, entity, metric), 0, limit - 1, withscores=True)
+        entries = [(int(member_id), score) for member_id, score in entries]
+    except Exception as e:
+        logger.warning(f"Leaderboard unavailable, computing from database: {str(e)}")
+        standings = compute_standings(period, entity, moment)
+        entries = sorted(
+            ((member_id, values[metric]) for member_id, values in standings.items() if values[metric] is not None),
+            key=lambda entry: entry[1],
+            reverse=True
+        )[:limit]
+
+    names = _member_names(entity, [member_id for member_id, _ in entries])
+    return [{
+        'rank': position + 1,
+        'id': member_id,
+        'name': names.get(member_id),
+        'score': score
+    } for position, (member_id, score) in enumerate(entries)]
+
+
+def rank(period: str, entity: str, metric: str, member_id: int,
+         moment: Optional[datetime] = None) -> Optional[Dict]:
+    """Return a member's 1-based rank and score on a leaderboard, or None if unranked."""
+    _validate(period, entity, metric)
+    bucket = period_key(period, moment)
+    key = _board_key(period, bucket, entity, metric)
+    try:
+        _ensure_built(period, moment)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zrevrank(key, str(member_id))
+        pipe.zscore(key, str(member_id))
+        pipe.zcard(key)
+        position, score, total = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Leaderboard unavailable, computing from database: {str(e)}")
+        standings = compute_standings(period, entity, moment)
+        ranked = sorted(
+            ((mid, values[metric]) for mid, values in standings.items() if values[metric] is not None),
+            key=lambda entry: entry[1],
+            reverse=True
+        )
+        ids = [mid for mid, _ in ranked]
+        position = ids.index(member_id) if member_id in ids else None
+        score = ranked[position][1] if position is not None else None
+        total = len(ranked)
+
+    if position is None:
+        return None
+    return {
+        'rank': position + 1,
+        'id': member_id,
+        'score': score,
+        'total': total
+    }
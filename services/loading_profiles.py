@@ -0,0 +1,77 @@
+from typing import Callable, Dict, List
+from sqlalchemy.orm import joinedload, lazyload, noload, selectinload
+from models.bank_model import Bank
+from models.sales_model import Sale
+from models.user_model import User
+from models.sales_executive_model import SalesExecutive
+from models.impact_product_model import ImpactProduct
+
+# Relationship loading profiles per model. Endpoints opt into a profile instead
+# of relying on the model-level lazy='joined' defaults:
+#   list   - pages of records: many-to-one relations in one SELECT ... IN per relation,
+#            with their own many-to-one relations joined into it
+#   detail - a single record: many-to-one relations joined into the same SELECT
+#   export - like list, plus the collections the export reads (inceptions, branches)
+#   exists - existence checks and updates: no relationships loaded at all
+PROFILES: Dict[type, Dict[str, Callable[[], List]]] = {
+    Sale: {
+        'list': lambda: [
+            selectinload(Sale.sale_manager).options(
+                joinedload(User.role),
+                selectinload(User.branches)
+            ),
+            selectinload(Sale.bank).selectinload(Bank.bank_branches),
+            selectinload(Sale.bank_branch),
+            selectinload(Sale.paypoint),
+            selectinload(Sale.policy_type).joinedload(ImpactProduct.category),
+            lazyload(Sale.sales_executive),
+            lazyload(Sale.user),
+        ],
+        'detail': lambda: [
+            joinedload(Sale.sale_manager).joinedload(User.role),
+            joinedload(Sale.bank),
+            joinedload(Sale.bank_branch),
+            joinedload(Sale.paypoint),
+            joinedload(Sale.policy_type).joinedload(ImpactProduct.category),
+            lazyload(Sale.sales_executive),
+            lazyload(Sale.user),
+        ],
+        'export': lambda: [
+            selectinload(Sale.sale_manager).options(
+                joinedload(User.role),
+                selectinload(User.branches)
+            ),
+            selectinload(Sale.bank).selectinload(Bank.bank_branches),
+            selectinload(Sale.bank_branch),
+            selectinload(Sale.paypoint),
+            selectinload(Sale.policy_type).joinedload(ImpactProduct.category),
+            selectinload(Sale.sales_executive).selectinload(SalesExecutive.branches),
+            selectinload(Sale.inceptions),
+            lazyload(Sale.user),
+        ],
+        'exists': lambda: [noload('*')],
+    },
+    User: {
+        'list': lambda: [selectinload(User.role), selectinload(User.branches)],
+        'detail': lambda: [joinedload(User.role), selectinload(User.branches)],
+        'exists': lambda: [noload('*')],
+    },
+    SalesExecutive: {
+        'list': lambda: [selectinload(SalesExecutive.branches), lazyload(SalesExecutive.manager)],
+        'detail': lambda: [selectinload(SalesExecutive.branches), lazyload(SalesExecutive.manager)],
+        'exists': lambda: [noload('*')],
+    },
+}
+
+
+def loading_options(model, profile: str) -> List:
+    """Return the loader options of a named profile for a model."""
+    try:
+        return PROFILES[model][profile]()
+    except KeyError:
+        raise ValueError(f"Unknown loading profile '{profile}' for {model.__name__}")
+
+
+def with_profile(query, model, profile: str):
+    """Apply a named loading profile to a query."""
+    return query.options(*loading_options(model, profile))
@@ -0,0 +1,307 @@
+import logging
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from flask import Response, current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+DEFAULT_SLOW_QUERY_MS = 200
+RECENT_SLOW_STATEMENTS = 100
+SQL_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class Histogram:
+    """A labelled Prometheus-style histogram with fixed buckets."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple, List] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                # Per-bucket counts, then sum and count
+                series = self.series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self.series.items()]
+        for label_values, counts, total, count in sorted(snapshot):
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), label_values + (_format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), label_values + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CounterMetric:
+    """A labelled Prometheus-style monotonically increasing counter."""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str]):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.series: Dict[Tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self.lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            snapshot = sorted(self.series.items())
+        for label_values, value in snapshot:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    escaped = (
+        str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        for value in values
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint',
+    ('method', 'endpoint', 'status'), LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements issued per HTTP request',
+    ('method', 'endpoint'), QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent executing SQL per HTTP request',
+    ('method', 'endpoint'), LATENCY_BUCKETS
+)
+STATEMENT_LATENCY = Histogram(
+    'db_statement_duration_seconds', 'SQL statement execution time by statement type',
+    ('operation',), LATENCY_BUCKETS
+)
+SLOW_STATEMENTS = CounterMetric(
+    'db_slow_statements_total', 'SQL statements slower than the slow query threshold',
+    ('endpoint',)
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+    (), LATENCY_BUCKETS
+)
+FUNCTION_LATENCY = Histogram(
+    'function_duration_seconds', 'Execution time of instrumented functions',
+    ('function',), LATENCY_BUCKETS
+)
+DB_READ_ROUTING = CounterMetric(
+    'db_read_routing_total', 'Read-only requests by the database that served their reads',
+    ('target',)
+)
+
+REGISTRY = (
+    REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, STATEMENT_LATENCY,
+    SLOW_STATEMENTS, POOL_CHECKOUT_WAIT, FUNCTION_LATENCY, DB_READ_ROUTING
+)
+
+# Most recent slow statements, newest last
+recent_slow_statements = deque(maxlen=RECENT_SLOW_STATEMENTS)
+
+# Callbacks invoked as handler(connection, statement, parameters, duration_seconds, endpoint)
+slow_statement_handlers: List[Callable] = []
+
+_slow_query_seconds = DEFAULT_SLOW_QUERY_MS / 1000.0
+
+
+def _endpoint() -> str:
+    """Return the route template of the current request, which keeps label cardinality bounded."""
+    if not has_request_context():
+        return 'background'
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append((context, time.perf_counter()))
+
+
+def _handle_error(exception_context):
+    """Drop the start time of a statement that failed, which after_cursor_execute never sees."""
+    connection = exception_context.connection
+    starts = connection.info.get('metrics_query_start') if connection is not None else None
+    # Errors raised before the statement ran, or after it was timed, leave nothing to drop
+    if starts and starts[-1][0] is exception_context.execution_context:
+        starts.pop()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    _, start = starts.pop()
+    duration = time.perf_counter() - start
+    operation = statement.lstrip()[:6].upper()
+    STATEMENT_LATENCY.observe(duration, operation if operation in SQL_OPERATIONS else 'OTHER')
+
+    in_request = has_app_context() and 'metrics_start' in g
+    if in_request:
+        g.metrics_queries += 1
+        g.metrics_db_time += duration
+
+    if duration >= _slow_query_seconds:
+        endpoint = _endpoint() if in_request else 'background'
+        SLOW_STATEMENTS.inc(endpoint)
+        recent_slow_statements.append({
+            'endpoint': endpoint,
+            'duration_ms': round(duration * 1000, 2),
+            'statement': ' '.join(statement.split())[:1000],
+            'recorded_at': time.time()
+        })
+        logger.warning(f"Slow SQL statement ({duration * 1000:.1f}ms) on {endpoint}: {' '.join(statement.split())[:200]}")
+        for handler in slow_statement_handlers:
+            try:
+                handler(conn, statement, parameters, duration, endpoint)
+            except Exception as e:
+                logger.warning(f"Slow statement handler failed: {str(e)}")
+
+
+def _instrument_pool(pool):
+    """Time connection checkout, including any wait for a free connection."""
+    if getattr(pool, '_metrics_instrumented', False):
+        return
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+    pool._metrics_instrumented = True
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_db_time = 0.0
+
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    endpoint = _endpoint()
+    REQUEST_LATENCY.observe(time.perf_counter() - start, request.method, endpoint, str(response.status_code))
+    REQUEST_QUERIES.observe(g.metrics_queries, request.method, endpoint)
+    REQUEST_DB_TIME.observe(g.metrics_db_time, request.method, endpoint)
+    return response
+
+
+def _pool_gauges(engine) -> List[str]:
+    pool = engine.pool
+    lines = []
+    for name, description, getter in (
+        ('db_pool_size', 'Configured connection pool size', 'size'),
+        ('db_pool_checked_out', 'Connections currently checked out', 'checkedout'),
+        ('db_pool_overflow', 'Connections open beyond the pool size', 'overflow'),
+    ):
+        if hasattr(pool, getter):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {getattr(pool, getter)()}")
+    return lines
+
+
+def _process_gauges() -> List[str]:
+    try:
+        import psutil
+    except ImportError:
+        return []
+    memory = psutil.Process().memory_info().rss
+    return [
+        '# HELP process_resident_memory_bytes Resident memory size in bytes',
+        '# TYPE process_resident_memory_bytes gauge',
+        f"process_resident_memory_bytes {memory}"
+    ]
+
+
+def render_metrics(engine=None) -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    if engine is not None:
+        lines.extend(_pool_gauges(engine))
+    lines.extend(_process_gauges())
+    return '\n'.join(lines) + '\n'
+
+
+def track_duration(name: Optional[str] = None):
+    """Decorator recording a function's execution time in the function histogram."""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                FUNCTION_LATENCY.observe(time.perf_counter() - start, label)
+        return wrapper
+    return decorator
+
+
+def init_app(app, db):
+    """Install the SQLAlchemy and request hooks and register the /metrics route."""
+    global _slow_query_seconds
+    _slow_query_seconds = app.config.get('SLOW_QUERY_THRESHOLD_MS', DEFAULT_SLOW_QUERY_MS) / 1000.0
+
+    with app.app_context():
+        # Every bind, including a read replica, counts towards the request's queries
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(engine, 'handle_error', _handle_error)
+            _instrument_pool(engine.pool)
+            # dispose() replaces the pool, so instrument its replacement too
+            event.listen(engine, 'engine_disposed', lambda conn, engine=engine: _instrument_pool(engine.pool))
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    @app.route('/metrics')
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return {'message': 'Unauthorized'}, 401
+        return Response(render_metrics(db.engine), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,285 @@
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Partitioned tables, their partition key and the retention policy data type governing them
+PARTITIONED_TABLES = {
+    'sale': {'key': 'created_at', 'data_type': 'sales'},
+    'audit_trail': {'key': 'timestamp', 'data_type': 'audit'},
+}
+DEFAULT_MONTHS_AHEAD = 3
+DEFAULT_PARTITION_SUFFIX = 'default'
+
+# Primary and unique keys of a partitioned table must include the partition key, so
+# sale ids and serial numbers stay globally unique in this key table instead. Foreign
+# keys to sale.id point here, and a trigger keeps it in step with inserts. Rows are
+# kept when old partitions are dropped, so serial numbers are never reused.
+SALE_KEY_TABLE = 'sale_key'
+SALE_KEY_SCHEMA = (
+    f"CREATE TABLE IF NOT EXISTS {SALE_KEY_TABLE} ("
+    "id integer PRIMARY KEY, serial_number varchar(100) NOT NULL UNIQUE, created_at timestamp NOT NULL)",
+    f"""
+    CREATE OR REPLACE FUNCTION {SALE_KEY_TABLE}_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO {SALE_KEY_TABLE} (id, serial_number, created_at)
+        VALUES (NEW.id, NEW.serial_number, NEW.created_at)
+        ON CONFLICT (id) DO UPDATE SET serial_number = EXCLUDED.serial_number;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"DROP TRIGGER IF EXISTS {SALE_KEY_TABLE}_sync ON sale",
+    f"CREATE TRIGGER {SALE_KEY_TABLE}_sync BEFORE INSERT OR UPDATE OF serial_number ON sale "
+    f"FOR EACH ROW EXECUTE FUNCTION {SALE_KEY_TABLE}_sync()",
+)
+KEY_TABLES = {'sale': SALE_KEY_TABLE}
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+class PartitionManager:
+    """
+    Monthly range partitioning of the sale and audit_trail tables on PostgreSQL 13+.
+
+    ``convert`` turns an existing table into a partitioned one in a single
+    transaction, ``ensure_future_partitions`` creates the coming months
+    ahead of time, and ``drop_partitions_before`` applies retention by
+    dropping whole months, which is a catalogue change rather than a DELETE.
+    Rows outside every monthly partition land in a default partition.
+    """
+
+    def __init__(self, connection):
+        if connection.dialect.name != 'postgresql':
+            raise ValueError("Table partitioning requires PostgreSQL")
+        self.connection = connection
+
+    def _execute(self, statement: str, **params):
+        return self.connection.execute(text(statement), params)
+
+    def _key(self, table: str) -> str:
+        if table not in PARTITIONED_TABLES:
+            raise ValueError(f"{table} is not a partitionable table; expected one of {', '.join(PARTITIONED_TABLES)}")
+        return PARTITIONED_TABLES[table]['key']
+
+    def is_partitioned(self, table: str) -> bool:
+        return self._execute(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)", table=table
+        ).scalar() or False
+
+    def partitions(self, table: str) -> List[Dict]:
+        """List the partitions of a table with their bounds and approximate row counts."""
+        rows = self._execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname",
+            table=table
+        ).all()
+        partitions = []
+        for name, bound, tuples in rows:
+            match = _BOUND_PATTERN.search(bound or '')
+            partitions.append({
+                'name': name,
+                'start': datetime.fromisoformat(match.group(1)) if match else None,
+                'end': datetime.fromisoformat(match.group(2)) if match else None,
+                'rows': max(0, int(tuples)),
+                'default': not match
+            })
+        return partitions
+
+    def _default_partition(self, table: str) -> str:
+        return f"{table}_{DEFAULT_PARTITION_SUFFIX}"
+
+    def create_partition(self, table: str, month: datetime) -> Optional[str]:
+        """
+        Create the partition holding ``month``, unless it exists.
+
+        Rows for that month already sitting in the default partition are
+        moved into the new partition, since PostgreSQL refuses to create it
+        otherwise.
+        """
+        key = self._key(table)
+        start, end = month_start(month), add_months(month_start(month), 1)
+        name = partition_name(table, start)
+        if self._execute("SELECT to_regclass(:name) IS NOT NULL", name=name).scalar():
+            return None
+
+        default = self._default_partition(table)
+        has_default = self._execute("SELECT to_regclass(:name) IS NOT NULL", name=default).scalar()
+        stranded = has_default and self._execute(
+            f'SELECT 1 FROM {default} WHERE "{key}" >= :start AND "{key}" < :end LIMIT 1', start=start, end=end
+        ).scalar()
+        if stranded:
+            self._execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+        self._execute(
+            f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        if stranded:
+            moved = self._execute(
+                f'WITH moved AS (DELETE FROM {default} WHERE "{key}" >= :start AND "{key}" < :end RETURNING *) '
+                f"INSERT INTO {table} SELECT * FROM moved",
+                start=start, end=end
+            ).rowcount
+            self._execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+            logger.info(f"Moved {moved} rows from {default} into {name}")
+        logger.info(f"Created partition {name}")
+        return name
+
+    def ensure_future_partitions(self, table: str, months_ahead: int = DEFAULT_MONTHS_AHEAD,
+                                 now: Optional[datetime] = None) -> List[str]:
+        """Create partitions from the current month to ``months_ahead`` months from now."""
+        current = month_start(now or datetime.utcnow())
+        created = [self.create_partition(table, add_months(current, offset)) for offset in range(months_ahead + 1)]
+        return [name for name in created if name]
+
+    def drop_partitions_before(self, table: str, cutoff: datetime, detach_only: bool = False) -> List[str]:
+        """
+        Drop every monthly partition whose rows are all older than ``cutoff``.
+
+        A month that straddles the cutoff is kept whole until it has fully
+        expired. With ``detach_only`` the partitions become standalone tables,
+        for archiving before they are dropped by hand.
+        """
+        dropped = []
+        for partition in self.partitions(table):
+            if partition['default'] or partition['end'] > cutoff:
+                continue
+            self._execute(f"ALTER TABLE {table} DETACH PARTITION {partition['name']}")
+            if not detach_only:
+                self._execute(f"DROP TABLE {partition['name']}")
+            dropped.append(partition['name'])
+            logger.info(f"{'Detached' if detach_only else 'Dropped'} partition {partition['name']}")
+        return dropped
+
+    def convert(self, table: str, months_ahead: int = DEFAULT_MONTHS_AHEAD) -> Dict:
+        """
+        Convert a regular table into a monthly partitioned table with the same name.
+
+        Runs in the caller's transaction and locks the table for its duration.
+        Indexes, foreign keys and the id sequence are carried over; the
+        primary key becomes (id, partition key), and unique indexes that do
+        not include the partition key are recreated as plain indexes. Foreign
+        keys pointing at sale.id are re-pointed at the sale_key table.
+        """
+        key = self._key(table)
+        if self.is_partitioned(table):
+            raise ValueError(f"{table} is already partitioned")
+        old = f"{table}_unpartitioned"
+
+        self._execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        indexes = self._execute(
+            "SELECT pg_get_indexdef(i.indexrelid), i.indisunique, a.attnum = ANY(i.indkey::int2[]) "
+            "FROM pg_index i JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attname = :key "
+            "WHERE i.indrelid = to_regclass(:table) AND NOT i.indisprimary",
+            table=table, key=key
+        ).all()
+        outgoing = self._execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:table) AND contype = 'f'",
+            table=table
+        ).all()
+        incoming = self._execute(
+            "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE confrelid = to_regclass(:table) AND contype = 'f'",
+            table=table
+        ).all()
+        sequence = self._execute("SELECT pg_get_serial_sequence(:table, 'id')", table=table).scalar()
+        first = self._execute(f'SELECT min("{key}") FROM {table}').scalar()
+
+        for child, name, _ in incoming:
+            self._execute(f'ALTER TABLE {child} DROP CONSTRAINT "{name}"')
+        self._execute(f'UPDATE {table} SET "{key}" = now() WHERE "{key}" IS NULL')
+        self._execute(f"ALTER TABLE {table} RENAME TO {old}")
+        self._execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+            f'INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ("{key}")'
+        )
+        self._execute(f'ALTER TABLE {table} ALTER COLUMN "{key}" SET NOT NULL')
+        self._execute(f"CREATE TABLE {self._default_partition(table)} PARTITION OF {table} DEFAULT")
+
+        month = month_start(first or datetime.utcnow())
+        last = add_months(month_start(datetime.utcnow()), months_ahead)
+        created = []
+        while month <= last:
+            created.append(self.create_partition(table, month))
+            month = add_months(month, 1)
+
+        copied = self._execute(f"INSERT INTO {table} SELECT * FROM {old}").rowcount
+        if sequence:
+            self._execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+        self._execute(f"DROP TABLE {old}")
+
+        # Indexes are built after the copy, which is much faster than maintaining them row by row
+        self._execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, "{key}")')
+        demoted = []
+        for definition, unique, includes_key in indexes:
+            if unique and not includes_key:
+                definition = definition.replace('CREATE UNIQUE INDEX', 'CREATE INDEX', 1)
+                demoted.append(definition)
+            self._execute(definition)
+        for name, definition in outgoing:
+            self._execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+
+        key_table = KEY_TABLES.get(table)
+        if key_table:
+            for statement in SALE_KEY_SCHEMA[:1]:
+                self._execute(statement)
+            self._execute(
+                f"INSERT INTO {key_table} (id, serial_number, created_at) "
+                f"SELECT id, serial_number, created_at FROM {table} ON CONFLICT (id) DO NOTHING"
+            )
+            for statement in SALE_KEY_SCHEMA[1:]:
+                self._execute(statement)
+        repointed = []
+        for child, name, definition in incoming:
+            if not key_table:
+                logger.warning(f"Foreign key {child}.{name} on {table} cannot be recreated on a partitioned table")
+                continue
+            definition = re.sub(rf'REFERENCES {table}\(', f'REFERENCES {key_table}(', definition)
+            self._execute(f'ALTER TABLE {child} ADD CONSTRAINT "{name}" {definition}')
+            repointed.append(f"{child}.{name}")
+
+        return {
+            'table': table,
+            'rows': copied,
+            'partitions': len([name for name in created if name]),
+            'indexes': len(indexes),
+            'non_unique_indexes': demoted,
+            'foreign_keys_repointed': repointed
+        }
+
+
+def apply_partition_retention(manager: PartitionManager, tables: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    Drop expired partitions of every partitioned table according to its retention policy.
+
+    Tables without an explicit policy are left alone. Policies with
+    archive_before_delete detach expired months instead of dropping them.
+    """
+    from models.retention_model import RetentionPolicy
+    dropped = {}
+    for table, settings in PARTITIONED_TABLES.items():
+        if (tables and table not in tables) or not manager.is_partitioned(table):
+            continue
+        policy = RetentionPolicy.query.filter_by(data_type=settings['data_type']).first()
+        if policy is None:
+            continue
+        cutoff = datetime.utcnow() - timedelta(days=policy.retention_days)
+        dropped[table] = manager.drop_partitions_before(table, cutoff, detach_only=bool(policy.archive_before_delete))
+    return dropped
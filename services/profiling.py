@@ -0,0 +1,269 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime
+from io import StringIO
+from typing import Dict, List, Optional
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_FLAG = '_profile'
+DEFAULT_PROFILE_DIR = 'profiles/'
+DEFAULT_MAX_PROFILES = 50
+DEFAULT_SAMPLE_INTERVAL = 0.005
+ALLOCATION_TOP_N = 25
+TRACEMALLOC_FRAMES = 10
+ARTIFACTS = {'pstats': '.pstats', 'collapsed': '.collapsed', 'meta': '.json'}
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# tracemalloc and the sampler observe the whole process, so profile one request at a time
+_profile_lock = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+def profile_dir() -> str:
+    path = current_app.config.get('PROFILE_DIR', DEFAULT_PROFILE_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def artifact_path(profile_id: str, artifact: str) -> Optional[str]:
+    """Return the file of a stored profile artifact, or None for unknown IDs."""
+    if not PROFILE_ID_PATTERN.match(profile_id) or artifact not in ARTIFACTS:
+        return None
+    path = os.path.join(profile_dir(), profile_id + ARTIFACTS[artifact])
+    return path if os.path.exists(path) else None
+
+
+def _requested() -> bool:
+    return bool(request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_FLAG))
+
+
+def _is_admin() -> bool:
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        return False
+    return bool(identity) and identity.get('role', '').lower() == 'admin'
+
+
+def _start_profiling():
+    if not _requested() or not _is_admin():
+        return
+    if not _profile_lock.acquire(blocking=False):
+        g.profile_status = 'busy'
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active in this process
+        _profile_lock.release()
+        g.profile_status = 'unavailable'
+        return
+
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    sampler = StackSampler(threading.get_ident(), current_app.config.get('PROFILE_SAMPLE_INTERVAL', DEFAULT_SAMPLE_INTERVAL))
+    sampler.start()
+    g.profile = {
+        'id': uuid.uuid4().hex,
+        'profiler': profiler,
+        'sampler': sampler,
+        'started_tracemalloc': started_tracemalloc,
+        'baseline': tracemalloc.take_snapshot(),
+        'start': time.perf_counter()
+    }
+
+
+def _stop_profiling(state: Dict) -> Dict:
+    """Stop all collectors of a request's profile and return their results."""
+    try:
+        state['profiler'].disable()
+        duration = time.perf_counter() - state['start']
+        stacks = state['sampler'].stop()
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if state['started_tracemalloc']:
+            tracemalloc.stop()
+    finally:
+        _profile_lock.release()
+
+    allocations = [
+        {
+            'location': str(stat.traceback[0]) if stat.traceback else None,
+            'size_kb': round(stat.size_diff / 1024, 1),
+            'count': stat.count_diff
+        }
+        for stat in snapshot.compare_to(state['baseline'], 'lineno')[:ALLOCATION_TOP_N]
+    ]
+    return {
+        'id': state['id'],
+        'profiler': state['profiler'],
+        'stacks': stacks,
+        'duration_ms': round(duration * 1000, 2),
+        'peak_traced_kb': round(peak / 1024, 1),
+        'allocations': allocations
+    }
+
+
+def _request_details(status_code: int) -> Dict:
+    """What a profile records about its request, taken while the request is still active."""
+    identity = get_jwt_identity()
+    return {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.url_rule.rule if request.url_rule else None,
+        'status': status_code,
+        'user_id': identity.get('id') if identity else None
+    }
+
+
+def _save(result: Dict, details: Dict, directory: str, max_kept: int) -> str:
+    profile_id = result['id']
+    result['profiler'].dump_stats(os.path.join(directory, profile_id + ARTIFACTS['pstats']))
+    with open(os.path.join(directory, profile_id + ARTIFACTS['collapsed']), 'w') as f:
+        for stack, count in result['stacks'].most_common():
+            f.write(f"{stack} {count}\n")
+
+    metadata = {
+        'id': profile_id,
+        **details,
+        'duration_ms': result['duration_ms'],
+        'samples': sum(result['stacks'].values()),
+        'peak_traced_kb': result['peak_traced_kb'],
+        'allocations': result['allocations'],
+        'created_at': datetime.utcnow().isoformat()
+    }
+    with open(os.path.join(directory, profile_id + ARTIFACTS['meta']), 'w') as f:
+        json.dump(metadata, f)
+    _prune(directory, max_kept)
+    return profile_id
+
+
+def _prune(directory: str, max_kept: int):
+    """Keep only the newest ``max_kept`` profiles."""
+    metas = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(ARTIFACTS['meta'])),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in metas[max_kept:]:
+        profile_id = entry.name[:-len(ARTIFACTS['meta'])]
+        for suffix in ARTIFACTS.values():
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def _finish_profiling(response):
+    status = g.pop('profile_status', None)
+    if status:
+        response.headers['X-Profile-Status'] = status
+    state = g.pop('profile', None)
+    if state is None:
+        return response
+    details = _request_details(response.status_code)
+    directory = profile_dir()
+    max_kept = current_app.config.get('PROFILE_MAX_KEPT', DEFAULT_MAX_PROFILES)
+
+    def finish() -> bool:
+        try:
+            _save(_stop_profiling(state), details, directory, max_kept)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving request profile: {str(e)}")
+            return False
+
+    if response.is_streamed:
+        # The body is produced after this hook, once the headers are sent; profile it too
+        response.headers['X-Profile-Id'] = state['id']
+        response.call_on_close(finish)
+    elif finish():
+        response.headers['X-Profile-Id'] = state['id']
+    return response
+
+
+def _abandon_profiling(exc):
+    # Make sure collectors never outlive a request that failed before after_request
+    state = g.pop('profile', None)
+    if state is not None:
+        _stop_profiling(state)
+
+
+def list_profiles() -> List[Dict]:
+    """Return the metadata of stored profiles, newest first."""
+    directory = profile_dir()
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(ARTIFACTS['meta']):
+            with open(entry.path) as f:
+                metadata = json.load(f)
+            metadata.pop('allocations', None)
+            profiles.append(metadata)
+    return sorted(profiles, key=lambda metadata: metadata['created_at'], reverse=True)
+
+
+def load_profile(profile_id: str, top: int = 30) -> Optional[Dict]:
+    """Return a profile's metadata with its top functions by cumulative time."""
+    meta_path = artifact_path(profile_id, 'meta')
+    stats_path = artifact_path(profile_id, 'pstats')
+    if not meta_path:
+        return None
+    with open(meta_path) as f:
+        metadata = json.load(f)
+    if stats_path:
+        output = StringIO()
+        stats = pstats.Stats(stats_path, stream=output)
+        stats.sort_stats('cumulative').print_stats(top)
+        metadata['top_functions'] = output.getvalue()
+    return metadata
+
+
+def init_app(app):
+    """Register the request hooks that profile admin requests on demand."""
+    app.before_request(_start_profiling)
+    app.after_request(_finish_profiling)
+    app.teardown_request(_abandon_profiling)
@@ -0,0 +1,83 @@
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import List
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when an endpoint issues more SQL statements than its declared budget."""
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while it is active."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def most_repeated(self, limit: int = 3):
+        """Return the most frequently repeated statements, the usual sign of an N+1."""
+        return [
+            (statement, times) for statement, times in Counter(self.statements).most_common(limit)
+            if times > 1
+        ]
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    if not has_app_context():
+        return
+    for counter in g.get('query_counters', ()):
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed in the current app context."""
+    counter = QueryCounter()
+    counters = g.setdefault('query_counters', [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def query_budget(max_queries: int):
+    """
+    Declare the maximum number of SQL statements an endpoint may issue.
+
+    Exceeding the budget raises QueryBudgetExceeded when ENFORCE_QUERY_BUDGETS
+    is enabled (as in the test configuration) and logs a warning otherwise.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            with count_queries() as counter:
+                result = f(*args, **kwargs)
+
+            if counter.count > max_queries:
+                message = (
+                    f"{request.method} {request.path} issued {counter.count} queries, "
+                    f"budget is {max_queries}"
+                )
+                repeated = counter.most_repeated()
+                if repeated:
+                    message += '; repeated: ' + '; '.join(
+                        f"{times}x {' '.join(statement.split())[:200]}" for statement, times in repeated
+                    )
+                if current_app.config.get('ENFORCE_QUERY_BUDGETS', False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return result
+        return wrapped
+    return decorator
@@ -0,0 +1,261 @@
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, select, update
+from extensions import db
+from models.inception_model import Inception
+from models.reconciliation_model import ReconciliationBatch, ReconciliationPayment, ReconciliationStatus
+from models.sales_model import Sale
+
+logger = logging.getLogger(__name__)
+
+WRITE_CHUNK_SIZE = 5000
+# Identifiers a payment can be matched on, strongest first
+MATCH_KEYS = ('momo_transaction_id', 'momo_reference_number')
+# Statement column names accepted for each payment field
+COLUMN_ALIASES = {
+    'momo_reference_number': ('momo_reference_number', 'reference', 'reference_number', 'momo_reference'),
+    'momo_transaction_id': ('momo_transaction_id', 'transaction_id', 'momo_transaction', 'txn_id'),
+    'amount': ('amount', 'amount_received', 'premium'),
+    'received_at': ('received_at', 'date', 'transaction_date', 'payment_date'),
+    'payment_method': ('payment_method', 'method'),
+    'description': ('description', 'narration'),
+}
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y %H:%M', '%d/%m/%Y', '%d-%m-%Y')
+INCEPTION_PAYMENT_METHODS = ('cash', 'bank', 'mobile_money', 'cheque', 'paypoint', 'other')
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {value}")
+
+
+def parse_payment(row: Dict[str, str]) -> Dict:
+    """Map a statement row onto payment fields; raises ValueError for unusable rows."""
+    fields = {key.strip().lower(): value for key, value in row.items() if key}
+    payment = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        value = next((fields[alias] for alias in aliases if fields.get(alias) not in (None, '')), None)
+        payment[field] = value.strip() if isinstance(value, str) else value
+    if not payment['momo_reference_number'] and not payment['momo_transaction_id']:
+        raise ValueError("Either a reference number or a transaction id is required")
+    if payment['amount'] in (None, ''):
+        raise ValueError("Amount is required")
+    payment['amount'] = float(str(payment['amount']).replace(',', ''))
+    if payment['amount'] <= 0:
+        raise ValueError("Amount must be greater than zero")
+    if not payment['received_at']:
+        raise ValueError("Payment date is required")
+    if not isinstance(payment['received_at'], datetime):
+        payment['received_at'] = _parse_date(str(payment['received_at']))
+    payment['payment_method'] = payment['payment_method'] or 'mobile_money'
+    return payment
+
+
+def create_batch(
+    source: str,
+    rows: Iterable[Tuple[int, Dict[str, str]]],
+    uploaded_by: Optional[int] = None,
+    **tolerances
+) -> Tuple[ReconciliationBatch, List[str]]:
+    """
+    Store the payment lines of a statement as a new batch.
+
+    ``rows`` yields (line number, row) pairs such as reference_import.read_csv
+    produces. Rows that cannot be parsed are reported and left out. The
+    tolerances are ReconciliationBatch columns (amount_tolerance,
+    amount_tolerance_pct, days_before, days_after).
+    """
+    batch = ReconciliationBatch(source=source, uploaded_by=uploaded_by, **{
+        key: value for key, value in tolerances.items() if value is not None
+    })
+    db.session.add(batch)
+    db.session.flush()
+
+    errors, pending, count, total = [], [], 0, 0.0
+    for line_number, row in rows:
+        try:
+            payment = parse_payment(row)
+        except (ValueError, TypeError) as e:
+            errors.append(f"line {line_number}: {e}")
+            continue
+        payment.update(batch_id=batch.id, line_number=line_number, status=ReconciliationStatus.PENDING.value)
+        pending.append(payment)
+        count += 1
+        total += payment['amount']
+        if len(pending) >= WRITE_CHUNK_SIZE:
+            db.session.execute(insert(ReconciliationPayment), pending)
+            pending = []
+    if pending:
+        db.session.execute(insert(ReconciliationPayment), pending)
+    batch.payment_count = count
+    batch.total_amount = round(total, 2)
+    db.session.commit()
+    return batch, errors
+
+
+def _candidates(batch_id: int) -> Dict[int, List[Tuple]]:
+    """
+    Sales sharing a transaction id or reference with each payment of the batch.
+
+    Each identifier is one join between the batch and the sale table, which
+    the database runs as a hash join (or, on SQLite, through the sale index
+    on the identifier) instead of a query per payment. Deleted sales are
+    skipped here rather than in the join, so the is_deleted index is never
+    chosen to drive it.
+    """
+    payments, sales = ReconciliationPayment.__table__, Sale.__table__
+    candidates: Dict[int, List[Tuple]] = {}
+    for key in MATCH_KEYS:
+        statement = (
+            select(payments.c.id, sales.c.id, sales.c.amount, sales.c.created_at, sales.c.is_deleted)
+            .select_from(payments.join(sales, sales.c[key] == payments.c[key]))
+            .where(payments.c.batch_id == batch_id)
+            .execution_options(yield_per=WRITE_CHUNK_SIZE)
+        )
+        for payment_id, sale_id, amount, created_at, is_deleted in db.session.execute(statement):
+            if is_deleted:
+                continue
+            found = candidates.setdefault(payment_id, [])
+            if not any(candidate[0] == sale_id for candidate in found):
+                found.append((sale_id, amount, created_at, key))
+    return candidates
+
+
+def _within(batch: ReconciliationBatch, amount_difference: float, sale_amount: float, days: int) -> Optional[str]:
+    """None when a payment fits a sale within the batch tolerances, otherwise why it does not."""
+    allowed = max(batch.amount_tolerance or 0.0, (batch.amount_tolerance_pct or 0.0) / 100 * (sale_amount or 0.0))
+    if abs(amount_difference) > allowed + 0.005:
+        return f"Amount differs from the sale by {amount_difference:+.2f}"
+    if days < -batch.days_before:
+        return f"Received {-days} days before the sale"
+    if days > batch.days_after:
+        return f"Received {days} days after the sale"
+    return None
+
+
+def reconcile(batch: ReconciliationBatch) -> ReconciliationBatch:
+    """
+    Match every payment of a batch to a sale and store the results in bulk.
+
+    Transaction id matches are preferred over reference matches, then the
+    sale closest in amount and date. A sale matched by an earlier line of
+    the batch is not matched again; the later payment is a duplicate.
+    Payments that only match outside the tolerances are mismatched and keep
+    the nearest sale for review.
+    """
+    candidates = _candidates(batch.id)
+    payments = db.session.execute(
+        select(ReconciliationPayment.id, ReconciliationPayment.amount, ReconciliationPayment.received_at)
+        .where(ReconciliationPayment.batch_id == batch.id)
+        .order_by(ReconciliationPayment.id)
+    ).all()
+
+    claimed, results = {}, []
+    counts = {status.value: 0 for status in ReconciliationStatus}
+    matched_amount = 0.0
+    for payment_id, amount, received_at in payments:
+        result = {
+            'id': payment_id, 'status': ReconciliationStatus.UNMATCHED.value, 'sale_id': None, 'matched_on': None,
+            'amount_difference': None, 'days_difference': None, 'reason': 'No sale with this transaction id or reference'
+        }
+        options = []
+        for sale_id, sale_amount, created_at, key in candidates.get(payment_id, ()):
+            difference = round(amount - (sale_amount or 0.0), 2)
+            days = (received_at.date() - created_at.date()).days if created_at else 0
+            problem = _within(batch, difference, sale_amount, days)
+            options.append((
+                problem is not None, sale_id in claimed, MATCH_KEYS.index(key), abs(difference), abs(days),
+                sale_id, key, difference, days, problem
+            ))
+        if options:
+            options.sort()
+            outside, taken, _, _, _, sale_id, key, difference, days, problem = options[0]
+            result.update(sale_id=sale_id, matched_on=key, amount_difference=difference, days_difference=days)
+            if outside:
+                result.update(status=ReconciliationStatus.MISMATCHED.value, reason=problem)
+            elif taken:
+                result.update(
+                    status=ReconciliationStatus.DUPLICATE.value,
+                    reason=f"Sale already matched by payment {claimed[sale_id]}"
+                )
+            else:
+                claimed[sale_id] = payment_id
+                matched_amount += amount
+                result.update(status=ReconciliationStatus.MATCHED.value, reason=None)
+        counts[result['status']] += 1
+        results.append(result)
+        if len(results) >= WRITE_CHUNK_SIZE:
+            db.session.execute(update(ReconciliationPayment), results)
+            results = []
+    if results:
+        db.session.execute(update(ReconciliationPayment), results)
+
+    batch.matched_count = counts[ReconciliationStatus.MATCHED.value]
+    batch.mismatched_count = counts[ReconciliationStatus.MISMATCHED.value]
+    batch.unmatched_count = counts[ReconciliationStatus.UNMATCHED.value]
+    batch.duplicate_count = counts[ReconciliationStatus.DUPLICATE.value]
+    batch.matched_amount = round(matched_amount, 2)
+    batch.status = 'completed'
+    batch.reconciled_at = datetime.utcnow()
+    db.session.commit()
+    logger.info(
+        f"Reconciled batch {batch.id}: {batch.matched_count} matched, {batch.mismatched_count} mismatched, "
+        f"{batch.unmatched_count} unmatched, {batch.duplicate_count} duplicates"
+    )
+    return batch
+
+
+def post_batch(batch: ReconciliationBatch) -> int:
+    """Record the matched payments of a batch as completed inceptions of their sales."""
+    if batch.status not in ('completed', 'posted'):
+        raise ValueError("Only reconciled batches can be posted")
+    payments = db.session.execute(
+        select(
+            ReconciliationPayment.id, ReconciliationPayment.sale_id, ReconciliationPayment.amount,
+            ReconciliationPayment.received_at, ReconciliationPayment.payment_method,
+            ReconciliationPayment.momo_transaction_id, ReconciliationPayment.momo_reference_number
+        )
+        .where(
+            ReconciliationPayment.batch_id == batch.id,
+            ReconciliationPayment.status == ReconciliationStatus.MATCHED.value,
+            ReconciliationPayment.inception_id.is_(None)
+        )
+        .order_by(ReconciliationPayment.id)
+    ).all()
+
+    now, posted = datetime.utcnow(), 0
+    for start in range(0, len(payments), WRITE_CHUNK_SIZE):
+        chunk = payments[start:start + WRITE_CHUNK_SIZE]
+        inception_ids = db.session.execute(
+            insert(Inception.__table__).returning(Inception.__table__.c.id, sort_by_parameter_order=True),
+            [
+                {
+                    'sale_id': payment.sale_id,
+                    'amount_received': payment.amount,
+                    'received_at': payment.received_at,
+                    'description': f"Reconciled: {payment.momo_transaction_id or payment.momo_reference_number}",
+                    'payment_method': payment.payment_method if payment.payment_method in INCEPTION_PAYMENT_METHODS else 'other',
+                    'status': 'completed',
+                    'created_at': now
+                }
+                for payment in chunk
+            ]
+        ).scalars().all()
+        db.session.execute(update(ReconciliationPayment), [
+            {'id': payment.id, 'inception_id': inception_id}
+            for payment, inception_id in zip(chunk, inception_ids)
+        ])
+        posted += len(chunk)
+    batch.status = 'posted'
+    batch.posted_at = now
+    db.session.commit()
+    return posted
@@ -0,0 +1,422 @@
+import calendar
+import csv
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select, update
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models.bank_model import Bank, BankBranch
+from models.branch_model import Branch
+from models.performance_model import SalesTarget
+from models.sales_executive_model import SalesExecutive, sales_executive_branches
+from models.user_model import Role, User
+from services import validation_rules
+
+DEFAULT_USER_PASSWORD = 'Password'
+PREMIUM_PER_CASE = 100
+# Monthly target splits created for every sales manager in targets.csv
+TARGET_SPLITS = (
+    ('source_type', 'paypoint', 0.80),
+    ('product_group', 'risk', 0.70),
+    ('overall', 'monthly_total', 1.0),
+)
+
+_NON_ALPHANUMERIC = re.compile(r'[^A-Z0-9]+')
+
+
+def read_csv(path: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Stream a CSV as (line number, row) with stripped headers and values."""
+    with open(path, newline='', encoding='utf-8-sig') as csvfile:
+        yield from read_csv_file(csvfile)
+
+
+def read_csv_file(csvfile: Iterable[str]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Like read_csv, for a file that is already open (e.g. an upload)."""
+    reader = csv.reader(csvfile)
+    header = [column.strip() for column in next(reader, [])]
+    for line_number, values in enumerate(reader, start=2):
+        if not any(value.strip() for value in values):
+            continue
+        yield line_number, {column: value.strip() for column, value in zip(header, values)}
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Upper-case a person's name and drop punctuation and repeated spaces."""
+    return _NON_ALPHANUMERIC.sub(' ', (name or '').upper()).strip()
+
+
+class NameIndex:
+    """
+    Matches free-form person names against a known list without pairwise comparison.
+
+    Exact matches on the normalized name win. Otherwise every name sharing
+    at least ``min_common`` tokens is found through an inverted token index,
+    and the one with the most shared tokens is returned; ties are treated
+    as ambiguous and return None.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, object]], min_common: int = 2):
+        self.min_common = min_common
+        self.exact: Dict[str, object] = {}
+        self.tokens: Dict[str, set] = defaultdict(set)
+        self.values: List[object] = []
+        for name, value in entries:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            self.exact.setdefault(normalized, value)
+            position = len(self.values)
+            self.values.append(value)
+            for token in set(normalized.split()):
+                self.tokens[token].add(position)
+
+    def match(self, name: str):
+        normalized = normalize_name(name)
+        if normalized in self.exact:
+            return self.exact[normalized]
+        shared: Dict[int, int] = defaultdict(int)
+        for token in set(normalized.split()):
+            for position in self.tokens.get(token, ()):
+                shared[position] += 1
+        best = sorted(
+            ((count, position) for position, count in shared.items() if count >= self.min_common),
+            reverse=True
+        )
+        if not best or (len(best) > 1 and best[0][0] == best[1][0] and
+                        self.values[best[0][1]] != self.values[best[1][1]]):
+            return None
+        return self.values[best[0][1]]
+
+
+class ImportReport:
+    """Rows inserted, updated, unchanged and skipped by one import, per table."""
+
+    def __init__(self, source: str, dry_run: bool):
+        self.source = source
+        self.dry_run = dry_run
+        self.inserted: Dict[str, List[str]] = defaultdict(list)
+        self.updated: Dict[str, List[str]] = defaultdict(list)
+        self.unchanged: Dict[str, int] = defaultdict(int)
+        self.skipped: List[str] = []
+
+    def insert(self, table: str, label: str):
+        self.inserted[table].append(label)
+
+    def update(self, table: str, label: str, before: Dict, after: Dict):
+        changes = ', '.join(f"{key}: {before.get(key)!r} -> {value!r}" for key, value in after.items())
+        self.updated[table].append(f"{label} ({changes})")
+
+    def keep(self, table: str):
+        self.unchanged[table] += 1
+
+    def skip(self, line_number: int, reason: str):
+        self.skipped.append(f"line {line_number}: {reason}")
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        tables = set(self.inserted) | set(self.updated) | set(self.unchanged)
+        return {
+            table: {
+                'inserted': len(self.inserted.get(table, [])),
+                'updated': len(self.updated.get(table, [])),
+                'unchanged': self.unchanged.get(table, 0)
+            }
+            for table in sorted(tables)
+        }
+
+    def format(self, verbose: bool = False) -> str:
+        """Render the report; verbose output lists every change as a diff."""
+        lines = [f"{self.source}{' (dry run, nothing written)' if self.dry_run else ''}:"]
+        for table, counts in self.summary().items():
+            lines.append(
+                f"  {table}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged"
+            )
+        if self.skipped:
+            lines.append(f"  {len(self.skipped)} rows skipped")
+        if verbose:
+            for table, labels in self.inserted.items():
+                lines.extend(f"  + {table}: {label}" for label in labels)
+            for table, labels in self.updated.items():
+                lines.extend(f"  ~ {table}: {label}" for label in labels)
+            lines.extend(f"  ! {reason}" for reason in self.skipped)
+        return '\n'.join(lines)
+
+
+def _apply(model, inserts: List[Dict], updates: List[Dict]):
+    """Bulk insert new rows and bulk update changed rows by primary key."""
+    if inserts:
+        db.session.execute(insert(model), inserts)
+    if updates:
+        db.session.execute(update(model), updates)
+
+
+def _finish(report: ImportReport) -> ImportReport:
+    if report.dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    return report
+
+
+def import_banks(path: str, dry_run: bool = False) -> ImportReport:
+    """Import banks and their branches from a BANK NAME, BRANCH NAME, SORT CODE CSV."""
+    report = ImportReport('banks', dry_run)
+    branches: Dict[Tuple[str, str], str] = {}
+    for line_number, row in read_csv(path):
+        bank_name, branch_name = row.get('BANK NAME', ''), row.get('BRANCH NAME', '')
+        if not bank_name or not branch_name:
+            report.skip(line_number, 'missing bank or branch name')
+            continue
+        if (bank_name, branch_name) in branches:
+            report.skip(line_number, f"duplicate branch {branch_name} of {bank_name}")
+        branches[(bank_name, branch_name)] = row.get('SORT CODE') or None
+
+    bank_ids = dict(db.session.execute(select(Bank.name, Bank.id)).all())
+    existing_branches = {
+        (bank_id, name): (branch_id, sort_code)
+        for branch_id, bank_id, name, sort_code in db.session.execute(
+            select(BankBranch.id, BankBranch.bank_id, BankBranch.name, BankBranch.sort_code)
+        )
+    }
+
+    now = datetime.utcnow()
+    new_banks = sorted({bank_name for bank_name, _ in branches} - set(bank_ids))
+    for bank_name in new_banks:
+        report.insert('bank', bank_name)
+    report.unchanged['bank'] = len({bank_name for bank_name, _ in branches}) - len(new_banks)
+    if new_banks and not dry_run:
+        _apply(Bank, [{'name': name, 'is_deleted': False, 'created_at': now} for name in new_banks], [])
+        bank_ids.update(db.session.execute(select(Bank.name, Bank.id).where(Bank.name.in_(new_banks))).all())
+
+    inserts, updates = [], []
+    for (bank_name, branch_name), sort_code in branches.items():
+        existing = existing_branches.get((bank_ids.get(bank_name), branch_name))
+        if existing is None:
+            report.insert('bank_branch', f"{branch_name} ({bank_name})")
+            inserts.append({
+                'name': branch_name, 'bank_id': bank_ids.get(bank_name), 'sort_code': sort_code,
+                'is_deleted': False, 'created_at': now
+            })
+        elif sort_code and sort_code != existing[1]:
+            report.update('bank_branch', f"{branch_name} ({bank_name})", {'sort_code': existing[1]}, {'sort_code': sort_code})
+            updates.append({'id': existing[0], 'sort_code': sort_code, 'updated_at': now})
+        else:
+            report.keep('bank_branch')
+    if not dry_run:
+        _apply(BankBranch, inserts, updates)
+    _finish(report)
+    if new_banks and not dry_run:
+        # Bulk inserts bypass the Bank mapper events, so recompile the rules against the new banks
+        validation_rules.invalidate()
+    return report
+
+
+def import_users(path: str, dry_run: bool = False, password: str = DEFAULT_USER_PASSWORD) -> ImportReport:
+    """Import users keyed by email from a Name, Email, Phone number, Role CSV."""
+    report = ImportReport('users', dry_run)
+    role_ids = dict(db.session.execute(select(Role.name, Role.id)).all())
+    users: Dict[str, Dict] = {}
+    for line_number, row in read_csv(path):
+        email = row.get('Email', '')
+        if not email:
+            report.skip(line_number, f"user {row.get('Name') or 'Unknown'} has no email")
+            continue
+        if row.get('Role') not in role_ids:
+            report.skip(line_number, f"role {row.get('Role')!r} not found for {email}")
+            continue
+        if email.lower() in users:
+            report.skip(line_number, f"duplicate email {email}")
+        users[email.lower()] = {'email': email, 'name': row.get('Name', ''), 'role_id': role_ids[row['Role']]}
+
+    existing = {
+        email.lower(): (user_id, name, role_id)
+        for user_id, email, name, role_id in db.session.execute(select(User.id, User.email, User.name, User.role_id))
+    }
+    # Hashing is deliberately slow, so every new user shares one hash of the default password
+    password_hash = generate_password_hash(password) if any(email not in existing for email in users) else None
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    for email, values in users.items():
+        current = existing.get(email)
+        if current is None:
+            report.insert('user', email)
+            inserts.append({
+                'email': values['email'], 'name': values['name'], 'role_id': values['role_id'],
+                'password_hash': password_hash, 'is_active': True, 'is_deleted': False,
+                'created_at': now, 'updated_at': now
+            })
+            continue
+        before = {'name': current[1], 'role_id': current[2]}
+        changes = {key: values[key] for key in before if before[key] != values[key]}
+        if changes:
+            report.update('user', email, before, changes)
+            updates.append({'id': current[0], 'updated_at': now, **changes})
+        else:
+            report.keep('user')
+    if not dry_run:
+        _apply(User, inserts, updates)
+    return _finish(report)
+
+
+def manager_index() -> NameIndex:
+    """Index every user name for matching manager names written in reference CSVs."""
+    return NameIndex(db.session.execute(select(User.name, User.id).order_by(User.id)).all())
+
+
+def import_sales_executives(path: str, dry_run: bool = False) -> ImportReport:
+    """
+    Import sales executives keyed by agent code, linking managers by name and branches by name.
+
+    Rows without a phone number, with a phone number already used by another
+    executive, or with an unknown manager or branch are skipped.
+    """
+    report = ImportReport('sales_executives', dry_run)
+    managers = manager_index()
+    branch_ids = {normalize_name(name): branch_id for name, branch_id in db.session.execute(select(Branch.name, Branch.id))}
+    existing = {
+        code: (executive_id, name, manager_id, phone_number)
+        for executive_id, code, name, manager_id, phone_number in db.session.execute(
+            select(SalesExecutive.id, SalesExecutive.code, SalesExecutive.name,
+                   SalesExecutive.manager_id, SalesExecutive.phone_number)
+        )
+    }
+    phone_owners = {values[3]: code for code, values in existing.items() if values[3]}
+
+    executives: Dict[str, Dict] = {}
+    for line_number, row in read_csv(path):
+        code, name = row.get('AGENTCODE', ''), row.get('SALES EXECUTIVE', '')
+        phone_number = row.get('TELEPHONE', '')
+        if not code:
+            report.skip(line_number, f"{name or 'Unknown'} has no agent code")
+            continue
+        manager_id = managers.match(row.get('SALE MANAGER', ''))
+        if manager_id is None:
+            report.skip(line_number, f"sales manager {row.get('SALE MANAGER')!r} not found for {name}")
+            continue
+        branch_id = branch_ids.get(normalize_name(row.get('BRANCH')))
+        if branch_id is None:
+            report.skip(line_number, f"branch {row.get('BRANCH')!r} not found for {name}")
+            continue
+        if len(phone_number) != 10 or not phone_number.isdigit():
+            report.skip(line_number, f"{name} has no valid phone number")
+            continue
+        if phone_owners.get(phone_number, code) != code:
+            report.skip(line_number, f"phone number {phone_number} of {name} belongs to {phone_owners[phone_number]}")
+            continue
+        if code in executives:
+            report.skip(line_number, f"duplicate agent code {code}")
+        phone_owners[phone_number] = code
+        executives[code] = {'name': name, 'manager_id': manager_id, 'phone_number': phone_number, 'branch_id': branch_id}
+
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    for code, values in executives.items():
+        current = existing.get(code)
+        fields = {key: values[key] for key in ('name', 'manager_id', 'phone_number')}
+        if current is None:
+            report.insert('sales_executive', f"{code} {values['name']}")
+            inserts.append({'code': code, 'status': 'active', 'is_deleted': False, 'created_at': now, **fields})
+            continue
+        before = {'name': current[1], 'manager_id': current[2], 'phone_number': current[3]}
+        changes = {key: value for key, value in fields.items() if before[key] != value}
+        if changes:
+            report.update('sales_executive', code, before, changes)
+            updates.append({'id': current[0], 'updated_at': now, **changes})
+        else:
+            report.keep('sales_executive')
+    if dry_run:
+        return _finish(report)
+
+    _apply(SalesExecutive, inserts, updates)
+    executive_ids = dict(db.session.execute(
+        select(SalesExecutive.code, SalesExecutive.id).where(SalesExecutive.code.in_(list(executives)))
+    ).all())
+    linked = set(db.session.execute(
+        select(sales_executive_branches.c.sales_executive_id, sales_executive_branches.c.branch_id)
+        .where(sales_executive_branches.c.sales_executive_id.in_(list(executive_ids.values())))
+    ).all())
+    links = [
+        {'sales_executive_id': executive_ids[code], 'branch_id': values['branch_id']}
+        for code, values in executives.items()
+        if (executive_ids[code], values['branch_id']) not in linked
+    ]
+    if links:
+        db.session.execute(insert(sales_executive_branches), links)
+    return _finish(report)
+
+
+def import_targets(path: str, dry_run: bool = False, month: Optional[datetime] = None) -> ImportReport:
+    """
+    Import monthly sales manager targets from a Target, Name CSV.
+
+    Each manager gets a paypoint, a risk product and an overall target for
+    the month, sized from the monthly case count at PREMIUM_PER_CASE each.
+    Targets are keyed by manager, criteria and period, so re-importing a
+    changed CSV updates the month's targets in place.
+    """
+    report = ImportReport('targets', dry_run)
+    month = (month or datetime.utcnow()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    period_end = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+    managers = manager_index()
+
+    cases: Dict[int, int] = {}
+    for line_number, row in read_csv(path):
+        try:
+            monthly_cases = int(row.get('Target', ''))
+        except ValueError:
+            report.skip(line_number, f"invalid target {row.get('Target')!r} for {row.get('Name')}")
+            continue
+        manager_id = managers.match(row.get('Name', ''))
+        if manager_id is None:
+            report.skip(line_number, f"sales manager {row.get('Name')!r} not found")
+            continue
+        if manager_id in cases:
+            report.skip(line_number, f"duplicate target for {row.get('Name')}")
+        cases[manager_id] = monthly_cases
+
+    existing = {
+        (manager_id, criteria_type, criteria_value): (target_id, count, premium)
+        for target_id, manager_id, criteria_type, criteria_value, count, premium in db.session.execute(
+            select(SalesTarget.id, SalesTarget.sales_manager_id, SalesTarget.target_criteria_type,
+                   SalesTarget.target_criteria_value, SalesTarget.target_sales_count,
+                   SalesTarget.target_premium_amount)
+            .where(SalesTarget.period_start == month, SalesTarget.is_deleted == False)
+        )
+    }
+
+    now = datetime.utcnow()
+    inserts, updates = [], []
+    for manager_id, monthly_cases in cases.items():
+        for criteria_type, criteria_value, share in TARGET_SPLITS:
+            count = int(round(monthly_cases * share))
+            values = {'target_sales_count': count, 'target_premium_amount': float(count * PREMIUM_PER_CASE)}
+            label = f"manager {manager_id} {criteria_type}={criteria_value} {month:%Y-%m}"
+            current = existing.get((manager_id, criteria_type, criteria_value))
+            if current is None:
+                report.insert('sales_target', label)
+                inserts.append({
+                    'sales_manager_id': manager_id, 'target_criteria_type': criteria_type,
+                    'target_criteria_value': criteria_value, 'period_start': month, 'period_end': period_end,
+                    'is_active': True, 'is_deleted': False, 'created_at': now, **values
+                })
+                continue
+            before = {'target_sales_count': current[1], 'target_premium_amount': current[2]}
+            changes = {key: value for key, value in values.items() if before[key] != value}
+            if changes:
+                report.update('sales_target', label, before, changes)
+                updates.append({'id': current[0], **changes})
+            else:
+                report.keep('sales_target')
+    if not dry_run:
+        _apply(SalesTarget, inserts, updates)
+    return _finish(report)
+
+
+IMPORTERS: Dict[str, Callable[..., ImportReport]] = {
+    'banks': import_banks,
+    'users': import_users,
+    'sales_executives': import_sales_executives,
+    'targets': import_targets,
+}
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+from flask import Response, current_app, request
+from sqlalchemy import delete, func, select, update
+from extensions import db
+from models.bank_model import Bank, BankBranch
+from models.branch_model import Branch
+from models.impact_product_model import ImpactProduct, ProductCategory
+from models.inception_model import Inception
+from models.paypoint_model import Paypoint
+from models.report_model import ReportResultCache
+from models.sales_executive_model import SalesExecutive, sales_executive_branches
+from models.sales_model import Sale
+from models.user_model import User
+
+logger = logging.getLogger(__name__)
+
+# wbits for a gzip container, so cached bodies can be sent as-is with Content-Encoding: gzip
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+COMPRESSION_LEVEL = 6
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRY_BYTES = 32 * 1024 * 1024
+# Tables whose names and codes appear in report rows next to the sales
+REFERENCE_MODELS = (User, SalesExecutive, Branch, ImpactProduct, ProductCategory, Bank, BankBranch, Paypoint)
+
+
+def _normalize(value):
+    """Parameters in a canonical form: sorted keys, trimmed strings, empty values dropped."""
+    if isinstance(value, dict):
+        normalized = {str(key): _normalize(item) for key, item in value.items()}
+        return {key: normalized[key] for key in sorted(normalized) if normalized[key] not in (None, '', [], {})}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def cache_key(report_type: str, parameters: Dict) -> str:
+    """SHA-256 of the report type and its normalized parameters."""
+    payload = json.dumps(
+        {'report_type': report_type, 'parameters': _normalize(parameters)},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def sales_watermark(filters: Dict) -> Optional[str]:
+    """
+    Fingerprint of the data a sales report over ``filters`` reads.
+
+    Covers the sales in the report's date range (count, highest id and
+    latest update, so new, edited, soft- and hard-deleted sales all change
+    it), their inceptions, and the reference tables whose names appear in
+    the rows. Other filters only narrow the range, so they are left out.
+    Returns None when the date range cannot be parsed.
+    """
+    conditions = []
+    if 'start_date' in filters and 'end_date' in filters:
+        try:
+            start_date = datetime.strptime(filters['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(filters['end_date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return None
+        conditions.append(Sale.created_at.between(start_date, end_date))
+
+    sales = db.session.execute(
+        select(
+            func.count(Sale.id), func.max(Sale.id), func.max(Sale.updated_at),
+            func.count(Inception.id), func.max(Inception.id), func.max(Inception.updated_at)
+        ).select_from(Sale).outerjoin(Inception, Inception.sale_id == Sale.id).where(*conditions)
+    ).one()
+    reference = db.session.execute(
+        select(
+            *(select(func.count(model.id)).scalar_subquery() for model in REFERENCE_MODELS),
+            *(select(func.max(model.updated_at)).scalar_subquery() for model in REFERENCE_MODELS),
+            select(func.count()).select_from(sales_executive_branches).scalar_subquery()
+        )
+    ).one()
+    stamp = '|'.join(str(value) for value in (*sales, *reference))
+    return hashlib.sha256(stamp.encode('utf-8')).hexdigest()
+
+
+def _config(name: str, default):
+    return current_app.config.get(name, default)
+
+
+def evict(max_bytes: Optional[int] = None) -> int:
+    """Delete the least recently used entries until the cache fits ``max_bytes``; returns the number deleted."""
+    max_bytes = _config('REPORT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES) if max_bytes is None else max_bytes
+    total = db.session.scalar(select(func.coalesce(func.sum(ReportResultCache.compressed_size), 0)))
+    if total <= max_bytes:
+        return 0
+    evicted = []
+    for entry_id, size in db.session.execute(
+        select(ReportResultCache.id, ReportResultCache.compressed_size)
+        .order_by(ReportResultCache.last_accessed_at, ReportResultCache.id)
+    ):
+        if total <= max_bytes:
+            break
+        evicted.append(entry_id)
+        total -= size
+    db.session.execute(delete(ReportResultCache).where(ReportResultCache.id.in_(evicted)))
+    db.session.commit()
+    logger.info(f"Evicted {len(evicted)} cached reports")
+    return len(evicted)
+
+
+def clear() -> int:
+    """Delete every cached report; returns the number deleted."""
+    deleted = db.session.execute(delete(ReportResultCache)).rowcount
+    db.session.commit()
+    return deleted
+
+
+def stats() -> Dict:
+    entries, size, compressed_size, hits = db.session.execute(
+        select(
+            func.count(ReportResultCache.id),
+            func.coalesce(func.sum(ReportResultCache.size), 0),
+            func.coalesce(func.sum(ReportResultCache.compressed_size), 0),
+            func.coalesce(func.sum(ReportResultCache.hit_count), 0)
+        )
+    ).one()
+    return {
+        'entries': entries,
+        'size': size,
+        'compressed_size': compressed_size,
+        'hits': hits,
+        'max_bytes': _config('REPORT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+    }
+
+
+class CacheSlot:
+    """
+    The cache entry one report generation reads or fills.
+
+    The watermark is taken before the report is generated, so data written
+    while it runs makes the stored entry stale instead of wrong.
+    """
+
+    def __init__(self, report_type: str, parameters: Dict, watermark: Optional[str]):
+        self.report_type = report_type
+        self.parameters = _normalize(parameters)
+        self.key = cache_key(report_type, parameters)
+        self.watermark = watermark
+        self.enabled = watermark is not None and _config('REPORT_CACHE_ENABLED', True)
+
+    def lookup(self) -> Optional[Response]:
+        """The cached report as a response, or None when missing or stale."""
+        if not self.enabled:
+            return None
+        entry = ReportResultCache.query.filter_by(cache_key=self.key).first()
+        if entry is None or entry.watermark != self.watermark:
+            return None
+        db.session.execute(
+            update(ReportResultCache).where(ReportResultCache.id == entry.id)
+            .values(hit_count=ReportResultCache.hit_count + 1, last_accessed_at=datetime.utcnow())
+        )
+        db.session.commit()
+
+        gzip_accepted = bool(request.accept_encodings['gzip'])
+        body = entry.content if gzip_accepted else zlib.decompress(entry.content, GZIP_WBITS)
+        response = Response(body, mimetype=entry.content_type, headers={
+            'Content-Disposition': f"attachment;filename={entry.filename}",
+            'X-Report-Cache': 'hit',
+            'Vary': 'Accept-Encoding',
+            **(entry.headers or {})
+        })
+        if gzip_accepted:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    def capture(self, chunks: Iterable, content_type: str, filename: str, headers: Optional[Dict] = None) -> Iterator:
+        """
+        Pass a streamed report through while compressing it, and store it once complete.
+
+        Reports larger than REPORT_CACHE_MAX_ENTRY_BYTES, and streams the
+        client abandons, are not stored.
+        """
+        if not self.enabled:
+            yield from chunks
+            return
+        max_entry_bytes = _config('REPORT_CACHE_MAX_ENTRY_BYTES', DEFAULT_MAX_ENTRY_BYTES)
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        parts, size, compressed_size = [], 0, 0
+        for chunk in chunks:
+            yield chunk
+            if compressor is None:
+                continue
+            data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+            size += len(data)
+            part = compressor.compress(data)
+            if part:
+                parts.append(part)
+                compressed_size += len(part)
+            if compressed_size > max_entry_bytes:
+                compressor, parts = None, []
+        if compressor is None:
+            logger.info(f"Report {self.key[:12]} is over the cache entry limit, not cached")
+            return
+        parts.append(compressor.flush())
+        self.store(b''.join(parts), size, content_type, filename, headers)
+
+    def store(self, content: bytes, size: int, content_type: str, filename: str, headers: Optional[Dict] = None):
+        """Replace this slot's entry with freshly generated content, then evict to the size budget."""
+        try:
+            db.session.execute(delete(ReportResultCache).where(ReportResultCache.cache_key == self.key))
+            now = datetime.utcnow()
+            db.session.add(ReportResultCache(
+                cache_key=self.key,
+                report_type=self.report_type,
+                parameters=self.parameters,
+                watermark=self.watermark,
+                content=content,
+                content_type=content_type,
+                filename=filename,
+                headers={key: str(value) for key, value in (headers or {}).items()},
+                size=size,
+                compressed_size=len(content),
+                hit_count=0,
+                created_at=now,
+                last_accessed_at=now
+            ))
+            db.session.commit()
+            evict()
+        except Exception as e:
+            # Another request may have stored the same report first; the response is unaffected
+            db.session.rollback()
+            logger.warning(f"Failed to cache report {self.key[:12]}: {str(e)}")
@@ -0,0 +1,209 @@
+import csv
+import logging
+import os
+import tempfile
+from io import StringIO
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+import xlsxwriter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet output is unavailable
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Sales read and converted per round trip; every writer consumes rows in batches of this size
+REPORT_BATCH_SIZE = 1000
+# Rows per Parquet row group, the unit BI tools read and skip by
+PARQUET_ROW_GROUP_ROWS = 65536
+# Excel's row limit per worksheet, header included; longer reports continue on another sheet
+XLSX_MAX_ROWS = 1048576
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Column kinds, so typed formats keep numbers and flags instead of text
+KINDS = ('str', 'int', 'float', 'bool')
+
+
+class ReportColumn:
+    """A report column and the kind of value it holds."""
+
+    def __init__(self, name: str, kind: str = 'str'):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown column kind: {kind}")
+        self.name = name
+        self.kind = kind
+
+
+def column_kind(column) -> str:
+    """Kind of a table column's values; dates are serialized as ISO text."""
+    if column is None:
+        return 'str'
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return 'str'
+    if python_type is bool:
+        return 'bool'
+    if python_type is int:
+        return 'int'
+    if python_type is float:
+        return 'float'
+    return 'str'
+
+
+def write_csv(columns: Sequence[ReportColumn], batches: Iterable[List[list]]) -> Iterator[str]:
+    """CSV text, one chunk for the header and one per batch of rows."""
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow([column.name for column in columns])
+    yield output.getvalue()
+    for rows in batches:
+        output.seek(0)
+        output.truncate(0)
+        writer.writerows(rows)
+        yield output.getvalue()
+
+
+def _stream_file(path: str) -> Iterator[bytes]:
+    """Yield a finished temp file in chunks, deleting it afterwards."""
+    try:
+        with open(path, 'rb') as file:
+            while True:
+                chunk = file.read(FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def _temp_path(suffix: str) -> str:
+    handle, path = tempfile.mkstemp(prefix='report_', suffix=suffix)
+    os.close(handle)
+    return path
+
+
+def write_xlsx(columns: Sequence[ReportColumn], batches: Iterable[List[list]], sheet_name: str = 'Report') -> Iterator[bytes]:
+    """
+    An XLSX workbook written in constant memory.
+
+    XlsxWriter's constant_memory mode flushes each row to a temp file as
+    soon as the next one starts, so memory stays flat however long the
+    report is. The workbook can only be sent once it is closed, so it is
+    built in a temp file first and then streamed.
+    """
+    path = _temp_path('.xlsx')
+    try:
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False})
+        header_format = workbook.add_format({'bold': True})
+        header = [column.name for column in columns]
+        sheets, worksheet, row_number = 0, None, XLSX_MAX_ROWS
+        for rows in batches:
+            for row in rows:
+                if row_number >= XLSX_MAX_ROWS:
+                    sheets += 1
+                    worksheet = workbook.add_worksheet(sheet_name if sheets == 1 else f"{sheet_name} ({sheets})")
+                    worksheet.write_row(0, 0, header, header_format)
+                    row_number = 1
+                worksheet.write_row(row_number, 0, row)
+                row_number += 1
+        if worksheet is None:
+            workbook.add_worksheet(sheet_name).write_row(0, 0, header, header_format)
+        workbook.close()
+    except BaseException:
+        # Also on GeneratorExit, when the client goes away mid-report
+        os.remove(path)
+        raise
+    yield from _stream_file(path)
+
+
+def _arrow_schema(columns: Sequence[ReportColumn]):
+    types = {'str': pyarrow.string(), 'int': pyarrow.int64(), 'float': pyarrow.float64(), 'bool': pyarrow.bool_()}
+    return pyarrow.schema([(column.name, types[column.kind]) for column in columns])
+
+
+def _arrow_table(columns: Sequence[ReportColumn], rows: List[list], schema):
+    arrays = []
+    for position, column in enumerate(columns):
+        values = [row[position] for row in rows]
+        if column.kind == 'str':
+            values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+        arrays.append(pyarrow.array(values, type=schema.field(position).type))
+    return pyarrow.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(columns: Sequence[ReportColumn], batches: Iterable[List[list]]) -> Iterator[bytes]:
+    """
+    A Parquet file with typed columns, written a row group at a time.
+
+    Batches are gathered into row groups of PARQUET_ROW_GROUP_ROWS, so at
+    most one row group is held in memory. Parquet writes its footer last,
+    so the file is built in a temp file and then streamed.
+    """
+    if pyarrow is None:
+        raise ValueError("Parquet output needs the pyarrow package")
+    path = _temp_path('.parquet')
+    try:
+        schema = _arrow_schema(columns)
+        with pyarrow.parquet.ParquetWriter(path, schema, compression='snappy') as writer:
+            pending: List[list] = []
+            for rows in batches:
+                pending.extend(rows)
+                if len(pending) >= PARQUET_ROW_GROUP_ROWS:
+                    writer.write_table(_arrow_table(columns, pending, schema), row_group_size=PARQUET_ROW_GROUP_ROWS)
+                    pending = []
+            if pending:
+                writer.write_table(_arrow_table(columns, pending, schema), row_group_size=PARQUET_ROW_GROUP_ROWS)
+    except BaseException:
+        # Also on GeneratorExit, when the client goes away mid-report
+        os.remove(path)
+        raise
+    yield from _stream_file(path)
+
+
+class ReportFormat:
+    """
+    An output format: its writer, media type and file extension.
+
+    ``missing`` is what rows hold for values a sale does not have; CSV keeps
+    the N/A placeholder readers of the existing export expect, typed formats
+    use real nulls.
+    """
+
+    def __init__(self, name: str, writer: Callable, mimetype: str, extension: str, missing: Optional[str] = None,
+                 available: Callable[[], bool] = lambda: True):
+        self.name = name
+        self.writer = writer
+        self.mimetype = mimetype
+        self.extension = extension
+        self.missing = missing
+        self.available = available
+
+    def write(self, columns: Sequence[ReportColumn], batches: Iterable[List[list]]) -> Iterator:
+        return self.writer(columns, batches)
+
+
+XLSX = ReportFormat(
+    'xlsx', write_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'
+)
+FORMATS = {
+    'csv': ReportFormat('csv', write_csv, 'text/csv', 'csv', missing='N/A'),
+    'excel': XLSX,
+    'xlsx': XLSX,
+    'parquet': ReportFormat(
+        'parquet', write_parquet, 'application/vnd.apache.parquet', 'parquet',
+        available=lambda: pyarrow is not None
+    ),
+}
+
+
+def get_format(name: str) -> ReportFormat:
+    """The writer for an output format name, raising ValueError when unknown or not installed."""
+    report_format = FORMATS.get((name or 'csv').lower())
+    if report_format is None:
+        raise ValueError(f"Unsupported format. Allowed values are: {', '.join(FORMATS)}")
+    if not report_format.available():
+        raise ValueError(f"{report_format.name} output is not available on this server")
+    return report_format
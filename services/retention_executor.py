@@ -0,0 +1,300 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from flask import current_app
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.exc import OperationalError
+from extensions import db
+from models.audit_model import AuditTrail
+from models.performance_model import SalesPerformance
+from models.report_model import CustomReport, Report
+from models.retention_model import ArchivedData, DataType, RetentionCheckpoint, RetentionPolicy
+from models.sales_model import Sale
+from models.token_model import TokenBlacklist
+from models.user_session_model import UserSession
+from services.archive_segments import write_segment
+from services.sale_events import rebuild_derived_models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_PAUSE_SECONDS = 0.2
+DEFAULT_LOCK_TIMEOUT_MS = 2000
+# A chunk that cannot get its locks within the lock timeout is retried this many times
+MAX_LOCK_RETRIES = 5
+
+
+class RetentionTarget:
+    """A table governed by a retention policy, and the column its rows expire by."""
+
+    def __init__(self, data_type: DataType, model, date_column: str):
+        self.data_type = data_type
+        self.model = model
+        self.table = model.__table__
+        self.date_column = self.table.c[date_column]
+        # Tables with a soft delete flag keep their rows; the others lose them
+        self.soft_delete = 'is_deleted' in self.table.c
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+    def expired(self, cutoff: datetime):
+        """Conditions selecting the rows of this table that the executor still has to process."""
+        conditions = [self.date_column < cutoff]
+        if self.soft_delete:
+            conditions.append(self.table.c.is_deleted.is_(False))
+        return conditions
+
+
+# Custom policies have no table of their own
+RETENTION_TARGETS: List[RetentionTarget] = [
+    RetentionTarget(DataType.SALES, Sale, 'created_at'),
+    RetentionTarget(DataType.AUDIT, AuditTrail, 'timestamp'),
+    RetentionTarget(DataType.REPORTS, Report, 'created_at'),
+    RetentionTarget(DataType.REPORTS, CustomReport, 'created_at'),
+    RetentionTarget(DataType.PERFORMANCE, SalesPerformance, 'performance_date'),
+    RetentionTarget(DataType.USER_SESSIONS, UserSession, 'expires_at'),
+    RetentionTarget(DataType.USER_SESSIONS, TokenBlacklist, 'expire_at'),
+]
+
+
+def target_for(model) -> RetentionTarget:
+    return next(target for target in RETENTION_TARGETS if target.model is model)
+
+
+def archive_table(data_type: str, table_name: Optional[str] = None) -> Optional[str]:
+    """
+    The table to look archived records of a data type up in.
+
+    Ids are only unique within a table, so data types archived from several
+    tables (reports, user sessions) need one named.
+    """
+    tables = [target.name for target in RETENTION_TARGETS if target.data_type.value == data_type]
+    if table_name:
+        if table_name not in tables:
+            raise ValueError(f"Invalid table for {data_type}. Allowed values are: {', '.join(tables)}")
+        return table_name
+    if len(tables) > 1:
+        raise ValueError(f"{data_type} records are archived from several tables; name one of: {', '.join(tables)}")
+    return tables[0] if tables else None
+
+
+def _target_for_record(data_type: str, record: Dict) -> Optional[RetentionTarget]:
+    """The table a row archived without one came from, when the data type and its keys tell."""
+    targets = [target for target in RETENTION_TARGETS if target.data_type.value == data_type]
+    if len(targets) > 1:
+        targets = [target for target in targets if set(record) <= set(target.table.c.keys())]
+    return targets[0] if len(targets) == 1 else None
+
+
+def compact_archived_data(data_type: str, batch_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """
+    Repack the one-row-per-record archive of a data type into segments.
+
+    Rows are converted in batches, each committed with the segments that
+    replace it; rows whose table cannot be told apart are left in place.
+    """
+    result = {'data_type': data_type, 'rows': 0, 'segments': 0, 'skipped': 0}
+    last_id = 0
+    while True:
+        archived = ArchivedData.query.filter(
+            ArchivedData.data_type == data_type,
+            ArchivedData.is_deleted.is_(False),
+            ArchivedData.id > last_id
+        ).order_by(ArchivedData.id).limit(batch_size).all()
+        if not archived:
+            return result
+        last_id = archived[-1].id
+
+        groups: Dict = {}
+        for row in archived:
+            record = row.decompress_data()
+            record.setdefault('id', row.original_id)
+            target = _target_for_record(data_type, record)
+            if target is None:
+                result['skipped'] += 1
+                continue
+            groups.setdefault((target, row.retention_policy_id), []).append((row, record))
+        for (target, policy_id), rows in groups.items():
+            write_segment(data_type, target.name, policy_id, [record for _, record in rows], target.date_column.name)
+            ArchivedData.query.filter(ArchivedData.id.in_([row.id for row, _ in rows])) \
+                .delete(synchronize_session=False)
+            result['rows'] += len(rows)
+            result['segments'] += 1
+        db.session.commit()
+
+
+class RetentionExecutor:
+    """
+    Applies retention policies in bounded chunks of consecutive ids.
+
+    Each chunk packs its expired rows into one archive segment (when the
+    policy archives before deleting), soft or hard deletes them with one
+    statement, records its progress in retention_checkpoint and commits, so
+    locks are only held for one chunk and an interrupted run resumes after
+    the last committed chunk with the cutoff it started with. The executor
+    pauses between chunks and, on PostgreSQL, gives up on a chunk that waits
+    longer than the lock timeout instead of queueing behind live traffic.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        pause_seconds: float = DEFAULT_PAUSE_SECONDS,
+        lock_timeout_ms: int = DEFAULT_LOCK_TIMEOUT_MS,
+        max_seconds: Optional[float] = None
+    ):
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be positive")
+        self.chunk_size = chunk_size
+        self.pause_seconds = pause_seconds
+        self.lock_timeout_ms = lock_timeout_ms
+        self.max_seconds = max_seconds
+        self.deadline: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, **overrides) -> 'RetentionExecutor':
+        config = current_app.config
+        options = {
+            'chunk_size': config.get('RETENTION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            'pause_seconds': config.get('RETENTION_PAUSE_SECONDS', DEFAULT_PAUSE_SECONDS),
+            'lock_timeout_ms': config.get('RETENTION_LOCK_TIMEOUT_MS', DEFAULT_LOCK_TIMEOUT_MS),
+        }
+        options.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**options)
+
+    def run(self, data_types: Optional[List[str]] = None) -> List[Dict]:
+        """Process every target, or those of the given data types, within the time budget."""
+        self.deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+        results = []
+        for target in RETENTION_TARGETS:
+            if data_types and target.data_type.value not in data_types:
+                continue
+            results.append(self._run_target(target))
+        return results
+
+    def run_target(self, target: RetentionTarget) -> Dict:
+        self.deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+        return self._run_target(target)
+
+    @staticmethod
+    def reset(data_types: Optional[List[str]] = None) -> int:
+        """Forget runs in progress so the next run starts over with a fresh cutoff."""
+        query = RetentionCheckpoint.query
+        if data_types:
+            query = query.filter(RetentionCheckpoint.data_type.in_(data_types))
+        count = query.update({'status': 'idle', 'cutoff': None, 'last_id': 0}, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def _checkpoint(self, target: RetentionTarget, policy: RetentionPolicy) -> RetentionCheckpoint:
+        checkpoint = RetentionCheckpoint.query.filter_by(table_name=target.name).first()
+        if checkpoint is None:
+            checkpoint = RetentionCheckpoint(data_type=target.data_type.value, table_name=target.name)
+            db.session.add(checkpoint)
+        if checkpoint.status not in ('running', 'failed') or checkpoint.cutoff is None:
+            now = datetime.utcnow()
+            checkpoint.cutoff = now - timedelta(days=policy.retention_days)
+            checkpoint.last_id = 0
+            checkpoint.rows_archived = 0
+            checkpoint.rows_deleted = 0
+            checkpoint.started_at = now
+            checkpoint.completed_at = None
+        else:
+            logger.info(f"Resuming retention of {target.name} after id {checkpoint.last_id}")
+        checkpoint.status = 'running'
+        checkpoint.last_error = None
+        checkpoint.updated_at = datetime.utcnow()
+        db.session.commit()
+        return checkpoint
+
+    def _run_target(self, target: RetentionTarget) -> Dict:
+        result = {'data_type': target.data_type.value, 'table': target.name, 'archived': 0, 'deleted': 0, 'chunks': 0}
+        # An explicit policy is required; get_policy would create a default one and start deleting
+        policy = RetentionPolicy.query.filter_by(data_type=target.data_type.value).first()
+        if policy is None:
+            result['status'] = 'no_policy'
+            return result
+
+        checkpoint = self._checkpoint(target, policy)
+        result['cutoff'] = checkpoint.cutoff.isoformat()
+        try:
+            lock_retries = 0
+            while True:
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    result['status'] = 'paused'
+                    break
+                try:
+                    done = self._process_chunk(target, policy, checkpoint, result)
+                except OperationalError as e:
+                    db.session.rollback()
+                    lock_retries += 1
+                    if lock_retries > MAX_LOCK_RETRIES:
+                        raise
+                    logger.warning(f"Retention chunk of {target.name} after id {checkpoint.last_id} hit a lock, retrying: {e.orig}")
+                    time.sleep(self.pause_seconds * 2 ** lock_retries)
+                    continue
+                lock_retries = 0
+                if done:
+                    result['status'] = 'completed'
+                    break
+                result['chunks'] += 1
+                time.sleep(self.pause_seconds)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Retention of {target.name} failed after id {checkpoint.last_id}: {e}")
+            checkpoint.status = 'failed'
+            checkpoint.last_error = str(e)
+            checkpoint.updated_at = datetime.utcnow()
+            db.session.commit()
+            result['status'] = 'failed'
+            result['error'] = str(e)
+        result['last_id'] = checkpoint.last_id
+        if target.model is Sale and result['deleted']:
+            # Chunks delete with Core statements, which the sale event hooks never see
+            rebuild_derived_models()
+        return result
+
+    def _process_chunk(self, target: RetentionTarget, policy: RetentionPolicy, checkpoint: RetentionCheckpoint, result: Dict) -> bool:
+        """Archive and delete the next chunk of expired rows; returns True when none are left."""
+        table, key = target.table, target.table.c.id
+        ids = db.session.execute(
+            select(key)
+            .where(key > checkpoint.last_id, *target.expired(checkpoint.cutoff))
+            .order_by(key)
+            .limit(self.chunk_size)
+        ).scalars().all()
+        if not ids:
+            checkpoint.status = 'completed'
+            checkpoint.completed_at = checkpoint.updated_at = datetime.utcnow()
+            db.session.commit()
+            return True
+
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(text(f"SET LOCAL lock_timeout = {int(self.lock_timeout_ms)}"))
+        in_chunk = [key.between(ids[0], ids[-1]), *target.expired(checkpoint.cutoff)]
+        archived = 0
+        if policy.archive_before_delete:
+            rows = db.session.execute(select(table).where(*in_chunk).with_for_update()).mappings().all()
+            if rows:
+                write_segment(
+                    target.data_type.value, target.name, policy.id, [dict(row) for row in rows], target.date_column.name
+                )
+            archived = len(rows)
+
+        if target.soft_delete:
+            statement = update(table).where(*in_chunk).values(is_deleted=True)
+        else:
+            statement = delete(table).where(*in_chunk)
+        deleted = db.session.execute(statement).rowcount
+
+        checkpoint.last_id = ids[-1]
+        checkpoint.rows_archived += archived
+        checkpoint.rows_deleted += deleted
+        checkpoint.updated_at = datetime.utcnow()
+        db.session.commit()
+        result['archived'] += archived
+        result['deleted'] += deleted
+        return False
@@ -0,0 +1,104 @@
+import logging
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sale fields that derived read models (leaderboards, indexes, profiles) depend on
+SNAPSHOT_FIELDS = (
+    'id', 'sale_manager_id', 'sales_executive_id', 'client_name', 'client_phone', 'client_id_no',
+    'serial_number', 'source_type', 'policy_type_id', 'paypoint_id', 'bank_id', 'collection_platform',
+    'status', 'amount', 'created_at', 'is_deleted', 'geolocation_latitude', 'geolocation_longitude'
+)
+
+
+def sale_snapshot(sale) -> Dict:
+    """Capture the sale fields used by derived read models."""
+    return {field: getattr(sale, field, None) for field in SNAPSHOT_FIELDS}
+
+
+def _run(name: str, handler: Callable, *args):
+    """Run a derived-model update without letting its failure affect the sale."""
+    try:
+        handler(*args)
+    except Exception as e:
+        logger.warning(f"Failed to update {name} for sale: {str(e)}")
+
+
+def on_sale_created(sale):
+    """Propagate a committed new sale to derived read models."""
+    from services import analytics_cube, customer_profiles, geo_index, leaderboard, serial_index
+
+    snapshot = sale_snapshot(sale)
+    _run('leaderboard', leaderboard.record_sale, snapshot)
+    _run('serial index', serial_index.record_serial, snapshot)
+    _run('heatmap', geo_index.record_sale, snapshot)
+    _run('customer profile', customer_profiles.record_change, None, snapshot)
+    _run('daily aggregate', analytics_cube.record_sale, snapshot)
+
+
+def on_sale_updated(before: Optional[Dict], sale):
+    """Propagate a committed sale update; ``before`` is the snapshot taken prior to the change."""
+    from services import analytics_cube, customer_profiles, geo_index, leaderboard, serial_index
+
+    after = sale_snapshot(sale)
+    if not before or before['serial_number'] != after['serial_number']:
+        _run('serial index', serial_index.record_serial, after)
+
+    leaderboard_fields = ('sale_manager_id', 'sales_executive_id', 'amount', 'created_at', 'is_deleted')
+    if before and any(before[field] != after[field] for field in leaderboard_fields):
+        if not before['is_deleted']:
+            _run('leaderboard', leaderboard.record_sale, before, -1)
+        if not after['is_deleted']:
+            _run('leaderboard', leaderboard.record_sale, after)
+
+    heatmap_fields = ('amount', 'geolocation_latitude', 'geolocation_longitude', 'is_deleted')
+    if before and any(before[field] != after[field] for field in heatmap_fields):
+        if not before['is_deleted']:
+            _run('heatmap', geo_index.record_sale, before, -1)
+        if not after['is_deleted']:
+            _run('heatmap', geo_index.record_sale, after)
+
+    customer_fields = (
+        'client_phone', 'client_name', 'client_id_no', 'policy_type_id', 'amount', 'created_at', 'is_deleted'
+    )
+    if before and any(before[field] != after[field] for field in customer_fields):
+        _run('customer profile', customer_profiles.record_change, before, after)
+
+    aggregate_fields = (
+        'sale_manager_id', 'sales_executive_id', 'policy_type_id', 'paypoint_id', 'bank_id',
+        'collection_platform', 'status', 'source_type', 'amount', 'created_at', 'is_deleted'
+    )
+    if before and any(before[field] != after[field] for field in aggregate_fields):
+        if not before['is_deleted']:
+            _run('daily aggregate', analytics_cube.record_sale, before, -1)
+        if not after['is_deleted']:
+            _run('daily aggregate', analytics_cube.record_sale, after)
+
+
+def on_sale_deleted(snapshot: Dict):
+    """Propagate a committed (soft) deletion; ``snapshot`` is the sale as it was before it."""
+    from services import analytics_cube, customer_profiles, geo_index, leaderboard
+
+    _run('leaderboard', leaderboard.record_sale, snapshot, -1)
+    _run('heatmap', geo_index.record_sale, snapshot, -1)
+    _run('customer profile', customer_profiles.record_change, snapshot, None)
+    _run('daily aggregate', analytics_cube.record_sale, snapshot, -1)
+
+
+def rebuild_derived_models():
+    """
+    Recompute every derived read model from the sales table.
+
+    For writes that bypass the event hooks: bulk loads, retention runs,
+    archive restores and dropped partitions.
+    """
+    from services import analytics_cube, customer_profiles, geo_index, leaderboard, search
+
+    search.rebuild_search_index()
+    geo_index.rebuild_heatmap()
+    customer_profiles.rebuild_profiles()
+    analytics_cube.rebuild_aggregates()
+    try:
+        leaderboard.rebuild()
+    except Exception as e:
+        logger.warning(f"Could not rebuild leaderboards: {str(e)}")
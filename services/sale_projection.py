@@ -0,0 +1,131 @@
+import json
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import aliased
+from models.sales_model import Sale
+from models.user_model import User
+from models.sales_executive_model import SalesExecutive
+from models.bank_model import Bank, BankBranch
+from models.paypoint_model import Paypoint
+from models.impact_product_model import ImpactProduct
+
+try:
+    import msgspec
+    _json_encoder = msgspec.json.Encoder()
+except ImportError:  # pragma: no cover - msgspec is listed in requirements
+    _json_encoder = None
+
+# Scalar Sale attributes that may be requested with ``fields=``
+SCALAR_FIELDS = (
+    'id', 'user_id', 'sale_manager_id', 'sales_executive_id', 'client_name',
+    'client_id_no', 'client_phone', 'serial_number', 'source_type',
+    'momo_reference_number', 'collection_platform', 'momo_transaction_id',
+    'first_pay_with_momo', 'subsequent_pay_source_type', 'bank_id',
+    'bank_branch_id', 'bank_acc_number', 'staff_id', 'paypoint_id',
+    'paypoint_branch', 'policy_type_id', 'amount', 'created_at', 'updated_at',
+    'is_deleted', 'geolocation_latitude', 'geolocation_longitude', 'status',
+    'customer_called', 'momo_first_premium'
+)
+
+# Relations that may be requested with ``expand=``: model, foreign key on Sale,
+# the attributes that may be exposed and the ones returned by default
+RELATIONS = {
+    'sale_manager': (User, 'sale_manager_id', ('id', 'name', 'email', 'role_id'), ('id', 'name')),
+    'user': (User, 'user_id', ('id', 'name', 'email', 'role_id'), ('id', 'name')),
+    'sales_executive': (SalesExecutive, 'sales_executive_id', ('id', 'name', 'code', 'manager_id'), ('id', 'name')),
+    'bank': (Bank, 'bank_id', ('id', 'name', 'code'), ('id', 'name')),
+    'bank_branch': (BankBranch, 'bank_branch_id', ('id', 'name', 'code', 'bank_id', 'sort_code'), ('id', 'name')),
+    'paypoint': (Paypoint, 'paypoint_id', ('id', 'name', 'location'), ('id', 'name')),
+    'policy_type': (ImpactProduct, 'policy_type_id', ('id', 'name', 'group', 'category_id'), ('id', 'name')),
+}
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def parse_projection(fields: Optional[str], expand: Optional[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Parse ``fields`` and ``expand`` query parameters into a projection.
+
+    ``fields`` lists Sale attributes and may use ``relation.attribute`` to pick
+    attributes of a related record; ``expand`` lists relations to include with
+    their default attributes. Without ``fields`` every scalar attribute is returned.
+    """
+    scalars: List[str] = []
+    relations: Dict[str, List[str]] = {}
+
+    for name in _split(expand):
+        if name not in RELATIONS:
+            raise ValueError(f"Invalid expand value: {name}")
+        relations.setdefault(name, list(RELATIONS[name][3]))
+
+    requested = _split(fields)
+    for name in requested:
+        if '.' in name:
+            relation, attribute = name.split('.', 1)
+            if relation not in RELATIONS or attribute not in RELATIONS[relation][2]:
+                raise ValueError(f"Invalid field: {name}")
+            selected = relations.setdefault(relation, [])
+            if attribute not in selected:
+                selected.append(attribute)
+        elif name in SCALAR_FIELDS:
+            if name not in scalars:
+                scalars.append(name)
+        else:
+            raise ValueError(f"Invalid field: {name}")
+
+    if not requested:
+        scalars = list(SCALAR_FIELDS)
+    elif 'id' not in scalars:
+        scalars.insert(0, 'id')
+    return scalars, relations
+
+
+def project_query(query, scalars: List[str], relations: Dict[str, List[str]]) -> Tuple[object, Callable]:
+    """
+    Turn a Sale query into a column-projected query.
+
+    Only the requested Sale columns are selected, and each expanded relation is
+    added as a LEFT OUTER JOIN selecting just its requested columns, so the
+    model's joined eager loads are not emitted. Returns the projected query and
+    a function converting its rows to dicts.
+    """
+    columns = [getattr(Sale, name).label(name) for name in scalars]
+    joins = []
+    for relation, attributes in relations.items():
+        model, foreign_key, _, _ = RELATIONS[relation]
+        alias = aliased(model, name=relation)
+        joins.append((alias, getattr(alias, 'id') == getattr(Sale, foreign_key)))
+        # Always select the related id so a missing relation can be rendered as null
+        for attribute in dict.fromkeys(['id'] + attributes):
+            columns.append(getattr(alias, attribute).label(f"{relation}__{attribute}"))
+
+    projected = query.with_entities(*columns)
+    for alias, condition in joins:
+        projected = projected.outerjoin(alias, condition)
+
+    def to_dict(row) -> Dict:
+        mapping = row._mapping
+        result = {name: mapping[name] for name in scalars}
+        for relation, attributes in relations.items():
+            if mapping[f"{relation}__id"] is None:
+                result[relation] = None
+            else:
+                result[relation] = {attribute: mapping[f"{relation}__{attribute}"] for attribute in attributes}
+        return result
+
+    return projected, to_dict
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(payload) -> bytes:
+    """Encode a response payload, using msgspec when available."""
+    if _json_encoder is not None:
+        return _json_encoder.encode(payload)
+    return json.dumps(payload, default=_default).encode('utf-8')
@@ -0,0 +1,310 @@
+import base64
+import json
+import logging
+import re
+from typing import Dict, List, Optional
+from sqlalchemy import event, text, or_, func
+from extensions import db
+from models.sales_model import Sale
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'sale_search'
+MIN_QUERY_LENGTH = 2
+MAX_RESULTS = 100
+BACKFILL_BATCH_SIZE = 1000
+
+# Column weights for bm25: exact/prefix hits on name, phone and serial outrank
+# fuzzy trigram hits on the name
+BM25_WEIGHTS = (10.0, 10.0, 10.0, 1.0)
+
+# Engines whose search index has been verified in this process
+_ready_engines = set()
+
+SQLITE_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    client_name, client_phone, serial_number, name_grams,
+    tokenize='unicode61', prefix='2 3'
+)
+"""
+
+POSTGRES_SCHEMA = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sale_client_name_trgm "
+    "ON sale USING gin (lower(client_name) gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sale_client_phone_trgm "
+    "ON sale USING gin (client_phone gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sale_client_phone_pattern "
+    "ON sale (client_phone text_pattern_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sale_serial_number_pattern "
+    "ON sale (lower(serial_number) text_pattern_ops)",
+)
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return re.findall(r'[0-9a-z]+', (value or '').lower())
+
+
+def name_trigrams(value: Optional[str]) -> List[str]:
+    """Return the distinct trigrams of each alphabetic word, used for typo tolerance."""
+    grams = []
+    for word in tokenize(value):
+        if word.isdigit():
+            continue
+        if len(word) < 3:
+            grams.append(word)
+            continue
+        grams.extend(word[i:i + 3] for i in range(len(word) - 2))
+    return list(dict.fromkeys(grams))
+
+
+def encode_cursor(score: float, sale_id: int) -> str:
+    """Encode a keyset position as an opaque cursor."""
+    payload = json.dumps({'score': score, 'id': sale_id}).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {'score': float(payload['score']), 'id': int(payload['id'])}
+    except Exception:
+        raise ValueError('Invalid search cursor')
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _sqlite_index_exists(connection) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': SEARCH_TABLE}
+    ).first() is not None
+
+
+def _index_row(sale_id, client_name, client_phone, serial_number) -> Dict:
+    return {
+        'rowid': sale_id,
+        'client_name': client_name or '',
+        'client_phone': client_phone or '',
+        'serial_number': serial_number or '',
+        'name_grams': ' '.join(name_trigrams(client_name))
+    }
+
+
+def _backfill_sqlite(connection):
+    """Index every live sale in batches."""
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    result = connection.execute(
+        text("SELECT id, client_name, client_phone, serial_number FROM sale WHERE is_deleted = 0 OR is_deleted IS NULL")
+    )
+    while True:
+        rows = result.fetchmany(BACKFILL_BATCH_SIZE)
+        if not rows:
+            break
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, client_name, client_phone, serial_number, name_grams) "
+                 "VALUES (:rowid, :client_name, :client_phone, :serial_number, :name_grams)"),
+            [_index_row(*row) for row in rows]
+        )
+
+
+def _ensure_sqlite_index(connection):
+    """Create and populate the FTS5 table the first time it is needed."""
+    if connection.engine.url in _ready_engines:
+        return
+    if not _sqlite_index_exists(connection):
+        connection.execute(text(SQLITE_SCHEMA))
+        _backfill_sqlite(connection)
+    _ready_engines.add(connection.engine.url)
+
+
+def ensure_search_index():
+    """Create the search index for the current database if it does not exist yet."""
+    engine = db.engine
+    if engine.url in _ready_engines:
+        return
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as connection:
+            _ensure_sqlite_index(connection)
+    elif engine.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            # nor on a partitioned table, where the index is built per partition
+            partitioned = connection.execute(
+                text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('sale')")
+            ).scalar()
+            for statement in POSTGRES_SCHEMA:
+                if partitioned:
+                    statement = statement.replace(' CONCURRENTLY', '')
+                connection.execute(text(statement))
+        _ready_engines.add(engine.url)
+
+
+def rebuild_search_index():
+    """Drop and rebuild the SQLite FTS index from the sale table."""
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        ensure_search_index()
+        return
+    with engine.begin() as connection:
+        connection.execute(text(SQLITE_SCHEMA))
+        _backfill_sqlite(connection)
+    _ready_engines.add(engine.url)
+
+
+@event.listens_for(Sale, 'after_insert')
+@event.listens_for(Sale, 'after_update')
+def index_sale(mapper, connection, target):
+    """Keep the SQLite FTS index in step with sale writes; Postgres indexes maintain themselves."""
+    if connection.dialect.name != 'sqlite':
+        return
+    _ensure_sqlite_index(connection)
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {'rowid': target.id})
+    if not target.is_deleted:
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, client_name, client_phone, serial_number, name_grams) "
+                 "VALUES (:rowid, :client_name, :client_phone, :serial_number, :name_grams)"),
+            _index_row(target.id, target.client_name, target.client_phone, target.serial_number)
+        )
+
+
+@event.listens_for(Sale, 'after_delete')
+def unindex_sale(mapper, connection, target):
+    """Remove a hard-deleted sale from the SQLite FTS index."""
+    if connection.dialect.name != 'sqlite':
+        return
+    _ensure_sqlite_index(connection)
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"), {'rowid': target.id})
+
+
+def _fts_expression(query: str) -> Optional[str]:
+    """Build an FTS5 MATCH expression: token prefixes on every column OR name trigrams."""
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    prefix_terms = ' AND '.join(f'"{token}"*' for token in tokens)
+    expression = f'{{client_name client_phone serial_number}} : ({prefix_terms})'
+    grams = name_trigrams(query)
+    if grams:
+        expression += ' OR name_grams : (' + ' OR '.join(f'"{gram}"' for gram in grams) + ')'
+    return expression
+
+
+RESULT_COLUMNS = 'sale.id, sale.client_name, sale.client_phone, sale.serial_number, ' \
+                 'sale.amount, sale.status, sale.created_at'
+
+
+def _search_sqlite(query: str, limit: int, cursor: Optional[Dict]):
+    expression = _fts_expression(query)
+    if not expression:
+        return []
+    keyset = ''
+    params = {'expression': expression, 'limit': limit}
+    if cursor:
+        keyset = 'WHERE ranked.score < :score OR (ranked.score = :score AND ranked.id > :last_id)'
+        params.update({'score': cursor['score'], 'last_id': cursor['id']})
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    statement = text(f"""
+        SELECT {RESULT_COLUMNS}, ranked.score
+        FROM (
+            SELECT rowid AS id, round(-bm25({SEARCH_TABLE}, {weights}), 6) AS score
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH :expression
+        ) AS ranked
+        JOIN sale ON sale.id = ranked.id AND (sale.is_deleted = 0 OR sale.is_deleted IS NULL)
+        {keyset}
+        ORDER BY ranked.score DESC, ranked.id ASC
+        LIMIT :limit
+    """).columns(created_at=Sale.created_at.type)
+    return db.session.execute(statement, params).all()
+
+
+def _search_postgres(query: str, limit: int, cursor: Optional[Dict]):
+    normalized = query.strip().lower()
+    keyset = ''
+    params = {'query': normalized, 'prefix': _escape_like(normalized) + '%', 'limit': limit}
+    if cursor:
+        keyset = 'WHERE ranked.score < :score OR (ranked.score = :score AND ranked.id > :last_id)'
+        params.update({'score': cursor['score'], 'last_id': cursor['id']})
+    statement = text(f"""
+        SELECT ranked.id, ranked.client_name, ranked.client_phone, ranked.serial_number,
+               ranked.amount, ranked.status, ranked.created_at, ranked.score
+        FROM (
+            SELECT {RESULT_COLUMNS},
+                   round(GREATEST(
+                       similarity(lower(sale.client_name), :query),
+                       CASE WHEN lower(sale.client_name) LIKE :prefix THEN 1 ELSE 0 END,
+                       CASE WHEN sale.client_phone LIKE :prefix
+                                 OR lower(sale.serial_number) LIKE :prefix THEN 1 ELSE 0 END
+                   )::numeric, 6)::float AS score
+            FROM sale
+            WHERE sale.is_deleted = false
+              AND (lower(sale.client_name) % :query
+                   OR lower(sale.client_name) LIKE :prefix
+                   OR sale.client_phone LIKE :prefix
+                   OR lower(sale.serial_number) LIKE :prefix)
+        ) AS ranked
+        {keyset}
+        ORDER BY ranked.score DESC, ranked.id ASC
+        LIMIT :limit
+    """).columns(created_at=Sale.created_at.type)
+    return db.session.execute(statement, params).all()
+
+
+def search_sales(query: str, limit: int = 20, cursor: Optional[str] = None) -> Dict:
+    """
+    Ranked search over client name, phone and serial number.
+
+    Matches token prefixes of all three fields and tolerates typos in the
+    client name via trigram overlap. Results are ordered by score then ID and
+    paginated with an opaque keyset cursor, so deep pages cost the same as the
+    first one.
+    """
+    query = (query or '').strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        raise ValueError(f'Search query must be at least {MIN_QUERY_LENGTH} characters')
+    limit = min(max(limit, 1), MAX_RESULTS)
+    position = decode_cursor(cursor) if cursor else None
+
+    ensure_search_index()
+    if db.engine.dialect.name == 'sqlite':
+        rows = _search_sqlite(query, limit + 1, position)
+    else:
+        rows = _search_postgres(query, limit + 1, position)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    results = [{
+        'id': row.id,
+        'client_name': row.client_name,
+        'client_phone': row.client_phone,
+        'serial_number': row.serial_number,
+        'amount': row.amount,
+        'status': row.status,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'score': row.score
+    } for row in rows]
+
+    return {
+        'results': results,
+        'next_cursor': encode_cursor(rows[-1].score, rows[-1].id) if has_more else None
+    }
+
+
+def search_filter(query: str):
+    """
+    Return a SQL condition that restricts Sale queries to matching clients.
+
+    A substring match on the client name and phone, the same on every
+    database; the trigram indexes serve it on PostgreSQL. Ranked prefix and
+    typo-tolerant matching is left to search_sales.
+    """
+    pattern = f"%{_escape_like((query or '').strip().lower())}%"
+    return or_(
+        func.lower(Sale.client_name).like(pattern, escape='\\'),
+        Sale.client_phone.like(pattern, escape='\\')
+    )
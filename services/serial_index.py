@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from flask import current_app
+from sqlalchemy import func, or_, select
+from extensions import db
+from models.sales_model import Sale
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FALSE_POSITIVE_RATE = 0.001
+DEFAULT_REFRESH_SECONDS = 5
+# Full rebuilds catch anything the incremental refresh could not see
+DEFAULT_REWARM_SECONDS = 3600
+# Refreshes look back this far past the previous one, for writes committed after they were stamped
+REFRESH_OVERLAP = timedelta(seconds=60)
+MIN_CAPACITY = 10000
+WARM_BATCH_SIZE = 5000
+LOOKUP_BATCH_SIZE = 500
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity: int, false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class SerialNumberIndex:
+    """
+    In-memory membership index for sale serial numbers.
+
+    A "no" from the Bloom filter is definitive, so most checks for new serials
+    never touch the database. Possible hits are confirmed with a join-free
+    query on the indexed serial column. Sales written by other processes are
+    picked up by an incremental refresh: rows above the highest sale ID seen,
+    plus rows created or updated since the previous refresh (with an overlap,
+    as sequence IDs and timestamps can commit out of order). A periodic full
+    rebuild covers writes that took longer than the overlap to commit.
+    Deleted serials stay in the filter and are simply confirmed as absent.
+    """
+
+    def __init__(self, false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+                 refresh_seconds: float = DEFAULT_REFRESH_SECONDS,
+                 rewarm_seconds: float = DEFAULT_REWARM_SECONDS):
+        self.false_positive_rate = false_positive_rate
+        self.refresh_seconds = refresh_seconds
+        self.rewarm_seconds = rewarm_seconds
+        self.bloom: Optional[BloomFilter] = None
+        self.watermark = 0
+        self.changed_since: Optional[datetime] = None
+        self.refreshed_at = 0.0
+        self.warmed_at = 0.0
+        self.lock = threading.Lock()
+
+    def warm(self):
+        """Build the filter from every serial number in the sales table."""
+        with self.lock:
+            started = datetime.utcnow()
+            total, watermark = db.session.execute(
+                select(func.count(Sale.id), func.coalesce(func.max(Sale.id), 0))
+            ).one()
+            # Leave headroom so the false positive rate holds as sales grow
+            bloom = BloomFilter(max(MIN_CAPACITY, total * 2), self.false_positive_rate)
+            result = db.session.execute(
+                select(Sale.serial_number).where(Sale.id <= watermark).execution_options(yield_per=WARM_BATCH_SIZE)
+            )
+            for (serial_number,) in result:
+                bloom.add(serial_number)
+            self.bloom = bloom
+            self.watermark = watermark
+            self.changed_since = started
+            self.refreshed_at = self.warmed_at = time.monotonic()
+        logger.info(f"Serial number index warmed with {bloom.count} serials")
+
+    def refresh(self):
+        """Add serials of sales inserted or updated since the last refresh."""
+        with self.lock:
+            started = datetime.utcnow()
+            since = self.changed_since - REFRESH_OVERLAP
+            rows = db.session.execute(
+                select(Sale.id, Sale.serial_number).where(or_(
+                    Sale.id > self.watermark,
+                    Sale.created_at >= since,
+                    Sale.updated_at >= since
+                ))
+            ).all()
+            for sale_id, serial_number in rows:
+                # The overlap reads some rows again; count each serial once
+                if serial_number and serial_number not in self.bloom:
+                    self.bloom.add(serial_number)
+                self.watermark = max(self.watermark, sale_id)
+            self.changed_since = started
+            self.refreshed_at = time.monotonic()
+            needs_rebuild = self.bloom.count > self.bloom.capacity
+        if needs_rebuild:
+            self.warm()
+
+    def _ensure_fresh(self):
+        if self.bloom is None or time.monotonic() - self.warmed_at >= self.rewarm_seconds:
+            self.warm()
+        elif time.monotonic() - self.refreshed_at >= self.refresh_seconds:
+            self.refresh()
+
+    def add(self, serial_number: str):
+        """Record a serial number written by this process."""
+        if self.bloom is None or not serial_number:
+            return
+        with self.lock:
+            self.bloom.add(serial_number)
+
+    def might_exist(self, serial_number: str) -> bool:
+        """Return False only when the serial is definitely not in use."""
+        self._ensure_fresh()
+        return serial_number in self.bloom
+
+    def check_many(self, serial_numbers: Iterable[str]) -> Dict[str, bool]:
+        """Check many serials; only possible hits are confirmed against the database."""
+        self._ensure_fresh()
+        serial_numbers = list(dict.fromkeys(serial for serial in serial_numbers if serial))
+        results = {serial: False for serial in serial_numbers}
+        candidates = [serial for serial in serial_numbers if serial in self.bloom]
+
+        for start in range(0, len(candidates), LOOKUP_BATCH_SIZE):
+            batch = candidates[start:start + LOOKUP_BATCH_SIZE]
+            existing = db.session.execute(
+                select(Sale.serial_number).where(
+                    Sale.serial_number.in_(batch),
+                    Sale.is_deleted == False
+                )
+            ).scalars().all()
+            for serial in existing:
+                results[serial] = True
+        return results
+
+    def exists(self, serial_number: str) -> bool:
+        """Check a single serial, skipping the database when the filter rules it out."""
+        if not serial_number or not self.might_exist(serial_number):
+            return False
+        return db.session.execute(
+            select(
+                select(Sale.id).where(
+                    Sale.serial_number == serial_number,
+                    Sale.is_deleted == False
+                ).exists()
+            )
+        ).scalar()
+
+
+# One index per database, shared by all requests in the process
+_indexes: Dict[str, SerialNumberIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_serial_index() -> SerialNumberIndex:
+    """Return the serial number index for the current app's database."""
+    key = str(db.engine.url)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = SerialNumberIndex(
+                    false_positive_rate=current_app.config.get(
+                        'SERIAL_INDEX_FALSE_POSITIVE_RATE', DEFAULT_FALSE_POSITIVE_RATE
+                    ),
+                    refresh_seconds=current_app.config.get(
+                        'SERIAL_INDEX_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS
+                    ),
+                    rewarm_seconds=current_app.config.get(
+                        'SERIAL_INDEX_REWARM_SECONDS', DEFAULT_REWARM_SECONDS
+                    )
+                )
+                _indexes[key] = index
+    return index
+
+
+def record_serial(sale_snapshot: Dict):
+    """Sale event hook: add a newly written serial to this process's index."""
+    get_serial_index().add(sale_snapshot.get('serial_number'))
+
+
+def check_serials(serial_numbers: List[str]) -> Dict[str, bool]:
+    """Check which of the given serial numbers belong to live sales."""
+    return get_serial_index().check_many(serial_numbers)
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Optional
+from sqlalchemy import delete, func, insert, select
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ROWS = 10000
+DEFAULT_EXPLAIN_INTERVAL_SECONDS = 300
+QUEUE_SIZE = 1000
+WRITE_BATCH_SIZE = 100
+PRUNE_EVERY_WRITES = 20
+MAX_STATEMENT_LENGTH = 10000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Plan capture per dialect; ANALYZE executes the statement again, so it is opt-in
+EXPLAIN_PREFIXES = {
+    'sqlite': ('EXPLAIN QUERY PLAN ', 'EXPLAIN QUERY PLAN '),
+    'postgresql': ('EXPLAIN ', 'EXPLAIN (ANALYZE, BUFFERS) '),
+    'mysql': ('EXPLAIN ', 'EXPLAIN ANALYZE '),
+}
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a statement to its shape: literals, placeholders and IN lists become '?'."""
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _IN_LIST.sub('(?...)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip().lower()
+
+
+def fingerprint(statement: str) -> str:
+    """Return a stable hash of the normalized statement."""
+    return hashlib.sha1(normalize_statement(statement).encode('utf-8')).hexdigest()
+
+
+def redact_value(value):
+    """Keep the type and size of a bound value but not its content."""
+    if value is None or isinstance(value, (bool, int, float, Decimal)):
+        return value if not isinstance(value, Decimal) else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<bytes:{len(value)}>"
+    return f"<{type(value).__name__}:{len(str(value))}>"
+
+
+def redact_parameters(parameters) -> Optional[str]:
+    """Redact bound parameters to JSON; strings and binary values are masked."""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        redacted = {str(key): redact_value(value) for key, value in parameters.items()}
+    elif isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return json.dumps({'executemany': len(parameters)})
+        redacted = [redact_value(value) for value in parameters]
+    else:
+        redacted = redact_value(parameters)
+    return json.dumps(redacted)
+
+
+def explain(conn, statement: str, parameters, analyze: bool = False) -> Optional[str]:
+    """
+    Capture the plan of a statement on the connection that ran it.
+
+    The raw DBAPI cursor is used so the EXPLAIN is not itself instrumented.
+    Only reads are explained, and on PostgreSQL the EXPLAIN runs inside a
+    savepoint so a failure cannot abort the caller's transaction.
+    """
+    if not statement.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+        return None
+    prefixes = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefixes is None:
+        return None
+
+    dbapi_connection = conn.connection.dbapi_connection
+    use_savepoint = conn.dialect.name == 'postgresql' and not getattr(dbapi_connection, 'autocommit', False)
+    cursor = dbapi_connection.cursor()
+    try:
+        if use_savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefixes[1 if analyze else 0] + statement, parameters or ())
+            rows = cursor.fetchall()
+        except Exception:
+            if use_savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            raise
+        finally:
+            if use_savepoint:
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    finally:
+        cursor.close()
+    return '\n'.join(
+        ' | '.join(str(column) for column in row) if len(row) > 1 else str(row[0])
+        for row in rows
+    )
+
+
+class SlowQueryRecorder:
+    """
+    Captures slow statements reported by the metrics hooks.
+
+    The plan is taken synchronously on the slow statement's own connection,
+    at most once per fingerprint per interval. Rows are written by a
+    background thread so requests never wait on the log table, and the table
+    is pruned to the newest ``max_rows`` entries.
+    """
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+        self.max_rows = app.config.get('SLOW_QUERY_LOG_MAX_ROWS', DEFAULT_MAX_ROWS)
+        self.explain_enabled = app.config.get('SLOW_QUERY_EXPLAIN', True)
+        self.explain_analyze = app.config.get('SLOW_QUERY_EXPLAIN_ANALYZE', False)
+        self.explain_interval = app.config.get(
+            'SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', DEFAULT_EXPLAIN_INTERVAL_SECONDS
+        )
+        self.last_explained: Dict[str, float] = {}
+        self.pending = queue.Queue(maxsize=QUEUE_SIZE)
+        self.writer: Optional[threading.Thread] = None
+        self.writer_lock = threading.Lock()
+        self.writes = 0
+
+    def __call__(self, conn, statement, parameters, duration, endpoint):
+        if threading.current_thread() is self.writer:
+            return
+        statement_fingerprint = fingerprint(statement)
+
+        plan = None
+        now = time.monotonic()
+        if self.explain_enabled and now - self.last_explained.get(statement_fingerprint, 0) >= self.explain_interval:
+            self.last_explained[statement_fingerprint] = now
+            try:
+                plan = explain(conn, statement, parameters, self.explain_analyze)
+            except Exception as e:
+                logger.warning(f"Could not capture plan for slow statement: {str(e)}")
+
+        record = {
+            'fingerprint': statement_fingerprint,
+            'normalized_statement': normalize_statement(statement)[:MAX_STATEMENT_LENGTH],
+            'statement': statement[:MAX_STATEMENT_LENGTH],
+            'parameters': redact_parameters(parameters),
+            'duration_ms': round(duration * 1000, 3),
+            'endpoint': endpoint,
+            'explain_plan': plan,
+            'captured_at': datetime.utcnow()
+        }
+        try:
+            self.pending.put_nowait(record)
+        except queue.Full:
+            logger.warning("Slow query log queue is full; dropping capture")
+            return
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self.writer is not None and self.writer.is_alive():
+            return
+        with self.writer_lock:
+            if self.writer is None or not self.writer.is_alive():
+                self.writer = threading.Thread(target=self._write_loop, name='slow-query-log', daemon=True)
+                self.writer.start()
+
+    def _write_loop(self):
+        from models.slow_query_model import SlowQueryLog
+
+        while True:
+            batch = [self.pending.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self.app.app_context():
+                    with self.db.engine.begin() as connection:
+                        connection.execute(insert(SlowQueryLog.__table__), batch)
+                        self.writes += 1
+                        if self.writes % PRUNE_EVERY_WRITES == 1:
+                            self._prune(connection, SlowQueryLog)
+            except Exception as e:
+                logger.error(f"Error writing slow query log: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+
+    def _prune(self, connection, model):
+        newest = connection.execute(select(func.max(model.id))).scalar() or 0
+        if newest > self.max_rows:
+            connection.execute(delete(model.__table__).where(model.id <= newest - self.max_rows))
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until queued captures are written (used by scripts and tests)."""
+        deadline = time.monotonic() + timeout
+        while self.pending.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+recorder: Optional[SlowQueryRecorder] = None
+
+
+def init_app(app, db):
+    """Register the recorder as a slow statement handler of the metrics hooks."""
+    global recorder
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', True):
+        return
+    recorder = SlowQueryRecorder(app, db)
+    metrics.slow_statement_handlers.append(recorder)
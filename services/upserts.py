@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import update
+from extensions import db
+
+
+def increment(model, key: Dict, amounts: Dict):
+    """
+    Add amounts to the counters of the row with the given key, creating it when missing.
+
+    PostgreSQL and SQLite do this atomically with INSERT .. ON CONFLICT on the
+    key's unique constraint; other databases update first and insert when no
+    row matched. The caller commits.
+    """
+    now = datetime.utcnow()
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(model).values(**key, **amounts, updated_at=now)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                **{column: getattr(model, column) + statement.excluded[column] for column in amounts},
+                'updated_at': statement.excluded.updated_at,
+            }
+        ))
+        return
+
+    updated = db.session.execute(
+        update(model)
+        .where(*(getattr(model, column) == value for column, value in key.items()))
+        .values(**{column: getattr(model, column) + value for column, value in amounts.items()}, updated_at=now)
+    ).rowcount
+    if not updated:
+        db.session.add(model(**key, **amounts, updated_at=now))
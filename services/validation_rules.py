@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Hashable
+from typing import Dict, Iterable, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import event, select
+from extensions import db
+from models.bank_model import Bank
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'validation_rules.json')
+DEFAULT_REFRESH_SECONDS = 300
+
+
+def _is_number(value) -> bool:
+    # JSON true and false are bools, which Python also counts as ints
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class CompiledRules:
+    """
+    Validation rules compiled for lookups that never touch the database.
+
+    Bank account rules are matched against the bank names once, giving a
+    bank id to allowed lengths table; formats become precompiled patterns.
+    """
+
+    def __init__(self, rules: Dict, banks: Iterable[Tuple[int, str]]):
+        accounts = rules.get('bank_accounts', {})
+        self.default_lengths = frozenset(accounts.get('default_lengths', ()))
+        self.default_message = accounts.get('default_message') or \
+            f"Account number must be {', '.join(str(n) for n in sorted(self.default_lengths))} digits"
+        bank_rules = [
+            (rule['name_contains'].lower(), frozenset(rule['lengths']), rule.get('label') or rule['name_contains'])
+            for rule in accounts.get('banks', ())
+        ]
+        # bank id -> (allowed lengths, label); the first rule whose name fragment matches wins
+        self.bank_lengths: Dict[int, Tuple[frozenset, str]] = {}
+        for bank_id, name in banks:
+            name = (name or '').lower()
+            for fragment, lengths, label in bank_rules:
+                if fragment in name:
+                    self.bank_lengths[bank_id] = (lengths, label)
+                    break
+
+        self.platforms = tuple(rules.get('collection_platforms', ()))
+        self.platform_set = frozenset(self.platforms)
+
+        sale = rules.get('sale', {})
+        self.required = tuple(sale.get('required', ()))
+        self.formats = [
+            (field, re.compile(rule['pattern']), rule['message'], rule.get('allow_empty', False))
+            for field, rule in sale.get('formats', {}).items()
+        ]
+        self.positive = list(sale.get('positive', {}).items())
+        self.ranges = [
+            (field, rule['min'], rule['max'], rule['message'])
+            for field, rule in sale.get('ranges', {}).items()
+        ]
+        self.unique_in_batch = tuple(sale.get('unique_in_batch', ()))
+
+    def check_bank_account(self, bank_id: Optional[int], number: Optional[str]) -> Optional[str]:
+        """Error message for an account number at the given bank, or None when it is valid."""
+        if not bank_id or number is None:
+            return None
+        if not isinstance(number, str) or not number.isdigit():
+            return "Account number must be a string of digits"
+        length = len(number)
+        lengths, label = self.bank_lengths.get(bank_id, (None, None))
+        if lengths is not None and length not in lengths:
+            return f"{label} account number must be {sorted(lengths) if len(lengths) > 1 else next(iter(lengths))} digits"
+        if length not in self.default_lengths:
+            return self.default_message
+        return None
+
+    def check_platform(self, value: Optional[str]) -> Optional[str]:
+        if value not in self.platform_set:
+            return f"Invalid collection platform. Must be one of {list(self.platforms)}."
+        return None
+
+    def validate_sale(self, data: Dict) -> List[str]:
+        """All the rule violations of one sale payload, in a stable order."""
+        errors = [f'Missing required field: {field}' for field in self.required if field not in data]
+        for field, pattern, message, allow_empty in self.formats:
+            if field not in data:
+                continue
+            value = data[field]
+            if allow_empty and not value:
+                continue
+            if not isinstance(value, str) or not pattern.match(value):
+                errors.append(message)
+        for field, message in self.positive:
+            value = data.get(field)
+            if field in data and (not _is_number(value) or value <= 0):
+                errors.append(message)
+        range_errors = []
+        for field, low, high, message in self.ranges:
+            value = data.get(field)
+            if value is not None and (not _is_number(value) or not low <= value <= high):
+                if message not in range_errors:
+                    range_errors.append(message)
+        errors.extend(range_errors)
+        if 'collection_platform' in data:
+            error = self.check_platform(data['collection_platform'])
+            if error:
+                errors.append(error)
+        error = self.check_bank_account(data.get('bank_id'), data.get('bank_acc_number'))
+        if error:
+            errors.append(error)
+        return errors
+
+    def validate_sales(self, payloads: List[Dict]) -> List[List[str]]:
+        """Validate many sale payloads, also flagging values that must be unique within the batch."""
+        results = [self.validate_sale(payload) for payload in payloads]
+        for field in self.unique_in_batch:
+            first_seen: Dict = {}
+            for position, payload in enumerate(payloads):
+                value = payload.get(field)
+                # Lists and objects are malformed values, reported by the other rules if at all
+                if value in (None, '') or not isinstance(value, Hashable):
+                    continue
+                if value in first_seen:
+                    results[position].append(f"Duplicate {field} in batch (same as item {first_seen[value]})")
+                else:
+                    first_seen[value] = position
+        return results
+
+
+class RuleRegistry:
+    """Compiles the rules file against the bank list and recompiles it when either changes."""
+
+    def __init__(self, path: str, refresh_seconds: float):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.compiled: Optional[CompiledRules] = None
+        self.compiled_at = 0.0
+        self.rules_mtime: Optional[float] = None
+        self.rules: Dict = {}
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def _load_rules(self, mtime: float) -> Dict:
+        if mtime != self.rules_mtime:
+            with open(self.path, encoding='utf-8') as f:
+                self.rules = json.load(f)
+            self.rules_mtime = mtime
+        return self.rules
+
+    def _current(self, mtime: float) -> bool:
+        return (
+            self.compiled is not None and not self.stale and mtime == self.rules_mtime
+            and time.monotonic() - self.compiled_at < self.refresh_seconds
+        )
+
+    def get(self) -> CompiledRules:
+        # A stat per call picks up edits to the rules file at once; bank changes wait for invalidate() or the refresh
+        mtime = os.path.getmtime(self.path)
+        compiled = self.compiled
+        if self._current(mtime):
+            return compiled
+        with self.lock:
+            if not self._current(mtime):
+                rules = self._load_rules(mtime)
+                banks = db.session.execute(select(Bank.id, Bank.name)).all()
+                self.compiled = CompiledRules(rules, banks)
+                self.compiled_at = time.monotonic()
+                self.stale = False
+                logger.debug(f"Compiled validation rules for {len(self.compiled.bank_lengths)} banks")
+            return self.compiled
+
+
+_registries: Dict[str, RuleRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_rules() -> CompiledRules:
+    """The compiled validation rules of the current app."""
+    path = current_app.config.get('VALIDATION_RULES_PATH') or DEFAULT_RULES_PATH
+    key = f"{db.engine.url}|{path}"
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(key, RuleRegistry(
+                path, current_app.config.get('VALIDATION_RULES_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+            ))
+    return registry.get()
+
+
+def invalidate():
+    """Recompile on next use, e.g. after banks were added or renamed."""
+    for registry in _registries.values():
+        registry.stale = True
+
+
+@event.listens_for(Bank, 'after_insert')
+@event.listens_for(Bank, 'after_update')
+@event.listens_for(Bank, 'after_delete')
+def _bank_changed(mapper, connection, target):
+    invalidate()
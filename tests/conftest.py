@@ -0,0 +1,101 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+import pytest
+
+# The app binds its database when imported, so point it at a throwaway file first
+_db_file = os.path.join(tempfile.mkdtemp(prefix='sales_app_tests_'), 'test.db')
+os.environ['DEV_DATABASE_URL'] = os.environ['TEST_DATABASE_URL'] = f"sqlite:///{_db_file}"
+os.environ.setdefault('SLOW_QUERY_LOG_ENABLED', 'false')
+
+from flask_jwt_extended import create_access_token
+from app import app as flask_app
+from extensions import db
+from models.bank_model import Bank, BankBranch
+from models.impact_product_model import ImpactProduct, ProductCategory
+from models.paypoint_model import Paypoint
+from models.sales_executive_model import SalesExecutive
+from models.sales_model import Sale
+from models.user_model import Role, User
+
+SALES_COUNT = 12
+
+
+@pytest.fixture
+def app():
+    flask_app.config.from_object('config.TestConfig')
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['TEST_DATABASE_URL']
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def sales(app):
+    """Sales spread over several managers, executives, products, banks and paypoints."""
+    admin_role = Role(name='admin')
+    manager_role = Role(name='sales_manager')
+    db.session.add_all([admin_role, manager_role])
+    db.session.flush()
+    admin = User(email='admin@example.com', name='Admin', password_hash='x', role_id=admin_role.id)
+    managers = [
+        User(email=f'manager{i}@example.com', name=f'Manager {i}', password_hash='x', role_id=manager_role.id)
+        for i in range(3)
+    ]
+    category = ProductCategory(name='Retail')
+    db.session.add_all([admin, *managers, category])
+    db.session.flush()
+    products = [
+        ImpactProduct(name=name, category_id=category.id, group=group)
+        for name, group in (('EDUCARE', 'investment'), ('FAREWELL', 'risk'))
+    ]
+    executives = [
+        SalesExecutive(name=f'Executive {i}', code=f'EX{i}', manager_id=managers[i % 3].id) for i in range(4)
+    ]
+    banks = [Bank(name=f'Bank {i}', code=f'BK{i}') for i in range(2)]
+    paypoint = Paypoint(name='Head Office')
+    db.session.add_all([*products, *executives, *banks, paypoint])
+    db.session.flush()
+    branches = [BankBranch(name=f'Branch {i}', code=f'BR{i}', bank_id=bank.id) for i, bank in enumerate(banks)]
+    db.session.add_all(branches)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(SALES_COUNT):
+        bank_sale = i % 2 == 0
+        rows.append(Sale(
+            user_id=admin.id,
+            sale_manager_id=managers[i % 3].id,
+            sales_executive_id=executives[i % 4].id,
+            client_name=f'Client {i}',
+            client_phone=f'024{i:07d}',
+            serial_number=f'SN{i:06d}',
+            source_type='bank' if bank_sale else 'paypoint',
+            bank_id=banks[i % 2].id if bank_sale else None,
+            bank_branch_id=branches[i % 2].id if bank_sale else None,
+            paypoint_id=None if bank_sale else paypoint.id,
+            policy_type_id=products[i % 2].id,
+            amount=100.0 + i,
+            geolocation_latitude=5.6 + i / 100,
+            geolocation_longitude=-0.2 - i / 100,
+            created_at=now - timedelta(days=i)
+        ))
+    db.session.add_all(rows)
+    db.session.commit()
+    return [sale.id for sale in rows]
+
+
+@pytest.fixture
+def auth_headers(app, sales):
+    admin = User.query.filter_by(email='admin@example.com').one()
+    token = create_access_token(identity={'id': admin.id, 'email': admin.email, 'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
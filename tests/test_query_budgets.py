@@ -0,0 +1,57 @@
+"""
+Sale endpoints stay within their declared query budgets.
+
+TestConfig enables ENFORCE_QUERY_BUDGETS, so an endpoint that goes over its
+budget raises QueryBudgetExceeded instead of returning.
+"""
+import pytest
+from extensions import db
+from models.sales_model import Sale
+from services.query_budget import count_queries
+
+
+def test_config_enforces_budgets(app):
+    assert app.config['ENFORCE_QUERY_BUDGETS'] is True
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'per_page': 50},
+    {'expand': 'sale_manager,sales_executive,policy_type,bank,bank_branch,paypoint'},
+    {'fields': 'id,client_name,policy_type.name,sales_executive.name,bank.name'},
+])
+def test_sale_list_within_budget(client, auth_headers, sales, params):
+    response = client.get('/api/v1/sales/', query_string=params, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['total'] == len(sales)
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'expand': 'sale_manager,sales_executive,policy_type,bank,bank_branch,paypoint'},
+])
+def test_sale_detail_within_budget(client, auth_headers, sales, params):
+    for sale_id in sales[:2]:
+        response = client.get(f'/api/v1/sales/{sale_id}', query_string=params, headers=auth_headers)
+
+        assert response.status_code == 200
+
+
+def test_sale_list_queries_do_not_grow_with_page_size(client, auth_headers, sales):
+    counts = []
+    for per_page in (2, len(sales)):
+        with count_queries() as counter:
+            response = client.get('/api/v1/sales/', query_string={'per_page': per_page}, headers=auth_headers)
+        assert response.status_code == 200
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1]
+
+
+def test_sale_delete_within_budget(client, auth_headers, sales):
+    for sale_id in sales[:2]:
+        response = client.delete(f'/api/v1/sales/{sale_id}', headers=auth_headers)
+
+        assert response.status_code == 200
+        assert db.session.get(Sale, sale_id).is_deleted
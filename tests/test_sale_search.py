@@ -0,0 +1,28 @@
+"""The sale list filter and the ranked sale search."""
+from datetime import datetime
+from services.search import rebuild_search_index
+
+
+def test_list_filter_matches_phone_substring(client, auth_headers, sales):
+    response = client.get('/api/v1/sales/', query_string={'filter_by': '000003'}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert [sale['client_phone'] for sale in response.get_json()['sales']] == ['0240000003']
+
+
+def test_list_filter_matches_name_substring(client, auth_headers, sales):
+    response = client.get('/api/v1/sales/', query_string={'filter_by': 'LIENT 1', 'per_page': 50}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert {sale['client_name'] for sale in response.get_json()['sales']} == {'Client 1', 'Client 10', 'Client 11'}
+
+
+def test_search_returns_iso_dates(client, auth_headers, sales):
+    rebuild_search_index()
+    response = client.get('/api/v1/sales/search', query_string={'q': 'client'}, headers=auth_headers)
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results
+    for result in results:
+        assert datetime.fromisoformat(result['created_at']).isoformat() == result['created_at']
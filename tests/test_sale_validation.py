@@ -0,0 +1,36 @@
+"""Bulk validation reports malformed sales instead of failing on them."""
+import pytest
+from models.bank_model import Bank
+
+SALE = {
+    'sale_manager_id': 2, 'sales_executive_id': 1, 'client_name': 'Client', 'client_phone': '0241234567',
+    'serial_number': 'SN1', 'policy_type_id': 1, 'amount': 100.0
+}
+
+
+def validate(client, auth_headers, payloads):
+    response = client.post('/api/v1/sales/validate', json={'sales': payloads}, headers=auth_headers)
+    assert response.status_code == 200
+    return {item['index']: item['errors'] for item in response.get_json()['invalid']}
+
+
+@pytest.mark.parametrize('number', [1234567890, '12345-6789', ['1234567890']])
+def test_account_number_must_be_digits(client, auth_headers, number):
+    bank_id = Bank.query.first().id
+    invalid = validate(client, auth_headers, [dict(SALE, bank_id=bank_id, bank_acc_number=number)])
+
+    assert invalid == {0: ['Account number must be a string of digits']}
+
+
+def test_unhashable_values_do_not_break_batch_uniqueness(client, auth_headers):
+    payloads = [dict(SALE, serial_number=['SN1']), dict(SALE, serial_number=['SN1']), SALE, dict(SALE)]
+    invalid = validate(client, auth_headers, payloads)
+
+    assert invalid == {3: ['Duplicate serial_number in batch (same as item 2)']}
+
+
+@pytest.mark.parametrize('field, value', [('amount', True), ('geolocation_latitude', True)])
+def test_booleans_are_not_numbers(client, auth_headers, field, value):
+    invalid = validate(client, auth_headers, [dict(SALE, **{field: value})])
+
+    assert 0 in invalid